@@ -24,6 +24,21 @@ def main():
         action='store_true',  # Флаг (без значения)
         help='Загрузить или обновить исторические данные c биржи минутный график'
     )
+    parser.add_argument(
+        '--ld_update',
+        action='store_true',  # Флаг (без значения)
+        help='Догрузить только новые свечи к сохраненным данным (вместе с --ldata)'
+    )
+    parser.add_argument(
+        '--ld_check',
+        action='store_true',  # Флаг (без значения)
+        help='Проверить данные на пропуски и дубликаты (индекс в DATA_DIR/manifest.json)'
+    )
+    parser.add_argument(
+        '--ld_repair',
+        action='store_true',  # Флаг (без значения)
+        help='Догрузить с биржи только пропущенные участки данных'
+    )
     # Добавляем параметр --debug
     parser.add_argument(
         '--debug',
@@ -37,6 +52,48 @@ def main():
         action='store_true',  # Флаг (без значения)
         help=f'Запустить бэктестер с локальными данными из директории {data_dir}'
     )
+    # Добавляем параметр --ptest
+    parser.add_argument(
+        '--ptest',
+        action='store_true',  # Флаг (без значения)
+        help='Портфельный бэктест: все монеты на общем балансе с лимитом RISK_SETTINGS.MAX_POSITIONS'
+    )
+    # Добавляем параметр --dtest
+    parser.add_argument(
+        '--dtest',
+        action='store_true',  # Флаг (без значения)
+        help='Распределенный бэктест: поставить задачи в очередь, дождаться воркеров и построить сводный отчет'
+    )
+    parser.add_argument(
+        '--local-workers',
+        type=int,
+        default=0,
+        help='Сколько воркеров запустить локальными процессами вместе с --dtest'
+    )
+    # Добавляем параметр --worker
+    parser.add_argument(
+        '--worker',
+        action='store_true',  # Флаг (без значения)
+        help='Запустить воркер распределенного бэктеста (берет задачи из очереди BACKTEST_SETTINGS.QUEUE_PATH)'
+    )
+    # Добавляем параметр --no-cache
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',  # Флаг (без значения)
+        help='Пересчитать все тесты, не используя кеш результатов'
+    )
+    # Добавляем параметр --resume
+    parser.add_argument(
+        '--resume',
+        action='store_true',  # Флаг (без значения)
+        help='Продолжить прерванный бэктест: пропустить завершенные задачи и восстановить остальные из чекпоинтов'
+    )
+    # Добавляем параметр --incremental
+    parser.add_argument(
+        '--incremental',
+        action='store_true',  # Флаг (без значения)
+        help='Бэктест только по новым свечам от состояния прошлого запуска (при изменении настроек или данных — полный прогон)'
+    )
     
     args = parser.parse_args()
 
@@ -50,12 +107,19 @@ def main():
     if args.ldata:
         logger.info("Загрузка и обновление исторических данных...")
         from src.data_fetcher.get_data_from_exchange import run_data_update_pipeline
-        if args.ld_min:
+        if args.ld_update:
+            run_data_update_pipeline(incremental=True)
+        elif args.ld_min:
             run_data_update_pipeline(loading_min=True)
         else:
             run_data_update_pipeline()
             
         logger.info("Загрузка исторических данных завершена.")
+
+    # Проверка данных на пропуски и дубликаты
+    if args.ld_check or args.ld_repair:
+        from src.data_fetcher.get_data_from_exchange import run_data_validation
+        run_data_validation(repair=args.ld_repair)
         
     
     # Отладка стратегии 
@@ -71,10 +135,30 @@ def main():
         max_workers = config.get_setting("BACKTEST_SETTINGS", "MAX_WORKERS")
         
         from src.backtester.backtester import TestManager
-        test_manager = TestManager()
+        test_manager = TestManager(resume=args.resume, incremental=args.incremental, use_cache=not args.no_cache)
         test_manager.run_parallel_backtest(max_workers=max_workers)
         
         logger.info("Бэктестер завершил работу.")
+
+    # распределенный бэктест: координатор
+    if args.dtest:
+        logger.info("Запуск распределенного бэктеста...")
+        from src.backtester.backtester import TestManager
+        from src.backtester.distributed.coordinator import Coordinator
+        timeout = config.get_section("BACKTEST_SETTINGS").get("DTEST_TIMEOUT_SECONDS") or None
+        Coordinator(TestManager()).run(local_workers=args.local_workers, timeout=timeout)
+
+    # воркер распределенного бэктеста
+    if args.worker:
+        from src.backtester.distributed.coordinator import run_worker
+        run_worker()
+
+    # портфельный бэктест всех монет на общем балансе
+    if args.ptest:
+        logger.info("Запуск портфельного бэктеста...")
+        from src.backtester.backtester import TestManager
+        TestManager().run_portfolio_backtest()
+        logger.info("Портфельный бэктест завершен.")
     
 
 # Точка входа
@@ -12,4 +12,7 @@ def Connector_Bybit():
         testnet=cfg["exchange"]["testnet"],
         demo=cfg["exchange"].get("demo", False)
         )
+    # локальная поддельная биржа (src/data_fetcher/fake_exchange.py) вместо api.bybit.com
+    if cfg["exchange"].get("api_url"):
+        session.endpoint = cfg["exchange"]["api_url"].rstrip("/")
     return session
\ No newline at end of file
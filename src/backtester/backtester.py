@@ -2,18 +2,24 @@
 # Симуляция выполнения сделок. 
 # Расчет метрик производительности (прибыльность, просадка, Sharpe Ratio).
 import concurrent.futures
+import json
+from contextlib import nullcontext
 from threading import Lock
 
+import pandas as pd
+
 
 # Логирование
 # ====================================================
-from src.utils.logger import get_logger
+from src.utils.logger import get_logger, LoggingTimer, QuietEvents, log_manager
 logger = get_logger(__name__)
+from src.utils.logger_time import Instrumentation, NULL_INSTRUMENTATION
+from src.utils.memory import MemoryTracker, MemoryBudget, MB
 from src.config.config import config
 
 # Подключение модуля с загрузчиком данных
 from src.data_fetcher.data_fetcher import DataFetcher
-from src.data_fetcher.utils import select_range_backtest
+from src.data_fetcher.validation import gaps_overlapping
 
 from src.backtester.reports.collector import SummaryCollector
 from src.backtester.reports.single_test.test_report_generator import TestReportGenerator
@@ -21,7 +27,11 @@ from src.backtester.reports.summary.summary_report_generator import SummaryRepor
 from src.backtester.reports.paths import (
     build_test_report_path,
     build_summary_report_path,
+    build_checkpoint_dir,
 )
+from src.backtester.engine.checkpoint import CheckpointManager, save_task_result, load_task_result
+from src.backtester.fingerprint import config_fingerprint
+from src.backtester.result_cache import ResultCache, build_cache_key
 
 
     
@@ -33,7 +43,12 @@ class TestManager:
     Управление тестами: запуск, получение списка позиций, подсчет статистики.
     Проведение паралельное тестирования 
     """
-    def __init__(self):
+    def __init__(self, resume: bool = False, incremental: bool = False, use_cache: bool = True):
+        # resume: продолжить прерванный запуск (пропуск завершенных задач, восстановление из чекпоинтов)
+        # incremental: продолжить прошлый завершенный запуск только на новых свечах
+        # use_cache: брать результат из кеша, если данные, настройки и движок не менялись
+        self.resume = resume
+        self.incremental = incremental
         # Параметры биржи
         self.exchange = config.get_section("EXCHANGE_SETTINGS")
         # Получение массива монет из конфигурации
@@ -41,75 +56,127 @@ class TestManager:
         # Параметры бэктеста
         self.settings_test = config.get_section("BACKTEST_SETTINGS")
         self.settings_strategy = config.get_section("STRATEGY_SETTINGS")
+        # кеш результатов (RESULT_CACHE: false — отключить)
+        self.result_cache = None
+        if use_cache and self.settings_test.get("RESULT_CACHE", True):
+            self.result_cache = ResultCache(self.settings_test.get("RESULT_CACHE_DIR", "CACHE/results/"))
         
         self.collector = SummaryCollector()
         self.collector_lock = Lock()
+        # бюджет памяти текущего запуска (MEMORY_BUDGET_MB), уточняется по пикам задач
+        self.memory_budget = None
         logger.info(f"Загружено {len(self.coins_list)} монет из конфигурации.")
 
     # ====================================================
-    # ? Выполнение одного теста бэктеста
-    # ? Подготовка данных, инициализация компонентов и запуск бэктеста
+    # ? Ключ запуска: чекпоинты и результаты другого запуска не используются
     # ====================================================
-    def _execute_single_backtest(self, coin, timeframe): # Dict[str, Any]:
-        # * Выполняет один бэктест для конкретной монеты и таймфрейма.
-        # * Возвращает все позиции которые были за указанный период
-        
-        symbol = f"{coin['SYMBOL']}/USDT"
-        coin = coin.copy()  # Создаем копию чтобы избежать изменений оригинала
-        coin["TIMEFRAME"] = timeframe
-        
-        try:
-            logger.info(f"[{symbol}, {timeframe}] >>> Starting backtest execution...")
-
-            # ! -------- 1. Загрузка данных --------
-            fetcher = DataFetcher(
-                coin=coin, 
-                exchange=self.exchange, 
-                directory=self.settings_test.get("DATA_DIR", "")
-                )
+    def _build_run_key(self, coin, with_end_date: bool = True) -> str:
+        # без конечной даты ключ годится для инкрементального продолжения на новых свечах
+        payload = {
+            "coin": coin,
+            "strategy": self.settings_strategy,
+            "start_date": self.settings_test.get("START_DATE"),
+            "full_datafile": self.settings_test.get("FULL_DATAFILE"),
+        }
+        if with_end_date:
+            payload["end_date"] = self.settings_test.get("END_DATE")
+        return config_fingerprint(payload)
 
-            data_1m  = fetcher.load_from_csv(file_type="csv")
-            data_htf  = fetcher.load_from_csv(file_type="csv", timeframe=timeframe)
-            if data_1m is None or data_htf is None:
-                raise RuntimeError("Данные не загружены")
-
-            # ! -------- 2. Выбор периода --------
-            data_htf = select_range_backtest(
-                data_df=data_htf,  
-                full_datafile=self.settings_test.get("FULL_DATAFILE", ""),
-                start_date=self.settings_test.get("START_DATE"),
-                end_date=self.settings_test.get("END_DATE"),
-                offset_bars=self.settings_strategy.get("MINIMUM_BARS_FOR_STRATEGY_CALCULATION", 0)
+    # ====================================================
+    # ? Добавление результата теста в сводку (THREAD SAFE)
+    # ====================================================
+    def _collect(self, coin, timeframe, result, report_path, cached: bool = False, stats: dict = None):
+        with self.collector_lock:
+            self.collector.add(
+                symbol=coin["SYMBOL"],
+                coin=coin,
+                timeframe=timeframe,
+                test_id=result["test_id"],
+                metrics=result["metrics"],
+                portfolio=result["portfolio"],
+                report_path=str(report_path),
+                cached=cached,
+                stats=stats,
             )
-            data_1m = select_range_backtest(
-                data_df=data_1m,  
-                full_datafile=self.settings_test.get("FULL_DATAFILE", ""),  
-                start_date=self.settings_test.get("START_DATE"), 
-                end_date=self.settings_test.get("END_DATE"),
-                offset_bars=0
+
+    # ====================================================
+    # ? Загрузка данных монеты и выбор периода бэктеста
+    # ====================================================
+    def _fetcher(self, coin):
+        return DataFetcher(
+            coin=coin, 
+            exchange=self.exchange, 
+            directory=self.settings_test.get("DATA_DIR", "")
             )
 
-            if data_htf is None or len(data_htf) == 0:
-                    raise RuntimeError("Недостаточно данных")
-
-            # !-------- 3. Инициализация --------
-            # импортируем здесь чтобы избежать циклических импортов
-            from src.backtester.runner import run_backtest
-            from src.backtester.engine.execution_engine import ExecutionEngine
-            from src.logical.strategy.zigzag_fibo.zigzag_and_fibo import ZigZagAndFibo
-            from src.trading_engine.managers.position_manager import PositionManager
-            from src.logical.hedging.als.als_engine import ALSEngine
-
-            # инициализация стратегии
-            strategy = ZigZagAndFibo(coin)
-            # инициализация менеджера позиций
-            position_manager = PositionManager()
-            # инициализация движка исполнения
-            engine = ExecutionEngine(position_manager)
-            # инициализация модуля хеджирования (если нужен)
-            
-            
-            # ! -------- 4. Backtest --------
+    def _load_task_data(self, coin, timeframe):
+        fetcher = self._fetcher(coin)
+        data_format = self.settings_test.get("DATA_FORMAT", "csv")
+
+        period = {
+            "full_datafile": self.settings_test.get("FULL_DATAFILE", ""),
+            "start_date": self.settings_test.get("START_DATE"),
+            "end_date": self.settings_test.get("END_DATE"),
+        }
+        # загрузка сразу с выбором периода: mmap-хранилище читает с диска только нужный диапазон
+        data_1m = fetcher.load_range(file_type=data_format, offset_bars=0, **period)
+        data_htf = fetcher.load_range(
+            file_type=data_format,
+            timeframe=timeframe,
+            offset_bars=self.settings_strategy.get("MINIMUM_BARS_FOR_STRATEGY_CALCULATION", 0),
+            resample=self.settings_test.get("HTF_SOURCE", "download") == "resample",
+            **period,
+        )
+        if data_1m is None or data_htf is None:
+            raise RuntimeError("Данные не загружены")
+
+        if data_htf is None or len(data_htf) == 0:
+            raise RuntimeError("Недостаточно данных")
+
+        return data_htf, data_1m
+
+    # ====================================================
+    # ? Ключ кеша результата: файлы данных + период + настройки + версия движка
+    # ====================================================
+    def _build_cache_key(self, coin, timeframe):
+        fetcher = self._fetcher(coin)
+        data_format = self.settings_test.get("DATA_FORMAT", "csv")
+        data_files = {"1": fetcher._get_export_path(timeframe="1", file_extension=data_format)}
+        if self.settings_test.get("HTF_SOURCE", "download") == "resample":
+            # свечи HTF строятся из минутных: от них и зависит результат
+            data_files[f"{timeframe}:resample"] = data_files["1"]
+        else:
+            data_files[timeframe] = fetcher._get_export_path(timeframe=timeframe, file_extension=data_format)
+        return build_cache_key(data_files, coin, self.settings_test, self.settings_strategy)
+
+    # ====================================================
+    # ? Расчет одной задачи: данные, компоненты, бэктест
+    # ? (используется и локальным запуском, и распределенными воркерами)
+    # ====================================================
+    def _run_task(self, coin, timeframe, checkpoint=None, instrumentation=None, memory=None):
+        # ! -------- 1-2. Загрузка данных и выбор периода --------
+        with (instrumentation or NULL_INSTRUMENTATION).stage("load_data"):
+            data_htf, data_1m = self._load_task_data(coin, timeframe)
+        if memory is not None:
+            memory.measure_frames(data_htf, data_1m)
+
+        # !-------- 3. Инициализация --------
+        # импортируем здесь чтобы избежать циклических импортов
+        from src.backtester.runner import run_backtest
+        from src.backtester.engine.execution_engine import ExecutionEngine
+        from src.logical.strategy.zigzag_fibo.zigzag_and_fibo import ZigZagAndFibo
+        from src.trading_engine.managers.position_manager import PositionManager
+
+        # инициализация стратегии
+        strategy = ZigZagAndFibo(coin)
+        # инициализация менеджера позиций
+        position_manager = PositionManager()
+        # инициализация движка исполнения
+        engine = ExecutionEngine(position_manager, mode=self.settings_test.get("EXECUTION_MODE", "bar"))
+
+        # ! -------- 4. Backtest --------
+        # тихий режим (LOGGING_SETTINGS.BACKTEST_QUIET): события считаются, а не пишутся построчно
+        with QuietEvents(enabled=log_manager.backtest_quiet) as events:
             result = run_backtest(
                     data = data_htf,  #  исторические данные для бэктеста
                     data_1m = data_1m, #  исторические данные 1м для бэктеста
@@ -117,19 +184,94 @@ class TestManager:
                     strategy = strategy, # стратегия
                     position_manager = position_manager, # менеджер позиций
                     engine = engine, # движок исполнения
-                    logger = logger # логгер
+                    logger = logger, # логгер
+                    checkpoint = checkpoint, # чекпоинты состояния
+                    instrumentation = instrumentation # замеры по этапам
                 )
-            
-            # ! -------- 5. Test report --------
-            test_report_path = build_test_report_path(
-                coin["SYMBOL"], timeframe
-            )
+        self._report_events(f"{coin['SYMBOL']}, {timeframe}", events, instrumentation)
+        result["data_gaps"] = self._positions_in_gaps(coin, timeframe, result["positions"], data_1m)
+        if memory is not None:
+            memory.measure_positions(result["positions"])
+        return result
+
+    # ====================================================
+    # ? Позиции, окно исполнения которых пересекает известный пропуск минутных данных
+    # ? (манифест DATA_DIR/manifest.json, python app.py --ld_check): TP / SL в пропуске могли не сработать
+    # ====================================================
+    def _positions_in_gaps(self, coin, timeframe, positions: dict, data_1m) -> list:
+        fetcher = self._fetcher(coin)
+        gaps = fetcher.known_gaps(coin.get("MIN_TIMEFRAME") or "1")
+        if not gaps or data_1m is None or len(data_1m) == 0:
+            return []
+
+        def to_ms(value):
+            return pd.Timestamp(value).value // 1_000_000
+
+        data_end = to_ms(data_1m.index[-1])
+        affected = []
+        for pos in positions.values():
+            created = [o.created_bar for o in pos.orders if o.created_bar is not None]
+            start = pos.bar_opened if not created else min(created)
+            if start is None:
+                continue
+            end = to_ms(pos.bar_closed) if pos.bar_closed is not None else data_end
+            overlap = gaps_overlapping(gaps, to_ms(start), end)
+            if overlap:
+                affected.append({"position": str(pos.id), "gaps": overlap})
+                logger.warning(
+                    f"[{coin['SYMBOL']}, {timeframe}] ⚠️ Позиция {pos.id}: окно исполнения пересекает пропуск минутных данных "
+                    f"{pd.Timestamp(overlap[0][0], unit='ms')} — {pd.Timestamp(overlap[0][1], unit='ms')} ({overlap[0][2]} свечей)"
+                )
+        return affected
+
+    # ====================================================
+    # ? Итог событий тихого режима: одна строка вместо строки на событие
+    # ====================================================
+    @staticmethod
+    def _report_events(name: str, events: QuietEvents, instrumentation=None):
+        if not events.counters:
+            return
+        logger.info("[%s] События бэктеста: %s", name, events.summary())
+        if instrumentation is not None:
+            for event, count in events.counters.items():
+                instrumentation.count(f"events.{event}", count)
+
+    # ====================================================
+    # ? Замеры по этапам (BACKTEST_SETTINGS.INSTRUMENTATION)
+    # ====================================================
+    def _instrumentation(self, coin, timeframe):
+        if not self.settings_test.get("INSTRUMENTATION", False):
+            return None
+        return Instrumentation(f"{coin['SYMBOL']}_TF-{timeframe}")
+
+    # ====================================================
+    # ? Учет памяти задачи (BACKTEST_SETTINGS.MEMORY_TRACKING)
+    # ====================================================
+    def _memory_tracker(self, coin, timeframe):
+        if not self.settings_test.get("MEMORY_TRACKING", False):
+            return None
+        return MemoryTracker(
+            f"{coin['SYMBOL']}_TF-{timeframe}",
+            trace=self.settings_test.get("MEMORY_TRACEMALLOC", True),
+            top=self.settings_test.get("MEMORY_TOP_ALLOCATIONS", 10),
+        )
+
+    # ====================================================
+    # ? HTML-отчет одного теста (+ JSON с замерами рядом с ним)
+    # ====================================================
+    def _render_test_report(self, coin, timeframe, result, instrumentation=None):
+        test_report_path = build_test_report_path(
+            coin["SYMBOL"], timeframe
+        )
 
+        timer = nullcontext()
+        if instrumentation is not None:
+            timer = LoggingTimer(f"[{coin['SYMBOL']}, {timeframe}] Отчет", instrumentation=instrumentation, stage="report")
+        with timer:
             TestReportGenerator(
                 template_dir=self.settings_test.get("TEMPLATE_DIRECTORY", ""),
                 settings_test=self.settings_test,
             ).generate(
-                
                 symbol=coin["SYMBOL"],
                 timeframe=timeframe,
                 coin=coin,
@@ -138,19 +280,109 @@ class TestManager:
                 portfolio=result["portfolio"],
                 positions=result["positions"],
                 output_path=test_report_path,
+                memory=result.get("memory"),
             )
 
-            # ! -------- 6. Collect summary (THREAD SAFE) --------
-            with self.collector_lock:
-                self.collector.add(
-                    symbol=coin["SYMBOL"],
-                    coin=coin,
-                    timeframe=timeframe,
-                    test_id=result["test_id"],
-                    metrics=result["metrics"],
-                    portfolio=result["portfolio"],
-                    report_path=str(test_report_path),
+        if instrumentation is not None:
+            instrumentation.save(test_report_path.with_suffix(".stats.json"))
+        return test_report_path
+
+    # ====================================================
+    # ? Сводный отчет по собранным результатам
+    # ====================================================
+    def _generate_summary(self):
+        # замеры всех задач суммируются в общий итог
+        reports = [
+            entry["stats"]
+            for entries in self.collector.data.values()
+            for entry in entries
+            if entry.get("stats")
+        ]
+        stats = Instrumentation.merge(reports) if reports else None
+
+        summary_path = build_summary_report_path()
+        SummaryReportGenerator(
+            template_dir=self.settings_test.get("TEMPLATE_DIRECTORY", ""),
+            settings_test=self.settings_test,
+        ).generate(
+            summary_data=self.collector.data,
+            output_path=summary_path,
+            stats=stats,
+        )
+        if stats is not None:
+            summary_path.with_suffix(".stats.json").write_text(
+                json.dumps({"total": stats, "tasks": reports}, ensure_ascii=False, indent=2), encoding="utf-8"
+            )
+
+    # ====================================================
+    # ? Выполнение одного теста бэктеста
+    # ? Подготовка данных, инициализация компонентов и запуск бэктеста
+    # ====================================================
+    def _execute_single_backtest(self, coin, timeframe): # Dict[str, Any]:
+        # * Выполняет один бэктест для конкретной монеты и таймфрейма.
+        # * Возвращает все позиции которые были за указанный период
+        
+        symbol = f"{coin['SYMBOL']}/USDT"
+        coin = coin.copy()  # Создаем копию чтобы избежать изменений оригинала
+        coin["TIMEFRAME"] = timeframe
+        
+        try:
+            logger.info(f"[{symbol}, {timeframe}] >>> Starting backtest execution...")
+
+            # ! -------- 0. Возобновление прерванного запуска --------
+            task_dir = build_checkpoint_dir(
+                self.settings_test.get("CHECKPOINT_DIR", "CHECKPOINTS/"), coin["SYMBOL"], timeframe
+            )
+            run_key = self._build_run_key(coin)
+            checkpoint = CheckpointManager(
+                task_dir,
+                run_key=run_key,
+                every_bars=self.settings_test.get("CHECKPOINT_EVERY_BARS", 500),
+                max_overhead=self.settings_test.get("CHECKPOINT_MAX_OVERHEAD", 0.02),
+                base_key=self._build_run_key(coin, with_end_date=False),
+                incremental=self.incremental,
+            )
+            if self.resume:
+                done = load_task_result(task_dir, run_key)
+                if done is not None:
+                    logger.info(f"[{symbol}, {timeframe}] ⏭ Задача уже завершена в прошлом запуске, пропуск.")
+                    self._collect(coin, timeframe, done, build_test_report_path(coin["SYMBOL"], timeframe))
+                    return
+            else:
+                checkpoint.clear()
+
+            # ! -------- 0.1. Кеш результатов: отчет без пересчета --------
+            cache_key = self._build_cache_key(coin, timeframe) if self.result_cache else None
+            cached = self.result_cache.get(cache_key) if cache_key else None
+            if cached is not None:
+                logger.info(f"[{symbol}, {timeframe}] ⚡ Данные и настройки не менялись, результат из кеша.")
+                test_report_path = self._render_test_report(coin, timeframe, cached)
+                self._collect(coin, timeframe, cached, test_report_path, cached=True)
+                return
+
+            # ! -------- 1-4. Данные, инициализация, бэктест --------
+            instrumentation = self._instrumentation(coin, timeframe)
+            memory = self._memory_tracker(coin, timeframe)
+            with memory or nullcontext():
+                result = self._run_task(
+                    coin, timeframe, checkpoint=checkpoint, instrumentation=instrumentation, memory=memory
                 )
+            if memory is not None:
+                result["memory"] = memory.report()
+                self._check_memory_budget(symbol, timeframe, result["memory"])
+            if self.result_cache:
+                self.result_cache.put(cache_key, result)
+
+            # ! -------- 5. Test report --------
+            test_report_path = self._render_test_report(coin, timeframe, result, instrumentation)
+
+            # ! -------- 6. Collect summary (THREAD SAFE) --------
+            stats = instrumentation.report() if instrumentation is not None else None
+            self._collect(coin, timeframe, result, test_report_path, stats=stats)
+
+            # ! -------- 7. Задача завершена: результат вместо чекпоинта --------
+            save_task_result(task_dir, run_key, result)
+            checkpoint.clear()
             
             logger.warning(f"[{symbol}, {timeframe}] ✅ Обработка завершена.")
         
@@ -174,27 +406,122 @@ class TestManager:
         # Словарь для структурирования результатов: {"BTC": {"1h": Test_obj, "4h": Test_obj}, ...}
 
         # ! Запуск параллельного выполнения
+        if max_workers > 1 and self.settings_test.get("MEMORY_TRACKING", False) \
+                and self.settings_test.get("MEMORY_TRACEMALLOC", True):
+            # tracemalloc общий для процесса: пики задач в соседних потоках смешались бы
+            logger.warning("🧮 MEMORY_TRACEMALLOC включен — задачи выполняются последовательно (MAX_WORKERS=1)")
+            max_workers = 1
+        budget_mb = self.settings_test.get("MEMORY_BUDGET_MB", 0)
         with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            if budget_mb:
+                self.memory_budget = MemoryBudget(int(budget_mb * MB))
+                try:
+                    self._run_with_memory_budget(executor, tasks, max_workers, self.memory_budget)
+                finally:
+                    self.memory_budget = None
+            else:
+                futures = [
+                    executor.submit(self._execute_single_backtest, coin, tf)
+                    for coin, tf in tasks
+                ]
 
-            futures = [
-                executor.submit(self._execute_single_backtest, coin, tf)
-                for coin, tf in tasks
-            ]
-            
-            # запускаем задачи строго в том порядке как идут в tasks
-            for future in concurrent.futures.as_completed(futures):
-                future.result()  # ошибки уже залогированы
+                # запускаем задачи строго в том порядке как идут в tasks
+                for future in concurrent.futures.as_completed(futures):
+                    future.result()  # ошибки уже залогированы
 
         # ! -------- Summary report --------
-        SummaryReportGenerator(
-            template_dir=self.settings_test.get("TEMPLATE_DIRECTORY", ""),
-            settings_test=self.settings_test,
-        ).generate(
-            summary_data=self.collector.data,
-            output_path=build_summary_report_path(),
-        )
+        self._generate_summary()
 
         logger.info("============================================================================")
         logger.info("📈 Все бэктесты завершены!")
         logger.info("============================================================================")
 
+    # ====================================================
+    # ? Запуск задач с бюджетом памяти: задача ждет, пока хватит свободной памяти
+    # ====================================================
+    def _run_with_memory_budget(self, executor, tasks, max_workers, budget):
+        pending = list(tasks)
+        running = set()
+        while pending or running:
+            while pending and len(running) < max_workers \
+                    and budget.can_start(len(running), f"{pending[0][0]['SYMBOL']}_TF-{pending[0][1]}"):
+                coin, tf = pending.pop(0)
+                running.add(executor.submit(self._execute_single_backtest, coin, tf))
+            if pending and not running:
+                # ничего не выполняется, а памяти все равно мало — запускаем по одной, чтобы не зависнуть
+                coin, tf = pending.pop(0)
+                logger.warning(f"[{coin['SYMBOL']}, {tf}] Свободной памяти меньше бюджета задачи, запуск без параллельных задач")
+                running.add(executor.submit(self._execute_single_backtest, coin, tf))
+            done, running = concurrent.futures.wait(running, timeout=1.0, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                future.result()  # ошибки уже залогированы
+        if budget.deferred:
+            logger.info(f"🧮 Из-за бюджета памяти откладывался запуск задач: {budget.deferred}")
+        if budget.overruns:
+            logger.warning(
+                f"🧮 Пик памяти превысил бюджет у задач: {budget.overruns}, "
+                f"бюджет поднят до {budget.task_bytes / MB:.1f} MB"
+            )
+
+    def _check_memory_budget(self, symbol, timeframe, memory):
+        budget_mb = self.settings_test.get("MEMORY_BUDGET_MB", 0)
+        used_mb = memory.get("traced_peak_mb")
+        if used_mb is None and memory.get("rss_peak_mb") and memory.get("rss_start_mb"):
+            used_mb = round(memory["rss_peak_mb"] - memory["rss_start_mb"], 1)
+        if not (budget_mb and used_mb and used_mb > budget_mb):
+            return
+        # превышение попадает в отчет теста, а пик — в бюджет следующих задач
+        memory["budget_overrun_mb"] = round(used_mb - budget_mb, 1)
+        logger.warning(f"[{symbol}, {timeframe}] Пик памяти задачи {used_mb} MB превышает бюджет {budget_mb} MB")
+        budget = self.memory_budget
+        if budget is not None and budget.observe(int(used_mb * MB)):
+            logger.info(f"[{symbol}, {timeframe}] 🧮 Бюджет памяти задачи поднят до {used_mb} MB")
+
+    # ====================================================
+    # ? Портфельный бэктест: все монеты на общем балансе
+    # ====================================================
+    def run_portfolio_backtest(self):
+        """
+        Бэктест всех монет из конфигурации на одном депозите для каждого таймфрейма.
+        Лимит одновременно открытых позиций — RISK_SETTINGS.MAX_POSITIONS.
+        Депозит — BACKTEST_SETTINGS.PORTFOLIO_START_DEPOSIT_USDT (по умолчанию сумма депозитов монет).
+        """
+        from decimal import Decimal
+        from src.backtester.runner import run_portfolio_backtest
+
+        max_positions = config.get_section("RISK_SETTINGS").get("MAX_POSITIONS", len(self.coins_list))
+        start_deposit = self.settings_test.get("PORTFOLIO_START_DEPOSIT_USDT") or sum(
+            Decimal(str(coin["START_DEPOSIT_USDT"])) for coin in self.coins_list
+        )
+        portfolio_coin = {"SYMBOL": "PORTFOLIO", "START_DEPOSIT_USDT": start_deposit, "MAX_POSITIONS": max_positions}
+
+        for timeframe in self.settings_test.get("TIMEFRAME_LIST", []):
+            try:
+                logger.info(f"[PORTFOLIO, {timeframe}] >>> Starting portfolio backtest ({len(self.coins_list)} монет)...")
+
+                tasks = []
+                for coin in self.coins_list:
+                    data_htf, data_1m = self._load_task_data(coin, timeframe)
+                    tasks.append((coin, data_htf, data_1m))
+
+                with QuietEvents(enabled=log_manager.backtest_quiet) as events:
+                    result = run_portfolio_backtest(
+                        tasks=tasks,
+                        timeframe=timeframe,
+                        start_deposit=Decimal(str(start_deposit)),
+                        max_positions=max_positions,
+                        logger=logger,
+                        execution_mode=self.settings_test.get("EXECUTION_MODE", "bar"),
+                    )
+                self._report_events(f"portfolio, {timeframe}", events)
+
+                coin = dict(portfolio_coin, TIMEFRAME=timeframe)
+                test_report_path = self._render_test_report(coin, timeframe, result)
+                self._collect(coin, timeframe, result, test_report_path)
+
+                logger.warning(f"[PORTFOLIO, {timeframe}] ✅ Обработка завершена.")
+
+            except Exception as e:
+                logger.exception(f"[PORTFOLIO, {timeframe}] ❌ FAILED: {e}")
+
+        self._generate_summary()
@@ -0,0 +1,169 @@
+# координатор распределенного бэктеста
+
+# src/backtester/distributed/coordinator.py
+import multiprocessing
+import time
+from pathlib import Path
+
+from src.backtester.distributed.job_queue import DONE, FAILED, PENDING, RUNNING, create_queue
+from src.backtester.engine.checkpoint import load_task_result
+
+# Логирование
+# ====================================================
+from src.utils.logger import get_logger
+logger = get_logger(__name__)
+
+
+# ------------------------
+# Очередь и каталог результатов из BACKTEST_SETTINGS
+# ------------------------
+def queue_from_settings(settings_test: dict):
+    return create_queue(
+        settings_test.get("QUEUE_BACKEND", "sqlite"),
+        settings_test.get("QUEUE_PATH", "QUEUE/jobs.sqlite"),
+    )
+
+
+def results_dir_from_settings(settings_test: dict) -> Path:
+    return Path(settings_test.get("RESULTS_DIR", "RESULTS/"))
+
+
+# ------------------------
+# Точка входа воркера (app.py --worker и локальные процессы)
+# ------------------------
+def run_worker(exit_when_idle: bool = False):
+    from src.config.config import config
+    from src.backtester.distributed.worker import Worker
+
+    settings_test = config.get_section("BACKTEST_SETTINGS")
+    Worker(
+        queue_from_settings(settings_test),
+        results_dir_from_settings(settings_test),
+        lease_seconds=settings_test.get("WORKER_LEASE_SECONDS", 60),
+        heartbeat_seconds=settings_test.get("WORKER_HEARTBEAT_SECONDS", 10),
+        exit_when_idle=exit_when_idle,
+    ).run()
+
+
+# -------------------------------------------------
+# Класс Coordinator
+# -------------------------------------------------
+class Coordinator:
+    """
+    Ставит задачи TestManager в очередь, ждет их выполнения воркерами
+    и строит отчеты по результатам из общего каталога.
+    Задача идентифицируется монетой, таймфреймом и run_key, поэтому
+    повторный запуск с теми же настройками не пересчитывает готовые задачи,
+    а задачи, завершившиеся ошибкой, ставит заново.
+    Локальные воркеры (run(local_workers=N)) завершаются, когда свободных задач нет;
+    если все они завершились (или убиты), а задачи еще можно взять (pending или истекшая аренда
+    упавшего воркера), wait запускает их заново — иначе ожидание длилось бы бесконечно.
+    """
+
+    def __init__(self, manager, queue=None, results_dir=None, poll_seconds: float = 5):
+        self.manager = manager
+        self.queue = queue or queue_from_settings(manager.settings_test)
+        self.results_dir = Path(results_dir or results_dir_from_settings(manager.settings_test))
+        self.poll_seconds = poll_seconds
+        self.processes = []  # локальные воркеры
+
+    # ------------------------
+    # Постановка задач в очередь
+    # ------------------------
+    def submit(self) -> list:
+        job_ids = []
+        for coin in self.manager.coins_list:
+            for timeframe in self.manager.settings_test.get("TIMEFRAME_LIST", []):
+                task_coin = dict(coin, TIMEFRAME=timeframe)
+                run_key = self.manager._build_run_key(task_coin)
+                job_id = f"{coin['SYMBOL']}_TF-{timeframe}_{run_key}"
+                self.queue.put(job_id, {"coin": coin, "timeframe": timeframe, "run_key": run_key})
+                job_ids.append(job_id)
+        logger.info(f"📤 В очереди задач бэктеста: {len(job_ids)}")
+        return job_ids
+
+    # ------------------------
+    # Ожидание завершения задач
+    # ------------------------
+    def wait(self, job_ids: list, timeout: float = None) -> list:
+        started = time.monotonic()
+        wanted = set(job_ids)
+        while True:
+            jobs = [job for job in self.queue.jobs() if job["id"] in wanted]
+            finished = [job for job in jobs if job["status"] in (DONE, FAILED)]
+            if len(finished) == len(wanted):
+                return jobs
+            if timeout is not None and time.monotonic() - started > timeout:
+                raise TimeoutError(f"Не завершено задач: {len(wanted) - len(finished)}")
+            logger.info(f"⏳ Выполнено задач {len(finished)} из {len(wanted)}")
+            self._revive_local_workers(jobs)
+            time.sleep(self.poll_seconds)
+
+    # ------------------------
+    # Локальные воркеры
+    # ------------------------
+    @staticmethod
+    def _start_workers(count: int) -> list:
+        processes = [multiprocessing.Process(target=run_worker, kwargs={"exit_when_idle": True}) for _ in range(count)]
+        for process in processes:
+            process.start()
+        return processes
+
+    def _revive_local_workers(self, jobs: list):
+        if not self.processes or any(process.is_alive() for process in self.processes):
+            return
+        # задача упавшего воркера свободна только после истечения его аренды
+        now = time.time()
+        claimable = [job for job in jobs if job["status"] == PENDING
+                     or (job["status"] == RUNNING and (job["lease_until"] or 0) < now)]
+        if not claimable:
+            return
+        logger.warning(f"⚠️ Локальные воркеры завершились, свободных задач: {len(claimable)} — запуск заново")
+        for process in self.processes:
+            process.join()
+        self.processes = self._start_workers(len(self.processes))
+
+    # ------------------------
+    # Отчеты по результатам
+    # ------------------------
+    def collect(self, jobs: list):
+        for job in jobs:
+            payload = job["payload"]
+            coin = dict(payload["coin"], TIMEFRAME=payload["timeframe"])
+            if job["status"] != DONE:
+                logger.error(f"[{job['id']}] ❌ задача не выполнена: {job['error']}")
+                continue
+            result = load_task_result(job["result_path"], payload["run_key"])
+            if result is None:
+                logger.error(f"[{job['id']}] ❌ результат не найден в {job['result_path']}")
+                continue
+            report_path = self.manager._render_test_report(coin, payload["timeframe"], result)
+            self.manager._collect(coin, payload["timeframe"], result, report_path)
+        self.manager._generate_summary()
+
+    # ===================================================
+    # ? Полный цикл: очередь -> воркеры -> сводный отчет
+    # ===================================================
+    def run(self, local_workers: int = 0, timeout: float = None):
+        """
+        local_workers: сколько воркеров запустить процессами на этой машине
+        (0 — только внешние воркеры, запущенные через app.py --worker).
+        timeout: секунд на ожидание всех задач (None — без ограничения), затем TimeoutError.
+        """
+        job_ids = self.submit()
+        self.processes = self._start_workers(local_workers)
+        try:
+            jobs = self.wait(job_ids, timeout=timeout)
+        except BaseException:
+            # при тайм-ауте локальные воркеры продолжили бы разбирать очередь — останавливаем их;
+            # взятые ими задачи вернутся в очередь по истечении аренды
+            for process in self.processes:
+                process.terminate()
+            raise
+        finally:
+            for process in self.processes:
+                process.join()
+            self.processes = []
+        self.collect(jobs)
+        logger.info("📈 Распределенный бэктест завершен!")
+        return jobs
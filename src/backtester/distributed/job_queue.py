@@ -0,0 +1,211 @@
+# очередь задач распределенного бэктеста
+
+# src/backtester/distributed/job_queue.py
+import json
+import sqlite3
+import time
+from pathlib import Path
+from typing import Optional
+
+# статусы задач
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+# -------------------------------------------------
+# Базовый класс очереди (интерфейс для бэкендов)
+# -------------------------------------------------
+class JobQueue:
+    """
+    Очередь задач бэктеста с арендой (lease).
+    Воркер берет задачу на lease_seconds и продлевает аренду heartbeat'ами.
+    Если воркер упал и аренда истекла — задачу заберет другой воркер.
+    Задача, упавшая с ошибкой или с истекшей арендой, возвращается в очередь,
+    пока не исчерпано max_attempts попыток, — затем помечается как failed.
+    """
+
+    def put(self, job_id: str, payload: dict):
+        """Новая задача или повтор задачи со статусом failed; pending / running / done не меняются."""
+        raise NotImplementedError
+
+    def claim(self, worker_id: str, lease_seconds: float) -> Optional[dict]:
+        """Захват следующей свободной задачи: {"id", "payload", "attempts"} или None."""
+        raise NotImplementedError
+
+    def heartbeat(self, job_id: str, worker_id: str, lease_seconds: float) -> bool:
+        """Продление аренды. False — задачу уже забрал другой воркер."""
+        raise NotImplementedError
+
+    def complete(self, job_id: str, worker_id: str, result_path: str) -> bool:
+        raise NotImplementedError
+
+    def fail(self, job_id: str, worker_id: str, error: str) -> Optional[str]:
+        """Ошибка задачи: pending (будет повтор) или failed (попытки исчерпаны); None — аренда потеряна."""
+        raise NotImplementedError
+
+    def jobs(self) -> list:
+        """Все задачи: [{"id", "payload", "status", "worker", "lease_until", "attempts", "result_path", "error"}]."""
+        raise NotImplementedError
+
+    def counts(self) -> dict:
+        counts = {PENDING: 0, RUNNING: 0, DONE: 0, FAILED: 0}
+        for job in self.jobs():
+            counts[job["status"]] += 1
+        return counts
+
+
+# -------------------------------------------------
+# Очередь на SQLite (по умолчанию)
+# -------------------------------------------------
+class SQLiteJobQueue(JobQueue):
+    """
+    Очередь в одном файле SQLite. Захват задачи выполняется в транзакции
+    BEGIN IMMEDIATE — блокировка файла гарантирует, что одну задачу
+    не возьмут два воркера (процессы на одной машине или общий каталог).
+    """
+
+    def __init__(self, path, max_attempts: int = 3):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_attempts = max_attempts
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    worker TEXT,
+                    lease_until REAL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    result_path TEXT,
+                    error TEXT,
+                    created REAL NOT NULL
+                )
+                """
+            )
+
+    def _connect(self):
+        # отдельное соединение на каждую операцию: безопасно для потоков и процессов
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return _Connection(conn)
+
+    # ------------------------
+    # Добавление задачи: повторное добавление выполненной или выполняемой задачи ничего не меняет,
+    # задача со статусом failed возвращается в очередь с обнуленными попытками
+    # ------------------------
+    def put(self, job_id: str, payload: dict):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, payload, status, created) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET payload = excluded.payload, status = excluded.status, "
+                "worker = NULL, lease_until = NULL, attempts = 0, result_path = NULL, error = NULL "
+                "WHERE jobs.status = ?",
+                (job_id, json.dumps(payload, default=str), PENDING, time.time(), FAILED),
+            )
+
+    # ------------------------
+    # Захват задачи: свободная или с истекшей арендой
+    # ------------------------
+    def claim(self, worker_id: str, lease_seconds: float) -> Optional[dict]:
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            # аренда истекла у задач, которые уже исчерпали попытки -> failed
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = ? WHERE status = ? AND lease_until < ? AND attempts >= ?",
+                (FAILED, "lease expired", RUNNING, now, self.max_attempts),
+            )
+            row = conn.execute(
+                "SELECT id, payload, attempts FROM jobs "
+                "WHERE status = ? OR (status = ? AND lease_until < ?) "
+                "ORDER BY created, id LIMIT 1",
+                (PENDING, RUNNING, now),
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = ?, worker = ?, lease_until = ?, attempts = attempts + 1 WHERE id = ?",
+                (RUNNING, worker_id, now + lease_seconds, row["id"]),
+            )
+            conn.execute("COMMIT")
+        return {"id": row["id"], "payload": json.loads(row["payload"]), "attempts": row["attempts"] + 1}
+
+    def heartbeat(self, job_id: str, worker_id: str, lease_seconds: float) -> bool:
+        with self._connect() as conn:
+            cur = conn.execute(
+                "UPDATE jobs SET lease_until = ? WHERE id = ? AND worker = ? AND status = ?",
+                (time.time() + lease_seconds, job_id, worker_id, RUNNING),
+            )
+            return cur.rowcount == 1
+
+    def complete(self, job_id: str, worker_id: str, result_path: str) -> bool:
+        with self._connect() as conn:
+            cur = conn.execute(
+                "UPDATE jobs SET status = ?, result_path = ?, error = NULL WHERE id = ? AND worker = ? AND status = ?",
+                (DONE, str(result_path), job_id, worker_id, RUNNING),
+            )
+            return cur.rowcount == 1
+
+    def fail(self, job_id: str, worker_id: str, error: str) -> Optional[str]:
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT attempts FROM jobs WHERE id = ? AND worker = ? AND status = ?",
+                (job_id, worker_id, RUNNING),
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            # пока есть попытки, задача возвращается в очередь, иначе -> failed
+            status = PENDING if row["attempts"] < self.max_attempts else FAILED
+            conn.execute(
+                "UPDATE jobs SET status = ?, worker = NULL, lease_until = NULL, error = ? WHERE id = ?",
+                (status, error, job_id),
+            )
+            conn.execute("COMMIT")
+        return status
+
+    def jobs(self) -> list:
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id, payload, status, worker, lease_until, attempts, result_path, error FROM jobs ORDER BY created, id"
+            ).fetchall()
+        return [dict(row, payload=json.loads(row["payload"])) for row in rows]
+
+
+class _Connection:
+    # контекст-менеджер, который закрывает соединение (sqlite3 только завершает транзакцию)
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None and self.conn.in_transaction:
+            self.conn.execute("ROLLBACK")
+        self.conn.close()
+
+
+# -------------------------------------------------
+# Реестр бэкендов очереди
+# -------------------------------------------------
+QUEUE_BACKENDS = {
+    "sqlite": SQLiteJobQueue,
+}
+
+
+def register_queue_backend(name: str, backend_cls):
+    """Подключение своего бэкенда (например, Redis) по имени из конфига."""
+    QUEUE_BACKENDS[name] = backend_cls
+
+
+def create_queue(backend: str, path, **kwargs) -> JobQueue:
+    if backend not in QUEUE_BACKENDS:
+        raise ValueError(f"Неизвестный бэкенд очереди: {backend}. Доступны: {', '.join(QUEUE_BACKENDS)}")
+    return QUEUE_BACKENDS[backend](path, **kwargs)
@@ -0,0 +1,122 @@
+# воркер распределенного бэктеста
+
+# src/backtester/distributed/worker.py
+import os
+import socket
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from src.backtester.distributed.job_queue import PENDING
+from src.backtester.engine.checkpoint import save_task_result
+
+# Логирование
+# ====================================================
+from src.utils.logger import get_logger
+logger = get_logger(__name__)
+
+
+# ------------------------
+# Выполнение задачи бэктеста по payload из очереди
+# ------------------------
+_manager = None
+
+
+def run_backtest_job(payload: dict) -> dict:
+    """
+    Задача: {"coin": ..., "timeframe": ..., "run_key": ...}.
+    Настройки стратегии и период воркер берет из своего конфига,
+    поэтому run_key сверяется: при расхождении конфигов задача падает, а не считает другое.
+    """
+    global _manager
+    if _manager is None:
+        from src.backtester.backtester import TestManager
+        _manager = TestManager()
+
+    coin = dict(payload["coin"], TIMEFRAME=payload["timeframe"])
+    run_key = _manager._build_run_key(coin)
+    if run_key != payload["run_key"]:
+        raise RuntimeError(f"Конфигурация воркера отличается от координатора (run_key {run_key} != {payload['run_key']})")
+    return _manager._run_task(coin, payload["timeframe"])
+
+
+# -------------------------------------------------
+# Класс Worker
+# -------------------------------------------------
+class Worker:
+    """
+    Воркер без состояния: берет задачи из очереди, считает и кладет результат
+    в общий каталог результатов (results_dir/<job_id>/result.pkl).
+    Пока задача считается, фоновый поток продлевает аренду (heartbeat).
+    Если воркер упадет, аренда истечет и задачу заберет другой воркер;
+    задача, упавшая с ошибкой, возвращается в очередь до исчерпания попыток очереди.
+    """
+
+    def __init__(
+        self,
+        queue,
+        results_dir,
+        runner=run_backtest_job,
+        worker_id: str = None,
+        lease_seconds: float = 60,
+        heartbeat_seconds: float = 10,
+        poll_seconds: float = 2,
+        exit_when_idle: bool = False,
+    ):
+        self.queue = queue
+        self.results_dir = Path(results_dir)
+        self.runner = runner
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.lease_seconds = lease_seconds
+        self.heartbeat_seconds = heartbeat_seconds
+        self.poll_seconds = poll_seconds
+        self.exit_when_idle = exit_when_idle # завершиться, когда свободных задач нет (тесты, разовые запуски)
+        self.processed = 0
+
+    # ===================================================
+    # ? Основной цикл воркера
+    # ===================================================
+    def run(self, max_jobs: int = None):
+        logger.info(f"🛠 Воркер {self.worker_id} запущен")
+        while max_jobs is None or self.processed < max_jobs:
+            job = self.queue.claim(self.worker_id, self.lease_seconds)
+            if job is None:
+                if self.exit_when_idle:
+                    break
+                time.sleep(self.poll_seconds)
+                continue
+            self.process(job)
+        logger.info(f"🛠 Воркер {self.worker_id} остановлен, выполнено задач: {self.processed}")
+
+    # ------------------------
+    # Выполнение одной задачи с heartbeat
+    # ------------------------
+    def process(self, job: dict):
+        job_id = job["id"]
+        stop = threading.Event()
+        beat = threading.Thread(target=self._heartbeat, args=(job_id, stop), daemon=True)
+        beat.start()
+        try:
+            logger.info(f"[{job_id}] воркер {self.worker_id}: попытка {job['attempts']}")
+            result = self.runner(job["payload"])
+            result_dir = self.results_dir / job_id
+            save_task_result(result_dir, job["payload"].get("run_key", ""), result)
+            if not self.queue.complete(job_id, self.worker_id, str(result_dir)):
+                logger.warning(f"[{job_id}] аренда потеряна, результат записан, но задача закрыта другим воркером")
+        except Exception as e:
+            status = self.queue.fail(job_id, self.worker_id, repr(e))
+            if status == PENDING:
+                logger.warning(f"[{job_id}] ⚠️ ошибка на попытке {job['attempts']}, задача возвращена в очередь: {e!r}")
+            else:
+                logger.exception(f"[{job_id}] ❌ FAILED: {e}")
+        finally:
+            stop.set()
+            beat.join()
+            self.processed += 1
+
+    def _heartbeat(self, job_id: str, stop: threading.Event):
+        while not stop.wait(self.heartbeat_seconds):
+            if not self.queue.heartbeat(job_id, self.worker_id, self.lease_seconds):
+                logger.warning(f"[{job_id}] аренда задачи потеряна воркером {self.worker_id}")
+                return
@@ -3,75 +3,137 @@
 # src/backtester/engine/backtest_engine.py
 from decimal import Decimal
 from src.data_fetcher.utils import select_range, shift_timestamp
+from src.backtester.fingerprint import data_fingerprint
 from src.logical.hedging.als.als_engine import ALSEngine
+from src.utils.logger_time import NULL_INSTRUMENTATION
 
 # Engine выполнения бэктеста по барам.
 # Отвечает за обход баров, вызов стратегии, обработку сигналов,
 # запуск исполняющего цикла по минутным барам и учет PnL в портфеле.
 class BacktestEngine:
-    def __init__(self, strategy, manager, execution_loop, signal_handler, portfolio, logger):
+    def __init__(self, strategy, manager, execution_loop, signal_handler, portfolio, logger, instrumentation=None):
         # strategy: объект стратегии с методом find_entry_point и параметром allowed_min_bars
         # manager: менеджер позиций, содержит словарь positions
         # execution_loop: объект, который симулирует исполнение ордеров по 1m барам
         # signal_handler: обработчик сигналов, возвращает/обновляет позицию
         # portfolio: учетная логика портфеля (расчёт floating, on_bar и т.д.)
         # logger: объект логирования
+        # instrumentation: замеры по этапам (Instrumentation), по умолчанию выключены
         self.strategy = strategy
         self.manager = manager
         self.execution_loop = execution_loop
         self.signal_handler = signal_handler
         self.portfolio = portfolio
         self.logger = logger
+        self.instrumentation = instrumentation or NULL_INSTRUMENTATION
 
     # ===================================================
     # ? Запуск бэктеста
     # ===================================================
-    def run(self, ohlcv, ohlcv_1m, timeframe):
+    def run(self, ohlcv, ohlcv_1m, timeframe, checkpoint=None):
+        # checkpoint: CheckpointManager (необязательно) — периодическое сохранение состояния
         positions = {}
 
         arr = ohlcv[['open','high','low','close']].copy()
         arr['dt'] = ohlcv.index.to_numpy()
         arr = arr.to_numpy()
 
+        start = self.strategy.allowed_min_bars
+        # ! Восстановление состояния из чекпоинта прерванного или прошлого запуска
+        if checkpoint is not None:
+            start, positions = self._restore(checkpoint, arr, ohlcv_1m, timeframe, start, positions)
+
         # ! Итерация по барам торгового таймфрейма
-        for i in range(self.strategy.allowed_min_bars, len(arr)):
+        inst = self.instrumentation
+        first = start
+        for i in range(start, len(arr)):
             bar = arr[i]
             bar_time = bar[4]
 
             # ! запуск стратегии, генерирует сигнал
             # передаем нужное число баров на заданном таймфрейме.
             
-            signal = self.strategy.find_entry_point(arr[i-self.strategy.allowed_min_bars:i])
+            with inst.stage("find_entry_point"):
+                signal = self.strategy.find_entry_point(arr[i-self.strategy.allowed_min_bars:i])
 
             # ! Обработка сигнала и Создание / обновление позиции ордеров через SignalHandler
             # Сюда можно подовать сигналы из других стратегий и она будет работать
-            positions = self.signal_handler.handle(signal, positions, bar)
+            with inst.stage("signal_handler"):
+                positions = self.signal_handler.handle(signal, positions, bar)
 
             # ! Запуск исполнения по минутным барам, если есть открытые позиции
             # Позиций может быть несколько, основная и хеджирующие
             if len(positions) > 0:
-                start = bar_time
-                end = shift_timestamp(bar_time, 1, timeframe, +1)
-                bars_1m = select_range(ohlcv_1m, start, end)
-                arr_1m = bars_1m[['open', 'high', 'low', 'close']].assign(
-                    dt=bars_1m.index.to_numpy()
-                ).to_numpy()
+                with inst.stage("select_range"):
+                    start = bar_time
+                    end = shift_timestamp(bar_time, 1, timeframe, +1)
+                    bars_1m = select_range(ohlcv_1m, start, end)
+                    arr_1m = bars_1m[['open', 'high', 'low', 'close']].assign(
+                        dt=bars_1m.index.to_numpy()
+                    ).to_numpy()
 
-                self.execution_loop.run(arr_1m)
+                with inst.stage("process_bar", calls=len(arr_1m)):
+                    self.execution_loop.run(arr_1m)
+                inst.count("bars_1m_processed", len(arr_1m))
 
             # ! Учет PnL в портфеле по окончании бара
-            realized = Decimal("0")
-            for p in self.manager.positions.values():
-                for e in p.executions:
-                    if e.bar_index == bar_time:
-                        realized += e.realized_pnl
-            
-            # ! расчет floating  
-            floating = self.portfolio.calculate_floating(
-                self.manager,
-                Decimal(str(bar[1])),
-                Decimal(str(bar[2]))
-            )
-            self.logger.debug(f"Осуществленный PnL на баре {bar_time}: {realized}, Плавающий PnL: {floating}")
-            # ! обновление портфеля по бару
-            self.portfolio.on_bar(bar_time, realized, floating)
+            with inst.stage("pnl"):
+                realized = Decimal("0")
+                for p in self.manager.positions.values():
+                    for e in p.executions:
+                        if e.bar_index == bar_time:
+                            realized += e.realized_pnl
+                
+                # ! расчет floating  
+                floating = self.portfolio.calculate_floating(
+                    self.manager,
+                    Decimal(str(bar[1])),
+                    Decimal(str(bar[2]))
+                )
+                self.logger.debug("Осуществленный PnL на баре %s: %s, Плавающий PnL: %s", bar_time, realized, floating)
+                # ! обновление портфеля по бару
+                self.portfolio.on_bar(bar_time, realized, floating)
+            inst.count("bars_htf")
+
+            # ! Сохранение состояния
+            if checkpoint is not None:
+                if checkpoint.due(i):
+                    checkpoint.save(i, bar_time, self, positions)
+                # последний бар может быть незакрытой свечой, поэтому
+                # база для инкрементального продолжения — предпоследний бар
+                if i == len(arr) - 2:
+                    window_end = shift_timestamp(bar_time, 1, timeframe, +1)
+                    checkpoint.save_final(i, bar_time, self, positions, data_fingerprint(arr, i, ohlcv_1m, window_end))
+
+        # ! минутные бары периода, которые не понадобились (нет открытых позиций)
+        if inst.enabled and first < len(arr):
+            window_end = shift_timestamp(arr[-1][4], 1, timeframe, +1)
+            total_1m = ohlcv_1m.index.searchsorted(window_end, side="right") - ohlcv_1m.index.searchsorted(arr[first][4])
+            inst.count("bars_1m_skipped", max(0, int(total_1m) - inst.counters.get("bars_1m_processed", 0)))
+
+    # ===================================================
+    # ? Восстановление состояния
+    # ===================================================
+    def _restore(self, checkpoint, arr, ohlcv_1m, timeframe, start, positions):
+        # 1. чекпоинт прерванного запуска
+        state = checkpoint.load()
+        if state is not None and state["cursor"] < len(arr) and arr[state["cursor"]][4] == state["bar_time"]:
+            positions = checkpoint.restore(state, self)
+            self.logger.info(f"♻️ Бэктест продолжен с бара {state['bar_time']} ({state['cursor'] + 1}/{len(arr)})")
+            return state["cursor"] + 1, positions
+
+        # 2. инкрементальный режим: состояние прошлого запуска, если обработанные данные не изменились
+        if not checkpoint.incremental:
+            return start, positions
+        state = checkpoint.load_final()
+        if state is None:
+            return start, positions
+        cursor = state["cursor"]
+        window_end = shift_timestamp(state["bar_time"], 1, timeframe, +1)
+        if cursor >= len(arr) or data_fingerprint(arr, cursor, ohlcv_1m, window_end) != state["data_fp"]:
+            self.logger.info("Данные изменились после прошлого запуска, выполняется полный прогон")
+            return start, positions
+
+        positions = checkpoint.restore(state, self, source="incremental_from")
+        self.logger.info(f"➕ Инкрементальный прогон с бара {state['bar_time']}: новых баров {len(arr) - cursor - 1}")
+        return cursor + 1, positions
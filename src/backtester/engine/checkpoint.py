@@ -0,0 +1,227 @@
+# чекпоинты бэктеста
+
+# src/backtester/engine/checkpoint.py
+import os
+import pickle
+import time
+from pathlib import Path
+from typing import Optional
+
+# Логирование
+# ====================================================
+from src.utils.logger import get_logger
+logger = get_logger(__name__)
+
+from src.trading_engine.core.ids import advance_past, max_id
+
+# версия формата чекпоинта, при изменении старые файлы игнорируются
+# 2: доменные объекты со __slots__ и целочисленными id
+CHECKPOINT_VERSION = 2
+
+
+# -------------------------------------------------
+# Класс CheckpointManager - сохранение состояния бэктеста
+# -------------------------------------------------
+class CheckpointManager:
+    """
+    Периодически сохраняет состояние BacktestEngine на диск и восстанавливает его после сбоя.
+    В чекпоинт попадает:
+        - курсор по барам HTF и время бара
+        - рабочий набор позиций SignalHandler
+        - состояние PositionManager (позиции, ордера, исполнения)
+        - состояние Portfolio (баланс, кривые equity / drawdown)
+        - состояние стратегии
+    Все объекты сериализуются одним pickle, поэтому общие ссылки
+    (позиции в менеджере и в рабочем наборе) сохраняются.
+
+    Стоимость ограничена: если доля времени на запись превышает max_overhead
+    от времени работы бэктеста, интервал между чекпоинтами удваивается.
+
+    Кроме промежуточных чекпоинтов сохраняется финальное состояние на последнем
+    закрытом баре — с него инкрементальный запуск продолжает бэктест на новых свечах.
+    """
+
+    FILE_NAME = "checkpoint.pkl"
+    FINAL_FILE_NAME = "final_state.pkl"
+
+    def __init__(
+        self,
+        directory,
+        run_key: str = "",
+        every_bars: int = 500,
+        max_overhead: float = 0.02,
+        base_key: str = "",
+        incremental: bool = False,
+    ):
+        self.directory = Path(directory)
+        self.path = self.directory / self.FILE_NAME
+        self.final_path = self.directory / self.FINAL_FILE_NAME
+        self.run_key = run_key # ключ запуска: чекпоинт другого запуска не восстанавливается
+        self.base_key = base_key # ключ настроек без конечной даты (для инкрементального режима)
+        self.incremental = incremental # продолжать с финального состояния прошлого запуска
+        self.every_bars = max(1, int(every_bars))
+        self.max_overhead = max_overhead
+
+        self._last_cursor: Optional[int] = None
+        self._started = time.perf_counter()
+        self.stats = {
+            "count": 0,       # количество записей
+            "seconds": 0.0,   # суммарное время записи
+            "bytes": 0,       # размер последнего чекпоинта
+            "every_bars": self.every_bars,
+            "resumed_from": None,
+            "incremental_from": None,
+        }
+
+    # ------------------------
+    # Пора ли сохранять состояние на этом баре
+    # ------------------------
+    def due(self, cursor: int) -> bool:
+        if self._last_cursor is None:
+            self._last_cursor = cursor
+            return False
+        return cursor - self._last_cursor >= self.every_bars
+
+    # ------------------------
+    # Сохранение состояния
+    # ------------------------
+    def save(self, cursor: int, bar_time, engine, positions: dict):
+        started = time.perf_counter()
+        size = self._write_atomic(self.path, self._build_state(cursor, bar_time, engine, positions))
+
+        elapsed = time.perf_counter() - started
+        self._last_cursor = cursor
+        self.stats["count"] += 1
+        self.stats["seconds"] += elapsed
+        self.stats["bytes"] = size
+
+        # ограничение стоимости: реже пишем, если чекпоинты стали заметны
+        total = time.perf_counter() - self._started
+        if total > 0 and self.stats["seconds"] / total > self.max_overhead:
+            self.every_bars *= 2
+            self.stats["every_bars"] = self.every_bars
+            logger.debug(f"Чекпоинт {self.path}: интервал увеличен до {self.every_bars} баров")
+
+    # ------------------------
+    # Финальное состояние для инкрементального продолжения
+    # ------------------------
+    def save_final(self, cursor: int, bar_time, engine, positions: dict, data_fp: str):
+        state = self._build_state(cursor, bar_time, engine, positions)
+        state["base_key"] = self.base_key
+        state["data_fp"] = data_fp
+        self._write_atomic(self.final_path, state)
+
+    def load_final(self) -> Optional[dict]:
+        state = self._read(self.final_path)
+        if state is None:
+            return None
+        if state.get("version") != CHECKPOINT_VERSION or state.get("base_key") != self.base_key:
+            logger.info(f"Настройки изменились после прошлого запуска ({self.final_path}), нужен полный прогон")
+            return None
+        return state
+
+    # ------------------------
+    # Загрузка состояния (None, если чекпоинта нет или он от другого запуска)
+    # ------------------------
+    def load(self) -> Optional[dict]:
+        state = self._read(self.path)
+        if state is None:
+            return None
+        if state.get("version") != CHECKPOINT_VERSION or state.get("run_key") != self.run_key:
+            logger.warning(f"Чекпоинт {self.path} создан другим запуском и будет проигнорирован")
+            return None
+        return state
+
+    # ------------------------
+    # Восстановление состояния в компоненты движка
+    # ------------------------
+    def restore(self, state: dict, engine, source: str = "resumed_from") -> dict:
+        """
+        Обновляет состояние существующих объектов, а не заменяет их:
+        на менеджер и портфель ссылаются SignalHandler, PositionBuilder и ExecutionEngine.
+        Возвращает рабочий набор позиций.
+        source: ключ статистики, куда записать время бара (resumed_from | incremental_from)
+        """
+        engine.manager.__dict__.update(state["manager"])
+        engine.portfolio.__dict__.update(state["portfolio"])
+        engine.strategy.__dict__.update(state["strategy"])
+        # новые ордера и позиции получат id больше восстановленных
+        advance_past(max_id(engine.manager.positions))
+        self._last_cursor = state["cursor"]
+        self.stats[source] = str(state["bar_time"])
+        return state["positions"]
+
+    def _build_state(self, cursor: int, bar_time, engine, positions: dict) -> dict:
+        return {
+            "version": CHECKPOINT_VERSION,
+            "run_key": self.run_key,
+            "cursor": cursor,
+            "bar_time": bar_time,
+            "positions": positions,
+            "manager": engine.manager.__dict__,
+            "portfolio": engine.portfolio.__dict__,
+            "strategy": engine.strategy.__dict__,
+        }
+
+    # ------------------------
+    # Удаление чекпоинта
+    # ------------------------
+    def clear(self):
+        if self.path.exists():
+            self.path.unlink()
+
+    # ------------------------
+    # Итоговая стоимость чекпоинтов
+    # ------------------------
+    def report(self) -> dict:
+        logger.info(
+            f"💾 Чекпоинты {self.directory}: записей {self.stats['count']}, "
+            f"время {self.stats['seconds']:.3f} c, размер {self.stats['bytes'] / 1024:.1f} KB, "
+            f"интервал {self.stats['every_bars']} баров"
+        )
+        return dict(self.stats)
+
+    # ------------------------
+    # Атомарная запись: временный файл + os.replace
+    # ------------------------
+    @staticmethod
+    def _write_atomic(path: Path, obj) -> int:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        with open(tmp_path, "wb") as f:
+            pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        return path.stat().st_size
+
+    @staticmethod
+    def _read(path: Path):
+        if not path.exists():
+            return None
+        try:
+            with open(path, "rb") as f:
+                return pickle.load(f)
+        except Exception as e:
+            logger.warning(f"Не удалось прочитать чекпоинт {path}: {e}")
+            return None
+
+
+# -------------------------------------------------
+# Результат завершенной задачи (для пропуска при возобновлении)
+# -------------------------------------------------
+RESULT_FILE_NAME = "result.pkl"
+
+
+def save_task_result(directory, run_key: str, result: dict):
+    CheckpointManager._write_atomic(
+        Path(directory) / RESULT_FILE_NAME,
+        {"version": CHECKPOINT_VERSION, "run_key": run_key, "result": result},
+    )
+
+
+def load_task_result(directory, run_key: str) -> Optional[dict]:
+    data = CheckpointManager._read(Path(directory) / RESULT_FILE_NAME)
+    if not data or data.get("version") != CHECKPOINT_VERSION or data.get("run_key") != run_key:
+        return None
+    return data["result"]
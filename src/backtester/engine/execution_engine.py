@@ -2,10 +2,16 @@ from src.trading_engine.core.order import Order
 from src.trading_engine.core.enums import OrderType, Position_Status, Direction
 from src.trading_engine.utils.decimal_utils import to_decimal
 from src.trading_engine.managers.position_manager import PositionManager
+from src.backtester.engine.order_book import OrderBook, SIDE_CODES
 from datetime import datetime
 
 from decimal import Decimal
 
+import numpy as np
+
+# режимы исполнения: "bar" — бар за баром, "batch" — векторная проверка блока минутных баров
+EXECUTION_MODES = ("bar", "batch")
+
 # Логирование
 # ====================================================
 from src.utils.logger import get_logger
@@ -30,55 +36,108 @@ class ExecutionEngine:
     Частичные заполнения не моделируются (полное заполнение).
     """
     
-    def __init__(self, position_manager: PositionManager, on_execution=None):
+    def __init__(self, position_manager: PositionManager, on_execution=None, mode: str = "bar"):
         
+        if mode not in EXECUTION_MODES:
+            raise ValueError(f"Неизвестный режим исполнения: {mode}. Доступны: {EXECUTION_MODES}")
         self.position_manager = position_manager # менеджер позиций
         self.on_execution = on_execution # коллбек после исполнения ордера (если нужен)
+        self.mode = mode # режим исполнения (EXECUTION_MODES)
+        self.order_book = OrderBook(position_manager) # индекс активных ордеров по цене срабатывания
 
     def process_bar(self, bar: list[float], bar_index: datetime):
         """
         bar: dict with keys: 'time' (optional), 'open', 'high', 'low', 'close'
         bar_index: integer index of the bar
+
+        Сработавшие ордера берутся из OrderBook бисекцией по [low, high] — O(log n + исполнения)
+        вместо перебора всех активных ордеров. Порядок обработки прежний: позиции по порядку
+        создания, ордера по порядку в позиции; ордера, добавленные на баре, проверяются со следующего бара.
         """
-        # перебераем все позиции и их активные ордера
-        for pos in list(self.position_manager.positions.values()):
-            # из позиции получаем активные ордера
-            active_orders = pos.get_active_orders()
-            if not active_orders:
-                # если активных ордеров нет, переходим к следующей позиции
+        book = self.order_book
+        book.sync()
+        # перенос SL в безубыточность проверяется только у позиций, где что-то изменилось:
+        # новые ордера с прошлого бара или исполнения на этом баре
+        check_break = book.touched
+        book.touched = {}
+
+        triggered = book.triggered(to_decimal(bar[2]), to_decimal(bar[1]))
+        for rank, _, order, pos in triggered:
+            # определяем цену исполнения и объем
+            exec_price = self.get_execution_price(order, bar)
+            exec_volume = order.remaining()
+
+            # убедиться, что мы не закрываем больше, чем осталось (для ордеров на выход)
+            if order.order_type in {OrderType.TAKE_PROFIT, OrderType.CLOSE, OrderType.STOP_LOSS}:
+                exec_volume = min(exec_volume, pos.remaining_volume)
+
+            if exec_volume <= Decimal("0"):
                 continue
-            
-            # перебираем все активные ордера позиции
-            for order in active_orders:
-                # проверяем, следует ли исполнить ордер на этом баре
-                if self.should_execute(order, bar):
-                    
-                    # определяем цену исполнения и объем
-                    exec_price = self.get_execution_price(order, bar)
-                    exec_volume = order.remaining()
-                    
-                    # убедиться, что мы не закрываем больше, чем осталось (для ордеров на выход)
-                    if order.order_type in {OrderType.TAKE_PROFIT, OrderType.CLOSE, OrderType.STOP_LOSS}:
-                        exec_volume = min(exec_volume, pos.remaining_volume)
-
-                    if exec_volume <= Decimal("0"):
-                        continue
-
-                    # ! регистрируем исполнение ордера в позиции
-                    pos.record_execution(order, exec_price, pos.round_to_tick(exec_volume), bar_index)
-
-                    # действия после выполнения: если запись заполнена, могут быть ордера в скобках (их может установить пользователь)
-                    # здесь мы могли бы реализовать логику OCO, трейлинг-стопы и т. д. 
-                    # На данный момент мы оставляем расширения на усмотрение пользователя.
-            
-            # Сделать универсальную проверку по переводу SL в безубыточность
-            # Пока проверяем только для активных позиций
-            # проверяем исполнен ли TP после которого переводим SL в без убыточность
+
+            # ! регистрируем исполнение ордера в позиции
+            pos.record_execution(order, exec_price, pos.round_to_tick(exec_volume), bar_index)
+            book.watch(pos, rank)
+            check_break[rank] = pos
+
+            # действия после выполнения: если запись заполнена, могут быть ордера в скобках (их может установить пользователь)
+            # здесь мы могли бы реализовать логику OCO, трейлинг-стопы и т. д. 
+            # На данный момент мы оставляем расширения на усмотрение пользователя.
+
+        # Сделать универсальную проверку по переводу SL в безубыточность
+        # Пока проверяем только для активных позиций
+        # проверяем исполнен ли TP после которого переводим SL в без убыточность
+        for rank in sorted(check_break):
+            pos = check_break[rank]
             if pos.status == Position_Status.ACTIVE and pos.check_stop_break():
                 # если закрыт хотя бы один TP, двигаем стоп в безубыточность
                 pos.move_stop_to_break_even()
 
 
+    # ------------------------
+    # ? Блок минутных баров (режим "batch")
+    # ------------------------
+    def process_block(self, bars):
+        """
+        Векторная проверка: условия срабатывания всех ордеров считаются сразу для блока баров
+        маской (бары × ордера). Бар с первым срабатыванием обрабатывается обычным process_bar
+        (порядок исполнения — по бару, затем по позиции и ордеру), после чего маска
+        пересчитывается для оставшихся баров: исполнения меняют набор ордеров и объемы.
+        Бары без срабатываний пропускаются — результат совпадает с режимом "bar".
+        """
+        n = len(bars)
+        if n == 0:
+            return
+        book = self.order_book
+        highs = np.asarray(bars[:, 1], dtype=np.float64)
+        lows = np.asarray(bars[:, 2], dtype=np.float64)
+
+        i = 0
+        while i < n:
+            book.sync()
+            # новые ордера с прошлого бара: бар обрабатывается целиком (проверка переноса SL)
+            if book.touched:
+                self.process_bar(bars[i], bars[i][4])
+                i += 1
+                continue
+
+            price, side, _ = book.arrays()
+            if len(price) == 0:
+                return
+            low = lows[i:, None]
+            high = highs[i:, None]
+            mask = (
+                (side == SIDE_CODES["always"])
+                | ((side == SIDE_CODES["range"]) & (low <= price) & (price <= high))
+                | ((side == SIDE_CODES["low"]) & (low <= price))
+                | ((side == SIDE_CODES["high"]) & (high >= price))
+            )
+            hit = mask.any(axis=1)
+            if not hit.any():
+                return
+            i += int(hit.argmax())
+            self.process_bar(bars[i], bars[i][4])
+            i += 1
+
     # ------------------------
     # Проверка условий исполнения
     # ------------------------  
@@ -7,6 +7,10 @@ class ExecutionLoop:
 
     # Перебор минутных баров и передача их в движок исполнения
     def run(self, bars_1m):
+        # режим "batch": векторная проверка всего блока баров
+        if getattr(self.engine, "mode", "bar") == "batch":
+            self.engine.process_block(bars_1m)
+            return
         # Итерация по минутным барам
         for bar in bars_1m:
             self.engine.process_bar(bar, bar[4])
@@ -0,0 +1,218 @@
+# индекс активных ордеров по цене срабатывания
+
+# src/backtester/engine/order_book.py
+from bisect import bisect_left, bisect_right, insort
+from decimal import Decimal
+from itertools import islice
+
+import numpy as np
+
+from src.trading_engine.core.enums import Direction, OrderStatus, OrderType, Position_Status
+
+# статусы позиций, в которые еще могут добавляться ордера
+OPEN_STATUSES = (Position_Status.CREATED, Position_Status.ACTIVE)
+
+# ордера на выход: объем исполнения ограничен открытым объемом позиции
+EXIT_TYPES = (OrderType.TAKE_PROFIT, OrderType.CLOSE, OrderType.STOP_LOSS)
+
+# коды групп для векторной проверки (OrderBook.arrays)
+SIDE_CODES = {"always": 0, "range": 1, "low": 2, "high": 3}
+
+# ключ (цена, seq) больше любого ключа с той же ценой
+_AFTER = float("inf")
+
+
+# ------------------------
+# Группа ордера по условию срабатывания
+# ------------------------
+def trigger_side(order) -> str | None:
+    """
+        - "always": MARKET / CLOSE — исполняются на любом баре
+        - "range":  LIMIT / ENTRY — low <= price <= high
+        - "low":    SL LONG, TP SHORT — low <= price
+        - "high":   TP LONG, SL SHORT — high >= price
+    None — ордер никогда не срабатывает (нет цены, трейлинг-стоп).
+    """
+    otype = order.order_type
+    if otype in (OrderType.MARKET, OrderType.CLOSE):
+        return "always"
+    if order.price is None:
+        return None
+    if otype in (OrderType.LIMIT, OrderType.ENTRY):
+        return "range"
+    if otype == OrderType.STOP_LOSS:
+        return "low" if order.direction == Direction.LONG else "high"
+    if otype == OrderType.TAKE_PROFIT:
+        return "high" if order.direction == Direction.LONG else "low"
+    return None
+
+
+# -------------------------------------------------
+# Класс OrderBook - активные ордера менеджера позиций
+# -------------------------------------------------
+class OrderBook:
+    """
+    Ордера лежат в отсортированных по цене списках ключей (price, seq), по одному на группу
+    trigger_side. Сработавшие на баре ордера находятся бисекцией по [low, high]:
+    O(log n + k) вместо проверки каждого активного ордера.
+
+    Синхронизация с PositionManager без изменения его API:
+        - новые позиции — по длине словаря manager.positions (он только растет)
+        - новые ордера — по длине pos.orders (ордера только добавляются) у открытых позиций
+        - исполненные и отмененные ордера удаляются лениво, когда попадают в выборку,
+          и при периодической чистке (когда размер индекса удваивается)
+    Если словарь позиций заменен (восстановление из чекпоинта) — индекс строится заново.
+    """
+
+    def __init__(self, manager):
+        self.manager = manager
+        self._reset()
+
+    def _reset(self):
+        self._positions = self.manager.positions
+        self._seen = 0              # сколько позиций словаря уже учтено
+        self._live = {}             # открытые позиции: id -> (позиция, ранг, учтено ордеров)
+        self._keys = {side: [] for side in ("range", "low", "high")}
+        self._always = {}           # seq -> запись
+        self._entries = {}          # seq -> (ранг позиции, номер ордера, ордер, позиция)
+        self._sides = {}            # seq -> группа trigger_side
+        self._seq = 0
+        self._compact_at = 64
+        self.touched = {}           # позиции с новыми активными ордерами с прошлого бара: ранг -> позиция
+
+    # ------------------------
+    # Синхронизация с менеджером позиций
+    # ------------------------
+    def sync(self):
+        positions = self.manager.positions
+        if positions is not self._positions:
+            self._reset()
+
+        if len(positions) > self._seen:
+            for rank, pos in enumerate(islice(positions.values(), self._seen, None), start=self._seen):
+                self._live[pos.id] = (pos, rank, 0)
+            self._seen = len(positions)
+
+        for pos_id, (pos, rank, seen) in list(self._live.items()):
+            if len(pos.orders) > seen:
+                for index in range(seen, len(pos.orders)):
+                    self._add(pos, rank, index, pos.orders[index])
+                seen = len(pos.orders)
+            if pos.status in OPEN_STATUSES:
+                self._live[pos_id] = (pos, rank, seen)
+            else:
+                del self._live[pos_id]
+
+        if len(self._entries) > self._compact_at:
+            self._compact()
+
+    def watch(self, pos, rank: int):
+        # закрытая позиция снова открылась исполнением (например, оставшийся ENTRY) — следим за ее ордерами
+        if pos.id not in self._live and pos.status in OPEN_STATUSES:
+            self._live[pos.id] = (pos, rank, len(pos.orders))
+
+    def _add(self, pos, rank: int, index: int, order):
+        if order.status != OrderStatus.ACTIVE:
+            return
+        side = trigger_side(order)
+        if side is None:
+            return
+        seq = self._seq
+        self._seq += 1
+        self._entries[seq] = (rank, index, order, pos)
+        self._sides[seq] = side
+        self.touched[rank] = pos
+        if side == "always":
+            self._always[seq] = True
+        else:
+            insort(self._keys[side], (order.price, seq))
+
+    def _compact(self):
+        # выбросить неактивные ордера целиком; порог растет вместе с индексом
+        dead = [seq for seq, (_, _, order, _) in self._entries.items() if order.status != OrderStatus.ACTIVE]
+        for seq in dead:
+            del self._entries[seq]
+            del self._sides[seq]
+            self._always.pop(seq, None)
+        if dead:
+            for side, keys in self._keys.items():
+                self._keys[side] = [key for key in keys if key[1] in self._entries]
+        self._compact_at = max(64, 2 * len(self._entries))
+
+    # ------------------------
+    # Ордера, сработавшие на баре
+    # ------------------------
+    def triggered(self, low: Decimal, high: Decimal) -> list:
+        """
+        Активные ордера, условие которых выполняется на баре,
+        в порядке обхода исходного движка: позиции по порядку создания, ордера по порядку в позиции.
+        Возвращает [(ранг позиции, номер ордера, ордер, позиция)].
+        """
+        found = []
+        dead = []
+
+        def collect(seqs):
+            for seq in seqs:
+                entry = self._entries[seq]
+                if entry[2].status == OrderStatus.ACTIVE:
+                    found.append(entry)
+                else:
+                    dead.append(seq)
+
+        keys = self._keys["range"]
+        collect(seq for _, seq in keys[bisect_left(keys, (low,)):bisect_right(keys, (high, _AFTER))])
+        keys = self._keys["low"]
+        collect(seq for _, seq in keys[bisect_left(keys, (low,)):])
+        keys = self._keys["high"]
+        collect(seq for _, seq in keys[:bisect_right(keys, (high, _AFTER))])
+        collect(list(self._always))
+
+        for seq in dead:
+            self._remove(seq)
+
+        found.sort(key=lambda entry: (entry[0], entry[1]))
+        return found
+
+    def _remove(self, seq: int):
+        _, _, order, _ = self._entries.pop(seq)
+        side = self._sides.pop(seq)
+        if side == "always":
+            del self._always[seq]
+            return
+        keys = self._keys[side]
+        i = bisect_left(keys, (order.price, seq))
+        if i < len(keys) and keys[i][1] == seq:
+            del keys[i]
+
+    # ------------------------
+    # Параллельные массивы для векторной проверки блока баров
+    # ------------------------
+    def arrays(self):
+        """
+        Ордера, исполнение которых может что-то изменить:
+        активные, с ненулевым остатком; ордера на выход — только у позиций с открытым объемом
+        (иначе движок пропускает их с нулевым объемом).
+        Возвращает (price float64, side int8 — SIDE_CODES, slot int64 — ранг позиции).
+
+        Сравнение во float не теряет срабатываний: low = float(Decimal(repr(low))),
+        округление монотонно, поэтому price <= low в Decimal влечет float(price) <= low.
+        Обратное не гарантируется — лишние кандидаты отсекает точная проверка в OrderBook.triggered.
+        """
+        prices, sides, slots = [], [], []
+        for seq, (rank, _, order, pos) in self._entries.items():
+            if order.status != OrderStatus.ACTIVE or order.remaining() <= 0:
+                continue
+            side = self._sides[seq]
+            if order.order_type in EXIT_TYPES and pos.remaining_volume <= 0:
+                continue
+            prices.append(float(order.price) if order.price is not None else 0.0)
+            sides.append(SIDE_CODES[side])
+            slots.append(rank)
+        return (
+            np.array(prices, dtype=np.float64),
+            np.array(sides, dtype=np.int8),
+            np.array(slots, dtype=np.int64),
+        )
+
+    def __len__(self):
+        return len(self._entries)
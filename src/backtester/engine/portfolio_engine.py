@@ -0,0 +1,214 @@
+# портфельный бэктест по нескольким монетам с общим капиталом
+
+# src/backtester/engine/portfolio_engine.py
+import heapq
+from decimal import Decimal
+from itertools import islice, repeat
+
+import numpy as np
+
+from src.data_fetcher.utils import shift_timestamp
+from src.trading_engine.core.enums import Position_Status, SignalType
+from src.trading_engine.signals.signal import Signal
+
+# статусы позиций, которые занимают лимит и капитал
+OPEN_STATUSES = (Position_Status.CREATED, Position_Status.ACTIVE)
+
+
+# -------------------------------------------------
+# Состояние одной монеты внутри портфельного бэктеста
+# -------------------------------------------------
+class SymbolContext:
+    """
+    Компоненты и данные одной монеты. Данные хранятся в numpy-массивах:
+        - ts / arr: бары HTF (int64 ns и объектный массив open, high, low, close, dt для стратегии)
+        - window_end: конец окна исполнения каждого бара HTF (int64 ns)
+        - ts_1m / ohlc_1m / dt_1m: минутные бары
+    """
+    def __init__(self, coin, ohlcv, ohlcv_1m, timeframe, strategy, manager, signal_handler, execution_loop):
+        self.coin = coin
+        self.symbol = coin["SYMBOL"]
+        self.margin = Decimal(str(coin["VOLUME_SIZE"]))  # капитал, занимаемый одной позицией
+        self.strategy = strategy
+        self.manager = manager
+        self.signal_handler = signal_handler
+        self.execution_loop = execution_loop
+        self.positions = {}  # рабочий набор позиций SignalHandler
+
+        arr = ohlcv[['open', 'high', 'low', 'close']].copy()
+        arr['dt'] = ohlcv.index.to_numpy()
+        self.arr = arr.to_numpy()
+        self.ts = ohlcv.index.asi8
+        # окна считаются один раз при подготовке, а не на каждом баре
+        self.window_end = np.array(
+            [shift_timestamp(t, 1, timeframe, +1).value for t in ohlcv.index], dtype=np.int64
+        )
+
+        self.ts_1m = ohlcv_1m.index.asi8
+        self.ohlc_1m = ohlcv_1m[['open', 'high', 'low', 'close']].to_numpy(dtype=np.float64)
+        self.dt_1m = ohlcv_1m.index.to_numpy().astype("datetime64[us]")
+
+        self.last_high = None
+        self.last_low = None
+        self._seen = 0            # сколько позиций менеджера уже учтено в _live
+        self._live = {}           # позиции, которые могут дать PnL: id -> число учтенных исполнений
+        self.open_count = 0       # открытых позиций после последнего бара (учтено в лимитах движка)
+
+    # ------------------------
+    # Минутные бары окна исполнения бара HTF (без pandas)
+    # ------------------------
+    def bars_1m(self, i: int):
+        lo = np.searchsorted(self.ts_1m, self.ts[i], side="left")
+        hi = np.searchsorted(self.ts_1m, self.window_end[i], side="right")
+        window = np.empty((hi - lo, 5), dtype=object)
+        window[:, :4] = self.ohlc_1m[lo:hi].tolist()
+        window[:, 4] = self.dt_1m[lo:hi].astype(object)
+        return window
+
+    # ------------------------
+    # Новые исполнения с прошлого вызова -> реализованный PnL
+    # ------------------------
+    def collect_realized(self) -> Decimal:
+        self._sync()
+        realized = Decimal("0")
+        for pos_id in list(self._live):
+            pos = self.manager.positions[pos_id]
+            seen = self._live[pos_id]
+            for e in islice(pos.executions, seen, None):
+                realized += e.realized_pnl
+            self._live[pos_id] = len(pos.executions)
+            if pos.status not in OPEN_STATUSES:
+                # позиция закрыта и все ее исполнения учтены
+                del self._live[pos_id]
+        return realized
+
+    def _sync(self):
+        # новые позиции менеджера (словарь сохраняет порядок добавления)
+        for pos in islice(self.manager.positions.values(), self._seen, None):
+            self._live[pos.id] = 0
+        self._seen = len(self.manager.positions)
+
+    def open_positions(self):
+        self._sync()
+        return [self.manager.positions[pid] for pid in self._live if self.manager.positions[pid].status in OPEN_STATUSES]
+
+    def floating(self) -> Decimal:
+        if self.last_high is None:
+            return Decimal("0")
+        floating = Decimal("0")
+        for pos in self.open_positions():
+            floating += pos.calc_worst_unrealized_pnl(self.last_high, self.last_low)
+        return floating
+
+
+# -------------------------------------------------
+# Класс PortfolioBacktestEngine
+# -------------------------------------------------
+class PortfolioBacktestEngine:
+    """
+    Бэктест всех монет на одном общем балансе.
+    Потоки баров HTF всех монет сливаются по времени (k-way merge на куче),
+    для каждой монеты работают ее стратегия, SignalHandler и исполнение по 1m барам.
+    Общие ограничения:
+        - max_positions: не больше открытых позиций по всем монетам
+        - капитал: новая позиция открывается, если свободный баланс покрывает VOLUME_SIZE
+    Портфель обновляется один раз на каждую метку времени.
+    Число открытых позиций и занятый капитал хранятся накопленными суммами и обновляются
+    только по монете, у которой был бар; реализованный PnL собирается по монетам с баром,
+    плавающий — по монетам с открытыми позициями (не больше max_positions).
+    Работа на метку времени не зависит от общего числа монет.
+    """
+    def __init__(self, contexts: list, portfolio, max_positions: int, logger):
+        self.contexts = contexts
+        self.portfolio = portfolio
+        self.max_positions = max_positions
+        self.logger = logger
+        self.skipped_entries = 0  # входы, отклоненные лимитами
+        self.open_count = 0                # открытых позиций по всем монетам
+        self.used_margin = Decimal("0")    # капитал, занятый открытыми позициями
+        self.holding = {}                  # монеты с открытыми позициями (dict — порядок открытия)
+
+    # ===================================================
+    # ? Слияние потоков баров: (время, номер монеты, номер бара)
+    # ===================================================
+    def _events(self):
+        streams = [
+            zip(ctx.ts[ctx.strategy.allowed_min_bars:].tolist(), repeat(k), range(ctx.strategy.allowed_min_bars, len(ctx.ts)))
+            for k, ctx in enumerate(self.contexts)
+        ]
+        return heapq.merge(*streams)
+
+    # ===================================================
+    # ? Запуск портфельного бэктеста
+    # ===================================================
+    def run(self):
+        current_ts = None
+        current_dt = None
+        touched = []  # монеты с баром на текущей метке времени
+        for ts, k, i in self._events():
+            if current_ts is not None and ts != current_ts:
+                self._on_timestamp(current_dt, touched)
+                touched = []
+            current_ts = ts
+            current_dt = self.contexts[k].arr[i][4]
+            self._on_bar(self.contexts[k], i)
+            touched.append(self.contexts[k])
+
+        if current_ts is not None:
+            self._on_timestamp(current_dt, touched)
+
+        if self.skipped_entries:
+            self.logger.info(f"Портфель: отклонено входов из-за лимитов: {self.skipped_entries}")
+
+    # ------------------------
+    # Один бар HTF одной монеты
+    # ------------------------
+    def _on_bar(self, ctx: SymbolContext, i: int):
+        arr = ctx.arr
+        bar = arr[i]
+        allowed = ctx.strategy.allowed_min_bars
+
+        signal = ctx.strategy.find_entry_point(arr[i - allowed:i])
+        if signal.signal_type in (SignalType.ENTRY, SignalType.HEDGE_OPEN) and not self._can_open(ctx):
+            self.skipped_entries += 1
+            signal = Signal.no_signal()
+
+        ctx.positions = ctx.signal_handler.handle(signal, ctx.positions, bar)
+
+        if len(ctx.positions) > 0:
+            ctx.execution_loop.run(ctx.bars_1m(i))
+
+        # позиции монеты открываются и закрываются только на ее баре
+        opened = len(ctx.open_positions()) - ctx.open_count
+        if opened:
+            ctx.open_count += opened
+            self.open_count += opened
+            self.used_margin += ctx.margin * opened
+            if ctx.open_count:
+                self.holding[ctx] = None
+            else:
+                self.holding.pop(ctx, None)
+
+        ctx.last_high = Decimal(str(bar[1]))
+        ctx.last_low = Decimal(str(bar[2]))
+
+    # ------------------------
+    # Проверка общих лимитов перед открытием позиции
+    # ------------------------
+    def _can_open(self, ctx: SymbolContext) -> bool:
+        if self.open_count >= self.max_positions:
+            return False
+        return self.portfolio.balance - self.used_margin >= ctx.margin
+
+    # ------------------------
+    # Обновление общего портфеля по метке времени
+    # ------------------------
+    def _on_timestamp(self, bar_time, touched: list):
+        # исполнения появляются только на баре монеты
+        realized = Decimal("0")
+        for ctx in touched:
+            realized += ctx.collect_realized()
+        floating = Decimal("0")
+        for ctx in self.holding:
+            floating += ctx.floating()
+        self.portfolio.on_bar(bar_time, realized, floating)
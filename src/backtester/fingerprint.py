@@ -0,0 +1,96 @@
+# отпечатки конфигурации и данных бэктеста
+
+# src/backtester/fingerprint.py
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+
+# ------------------------
+# Отпечаток настроек (словарь -> короткий hex)
+# ------------------------
+def config_fingerprint(payload: dict) -> str:
+    raw = json.dumps(payload, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+# ------------------------
+# Отпечаток содержимого файла данных
+# ------------------------
+_file_fingerprints = {}  # (путь, размер, mtime) -> хеш: файл не перечитывается, пока не изменился
+
+
+def file_fingerprint(path) -> str:
+    """sha256 содержимого файла (None, если файла нет)."""
+    if not os.path.exists(path):
+        return None
+    stat = os.stat(path)
+    memo_key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    if memo_key not in _file_fingerprints:
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        _file_fingerprints[memo_key] = h.hexdigest()
+    return _file_fingerprints[memo_key]
+
+
+# ------------------------
+# Версия движка: хеш исходников, от которых зависит результат бэктеста
+# ------------------------
+ENGINE_SOURCES = (
+    "src/backtester/engine",
+    "src/backtester/trading",
+    "src/backtester/portfolio",
+    "src/backtester/runner.py",
+    "src/trading_engine",
+    "src/logical/strategy",
+    "src/logical/indicators",
+    "src/data_fetcher/resample.py",
+)
+_engine_version = None
+
+
+def engine_version() -> str:
+    global _engine_version
+    if _engine_version is None:
+        root = Path(__file__).resolve().parents[2]
+        h = hashlib.sha256()
+        for source in ENGINE_SOURCES:
+            path = root / source
+            files = sorted(path.rglob("*.py")) if path.is_dir() else [path]
+            for file in files:
+                h.update(str(file.relative_to(root)).encode("utf-8"))
+                h.update(file.read_bytes())
+        _engine_version = h.hexdigest()[:16]
+    return _engine_version
+
+
+# ------------------------
+# Отпечаток обработанной части данных
+# ------------------------
+def data_fingerprint(arr, cursor: int, ohlcv_1m: pd.DataFrame, window_end) -> str:
+    """
+    Хеш баров HTF [0..cursor] и минутных баров до конца окна исполнения бара cursor (включительно).
+    Если на этом участке изменилась хоть одна цена или метка времени — отпечаток другой.
+
+    :param arr: массив баров BacktestEngine (open, high, low, close, dt)
+    :param cursor: индекс последнего обработанного бара
+    :param ohlcv_1m: минутные данные
+    :param window_end: конец окна исполнения бара cursor
+    """
+    h = hashlib.sha256()
+
+    htf = arr[:cursor + 1]
+    h.update(np.ascontiguousarray(htf[:, :4], dtype=np.float64).tobytes())
+    h.update(pd.DatetimeIndex(htf[:, 4]).asi8.tobytes())
+
+    n_1m = ohlcv_1m.index.searchsorted(pd.Timestamp(window_end), side="right")
+    h.update(np.ascontiguousarray(ohlcv_1m[["open", "high", "low", "close"]].to_numpy()[:n_1m], dtype=np.float64).tobytes())
+    h.update(ohlcv_1m.index[:n_1m].asi8.tobytes())
+
+    return h.hexdigest()
@@ -12,7 +12,9 @@ class SummaryCollector:
         metrics: dict,
         test_id: str,
         portfolio: dict,
-        report_path: str
+        report_path: str,
+        cached: bool = False,
+        stats: dict = None,
     ):
         self.data.setdefault(symbol, [])
         self.data[symbol].append({
@@ -22,4 +24,6 @@ class SummaryCollector:
             "portfolio": portfolio,
             "report_path": report_path,
             "test_id": test_id,
+            "cached": cached,  # результат взят из кеша без пересчета
+            "stats": stats,  # замеры по этапам (если включены)
         })
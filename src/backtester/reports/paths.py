@@ -14,3 +14,8 @@ def build_test_report_path(symbol: str, timeframe: str) -> Path:
 def build_summary_report_path() -> Path:
     ensure_dir(BASE_REPORT_DIR)
     return BASE_REPORT_DIR / "summary.html"
+
+def build_checkpoint_dir(base_dir: str, symbol: str, timeframe: str) -> Path:
+    path = Path(base_dir) / f"{symbol}_TF-{timeframe}"
+    ensure_dir(path)
+    return path
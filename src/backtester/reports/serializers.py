@@ -6,7 +6,7 @@ def serialize_meta(meta):
 
 def serialize_order(order):
     return {
-        "id": order.id,
+        "id": str(order.id),
         "order_type": order.order_type.name,
         "status": order.status.name,
         "price": float(order.price),
@@ -21,7 +21,7 @@ def serialize_order(order):
 
 def serialize_position(position):
     return {
-        "id": position.id,
+        "id": str(position.id),
         "symbol": position.symbol,
         "direction": position.direction.name,
         "status": position.status.name,
@@ -29,6 +29,7 @@ class TestReportGenerator:
         portfolio=dict,
         positions,
         output_path: Path,
+        memory: dict = None,
     ):
         template = self.env.get_template("v2/report_coin.html")
 
@@ -41,6 +42,7 @@ class TestReportGenerator:
             portfolio=portfolio,
             settings=self.settings_test,
             positions=serialize_positions(positions),
+            memory=memory,
         )
 
         output_path.write_text(html, encoding="utf-8")
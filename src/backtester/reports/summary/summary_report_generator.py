@@ -16,12 +16,13 @@ class SummaryReportGenerator:
         )
         self.settings_test = settings_test
 
-    def generate(self, summary_data: dict, output_path: Path):
+    def generate(self, summary_data: dict, output_path: Path, stats: dict = None):
         template = self.env.get_template("v2/report_summary.html")
 
         html = template.render(
             coins=summary_data,
             settings=self.settings_test,
+            stats=stats,
             generated_at=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
         )
 
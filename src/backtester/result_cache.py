@@ -0,0 +1,86 @@
+# кеш результатов бэктеста
+
+# src/backtester/result_cache.py
+from pathlib import Path
+from typing import Optional
+
+from src.backtester.engine.checkpoint import CheckpointManager
+from src.backtester.fingerprint import config_fingerprint, engine_version, file_fingerprint
+from src.data_fetcher.catalog import DataCatalog
+
+# Логирование
+# ====================================================
+from src.utils.logger import get_logger
+logger = get_logger(__name__)
+
+# версия формата записи кеша
+CACHE_VERSION = 1
+
+
+# ------------------------
+# Отпечаток файла данных: хеш содержимого из каталога данных, без чтения файла
+# ------------------------
+def series_fingerprint(path) -> Optional[str]:
+    entry = DataCatalog.for_path(path).entry(path) if Path(path).exists() else None
+    return f"catalog:{entry['hash']}" if entry else file_fingerprint(path)
+
+
+# ------------------------
+# Ключ кеша одного теста
+# ------------------------
+def build_cache_key(data_files: dict, coin: dict, settings_test: dict, settings_strategy: dict) -> Optional[str]:
+    """
+    Ключ зависит только от входов бэктеста:
+        - содержимое файлов данных (1m и HTF)
+        - период (START_DATE, END_DATE, FULL_DATAFILE)
+        - STRATEGY_SETTINGS (включая FIBONACCI_LEVELS) и параметры монеты
+        - версия движка (хеш исходников)
+    None — если какого-то файла данных нет (кешировать нечего).
+    :param data_files: {таймфрейм: путь к файлу данных}
+    """
+    data = {tf: series_fingerprint(path) for tf, path in data_files.items()}
+    if None in data.values():
+        return None
+    return config_fingerprint({
+        "version": CACHE_VERSION,
+        "data": data,
+        "start_date": settings_test.get("START_DATE"),
+        "end_date": settings_test.get("END_DATE"),
+        "full_datafile": settings_test.get("FULL_DATAFILE"),
+        "strategy": settings_strategy,
+        "coin": coin,
+        "engine": engine_version(),
+    })
+
+
+# -------------------------------------------------
+# Класс ResultCache
+# -------------------------------------------------
+class ResultCache:
+    """
+    Кеш результатов по содержимому: directory/<ключ[:2]>/<ключ>.pkl.
+    Хранит результат run_backtest целиком: метрики, позиции с ордерами (журнал сделок)
+    и портфель с кривыми equity / drawdown — этого достаточно, чтобы заново построить отчет.
+    """
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.pkl"
+
+    def get(self, key: str) -> Optional[dict]:
+        if key is None:
+            return None
+        entry = CheckpointManager._read(self._path(key))
+        if not entry or entry.get("version") != CACHE_VERSION:
+            return None
+        return entry["result"]
+
+    def put(self, key: str, result: dict):
+        if key is None:
+            return
+        # статистика чекпоинтов и памяти относится к конкретному запуску и в кеш не попадает
+        result = {k: v for k, v in result.items() if k not in ("checkpoint", "memory")}
+        CheckpointManager._write_atomic(self._path(key), {"version": CACHE_VERSION, "result": result})
+        logger.debug(f"Результат сохранен в кеш: {self._path(key)}")
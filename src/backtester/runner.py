@@ -1,14 +1,16 @@
 # src/backtester/runner.py
 from src.backtester.engine.backtest_engine import BacktestEngine
 from src.backtester.engine.execution_loop import ExecutionLoop
+from src.backtester.engine.portfolio_engine import PortfolioBacktestEngine, SymbolContext
 from src.backtester.trading.position_builder import PositionBuilder
 from src.backtester.trading.signal_handler import SignalHandler
 from src.backtester.portfolio.portfolio import Portfolio
 from src.backtester.portfolio.metrics import MetricsCalculator
+from src.utils.logger_time import NULL_INSTRUMENTATION
 
 
 # Запуск бэктеста
-def run_backtest(data, data_1m, coin, strategy, position_manager, engine, logger):
+def run_backtest(data, data_1m, coin, strategy, position_manager, engine, logger, checkpoint=None, instrumentation=None):
     """
     Запускает бэктест. Возвращает результаты бэктеста.
     :param data: исторические данные для бэктеста (DataFrame)
@@ -18,6 +20,8 @@ def run_backtest(data, data_1m, coin, strategy, position_manager, engine, logger
     :param manager: менеджер позиций (из конфига) (PositionManager)
     :param engine: объект исполнителя (из конфига) (ExecutionEngine)    
     :param logger: объект логирования (из конфига) (Logger)
+    :param checkpoint: менеджер чекпоинтов (необязательно) (CheckpointManager)
+    :param instrumentation: замеры по этапам (необязательно) (Instrumentation)
     :return: результаты бэктеста (dict)
     """
     # хранит информацию о PnL, балансе и т.д.
@@ -35,14 +39,66 @@ def run_backtest(data, data_1m, coin, strategy, position_manager, engine, logger
         exec_loop,
         signal_handler,
         portfolio,
-        logger
+        logger,
+        instrumentation
     )
 
-    bt.run(data, data_1m, coin["TIMEFRAME"])
+    with (instrumentation or NULL_INSTRUMENTATION).stage("backtest"):
+        bt.run(data, data_1m, coin["TIMEFRAME"], checkpoint=checkpoint)
 
     return {
         "test_id": position_manager.id,
         "positions": position_manager.positions,
         "portfolio": portfolio,
-        "metrics": MetricsCalculator.from_positions(position_manager.positions)
+        "metrics": MetricsCalculator.from_positions(position_manager.positions),
+        "checkpoint": checkpoint.report() if checkpoint is not None else None,
+    }
+
+
+# Запуск портфельного бэктеста (все монеты на общем балансе)
+def run_portfolio_backtest(tasks, timeframe, start_deposit, max_positions, logger, execution_mode="bar"):
+    """
+    Запускает портфельный бэктест. Возвращает результаты в том же формате, что и run_backtest.
+    :param tasks: список (coin, data, data_1m) — монета из конфига и ее данные HTF / 1м (list)
+    :param timeframe: торговый таймфрейм (str)
+    :param start_deposit: общий начальный депозит (Decimal)
+    :param max_positions: максимум одновременно открытых позиций по всем монетам (int)
+    :param logger: объект логирования (Logger)
+    :param execution_mode: режим исполнения ExecutionEngine ("bar" / "batch") (str)
+    :return: результаты бэктеста (dict) и skipped_entries — число входов, отклоненных общими лимитами
+    """
+    # импортируем здесь чтобы избежать циклических импортов
+    from src.backtester.engine.execution_engine import ExecutionEngine
+    from src.logical.strategy.zigzag_fibo.zigzag_and_fibo import ZigZagAndFibo
+    from src.trading_engine.managers.position_manager import PositionManager
+
+    portfolio = Portfolio(start_deposit)
+    contexts = []
+    for coin, data, data_1m in tasks:
+        coin = dict(coin, TIMEFRAME=timeframe)
+        manager = PositionManager()
+        builder = PositionBuilder(manager, coin)
+        contexts.append(SymbolContext(
+            coin=coin,
+            ohlcv=data,
+            ohlcv_1m=data_1m,
+            timeframe=timeframe,
+            strategy=ZigZagAndFibo(coin),
+            manager=manager,
+            signal_handler=SignalHandler(manager, builder, logger),
+            execution_loop=ExecutionLoop(ExecutionEngine(manager, mode=execution_mode)),
+        ))
+
+    engine = PortfolioBacktestEngine(contexts, portfolio, max_positions, logger)
+    engine.run()
+
+    positions = {pid: p for ctx in contexts for pid, p in ctx.manager.positions.items()}
+    metrics = MetricsCalculator.from_positions(positions)
+    metrics["max_drawdown"] = min(portfolio.drawdown_curve) * 100 if portfolio.drawdown_curve else 0
+    return {
+        "test_id": "portfolio_" + "_".join(ctx.symbol for ctx in contexts),
+        "positions": positions,
+        "portfolio": portfolio,
+        "metrics": metrics,
+        "skipped_entries": engine.skipped_entries,
     }
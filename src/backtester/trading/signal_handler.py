@@ -4,6 +4,9 @@
 from src.trading_engine.signals.signal import Signal
 from src.trading_engine.core.enums import SignalType
 from typing import Dict
+import logging
+
+from src.utils.logger import log_event
 
 # Обработчик сигналов стратегии.
 # Отвечает за открытие, закрытие и изменение позиций
@@ -23,7 +26,9 @@ class SignalHandler:
     def handle(self, signal: Signal, positions: Dict[str, object], bar) -> Dict[str, object]:
         # !--- 1. NO SIGNAL ---
         if signal.is_no_signal():
-            self.logger.debug(f"Обработка сигнала: {signal.signal_type}, Позиции: {list(positions.keys())}")
+            # список позиций строится только при включенном DEBUG (метод вызывается на каждом баре)
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug("Обработка сигнала: %s, Позиции: %s", signal.signal_type, list(positions.keys()))
             return positions
         
         # self.logger.debug(f"Обработка сигнала: {signal.signal_type}, Позиции: {list(positions.keys())}")
@@ -57,7 +62,7 @@ class SignalHandler:
                 self.logger.debug("ENTRY пропущен — позиция уже существует")
                 return positions
 
-        self.logger.info("ENTRY: открытие новой позиции")
+        log_event(self.logger, "signal_entry", "ENTRY: открытие новой позиции")
 
         position = self.builder.build(signal, bar)
 
@@ -70,7 +75,7 @@ class SignalHandler:
     # ? EXIT — закрытие всех позиций источника
     # ==================================================
     def _handle_exit(self, signal: Signal, positions, bar):
-        self.logger.info("EXIT: закрытие позиций")
+        log_event(self.logger, "signal_exit", "EXIT: закрытие позиций")
         for pos_id, pos in list(positions.items()):
             if signal.source and pos.source != signal.source:
                 continue
@@ -95,7 +100,7 @@ class SignalHandler:
                 self.logger.debug("HEDGE уже существует")
                 return positions
 
-        self.logger.info("HEDGE_OPEN: открытие хедж позиции")
+        log_event(self.logger, "signal_hedge_open", "HEDGE_OPEN: открытие хедж позиции")
 
         if signal.direction is None or signal.price is None:
             self.logger.error("HEDGE_OPEN пропущен — отсутствует направление или цена")
@@ -124,7 +129,7 @@ class SignalHandler:
     # ==================================================
     def _handle_hedge_close(self, signal: Signal, positions, bar):
 
-        self.logger.info("HEDGE_CLOSE")
+        log_event(self.logger, "signal_hedge_close", "HEDGE_CLOSE")
 
         for pos_id, pos in list(positions.items()):
             if pos.is_hedge:
@@ -0,0 +1,308 @@
+# набор бенчмарков горячих участков бэктестера
+
+# src/benchmarks/suite.py
+"""
+Запуск (из корня проекта, рядом с configs/):
+    python -m src.benchmarks.suite --years 0.1 --save-baseline    # записать базовую линию
+    python -m src.benchmarks.suite --years 0.1 --threshold 0.25   # сравнить с базовой линией
+
+Код возврата 1, если хотя бы один бенчмарк медленнее базовой линии больше чем на threshold.
+"""
+import argparse
+import json
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from src.benchmarks.synthetic import generate_ohlcv, resample_ohlcv
+
+# Логирование
+# ====================================================
+from src.utils.logger import get_logger
+logger = get_logger(__name__)
+
+RESULTS_VERSION = 1
+
+# монета для синтетических данных
+BENCH_COIN = {
+    "SYMBOL": "BENCH",
+    "MARKET_TYPE": "linear",
+    "START_DEPOSIT_USDT": 1000,
+    "MINIMAL_TICK_SIZE": 0.01,
+    "LEVERAGE": 5,
+    "VOLUME_SIZE": 1000,
+}
+
+
+# -------------------------------------------------
+# Реестр бенчмарков
+# -------------------------------------------------
+BENCHMARKS = {}
+
+
+def benchmark(name: str, number: int = 1):
+    """
+    Регистрирует бенчмарк. Функция получает BenchmarkContext, выполняет подготовку
+    и возвращает функцию без аргументов — замеряется только она (number вызовов за замер).
+    """
+    def decorator(setup):
+        BENCHMARKS[name] = (setup, number)
+        return setup
+    return decorator
+
+
+# -------------------------------------------------
+# Общие данные бенчмарков
+# -------------------------------------------------
+class BenchmarkContext:
+    def __init__(self, years: float, volatility: float, seed: int, timeframe: str, workdir: Path):
+        self.timeframe = timeframe
+        self.coin = dict(BENCH_COIN, TIMEFRAME=timeframe)
+        self.workdir = workdir
+        self.data_1m = generate_ohlcv(years=years, volatility=volatility, seed=seed)
+        self.data_htf = resample_ohlcv(self.data_1m, timeframe)
+        self._backtest_result = None
+
+    def htf_array(self):
+        # массив баров в формате BacktestEngine: open, high, low, close, dt
+        arr = self.data_htf[["open", "high", "low", "close"]].copy()
+        arr["dt"] = self.data_htf.index.to_numpy()
+        return arr.to_numpy()
+
+    def backtest_result(self):
+        # результат полного бэктеста считается один раз и переиспользуется (отчет)
+        if self._backtest_result is None:
+            self._backtest_result = _run_backtest(self)
+        return self._backtest_result
+
+
+def _run_backtest(ctx: BenchmarkContext):
+    from src.backtester.runner import run_backtest
+    from src.backtester.engine.execution_engine import ExecutionEngine
+    from src.logical.strategy.zigzag_fibo.zigzag_and_fibo import ZigZagAndFibo
+    from src.trading_engine.managers.position_manager import PositionManager
+
+    manager = PositionManager()
+    return run_backtest(
+        data=ctx.data_htf,
+        data_1m=ctx.data_1m,
+        coin=ctx.coin,
+        strategy=ZigZagAndFibo(ctx.coin),
+        position_manager=manager,
+        engine=ExecutionEngine(manager),
+        logger=logger,
+    )
+
+
+# ===================================================
+# ? Бенчмарки
+# ===================================================
+@benchmark("zigzag.calculate_zigzag", number=5)
+def bench_zigzag(ctx):
+    from src.logical.indicators.zigzag import ZigZag
+    from src.logical.strategy.zigzag_fibo.zigzag_and_fibo import ZigZagAndFibo
+
+    window = ctx.data_htf[["open", "high", "low", "close"]].iloc[-ZigZagAndFibo(ctx.coin).allowed_min_bars:]
+    zigzag = ZigZag(ctx.coin)
+    return lambda: zigzag.calculate_zigzag(window)
+
+
+@benchmark("fibonacci_levels", number=1000)
+def bench_fibonacci(ctx):
+    from src.logical.indicators.fibonacci import fibonacci_levels
+
+    low, high = float(ctx.data_htf["low"].min()), float(ctx.data_htf["high"].max())
+    return lambda: fibonacci_levels(low, high, 1)
+
+
+@benchmark("strategy.find_entry_point", number=5)
+def bench_find_entry_point(ctx):
+    from src.logical.strategy.zigzag_fibo.zigzag_and_fibo import ZigZagAndFibo
+
+    strategy = ZigZagAndFibo(ctx.coin)
+    window = ctx.htf_array()[-strategy.allowed_min_bars:]
+    return lambda: strategy.find_entry_point(window)
+
+
+@benchmark("execution_engine.process_bar")
+def bench_process_bar(ctx):
+    from src.backtester.engine.execution_engine import ExecutionEngine
+    from src.backtester.trading.position_builder import PositionBuilder
+    from src.trading_engine.core.enums import Direction, SignalSource
+    from src.trading_engine.managers.position_manager import PositionManager
+    from src.trading_engine.signals.signal import Signal
+
+    # позиция с ордерами, которые не исполняются: меряется проверка активных ордеров на каждом баре
+    bars = ctx.data_1m[["open", "high", "low", "close"]].iloc[:1440]
+    low = float(bars["low"].min())
+    entry = low * 0.5
+    signal = Signal.entry(
+        source=SignalSource.STRATEGY,
+        direction=Direction.LONG,
+        entry_price=entry,
+        take_profits=[{"price": entry * (1 + k / 100), "volume": 0.2} for k in range(1, 6)],
+        stop_losses=[{"price": entry * 0.9, "volume": 1}],
+    )
+    arr_1m = bars.assign(dt=bars.index.to_numpy()).to_numpy()
+
+    manager = PositionManager()
+    PositionBuilder(manager, ctx.coin).build(signal, arr_1m[0])
+    engine = ExecutionEngine(manager)
+
+    def run():
+        for bar in arr_1m:
+            engine.process_bar(bar, bar[4])
+    return run
+
+
+@benchmark("backtest_engine.run")
+def bench_backtest(ctx):
+    return lambda: _run_backtest(ctx)
+
+
+@benchmark("data_fetcher.load_from_csv")
+def bench_load_from_csv(ctx):
+    from src.data_fetcher.data_fetcher import DataFetcher
+
+    fetcher = DataFetcher(coin=ctx.coin, exchange={"EXCHANGE_ID": "bybit", "LIMIT": 1000}, directory=f"{ctx.workdir}/")
+    fetcher.export_to_csv(ctx.data_1m, "1")
+    return lambda: fetcher.load_from_csv(file_type="csv")
+
+
+@benchmark("report.generate")
+def bench_report(ctx):
+    from src.config.config import config
+    from src.backtester.reports.single_test.test_report_generator import TestReportGenerator
+
+    settings_test = config.get_section("BACKTEST_SETTINGS")
+    template_dir = settings_test.get("TEMPLATE_DIRECTORY", "")
+    if not Path(template_dir).is_dir():
+        template_dir = str(Path(__file__).resolve().parents[2] / "TEMPLATES")
+    result = ctx.backtest_result()
+    generator = TestReportGenerator(template_dir=template_dir, settings_test=settings_test)
+    output_path = ctx.workdir / "report.html"
+
+    return lambda: generator.generate(
+        symbol=ctx.coin["SYMBOL"],
+        timeframe=ctx.timeframe,
+        coin=ctx.coin,
+        test_id=result["test_id"],
+        metrics=result["metrics"],
+        portfolio=result["portfolio"],
+        positions=result["positions"],
+        output_path=output_path,
+    )
+
+
+# ===================================================
+# ? Запуск и сравнение
+# ===================================================
+def run_suite(
+    years: float = 0.1,
+    volatility: float = 0.002,
+    seed: int = 42,
+    timeframe: str = "4h",
+    repeat: int = 3,
+    only: list = None,
+) -> dict:
+    """Запускает бенчмарки и возвращает результаты (секунды на один вызов)."""
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        ctx = BenchmarkContext(years, volatility, seed, timeframe, Path(workdir))
+        for name, (setup, number) in BENCHMARKS.items():
+            if only and name not in only:
+                continue
+            fn = setup(ctx)
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                for _ in range(number):
+                    fn()
+                timings.append((time.perf_counter() - started) / number)
+            results[name] = {
+                "median_s": statistics.median(timings),
+                "min_s": min(timings),
+                "repeat": repeat,
+                "number": number,
+            }
+            logger.info(f"⏱ {name}: {results[name]['median_s'] * 1000:.3f} мс")
+
+    return {
+        "version": RESULTS_VERSION,
+        "created": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "params": {"years": years, "volatility": volatility, "seed": seed, "timeframe": timeframe},
+        "benchmarks": results,
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """
+    Сравнение с базовой линией по медиане.
+    Возвращает регрессии: [{"name", "baseline_s", "current_s", "ratio"}].
+    """
+    if baseline.get("params") != results.get("params"):
+        logger.warning(f"Параметры базовой линии отличаются: {baseline.get('params')} != {results.get('params')}")
+
+    regressions = []
+    for name, current in results["benchmarks"].items():
+        base = baseline.get("benchmarks", {}).get(name)
+        if base is None or base["median_s"] <= 0:
+            continue
+        ratio = current["median_s"] / base["median_s"]
+        if ratio > 1 + threshold:
+            regressions.append({
+                "name": name,
+                "baseline_s": base["median_s"],
+                "current_s": current["median_s"],
+                "ratio": round(ratio, 3),
+            })
+    return regressions
+
+
+def _write_json(path: Path, data: dict):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Бенчмарки бэктестера на синтетических данных")
+    parser.add_argument("--years", type=float, default=0.1, help="Длина синтетической истории в годах")
+    parser.add_argument("--volatility", type=float, default=0.002, help="Волатильность минутных доходностей")
+    parser.add_argument("--seed", type=int, default=42, help="Зерно генератора данных")
+    parser.add_argument("--timeframe", default="4h", help="Торговый таймфрейм")
+    parser.add_argument("--repeat", type=int, default=3, help="Количество замеров каждого бенчмарка")
+    parser.add_argument("--only", nargs="*", help="Запустить только указанные бенчмарки")
+    parser.add_argument("--output", default="BENCHMARKS/results.json", help="Файл результатов")
+    parser.add_argument("--baseline", default="BENCHMARKS/baseline.json", help="Файл базовой линии")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Допустимое замедление (0.25 = +25%%)")
+    parser.add_argument("--save-baseline", action="store_true", help="Сохранить результаты как базовую линию")
+    args = parser.parse_args(argv)
+
+    results = run_suite(args.years, args.volatility, args.seed, args.timeframe, args.repeat, args.only)
+    _write_json(Path(args.output), results)
+
+    baseline_path = Path(args.baseline)
+    if args.save_baseline:
+        _write_json(baseline_path, results)
+        logger.info(f"Базовая линия сохранена: {baseline_path}")
+        return 0
+    if not baseline_path.exists():
+        logger.warning(f"Базовая линия {baseline_path} не найдена, сравнение пропущено")
+        return 0
+
+    regressions = compare(results, json.loads(baseline_path.read_text(encoding="utf-8")), args.threshold)
+    for r in regressions:
+        logger.error(
+            f"❌ Регрессия {r['name']}: {r['baseline_s'] * 1000:.3f} мс -> {r['current_s'] * 1000:.3f} мс (x{r['ratio']})"
+        )
+    if regressions:
+        return 1
+    logger.info("✅ Регрессий производительности нет")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
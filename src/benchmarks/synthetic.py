@@ -0,0 +1,66 @@
+# синтетические OHLCV данные для бенчмарков
+
+# src/benchmarks/synthetic.py
+import numpy as np
+import pandas as pd
+
+MINUTES_PER_YEAR = 365 * 24 * 60
+
+# таймфреймы Bybit -> правило pandas.resample
+RESAMPLE_RULES = {
+    "1": "1min",
+    "5": "5min",
+    "15": "15min",
+    "30": "30min",
+    "60": "60min",
+    "240": "240min",
+    "4h": "4h",
+    "D": "1D",
+}
+
+
+# ------------------------
+# Минутные бары: геометрическое случайное блуждание
+# ------------------------
+def generate_ohlcv(
+    years: float = 1.0,
+    volatility: float = 0.002,
+    seed: int = 42,
+    start: str = "2024-01-01",
+    start_price: float = 100.0,
+) -> pd.DataFrame:
+    """
+    Детерминированные минутные свечи (одинаковый seed -> одинаковые данные).
+
+    :param years: длина истории в годах
+    :param volatility: стандартное отклонение минутной лог-доходности
+    :param seed: зерно генератора
+    :param start: дата первой свечи
+    :param start_price: цена открытия первой свечи
+    :return: DataFrame (open, high, low, close, volume) с индексом timestamp
+    """
+    rng = np.random.default_rng(seed)
+    n = max(1, int(years * MINUTES_PER_YEAR))
+
+    close = start_price * np.exp(np.cumsum(rng.normal(0.0, volatility, n)))
+    open_ = np.empty(n)
+    open_[0] = start_price
+    open_[1:] = close[:-1]
+    # тени свечей — доля волатильности
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0.0, volatility / 2, n)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0.0, volatility / 2, n)))
+    volume = rng.uniform(1.0, 100.0, n)
+
+    index = pd.date_range(start, periods=n, freq="1min", name="timestamp")
+    return pd.DataFrame({"open": open_, "high": high, "low": low, "close": close, "volume": volume}, index=index)
+
+
+# ------------------------
+# Свечи старшего таймфрейма из минутных
+# ------------------------
+def resample_ohlcv(df_1m: pd.DataFrame, timeframe: str) -> pd.DataFrame:
+    rule = RESAMPLE_RULES[timeframe]
+    df = df_1m.resample(rule, label="left", closed="left").agg(
+        {"open": "first", "high": "max", "low": "min", "close": "last", "volume": "sum"}
+    )
+    return df.dropna()
@@ -0,0 +1,390 @@
+# асинхронная загрузка свечей по многим монетам и таймфреймам
+
+# src/data_fetcher/async_downloader.py
+import asyncio
+import os
+import random
+import shutil
+import time
+from typing import Optional
+
+import ccxt
+import numpy as np
+import pandas as pd
+
+from src.data_fetcher.data_fetcher import TEN_YEARS_MS, DataFetcher, history_start_requests, window_requests
+from src.data_fetcher.resample import timeframe_ms
+from src.data_fetcher.storage.base import PRICE_COLUMNS, TIMESTAMP, arrays_to_frame, read_json, write_json_atomic
+
+# Логирование
+# ====================================================
+from src.utils.logger import get_logger
+logger = get_logger(__name__)
+
+# Лимиты публичного REST API по биржам: (запросов в секунду, всплеск).
+# Bybit: 600 запросов за 5 секунд на IP — 120/с, берем ~75% с запасом на прочие запросы с того же IP
+EXCHANGE_RATE_LIMITS = {
+    "bybit": (90.0, 30),
+}
+DEFAULT_RATE_LIMIT = (10.0, 5)
+
+# ошибки, после которых запрос повторяется (сеть, 429, биржа недоступна)
+RETRY_ERRORS = (ccxt.NetworkError,)
+
+
+# -------------------------------------------------
+# Класс TokenBucket - общий лимит запросов всех задач
+# -------------------------------------------------
+class TokenBucket:
+    """
+    rate токенов в секунду, не больше capacity в запасе.
+    acquire() ждет, пока токен появится; очередность — по порядку вызовов (asyncio.Lock).
+    """
+
+    def __init__(self, rate: float, capacity: int, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.clock = clock
+        self.updated = clock()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, cost: float = 1.0):
+        async with self._lock:
+            self._refill()
+            while self.tokens < cost:
+                await asyncio.sleep((cost - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= cost
+
+
+# ------------------------
+# Пауза перед повтором: экспонента с полным джиттером
+# ------------------------
+def backoff_delay(attempt: int, base: float = 0.5, cap: float = 30.0, rng=random) -> float:
+    return rng.uniform(0, min(cap, base * 2 ** attempt))
+
+
+# -------------------------------------------------
+# Класс AsyncDownloader
+# -------------------------------------------------
+class AsyncDownloader:
+    """
+    Загрузка свечей на ccxt.async_support:
+        - один экземпляр биржи (одна HTTP-сессия aiohttp) на все задачи
+        - общий TokenBucket вместо паузы rateLimit после каждой страницы
+        - задачи (монета, таймфрейм) идут параллельно, не больше concurrency одновременно;
+          страницы внутри задачи — последовательно (пагинация назад по until, как в DataFetcher)
+        - новая серия (данных еще нет) загружается shards шардами по времени параллельно (_spool):
+          начальная загрузка истории быстрее примерно в shards раз;
+          шарды пишут порции по flush_rows свечей на диск, позиция каждого шарда — в cursor_path серии,
+          так что в памяти не больше flush_rows свечей на шард, а прерванная загрузка продолжается
+          (в том числе начатая DataFetcher.download_history)
+        - у существующей серии догружаются только новые свечи (fetch_history)
+        - сетевые ошибки и 429 повторяются с экспоненциальной паузой и джиттером
+
+    exchange — готовый асинхронный объект биржи (например, поддельная биржа в тестах);
+    по умолчанию создается ccxt.async_support.<EXCHANGE_ID>.
+    """
+
+    def __init__(self, exchange_settings: dict, directory: str, exchange=None,
+                 rate: Optional[float] = None, burst: Optional[int] = None,
+                 concurrency: int = 8, shards: int = 1, max_retries: int = 5, backoff_base: float = 0.5,
+                 flush_rows: int = 50_000):
+        self.exchange_settings = exchange_settings
+        self.directory = directory
+        self.exchange = exchange
+        self._own_exchange = exchange is None
+        exchange_id = exchange_settings.get("EXCHANGE_ID", "").lower()
+        default_rate, default_burst = EXCHANGE_RATE_LIMITS.get(exchange_id, DEFAULT_RATE_LIMIT)
+        self.rate = rate or exchange_settings.get("REQUESTS_PER_SECOND", default_rate)
+        self.burst = burst or default_burst
+        self.concurrency = concurrency
+        self.shards = shards
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.flush_rows = flush_rows
+        self.limit = exchange_settings.get("LIMIT") or 1000
+        self.stats = {"requests": 0, "retries": 0, "failed": 0}
+
+    def _create_exchange(self):
+        import ccxt.async_support as ccxt_async
+
+        exchange_class = getattr(ccxt_async, self.exchange_settings.get("EXCHANGE_ID").lower())
+        # свой лимитер: встроенный в ccxt сериализовал бы все запросы
+        exchange = exchange_class({"enableRateLimit": False})
+        if self.exchange_settings.get("API_URL"):
+            DataFetcher.set_api_url(exchange, self.exchange_settings["API_URL"])
+        return exchange
+
+    # ------------------------
+    # Один запрос с повторами
+    # ------------------------
+    async def _request(self, bucket: TokenBucket, symbol: str, timeframe: str, until_ms: int,
+                       since_ms: Optional[int] = None) -> list:
+        # since=None — последние limit свечей до until (пагинация назад)
+        if since_ms is None:
+            since_ms = until_ms - TEN_YEARS_MS
+        attempt = 0
+        while True:
+            await bucket.acquire()
+            self.stats["requests"] += 1
+            try:
+                return await self.exchange.fetch_ohlcv(
+                    symbol=symbol,
+                    timeframe=timeframe,
+                    since=since_ms,
+                    limit=self.limit,
+                    params={"until": until_ms},
+                )
+            except RETRY_ERRORS as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = backoff_delay(attempt, base=self.backoff_base)
+                attempt += 1
+                self.stats["retries"] += 1
+                logger.warning("[%s %s] %s: повтор %d через %.2f с", symbol, timeframe, type(e).__name__, attempt, delay)
+                await asyncio.sleep(delay)
+
+    # ------------------------
+    # Пагинация назад от текущего момента до stop_ms (включительно)
+    # ------------------------
+    async def fetch_history(self, bucket: TokenBucket, symbol: str, timeframe: str,
+                            stop_ms: Optional[int] = None, until_ms: Optional[int] = None):
+        until_ms = until_ms if until_ms is not None else int(time.time() * 1000)
+        stop_ms = stop_ms or 0
+        all_ohlcv = []
+        while True:
+            chunk = await self._request(bucket, symbol, timeframe, until_ms)
+            if not chunk or len(chunk) < 2:
+                break
+            if chunk[0][0] <= stop_ms:
+                all_ohlcv.extend(candle for candle in chunk if candle[0] >= stop_ms)
+                break
+            all_ohlcv.extend(chunk)
+            until_ms = chunk[0][0] - 1
+        return DataFetcher.candles_to_frame(all_ohlcv) if all_ohlcv else None
+
+    # ------------------------
+    # Загрузка диапазона шардами: параллельно, пагинация вперед внутри шарда
+    # ------------------------
+    async def _run_requests(self, bucket: TokenBucket, symbol: str, requests):
+        # план запросов DataFetcher (history_start_requests, window_requests) через общий лимит запросов
+        try:
+            request = next(requests)
+            while True:
+                timeframe, since_ms, until_ms = request
+                request = requests.send(await self._request(bucket, symbol, timeframe, until_ms, since_ms=since_ms))
+        except StopIteration as stop:
+            return stop.value
+
+    async def first_candle_ms(self, bucket: TokenBucket, symbol: str) -> Optional[int]:
+        return await self._run_requests(bucket, symbol, history_start_requests(int(time.time() * 1000)))
+
+    async def _fetch_shard(self, bucket: TokenBucket, symbol: str, timeframe: str, start_ms: int, end_ms: int) -> list:
+        # окно запроса [since, since + limit баров) (window_requests): следующий since известен заранее
+        # и не зависит от ответа (пропуски у биржи не сбивают шаг)
+        window = self.limit * timeframe_ms(timeframe)
+        candles = []
+        since = start_ms
+        while since < end_ms:
+            until = min(since + window, end_ms) - 1
+            candles.extend(await self._run_requests(bucket, symbol, window_requests(timeframe, since, until)))
+            since += window
+        return candles
+
+    def _shard_bounds(self, timeframe: str, start_ms: int, end_ms: int, shards: int) -> list:
+        # границы шардов выровнены по окну запроса (limit баров): [start, b1, ..., end]
+        step = timeframe_ms(timeframe)
+        window = self.limit * step
+        start_ms -= start_ms % step
+        windows = max(1, -(-(end_ms - start_ms) // window))
+        shards = max(1, min(shards, windows))
+        return [start_ms + window * (windows * i // shards) for i in range(shards)] + [end_ms]
+
+    async def fetch_range_sharded(self, bucket: TokenBucket, symbol: str, timeframe: str,
+                                  start_ms: int, end_ms: int, shards: int = 4):
+        """
+        Свечи [start_ms, end_ms) по shards параллельным шардам.
+        Границы шардов выровнены по окну запроса (limit баров), шарды склеиваются по порядку
+        с удалением дубликатов, затем проверяется стык каждой пары соседних шардов.
+        :return: (DataFrame или None, [{"boundary", "prev", "next"}] — разрывы на стыках)
+        """
+        step = timeframe_ms(timeframe)
+        bounds = self._shard_bounds(timeframe, start_ms, end_ms, shards)
+
+        parts = await asyncio.gather(*(
+            self._fetch_shard(bucket, symbol, timeframe, lo, hi) for lo, hi in zip(bounds, bounds[1:])
+        ))
+        all_ohlcv = [candle for part in parts for candle in part]
+        if not all_ohlcv:
+            return None, []
+        df = DataFetcher.candles_to_frame(all_ohlcv)
+
+        # стык шардов: последняя свеча до границы и первая после должны быть соседними
+        ts = df.index.asi8 // 1_000_000
+        gaps = []
+        for boundary in bounds[1:-1]:
+            i = int(ts.searchsorted(boundary))
+            if 0 < i < len(ts) and ts[i] - ts[i - 1] != step:
+                gaps.append({"boundary": boundary, "prev": int(ts[i - 1]), "next": int(ts[i])})
+        for gap in gaps:
+            logger.warning(
+                "[%s %s] разрыв на стыке шардов %s: %s -> %s", symbol, timeframe,
+                pd.Timestamp(gap["boundary"], unit="ms"), pd.Timestamp(gap["prev"], unit="ms"), pd.Timestamp(gap["next"], unit="ms"),
+            )
+        return df, gaps
+
+    # ------------------------
+    # Загрузка истории шардами с записью порций на диск и продолжением после обрыва
+    # ------------------------
+    async def _spool_shard(self, bucket: TokenBucket, fetcher: DataFetcher, timeframe: str, state: dict, i: int):
+        # окна как в _fetch_shard; каждые flush_rows свечей — порция в spool_dir и позиция шарда в курсоре
+        shard = state["shards"][i]
+        window = self.limit * timeframe_ms(timeframe)
+        spool = fetcher.spool_dir(timeframe)
+        buffer = []
+        since = shard["next_ms"]
+        while since < shard["hi"]:
+            until = min(since + window, shard["hi"]) - 1
+            buffer.extend(await self._run_requests(bucket, fetcher.symbol, window_requests(timeframe, since, until)))
+            since += window
+            if len(buffer) >= self.flush_rows or since >= shard["hi"]:
+                if buffer:
+                    name = f"{i:03d}_{len(shard['chunks']):06d}.npy"
+                    await asyncio.to_thread(np.save, os.path.join(spool, name), np.asarray(buffer, dtype=np.float64))
+                    shard["chunks"].append(name)
+                    buffer = []
+                shard["next_ms"] = since
+                state["updated_at"] = int(time.time() * 1000)
+                # один цикл событий: курсор пишется между await, состояние шардов согласовано
+                write_json_atomic(fetcher.cursor_path(timeframe), state)
+
+    def _download_state(self, fetcher: DataFetcher, timeframe: str, start_ms: int, end_ms: int) -> dict:
+        bounds = self._shard_bounds(timeframe, start_ms, end_ms, self.shards)
+        return {
+            "timeframe": timeframe,
+            "start_ms": bounds[0],
+            "end_ms": end_ms,
+            "shards": [{"lo": lo, "hi": hi, "next_ms": lo, "chunks": []} for lo, hi in zip(bounds, bounds[1:])],
+            "updated_at": int(time.time() * 1000),
+        }
+
+    async def _spool(self, bucket: TokenBucket, fetcher: DataFetcher, timeframe: str) -> Optional[dict]:
+        """
+        Загрузка шардов в spool_dir; возвращает курсор (все шарды загружены) или None — истории нет.
+        Ошибка ccxt пробрасывается после остановки всех шардов: позиции уже сохранены в курсоре.
+        """
+        cursor_path = fetcher.cursor_path(timeframe)
+        state = read_json(cursor_path)
+        if state and "shards" in state:
+            logger.info(f"[{fetcher.symbol}] {timeframe}: продолжение загрузки шардами с сохраненных позиций")
+        elif state:
+            # позиция последовательной загрузки DataFetcher.download_history: остаток диапазона — шардами
+            state = self._download_state(fetcher, timeframe, state["next_ms"], state["end_ms"])
+        else:
+            start_ms = await self.first_candle_ms(bucket, fetcher.symbol)
+            if start_ms is None:
+                return None
+            state = self._download_state(fetcher, timeframe, start_ms, int(time.time() * 1000))
+        os.makedirs(fetcher.spool_dir(timeframe), exist_ok=True)
+        write_json_atomic(cursor_path, state)
+
+        results = await asyncio.gather(*(
+            self._spool_shard(bucket, fetcher, timeframe, state, i)
+            for i, shard in enumerate(state["shards"]) if shard["next_ms"] < shard["hi"]
+        ), return_exceptions=True)
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        return state
+
+    async def _merge_spool(self, fetcher: DataFetcher, timeframe: str, formats, state: dict) -> int:
+        """
+        Порции шардов по порядку времени дописываются в хранилище (store_update): в памяти одна порция.
+        Записанная порция удаляется из курсора и с диска; повтор порции после обрыва безопасен —
+        _append_csv дописывает только свечи не старше последней сохраненной.
+        """
+        step = timeframe_ms(timeframe)
+        spool = fetcher.spool_dir(timeframe)
+        cursor_path = fetcher.cursor_path(timeframe)
+        added = 0
+        for shard in state["shards"]:
+            boundary = True
+            while shard["chunks"]:
+                name = shard["chunks"][0]
+                candles = np.load(os.path.join(spool, name))
+                # свечи порции уже упорядочены по времени (окна шарда идут вперед)
+                df = arrays_to_frame({TIMESTAMP: candles[:, 0].astype(np.int64),
+                                      **{col: candles[:, j + 1] for j, col in enumerate(PRICE_COLUMNS)}})
+                last_ms = fetcher.last_stored_timestamp(timeframe, "csv")
+                # стык шардов: последняя записанная свеча и первая свеча шарда должны быть соседними
+                first_ms = int(candles[0, 0])
+                if boundary and last_ms is not None and first_ms - last_ms > step:
+                    logger.warning(
+                        "[%s %s] разрыв на стыке шардов %s: %s -> %s", fetcher.symbol, timeframe,
+                        pd.Timestamp(shard["lo"], unit="ms"), pd.Timestamp(last_ms, unit="ms"), pd.Timestamp(first_ms, unit="ms"),
+                    )
+                boundary = False
+                added += await asyncio.to_thread(fetcher.store_update, df, timeframe, formats, last_ms)
+                shard["chunks"].pop(0)
+                write_json_atomic(cursor_path, state)
+                os.remove(os.path.join(spool, name))
+
+        os.remove(cursor_path)
+        shutil.rmtree(spool, ignore_errors=True)
+        logger.info(f"[{fetcher.symbol}] ✅ {timeframe}: загрузка шардами завершена, новых свечей {added}")
+        return added
+
+    # ------------------------
+    # Обновление одной серии: догрузка и сохранение (как DataFetcher.update_history)
+    # ------------------------
+    async def _update(self, bucket, semaphore, coin: dict, timeframe: str, formats) -> Optional[int]:
+        fetcher = DataFetcher(coin, exchange=self.exchange_settings, directory=self.directory)
+        async with semaphore:
+            last_ms = fetcher.last_stored_timestamp(timeframe, "csv")
+            # новая серия или прерванная загрузка — всегда через курсор и порции на диске (при shards=1 — один шард);
+            # fetch_history (вся догрузка в памяти) — только для новых свечей существующей серии
+            spooled = last_ms is None or fetcher.download_in_progress(timeframe)
+            try:
+                if spooled:
+                    state = await self._spool(bucket, fetcher, timeframe)
+                else:
+                    df = await self.fetch_history(bucket, fetcher.symbol, timeframe, stop_ms=last_ms)
+            except ccxt.BaseError as e:
+                self.stats["failed"] += 1
+                logger.error(f"[{fetcher.symbol}] ❌ {timeframe}: загрузка не удалась: {e}")
+                return None
+        if spooled:
+            return 0 if state is None else await self._merge_spool(fetcher, timeframe, formats, state)
+        if df is None:
+            return 0
+        # запись файлов — синхронная и быстрая, в потоке, чтобы не останавливать остальные загрузки
+        return await asyncio.to_thread(fetcher.store_update, df, timeframe, formats, last_ms)
+
+    async def update(self, tasks, formats=("csv",)) -> dict:
+        """
+        :param tasks: [(монета из конфига, таймфрейм)]
+        :return: {(SYMBOL, таймфрейм): новых свечей или None при ошибке}
+        """
+        if self.exchange is None:
+            self.exchange = self._create_exchange()
+        bucket = TokenBucket(self.rate, self.burst)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        try:
+            results = await asyncio.gather(*(
+                self._update(bucket, semaphore, coin, timeframe, formats) for coin, timeframe in tasks
+            ))
+        finally:
+            if self._own_exchange:
+                await self.exchange.close()
+                self.exchange = None
+        return {(coin.get("SYMBOL"), timeframe): added for (coin, timeframe), added in zip(tasks, results)}
+
+    def run(self, tasks, formats=("csv",)) -> dict:
+        return asyncio.run(self.update(tasks, formats))
@@ -0,0 +1,249 @@
+# каталог рядов данных: диапазон, число строк, пропуски и хеш содержимого без чтения файлов
+
+# src/data_fetcher/catalog.py
+"""
+Каталог хранится в манифесте данных (DATA_DIR/manifest.json, см. validation.py), в записи ряда:
+    "symbol", "market_type", "timeframe", "exchange"
+    "stored": {формат: {"path", "rows", "first_ts", "last_ts", "gap_count", "hash", "size", "mtime_ns", "updated_at"}}
+
+Запись обновляется при каждой записи ряда через DataFetcher (полная запись, дозапись, конвертация).
+Запись каталога считается актуальной, пока размер и mtime файла совпадают с сохраненными
+(один os.stat); файл, измененный в обход DataFetcher, читается как раньше.
+
+Запуск (из корня проекта):
+    python -m src.data_fetcher.catalog --data-dir DATA_OHLCV/            # список рядов
+    python -m src.data_fetcher.catalog --data-dir DATA_OHLCV/ --rebuild  # пересобрать по файлам
+"""
+import argparse
+import hashlib
+import os
+import re
+import time
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from src.data_fetcher.resample import timeframe_ms
+from src.data_fetcher.storage.base import (
+    OHLCV_COLUMNS, STORAGE_FORMATS, TIMESTAMP, frame_to_arrays, open_store, read_ohlcv_csv,
+)
+import src.data_fetcher.storage.columnar  # noqa: F401  регистрирует формат npy
+import src.data_fetcher.storage.mmap_store  # noqa: F401  регистрирует формат mmap
+import src.data_fetcher.storage.chunked  # noqa: F401  регистрирует формат chunked
+import src.data_fetcher.storage.partitioned  # noqa: F401  регистрирует формат partitioned
+from src.data_fetcher.validation import load_manifest, manifest_lock, manifest_path, save_manifest, scan_series
+
+# Логирование
+# ====================================================
+from src.utils.logger import get_logger
+logger = get_logger(__name__)
+
+# имя ряда: BTC_USDT_USDT_4h_bybit_OHLCV(.csv) — как DataFetcher._get_export_path
+SERIES_NAME = re.compile(r"^(?P<base>[^_]+)_(?P<quote>[^_]+)(?:_(?P<settle>[^_]+))?_(?P<tf>[^_]+)_(?P<exchange>[^_]+)_OHLCV(?:\.csv)?$")
+
+
+def market_type(quote: str, settle: Optional[str]) -> str:
+    if settle:
+        return "linear" if settle == "USDT" else "inverse"
+    return "spot"
+
+
+def series_key(path) -> tuple:
+    """(имя ряда, файл, по которому проверяется актуальность): CSV — сам файл, хранилище — его header.json."""
+    path = Path(path)
+    if path.suffix == ".csv":
+        return path.stem, path
+    if path.name != "header.json":
+        path = path / "header.json"
+    return path.parent.name, path
+
+
+def content_hash(arrays: dict, previous: Optional[str] = None) -> str:
+    """
+    sha1 колонок (timestamp и OHLCV, little-endian). При дозаписи — хеш предыдущего содержимого
+    и добавленных строк: меняется при любом изменении ряда, файл целиком не перечитывается.
+    """
+    h = hashlib.sha1((previous or "").encode())
+    for col in OHLCV_COLUMNS:
+        h.update(np.ascontiguousarray(arrays[col], dtype="<i8" if col == TIMESTAMP else "<f8").tobytes())
+    return h.hexdigest()
+
+
+def _gap_count(ts: np.ndarray, timeframe: Optional[str]) -> int:
+    step = timeframe_ms(timeframe) if timeframe else None
+    return len(scan_series(ts, step)["gaps"]) if step else 0
+
+
+def summarize(arrays: dict, timeframe: Optional[str]) -> dict:
+    ts = arrays[TIMESTAMP]
+    return {
+        "rows": int(len(ts)),
+        "first_ts": int(ts[0]) if len(ts) else None,
+        "last_ts": int(ts[-1]) if len(ts) else None,
+        "gap_count": _gap_count(ts, timeframe),
+        "hash": content_hash(arrays),
+    }
+
+
+_manifests = {}  # путь -> (mtime_ns, манифест): манифест не разбирается заново, пока не изменился
+
+
+def _cached_manifest(data_dir: str) -> dict:
+    path = manifest_path(data_dir)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return load_manifest(data_dir)
+    cached = _manifests.get(path)
+    if cached is None or cached[0] != mtime:
+        cached = _manifests[path] = (mtime, load_manifest(data_dir))
+    return cached[1]
+
+
+# -------------------------------------------------
+# Класс DataCatalog
+# -------------------------------------------------
+class DataCatalog:
+    def __init__(self, data_dir: str):
+        self.data_dir = str(data_dir)
+
+    @classmethod
+    def for_path(cls, path) -> "DataCatalog":
+        """Каталог DATA_DIR, которому принадлежит файл ряда (DATA_DIR/<подкаталог формата>/...)."""
+        _, stat_path = series_key(path)
+        levels = 2 if stat_path.suffix == ".csv" else 3
+        return cls(stat_path.parents[levels - 1])
+
+    def _update(self, path, stored_update) -> dict:
+        name, stat_path = series_key(path)
+        match = SERIES_NAME.match(name)
+        with manifest_lock:
+            manifest = load_manifest(self.data_dir)
+            entry = manifest["series"].setdefault(name, {})
+            if match:
+                entry.update(
+                    symbol=match["base"],
+                    market_type=market_type(match["quote"], match["settle"]),
+                    timeframe=match["tf"],
+                    exchange=match["exchange"],
+                )
+            stored = entry.setdefault("stored", {})
+            fmt = "csv" if Path(path).suffix == ".csv" else self._format_of(path)
+            record = stored_update(stored.get(fmt), entry.get("timeframe"))
+            stat = os.stat(stat_path)
+            record.update(path=str(path), size=stat.st_size, mtime_ns=stat.st_mtime_ns, updated_at=int(time.time() * 1000))
+            stored[fmt] = record
+            save_manifest(self.data_dir, manifest)
+        return record
+
+    @staticmethod
+    def _format_of(path) -> str:
+        subdir = Path(path).parent.parent.name if Path(path).name == "header.json" else Path(path).parent.name
+        return next((fmt for fmt, (_, sub) in STORAGE_FORMATS.items() if sub == subdir), subdir)
+
+    # ------------------------
+    # Обновление при записи
+    # ------------------------
+    def record_write(self, path, arrays: dict) -> dict:
+        """Ряд записан целиком (arrays — его колонки)."""
+        return self._update(path, lambda _, timeframe: summarize(arrays, timeframe))
+
+    def record_append(self, path, arrays: dict, added: int) -> dict:
+        """
+        К ряду дописаны строки arrays (added из них новые; первая может заменять последнюю сохраненную).
+        Пропуски считаются только на стыке и внутри добавленных строк.
+        """
+        ts = arrays[TIMESTAMP]
+
+        def update(record, timeframe):
+            if not record:
+                # записи еще нет (ряд писался до появления каталога) — один раз читается весь файл
+                return summarize(read_arrays(path), timeframe)
+            if not len(ts):
+                return dict(record)
+            last = record["last_ts"]
+            return {
+                "rows": record["rows"] + added,
+                "first_ts": record["first_ts"] if record["first_ts"] is not None else int(ts[0]),
+                "last_ts": max(last, int(ts[-1])) if last is not None else int(ts[-1]),
+                "gap_count": record["gap_count"] + (
+                    _gap_count(np.concatenate(([last], ts[ts > last])), timeframe) if last is not None else 0
+                ),
+                "hash": content_hash(arrays, previous=record["hash"]),
+            }
+
+        return self._update(path, update)
+
+    # ------------------------
+    # Чтение
+    # ------------------------
+    def entry(self, path) -> Optional[dict]:
+        """Запись каталога о файле ряда или None, если ее нет или файл изменен в обход каталога."""
+        name, stat_path = series_key(path)
+        fmt = "csv" if Path(path).suffix == ".csv" else self._format_of(path)
+        record = _cached_manifest(self.data_dir)["series"].get(name, {}).get("stored", {}).get(fmt)
+        if record is None:
+            return None
+        try:
+            stat = os.stat(stat_path)
+        except OSError:
+            return None
+        if (stat.st_size, stat.st_mtime_ns) != (record["size"], record["mtime_ns"]):
+            return None
+        return record
+
+    def series(self, symbol: Optional[str] = None, timeframe: Optional[str] = None) -> dict:
+        """{имя ряда: запись} с фильтром по монете и таймфрейму."""
+        return {
+            name: entry
+            for name, entry in _cached_manifest(self.data_dir)["series"].items()
+            if "stored" in entry
+            and (symbol is None or entry.get("symbol") == symbol)
+            and (timeframe is None or entry.get("timeframe") == timeframe)
+        }
+
+    def rebuild(self) -> int:
+        """Заново вносит в каталог все ряды DATA_DIR (csv и зарегистрированные форматы)."""
+        paths = sorted(Path(self.data_dir, "csv_files").glob("*.csv"))
+        for _, subdir in STORAGE_FORMATS.values():
+            paths += sorted(Path(self.data_dir, subdir).glob("*/header.json"))
+        count = 0
+        for path in paths:
+            try:
+                self.record_write(path, read_arrays(path))
+                count += 1
+            except Exception as e:
+                logger.error(f"❌ Каталог: не удалось прочитать {path}: {e}")
+        return count
+
+
+def read_arrays(path) -> dict:
+    path = Path(path)
+    if path.suffix == ".csv":
+        df = read_ohlcv_csv(path)
+    else:
+        directory = path.parent if path.name == "header.json" else path
+        df = open_store(DataCatalog._format_of(directory / "header.json"), directory).read()
+    return frame_to_arrays(df)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Каталог рядов OHLCV")
+    parser.add_argument("--data-dir", default="DATA_OHLCV/", help="Каталог данных (BACKTEST_SETTINGS.DATA_DIR)")
+    parser.add_argument("--rebuild", action="store_true", help="Пересобрать каталог по файлам")
+    args = parser.parse_args(argv)
+
+    catalog = DataCatalog(args.data_dir)
+    if args.rebuild:
+        logger.info(f"Каталог пересобран: рядов {catalog.rebuild()}")
+    for name, entry in sorted(catalog.series().items()):
+        for fmt, record in sorted(entry["stored"].items()):
+            first = np.datetime64(record["first_ts"], "ms") if record["first_ts"] is not None else "-"
+            last = np.datetime64(record["last_ts"], "ms") if record["last_ts"] is not None else "-"
+            print(f"{name:45} {fmt:8} {record['rows']:>10} {first} .. {last} gaps={record['gap_count']} {record['hash'][:12]}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
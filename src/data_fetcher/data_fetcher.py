@@ -4,16 +4,61 @@
 # Загрузка OHLCV-свечей. Обновление рыночных данных в реальном времени.
 """
 import os
+import shutil
 import ccxt
 import pandas as pd
 import time
 from datetime import datetime
 from typing import Optional, List
 from src.utils.logger import get_logger 
+from src.data_fetcher.storage.base import (
+    STORAGE_FORMATS, arrays_to_frame, frame_to_arrays, open_store, read_json, read_ohlcv_csv, write_json_atomic,
+)
+from src.data_fetcher.storage.columnar import ColumnarStore
+from src.data_fetcher.resample import resample_arrays, timeframe_ms
+from src.data_fetcher.validation import load_manifest, update_manifest, validation_entry
+from src.data_fetcher.catalog import DataCatalog
+import src.data_fetcher.storage.mmap_store  # noqa: F401  регистрирует формат mmap
+import src.data_fetcher.storage.chunked  # noqa: F401  регистрирует формат chunked
+import src.data_fetcher.storage.partitioned  # noqa: F401  регистрирует формат partitioned
+from src.data_fetcher.utils import select_range_backtest, shift_timestamp
 # from src.config.config import config
 
 logger = get_logger(__name__)
 
+TEN_YEARS_MS = 1000 * 60 * 60 * 24 * 365 * 10
+
+
+# -------------------------------------------------------------
+# Планы запросов свечей: генераторы (timeframe, since_ms, until_ms) -> ответ биржи.
+# Один план выполняют и DataFetcher (синхронно, _run_requests), и AsyncDownloader (await) —
+# логика пагинации не расходится между загрузчиками.
+# -------------------------------------------------------------
+def history_start_requests(now_ms: int):
+    """Начало истории монеты за два запроса: первая месячная свеча, затем первая дневная в этом месяце."""
+    months = yield "M", now_ms - TEN_YEARS_MS, now_ms
+    if not months:
+        return None
+    month = months[0][0]
+    days = yield "D", month, month + 40 * timeframe_ms("D") - 1
+    return days[0][0] if days else month
+
+
+def window_requests(timeframe: str, since_ms: int, until_ms: int):
+    """
+    Свечи окна [since_ms, until_ms] по порядку времени. Окно в limit баров биржа отдает одним ответом;
+    если ответ короче (страница биржи меньше limit), недостающее начало окна догружается назад по until.
+    """
+    chunk = yield timeframe, since_ms, until_ms
+    candles = [candle for candle in chunk or () if since_ms <= candle[0] <= until_ms]
+    while candles and candles[0][0] > since_ms:
+        chunk = yield timeframe, since_ms, candles[0][0] - 1
+        earlier = [candle for candle in chunk or () if since_ms <= candle[0] < candles[0][0]]
+        if not earlier:
+            break
+        candles = earlier + candles
+    return candles
+
 
 # TODO: Добавить информацию о монете при инициализации класса
 
@@ -41,6 +86,7 @@ class DataFetcher:
             # Параметры биржи
             self.exchange_id = exchange.get("EXCHANGE_ID")
             self.limit = exchange.get("LIMIT")
+            self.api_url = exchange.get("API_URL")
             
             # Параметры, зависящие от монеты
             self.market_type = coin.get("MARKET_TYPE", "spot")   # spot | linear | inverse
@@ -51,6 +97,7 @@ class DataFetcher:
             self.min_timeframe = coin.get("MIN_TIMEFRAME") if coin.get("MIN_TIMEFRAME") else "1"
 
             self.directory = directory
+            self.catalog = DataCatalog(directory)
         except Exception as e:
             logger.error(f"Критическая ошибка при инициализации класса: {e}")
             raise
@@ -71,6 +118,8 @@ class DataFetcher:
                     "defaultType": self.market_type
                 }
                 })
+            if self.api_url:
+                self.set_api_url(self.exchange, self.api_url)
             
             # self.exchange.load_markets()
             self._detect_symbol_format()
@@ -80,6 +129,11 @@ class DataFetcher:
             logger.error(f"Биржа '{self.exchange_id}' не поддерживается библиотекой ccxt.")
             raise
         
+    @staticmethod
+    def set_api_url(exchange, api_url: str):
+        """Все REST-запросы ccxt — на api_url (например, локальная поддельная биржа fake_exchange)."""
+        exchange.urls["api"] = {name: api_url.rstrip("/") for name in exchange.urls["api"]}
+
     # -------------------------------------------
     # ВСПОМОГАТЕЛЬНЫЙ МЕТОД: Автоматическое определение формата символа
     # -------------------------------------------
@@ -117,6 +171,10 @@ class DataFetcher:
             path = self.directory+"csv_files"
         elif file_extension == "xlsx":
             path = self.directory+"excel"
+        elif file_extension in STORAGE_FORMATS:
+            # бинарные форматы: каталог серии, путь указывает на его заголовок (по нему считается отпечаток данных)
+            path = self.directory+STORAGE_FORMATS[file_extension][1]
+            return os.path.join(path, f"{file_prefix}_OHLCV", "header.json")
 
         # 1. Создание директории, если она не существует
         if not os.path.exists(path):
@@ -149,108 +207,55 @@ class DataFetcher:
             raise
     
     # -------------------------------------------------------------
-    # Вспомогательный метод: Универсальный метод для загрузки данных с пагинацией НАЗАД ВО ВРЕМЕНИ
+    # Вспомогательный метод: загрузка диапазона окнами ВПЕРЕД ПО ВРЕМЕНИ
     # -------------------------------------------------------------
-    def _generic_fetcher(self, timeframe, start_date_ms: Optional[int] = None, end_date_ms: Optional[int] = None) -> Optional[pd.DataFrame]:
+    def iter_history(self, timeframe: str, start_ms: int, end_ms: int, retry_delay: float = 1.0):
         """
-        Универсальный метод для загрузки данных с пагинацией НАЗАД ВО ВРЕМЕНИ.
-        
-        :param start_date_ms: Самый ранний таймштамп в мс, который нужно загрузить.
-        Если None, загрузка идет до самой ранней доступной даты.
-        :param end_date_ms: Таймштамп в мс, с которого НАЧИНАЕТСЯ загрузка (самая новая дата).
-        Если None, начинается с текущего времени.
+        Свечи [start_ms, end_ms] окнами по limit свечей (window_requests): по списку свечей на окно.
+        Сетевые ошибки повторяются (_fetch_page), после последней попытки ошибка ccxt пробрасывается —
+        окна, полученные до нее, уже отданы вызывающему.
         """
-        all_ohlcv: List[List] = []
-        
-        # 1. Определение начальной точки загрузки (самой новой свечи)
-        # Если end_date_ms не указан, начинаем с текущего момента.
-        since_ms = end_date_ms if end_date_ms is not None else int(time.time() * 1000)
-        
-        # 2. Определение точки остановки (самой старой свечи)
-        # Если start_date_ms не указан, загрузка идет до конца истории (0).
-        stop_ms = start_date_ms if start_date_ms is not None else 0 
-        
-        start_log = datetime.fromtimestamp(stop_ms / 1000).strftime('%Y-%m-%d') if stop_ms > 0 else "начала доступной истории"
-        end_log = datetime.fromtimestamp(since_ms / 1000).strftime('%Y-%m-%d %H:%M:%S')
-        logger.info(f"[{self.symbol}] Начало загрузки ({timeframe}) НАЗАД с {end_log} до {start_log}...")
-        error_count = 0
+        step = timeframe_ms(timeframe)
+        if step is None:
+            raise ValueError("Загрузка месячных свечей окнами не поддерживается")
+        window = self.limit * step
+        since = start_ms
+        while since <= end_ms:
+            until = min(since + window - 1, end_ms)
+            yield self._run_requests(window_requests(timeframe, since, until), retry_delay)
+            since += window
 
-        while True:
-            try:
-                # 3. Запрос: мы запрашиваем чанк, который ЗАКАНЧИВАЕТСЯ временем since_ms
-                # Фактически, мы просим ccxt дать нам limit свечей, предшествующих since_ms.
-                # Большинство бирж поддерживают такой режим, если since/until не указаны, 
-                # но для пагинации назад мы используем параметр 'since' как 'until' 
-                # или полагаемся на внутреннюю логику ccxt.
-                ohlcv_chunk = self.exchange.fetch_ohlcv(
-                    symbol=self.symbol,
-                    timeframe=timeframe,
-                    since=since_ms - 1000 * 60 * 60 * 24 * 365 * 10, # Приблизительная дата, чтобы ccxt мог начать, не критично, но лучше
-                    limit=self.limit,
-                    params={'until': since_ms} # Используем until/since, если биржа это поддерживает
-                )
-                
-                # --- Важный момент: Биржи и ccxt ---
-                # Самый надежный способ: ccxt.exchange.fetch_ohlcv()
-                # Если биржа поддерживает 'until', ccxt использует его для загрузки НАЗАД.
-                # На практике, передача None в 'since' и использование 'params={'until': since_ms}' 
-                # часто заставляет ccxt загружать последние свечи до 'since_ms'.
-                
-                # Если fetch_ohlcv не поддерживает 'until' через params, 
-                # нам нужно загрузить chunk, найти его первый таймштамп, 
-                # и использовать его как точку 'since' для следующего шага назад. 
-                # Ниже мы используем 'until' и полагаемся на ccxt.
-
-                if not ohlcv_chunk or len(ohlcv_chunk) < 2:
-                    logger.info(f"[{self.symbol}] Получен пустой ответ или менее двух свечей. Достигнут конец истории.")
-                    break # Конец истории
-
-                # 4. Обработка полученного чанка
-                first_timestamp = ohlcv_chunk[0][0]
-                last_timestamp = ohlcv_chunk[-1][0]
-                
-                # Если самая старая свеча (first_timestamp) уже старше нашей точки остановки (stop_ms)
-                if first_timestamp <= stop_ms:
-                    # Фильтруем свечи, которые выходят за рамки 'stop_ms' (слишком старые)
-                    valid_chunk = [candle for candle in ohlcv_chunk if candle[0] >= stop_ms]
-                    all_ohlcv.extend(valid_chunk)
-                    logger.info(f"[{self.symbol}] Загрузка завершена по достижении начальной даты.")
-                    break # Выход из цикла
-                
-                # Обычный случай: продолжаем пагинацию
-                valid_chunk = ohlcv_chunk 
-                all_ohlcv.extend(valid_chunk)
-
-                # 5. Обновление 'since' (для следующего шага назад)
-                # Следующая точка "until" будет на 1мс раньше самой первой свечи в этом чанке
-                since_ms = first_timestamp - 1 
-                
-                # Логирование прогресса
-                first_date = datetime.fromtimestamp(first_timestamp / 1000).strftime('%Y-%m-%d %H:%M:%S')
-                logger.info(f"[{self.symbol}] Успешно загружено свечей: {len(valid_chunk)}. Продолжение НАЗАД с: {first_date}")
-                
-                # Защита от DoS
-                time.sleep(self.exchange.rateLimit / 1000) 
-
-            except ccxt.ExchangeError as e:
-                # ... (обработка ошибок)
-                logger.error(f"[{self.symbol}] Ошибка API при загрузке данных: {e}. Пауза 5с.")
-                error_count += 1
-                if error_count >= 3:
-                    logger.critical(f"[{self.symbol}] Превышено количество попыток из-за ошибок API. Прерывание загрузки.")
-                    return None
-                time.sleep(5)
-                continue
-            except Exception as e:
-                # ... (обработка ошибок)
-                logger.critical(f"[{self.symbol}] Критическая ошибка загрузки данных: {e}", exc_info=True)
-                return None
+    def _generic_fetcher(self, timeframe, start_date_ms: Optional[int] = None, end_date_ms: Optional[int] = None) -> Optional[pd.DataFrame]:
+        """
+        Свечи диапазона одним DataFrame (iter_history) — для диапазонов, которые помещаются в память.
+        История ряда и догрузка новых свечей идут через download_history / update_history:
+        запись на диск по ходу загрузки и продолжение после обрыва.
 
-        # 6. Формирование DataFrame
+        :param start_date_ms: Самый ранний таймштамп в мс. Если None — с начала истории монеты (first_candle_ms).
+        :param end_date_ms: Самый поздний таймштамп в мс. Если None — до текущего момента.
+        :return: DataFrame или None, если биржа не вернула свечей; ошибки биржи (ccxt.BaseError) пробрасываются.
+        """
+        end_ms = end_date_ms if end_date_ms is not None else int(time.time() * 1000)
+        start_ms = start_date_ms if start_date_ms is not None else self.first_candle_ms()
+        if start_ms is None:
+            logger.warning(f"[{self.symbol}] Данные не загружены.")
+            return None
+        logger.info(f"[{self.symbol}] Загрузка ({timeframe}) с {pd.Timestamp(start_ms, unit='ms')} до {pd.Timestamp(end_ms, unit='ms')}...")
+
+        all_ohlcv: List[List] = []
+        for candles in self.iter_history(timeframe, start_ms, end_ms):
+            all_ohlcv.extend(candles)
         if not all_ohlcv:
             logger.warning(f"[{self.symbol}] Данные не загружены.")
             return None
 
+        df = self.candles_to_frame(all_ohlcv)
+        logger.info(f"[{self.symbol}] Загружено свечей {len(df)}. Диапазон: {df.index.min()} - {df.index.max()}")
+        return df
+
+    @staticmethod
+    def candles_to_frame(all_ohlcv: List[List]) -> pd.DataFrame:
+        """Свечи ccxt [ts, o, h, l, c, v] в DataFrame с индексом timestamp."""
         df = pd.DataFrame(all_ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
         
         # Так как загрузка шла от нового к старому, список all_ohlcv будет обратным.
@@ -259,9 +264,6 @@ class DataFetcher:
         df.drop_duplicates(subset=['timestamp'], inplace=True) 
         df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
         df.set_index('timestamp', inplace=True)
-        
-        logger.info(f"[{self.symbol}] Загружено свечей {len(df)}. Диапазон: {df.index.min()} - {df.index.max()}")
-        
         return df
 
     # -------------------------------------------------------------
@@ -315,12 +317,46 @@ class DataFetcher:
         try:
             # index=True сохранит индекс (таймштамп) как первый столбец
             df.to_csv(file_path, index=True)
+            self._catalog_update(file_path, df)
             logger.info(f"[{self.symbol}] ✅ Данные успешно экспортированы в: {file_path}")
             return file_path
         except Exception as e:
             logger.error(f"❌ Ошибка при сохранении CSV для {self.symbol}: {e}")
             return None
 
+    # -------------------------------------------------------------
+    # 3.1 МЕТОД: Экспорт в бинарное хранилище (npy: колонка на файл)
+    # -------------------------------------------------------------
+    def export_to_store(self, df: pd.DataFrame, timeframe: str, file_type: str = "npy") -> Optional[str]:
+        """
+        Сохраняет DataFrame в бинарном формате хранения (см. storage/).
+        
+        :return: Путь к заголовку серии или None в случае ошибки.
+        """
+        if df is None or df.empty:
+            logger.error(f"Невозможно экспортировать пустой DataFrame для {self.symbol}.")
+            return None
+
+        file_path = self._get_export_path(timeframe, file_extension=file_type)
+        try:
+            open_store(file_type, os.path.dirname(file_path)).write(df)
+            self._catalog_update(file_path, df)
+            logger.info(f"[{self.symbol}] ✅ Данные успешно экспортированы в: {file_path}")
+            return file_path
+        except Exception as e:
+            logger.error(f"❌ Ошибка при сохранении {file_type} для {self.symbol}: {e}")
+            return None
+
+    def _catalog_update(self, file_path: str, df: pd.DataFrame, added: Optional[int] = None):
+        """Обновляет запись ряда в каталоге данных: added=None — ряд записан целиком, иначе дописан df."""
+        try:
+            if added is None:
+                self.catalog.record_write(file_path, frame_to_arrays(df))
+            else:
+                self.catalog.record_append(file_path, frame_to_arrays(df), added)
+        except Exception as e:
+            logger.error(f"❌ Каталог данных не обновлен ({file_path}): {e}")
+
     # -------------------------------------------------------------
     # Метод проверки существования файла
     # -------------------------------------------------------------
@@ -367,9 +403,10 @@ class DataFetcher:
     # -------------------------------------------------------------
     def load_from_csv(self, file_type: str, timeframe: str = "1") -> Optional[pd.DataFrame]:
         """
-        Загружает исторические данные из локального CSV-файла.
+        Загружает исторические данные из локального CSV-файла
+        или из бинарного хранилища (file_type="npy", см. storage/) — результат одинаковый.
 
-        :param file_path: Полный путь к CSV-файлу.
+        :param file_type: csv | npy | mmap.
         :return: DataFrame с данными или None в случае ошибки.
         """
         # Префикс имени файла
@@ -383,26 +420,14 @@ class DataFetcher:
         logger.info(f"💾 Загрузка данных из файла: {file_path}")
         
         try:
-            # 1. Чтение файла
-            # index_col=0 указывает, что первый столбец (таймштамп) является индексом.
-            df = pd.read_csv(file_path, index_col=0)
-            
-            # 2. Пост обработка (как и после загрузки с биржи)
-            
-            # Конвертация индекса (таймштампа) в datetime
-            # Имя индекса должно соответствовать тому, что мы сохраняли ('timestamp')
-            df.index.name = 'timestamp' 
-            df.index = pd.to_datetime(df.index)
-            
-            # Конвертация числовых столбцов (если они были сохранены как строки)
-            for col in ['open', 'high', 'low', 'close', 'volume']:
-                if col in df.columns:
-                    # Используем pd.to_numeric с errors='coerce' для безопасной конвертации
-                    df[col] = pd.to_numeric(df[col], errors='coerce')
-            
-            # Удаление строк с пропущенными значениями после конвертации
-            df.dropna(inplace=True) 
-            
+            if file_type in STORAGE_FORMATS:
+                df = open_store(file_type, os.path.dirname(file_path)).read()
+                if df is None:
+                    logger.error(f"❌ Поврежден заголовок серии: {file_path}")
+                    return None
+            else:
+                df = read_ohlcv_csv(file_path)
+
             logger.info(f"✅ Данные из файла успешно загружены. Всего свечей: {len(df)}. Диапазон: {df.index.min()} - {df.index.max()}")
             return df
 
@@ -412,4 +437,395 @@ class DataFetcher:
             return None
         except Exception as e:
             logger.critical(f"❌ Критическая ошибка при чтении CSV-файла: {e}", exc_info=True)
-            return None
\ No newline at end of file
+            return None
+
+    # -------------------------------------------------------------
+    # 6. МЕТОД: Загрузка периода бэктеста
+    # -------------------------------------------------------------
+    def load_range(self, file_type: str, timeframe: str = "1", full_datafile: bool = False,
+                   start_date: Optional[str] = None, end_date: Optional[str] = None,
+                   offset_bars: int = 0, resample: bool = False) -> Optional[pd.DataFrame]:
+        """
+        То же, что load_from_csv + select_range_backtest.
+        Хранилища с индексом по времени (mmap, chunked, partitioned) читают только нужный диапазон:
+        бисекция по индексу и DataFrame поверх среза memmap, без загрузки всей истории;
+        строки прогрева (offset_bars) отсчитываются по индексу, а не по загруженному DataFrame.
+        resample=True — свечи таймфрейма строятся из минутных (load_resampled), а не читаются из файла.
+        """
+        file_path = self._get_export_path(timeframe=timeframe, file_extension=file_type)
+        store = open_store(file_type, os.path.dirname(file_path)) if file_type in STORAGE_FORMATS else None
+        if resample or store is None or not hasattr(store, "bounds"):
+            if resample:
+                df = self.load_resampled(timeframe, file_type=file_type)
+            else:
+                df = self.load_from_csv(file_type=file_type, timeframe=timeframe)
+            if df is None:
+                return None
+            return select_range_backtest(
+                data_df=df, full_datafile=full_datafile,
+                start_date=start_date, end_date=end_date, offset_bars=offset_bars,
+            )
+
+        if full_datafile:
+            df = store.read()
+        else:
+            if start_date is None or end_date is None:
+                raise ValueError("При full_datafile=False необходимо указать обе даты: start_date и end_date")
+            start_ms = pd.Timestamp(start_date).value // 1_000_000
+            end_ms = pd.Timestamp(end_date).value // 1_000_000
+            if start_ms > end_ms:
+                raise ValueError("start_date не может быть позже end_date")
+            df = store.read(start_ms, end_ms, offset_bars)
+        if df is None:
+            logger.error(f"❌ Файл данных не найден по пути: {file_path}")
+            return None
+        if df.empty:
+            logger.warning("Выделенный диапазон дат не содержит данных.")
+        else:
+            logger.info(f"📅 Период тестирования: {df.index[0]} ↔️  {end_date if not full_datafile else df.index[-1]}")
+        return df
+
+    # -------------------------------------------------------------
+    # 7. МЕТОД: Инкрементальное обновление сохраненной истории
+    # -------------------------------------------------------------
+    def _csv_tail(self, file_path: str):
+        """Смещение начала последней строки CSV и ее таймштамп (мс). Файл не читается целиком."""
+        with open(file_path, "rb") as f:
+            size = f.seek(0, os.SEEK_END)
+            chunk = 4096
+            while True:
+                start = max(0, size - chunk)
+                f.seek(start)
+                data = f.read(size - start).rstrip(b"\r\n")
+                cut = data.rfind(b"\n")
+                if cut >= 0 or start == 0:
+                    break
+                chunk *= 2
+        line = data[cut + 1:].decode("utf-8")
+        if not line:
+            return None, None
+        try:
+            return start + cut + 1, pd.Timestamp(line.split(",", 1)[0]).value // 1_000_000
+        except ValueError:
+            return None, None  # только заголовок
+
+    def last_stored_timestamp(self, timeframe: str, file_type: str = "csv") -> Optional[int]:
+        """Таймштамп (мс) последней сохраненной свечи или None, если данных нет."""
+        file_path = self._get_export_path(timeframe, file_extension=file_type)
+        if not os.path.exists(file_path):
+            return None
+        entry = self.catalog.entry(file_path)
+        if entry is not None:
+            return entry["last_ts"]
+        if file_type in STORAGE_FORMATS:
+            header = open_store(file_type, os.path.dirname(file_path)).header()
+            return header.get("last_ts") if header else None
+        return self._csv_tail(file_path)[1]
+
+    def _closed_candles(self, df: pd.DataFrame, timeframe: str, now_ms: Optional[int] = None) -> pd.DataFrame:
+        # последняя свеча биржи еще формируется: сохраняются только закрытые
+        if df.empty:
+            return df
+        now = pd.Timestamp(now_ms if now_ms is not None else int(time.time() * 1000), unit="ms")
+        close_time = shift_timestamp(df.index[-1], 1, timeframe, direction=1)
+        return df.iloc[:-1] if close_time > now else df
+
+    def _append_csv(self, df: pd.DataFrame, timeframe: str) -> int:
+        """
+        Дописывает свечи в CSV, начиная с последней сохраненной: она перезаписывается
+        (в файлах полной загрузки это могла быть незакрытая свеча).
+        """
+        file_path = self._get_export_path(timeframe, file_extension="csv")
+        offset, last_ms = self._csv_tail(file_path) if os.path.exists(file_path) else (None, None)
+        if last_ms is None:
+            return len(df) if self.export_to_csv(df, timeframe) else 0
+        last = pd.Timestamp(last_ms, unit="ms")
+        delta = df[df.index >= last]
+        if delta.empty:
+            return 0
+        with open(file_path, "r+b") as f:
+            if delta.index[0] == last:
+                f.truncate(offset)
+            f.seek(0, os.SEEK_END)
+            f.write(delta.to_csv(header=False).encode("utf-8"))
+        added = int((delta.index > last).sum())
+        self._catalog_update(file_path, delta, added)
+        return added
+
+    def update_history(self, timeframe: str, formats=("csv",)) -> Optional[int]:
+        """
+        Догружает только новые свечи: с последней сохраненной (с перекрытием в одну свечу) до текущего момента.
+        Если данных еще нет (или загрузка истории прервана) — загружается вся история.
+        Загрузка потоковая (download_history): свечи пишутся на диск порциями, после обрыва продолжение
+        с сохраненной позиции. CSV дописывается на месте; остальные форматы (npy, mmap) получают те же свечи
+        через append, а если отстают от CSV или отсутствуют — пересобираются из него.
+
+        :return: Количество новых свечей в CSV или None в случае ошибки загрузки (позиция сохранена).
+        """
+        if self.last_stored_timestamp(timeframe, "csv") is None or self.download_in_progress(timeframe):
+            return self.download_history(timeframe, formats)
+        # догрузка: каждая страница сразу на диск — сетевая ошибка не теряет уже полученные страницы
+        return self.download_history(timeframe, formats, flush_rows=self.limit)
+
+    def store_update(self, df: pd.DataFrame, timeframe: str, formats=("csv",), last_ms: Optional[int] = None) -> int:
+        """
+        Сохраняет догруженные свечи (загрузка с last_ms включительно): незакрытая свеча отбрасывается,
+        CSV дописывается, остальные форматы получают append или пересобираются из CSV.
+        Используется update_history и асинхронным загрузчиком.
+        """
+        df = self._closed_candles(df, timeframe)
+        added = self._append_csv(df, timeframe)
+
+        for file_type in formats:
+            if file_type == "csv":
+                continue
+            file_path = self._get_export_path(timeframe, file_extension=file_type)
+            store = open_store(file_type, os.path.dirname(file_path))
+            header = store.header()
+            if header is None or last_ms is None or (header.get("last_ts") or 0) < last_ms:
+                full = self.load_from_csv(file_type="csv", timeframe=timeframe)
+                store.write(full)
+                self._catalog_update(file_path, full)
+            else:
+                self._catalog_update(file_path, df, store.append(df))
+
+        logger.info(f"[{self.symbol}] ✅ {timeframe}: новых свечей {added}")
+        return added
+
+    # -------------------------------------------------------------
+    # 7.1 МЕТОД: Потоковая загрузка всей истории с продолжением после обрыва
+    # -------------------------------------------------------------
+    def cursor_path(self, timeframe: str) -> str:
+        # позиция незавершенной загрузки ряда: DATA_DIR/downloads/<имя ряда>.json
+        return os.path.join(self.directory + "downloads", f"{self.series_name(timeframe)}.json")
+
+    def spool_dir(self, timeframe: str) -> str:
+        # порции шардов асинхронной загрузки (AsyncDownloader), еще не записанные в CSV
+        return os.path.join(self.directory + "downloads", self.series_name(timeframe))
+
+    def download_in_progress(self, timeframe: str) -> bool:
+        return os.path.exists(self.cursor_path(timeframe))
+
+    def discard_history(self, timeframe: str):
+        # перед загрузкой ряда заново: сохраненный CSV и незавершенная загрузка (позиция, порции шардов) удаляются
+        for path in (self.cursor_path(timeframe), self._get_export_path(timeframe, file_extension="csv")):
+            if os.path.exists(path):
+                os.remove(path)
+        shutil.rmtree(self.spool_dir(timeframe), ignore_errors=True)
+
+    def first_candle_ms(self) -> Optional[int]:
+        """Начало истории монеты (history_start_requests)."""
+        return self._run_requests(history_start_requests(int(time.time() * 1000)))
+
+    def _run_requests(self, requests, retry_delay: float = 1.0):
+        # выполняет план запросов (history_start_requests, window_requests) и возвращает его результат
+        try:
+            request = next(requests)
+            while True:
+                timeframe, since_ms, until_ms = request
+                request = requests.send(self._fetch_page(timeframe, since_ms, until_ms, retry_delay=retry_delay))
+        except StopIteration as stop:
+            return stop.value
+
+    def _fetch_page(self, timeframe: str, since_ms: int, until_ms: int, max_retries: int = 5,
+                    retry_delay: float = 1.0) -> list:
+        # сетевые ошибки и лимит запросов (RateLimitExceeded — тоже NetworkError) повторяются с растущей паузой
+        for attempt in range(max_retries + 1):
+            try:
+                return self.exchange.fetch_ohlcv(
+                    symbol=self.symbol, timeframe=timeframe, since=since_ms, limit=self.limit,
+                    params={"until": until_ms},
+                )
+            except ccxt.NetworkError as e:
+                if attempt == max_retries:
+                    raise
+                logger.warning(f"[{self.symbol}] {timeframe}: {type(e).__name__}, повтор {attempt + 1}")
+                time.sleep(retry_delay * 2 ** attempt)
+
+    def download_history(self, timeframe: str, formats=("csv",), start_ms: Optional[int] = None,
+                         restart: bool = False, flush_rows: int = 50_000, retry_delay: float = 1.0) -> Optional[int]:
+        """
+        Загрузка истории вперед по времени окнами по limit свечей с записью на диск по ходу загрузки:
+        в памяти не больше flush_rows свечей, после каждой записи сохраняется позиция (cursor_path).
+        Прерванная загрузка (ошибка, остановка процесса) при следующем вызове продолжается с позиции,
+        уже записанные свечи повторно не запрашиваются. Ряд без незавершенной загрузки догружается
+        с последней сохраненной свечи.
+
+        :param start_ms: начало для нового ряда; по умолчанию — начало истории монеты (first_candle_ms)
+        :param restart: загрузить ряд заново (сохраненный CSV и позиция удаляются)
+        :return: количество новых свечей в CSV или None, если загрузка прервана (позиция сохранена)
+        """
+        step = timeframe_ms(timeframe)
+        if step is None:
+            raise ValueError("Потоковая загрузка месячных свечей не поддерживается")
+        cursor_path = self.cursor_path(timeframe)
+        if restart:
+            self.discard_history(timeframe)
+        self._set_exchange()
+
+        state = read_json(cursor_path)
+        if state and "shards" in state:
+            # прервана загрузка шардами (AsyncDownloader): порции шардов пишутся в CSV по порядку,
+            # поэтому CSV — непрерывное начало диапазона; продолжаем последовательно с его конца
+            shutil.rmtree(self.spool_dir(timeframe), ignore_errors=True)
+            last_ms = self.last_stored_timestamp(timeframe, "csv")
+            state = {"next_ms": state["start_ms"] if last_ms is None else last_ms, "end_ms": state["end_ms"]}
+        if state:
+            since, end = state["next_ms"], state["end_ms"]
+            logger.info(f"[{self.symbol}] {timeframe}: продолжение загрузки с {pd.Timestamp(since, unit='ms')}")
+        else:
+            since = self.last_stored_timestamp(timeframe, "csv")
+            if since is None:
+                since = start_ms if start_ms is not None else self.first_candle_ms()
+            if since is None:
+                logger.warning(f"[{self.symbol}] {timeframe}: биржа не вернула историю")
+                return None
+            end = int(time.time() * 1000)
+
+        window = self.limit * step
+        buffer, added = [], 0
+        try:
+            while since < end:
+                # окно [since, since + limit баров) биржа отдает целиком за один запрос
+                until = min(since + window, end) - 1
+                buffer.extend(self._run_requests(window_requests(timeframe, since, until), retry_delay))
+                since += window
+                if len(buffer) >= flush_rows or since >= end:
+                    if buffer:
+                        df = self.candles_to_frame(buffer)
+                        added += self.store_update(df, timeframe, formats, self.last_stored_timestamp(timeframe, "csv"))
+                        buffer = []
+                    write_json_atomic(cursor_path, {"timeframe": timeframe, "next_ms": since, "end_ms": end,
+                                                    "updated_at": int(time.time() * 1000)})
+        except ccxt.BaseError as e:
+            logger.error(f"[{self.symbol}] ❌ {timeframe}: загрузка прервана ({e}); "
+                         f"записанные свечи сохранены, следующий вызов продолжит с сохраненной позиции")
+            return None
+
+        if os.path.exists(cursor_path):
+            os.remove(cursor_path)
+        logger.info(f"[{self.symbol}] ✅ {timeframe}: загрузка завершена, новых свечей {added}")
+        return added
+
+    # -------------------------------------------------------------
+    # 8. МЕТОД: Свечи таймфрейма из минутных данных (с кешем)
+    # -------------------------------------------------------------
+    def _source_key(self, timeframe: str, file_type: str) -> Optional[str]:
+        # версия исходных данных: заголовок хранилища меняется при каждой записи, у CSV — размер и mtime
+        file_path = self._get_export_path(timeframe, file_extension=file_type)
+        if not os.path.exists(file_path):
+            return None
+        if file_type in STORAGE_FORMATS:
+            header = open_store(file_type, os.path.dirname(file_path)).header()
+            if header is None:
+                return None
+            return f"{file_type}:{header.get('sha1') or header.get('generation')}:{header['rows']}:{header['last_ts']}"
+        stat = os.stat(file_path)
+        return f"csv:{stat.st_size}:{stat.st_mtime_ns}"
+
+    def load_resampled(self, timeframe: str, file_type: str = "csv") -> Optional[pd.DataFrame]:
+        """
+        Свечи таймфрейма, построенные из минутных данных (MIN_TIMEFRAME) с выравниванием Bybit.
+        Результат кешируется в DATA_DIR/resampled/ и пересчитывается, когда минутные данные изменились
+        (дозапись, повторная загрузка). Последний незакрытый бар отбрасывается.
+        """
+        source_key = self._source_key(self.min_timeframe, file_type)
+        if source_key is None:
+            logger.error(f"❌ Нет минутных данных для построения таймфрейма {timeframe}")
+            return None
+
+        file_prefix = f"{self.symbol.replace('/', '_').replace(':', '_')}_{timeframe}_{self.exchange_id}"
+        cache = ColumnarStore(os.path.join(self.directory + "resampled", f"{file_prefix}_OHLCV"))
+        header = cache.header()
+        if header is not None and header.get("source_key") == source_key:
+            return cache.read()
+
+        data_1m = self.load_from_csv(file_type=file_type, timeframe=self.min_timeframe)
+        if data_1m is None:
+            return None
+        df = arrays_to_frame(resample_arrays(frame_to_arrays(data_1m), timeframe))
+        cache.write(df, meta={"source_key": source_key, "source_timeframe": self.min_timeframe})
+        logger.info(f"[{self.symbol}] Таймфрейм {timeframe} построен из {self.min_timeframe}: {len(df)} свечей")
+        return df
+
+    # -------------------------------------------------------------
+    # 9. МЕТОД: Проверка ряда на пропуски / дубликаты и точечная догрузка пропусков
+    # -------------------------------------------------------------
+    def series_name(self, timeframe: str) -> str:
+        # ключ ряда в манифесте данных — имя файла без расширения
+        return f"{self.symbol.replace('/', '_').replace(':', '_')}_{timeframe}_{self.exchange_id}_OHLCV"
+
+    def known_gaps(self, timeframe: str = "1") -> list:
+        """Пропуски ряда из манифеста данных (последняя проверка validate / repair)."""
+        return load_manifest(self.directory)["series"].get(self.series_name(timeframe), {}).get("gaps", [])
+
+    def validate(self, timeframe: str, file_type: str = "csv") -> Optional[dict]:
+        """Строит индекс пропусков и дубликатов ряда и сохраняет его в манифест данных."""
+        df = self.load_from_csv(file_type=file_type, timeframe=timeframe)
+        if df is None:
+            return None
+        file_path = self._get_export_path(timeframe, file_extension=file_type)
+        if self.catalog.entry(file_path) is None:
+            # ряд записан в обход DataFetcher (или до появления каталога) — данные уже прочитаны
+            self._catalog_update(file_path, df)
+        entry = validation_entry(df, timeframe_ms(timeframe), file_type)
+        entry = update_manifest(self.directory, self.series_name(timeframe), entry)
+        if entry["gaps"] or entry["duplicates"] or entry["unordered"]:
+            missing = sum(gap[2] for gap in entry["gaps"])
+            logger.warning(
+                f"[{self.symbol}] {timeframe}: пропусков {len(entry['gaps'])} ({missing} свечей), "
+                f"дубликатов {len(entry['duplicates'])}, нарушений порядка {entry['unordered']}"
+            )
+        return entry
+
+    def repair(self, timeframe: str, file_type: str = "csv") -> Optional[dict]:
+        """
+        Догружает с биржи только пропущенные участки (по одному диапазону на пропуск),
+        удаляет дубликаты и перезаписывает ряд. Пропуски, для которых биржа ответила без свечей
+        (например, техобслуживание), отмечаются в манифесте как подтвержденные и больше не запрашиваются.
+        Пропуски, загрузка которых не удалась (ошибка сети / API), попадают в failed_gaps и не подтверждаются.
+        """
+        entry = self.validate(timeframe, file_type)
+        if entry is None:
+            return None
+        confirmed = [tuple(gap[:2]) for gap in entry.get("confirmed_gaps", [])]
+        todo = [gap for gap in entry["gaps"] if tuple(gap[:2]) not in confirmed]
+        if not todo and not entry["duplicates"] and not entry["unordered"]:
+            return entry
+
+        df = self.load_from_csv(file_type=file_type, timeframe=timeframe)
+        parts = [df]
+        failed = []
+        if todo:
+            self._set_exchange()
+            for gap in todo:
+                # свечи пропуска окнами вперед: в памяти только сами недостающие свечи
+                try:
+                    for candles in self.iter_history(timeframe, gap[0], gap[1]):
+                        if candles:
+                            parts.append(self.candles_to_frame(candles))
+                except ccxt.BaseError as e:
+                    # ответа биржи нет — пропуск не подтверждается и будет запрошен при следующем repair
+                    logger.error(f"[{self.symbol}] ❌ {timeframe}: пропуск {pd.Timestamp(gap[0], unit='ms')} "
+                                 f"не догружен ({e})")
+                    failed.append(gap)
+        repaired = pd.concat(parts)
+        repaired = repaired[~repaired.index.duplicated(keep="last")].sort_index()
+
+        if file_type in STORAGE_FORMATS:
+            self.export_to_store(repaired, timeframe, file_type=file_type)
+        else:
+            self.export_to_csv(repaired, timeframe)
+
+        entry = self.validate(timeframe, file_type)
+        answered = [gap for gap in todo if gap not in failed]
+        still = [gap for gap in entry["gaps"] if any(gap[0] >= t[0] and gap[1] <= t[1] for t in todo)]
+        # подтверждаются только пропуски, на которые биржа ответила без свечей
+        empty = [gap for gap in still if any(gap[0] >= t[0] and gap[1] <= t[1] for t in answered)]
+        entry = update_manifest(self.directory, self.series_name(timeframe), {
+            "confirmed_gaps": entry.get("confirmed_gaps", []) + [gap for gap in empty if tuple(gap[:2]) not in confirmed],
+            "failed_gaps": failed,
+        })
+        logger.info(f"[{self.symbol}] {timeframe}: догружено пропусков {len(todo) - len(still)} из {len(todo)}, "
+                    f"ошибок загрузки {len(failed)}")
+        return entry
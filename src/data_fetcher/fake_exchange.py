@@ -0,0 +1,399 @@
+# локальная подделка REST API Bybit v5 поверх сохраненных свечей (без сети)
+
+# src/data_fetcher/fake_exchange.py
+"""
+Запуск:
+    python -m src.data_fetcher.fake_exchange --data-dir DATA_OHLCV/ --port 8765 --latency 0.05 --rate-limit 50 --page-size 200
+
+Подключение: EXCHANGE_SETTINGS.API_URL: http://127.0.0.1:8765 — DataFetcher и AsyncDownloader
+направляют запросы ccxt на этот адрес.
+"""
+import argparse
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qsl, urlsplit
+
+import numpy as np
+
+from src.data_fetcher.catalog import SERIES_NAME, market_type
+from src.data_fetcher.resample import resample_arrays, timeframe_minutes
+from src.data_fetcher.storage.base import STORAGE_FORMATS, TIMESTAMP, frame_to_arrays, open_store, read_ohlcv_csv
+
+# Логирование
+# ====================================================
+from src.utils.logger import get_logger
+logger = get_logger(__name__)
+
+# коды ответов Bybit
+OK = 0
+PARAMS_ERROR = 10001
+TOO_MANY_VISITS = 10006
+ORDER_NOT_FOUND = 110001
+
+OPEN_STATUSES = ("New", "PartiallyFilled")
+
+
+# -------------------------------------------------
+# Класс FakeBybit - состояние поддельной биржи
+# -------------------------------------------------
+class FakeBybit:
+    """
+    Отвечает как Bybit v5 на запросы, которые делают ccxt и src/Bybit:
+        GET  /v5/market/kline            свечи из локального хранилища (последние limit свечей в [start, end])
+        GET  /v5/market/instruments-info инструменты по найденным сериям (шаг цены — из COINS, если передан)
+        GET  /v5/market/time             время сервера (clock)
+        POST /v5/order/create, /v5/order/cancel
+        GET  /v5/order/realtime, /v5/order/history
+
+    latency — задержка каждого ответа (+ до latency_jitter случайно), rate_limit — запросов в секунду,
+    сверх которых отвечает retCode 10006, как Bybit; error_rate — доля случайных 10006 на запросах свечей
+    (справочные запросы ccxt.load_markets не портятся, чтобы ошибки приходились на пагинацию);
+    page_size — максимум свечей в ответе (меньше limit запроса — проверка пагинации).
+    Интервалы, которых нет в каталоге (D, M — начало истории монеты), строятся из самой младшей серии.
+    Рыночный ордер исполняется сразу по close последней закрытой свечи самого младшего таймфрейма.
+    """
+
+    def __init__(self, data_dir: str, file_type: str = "csv", coins: Optional[list] = None,
+                 latency: float = 0.0, latency_jitter: float = 0.0, rate_limit: Optional[float] = None,
+                 error_rate: float = 0.0, page_size: int = 1000, clock=time.time, seed: int = 0):
+        self.data_dir = data_dir
+        self.file_type = file_type
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.rate_limit = rate_limit
+        self.error_rate = error_rate
+        self.page_size = page_size
+        self.clock = clock
+        self.rng = random.Random(seed)
+        self.tick_sizes = {coin["SYMBOL"]: coin.get("MINIMAL_TICK_SIZE") for coin in coins or ()}
+        self.series = self._scan()
+        self.orders = {}
+        self.stats = {"requests": 0, "rate_limited": 0, "candles": 0}
+        self._cache = {}
+        self._window = (0, 0)  # (секунда, запросов в ней)
+        self._lock = threading.Lock()
+
+    # ------------------------
+    # Серии в каталоге данных
+    # ------------------------
+    def _scan(self) -> dict:
+        """{(category, symbol, минут): путь}; месячные свечи — минут None."""
+        subdir = "csv_files" if self.file_type == "csv" else STORAGE_FORMATS[self.file_type][1]
+        root = os.path.join(self.data_dir, subdir)
+        series = {}
+        for name in sorted(os.listdir(root)) if os.path.isdir(root) else ():
+            match = SERIES_NAME.match(name)
+            if not match:
+                continue
+            key = (
+                market_type(match["quote"], match["settle"]),
+                f"{match['base']}{match['quote']}",
+                timeframe_minutes(match["tf"]),
+            )
+            series[key] = os.path.join(root, name)
+        return series
+
+    def _source(self, key):
+        # интервала нет в каталоге (например, D и M для начала истории) — строится из самой младшей серии монеты
+        if key in self.series:
+            return key
+        finer = [k for k in self.series if k[:2] == key[:2] and k[2] is not None and (key[2] is None or key[2] % k[2] == 0)]
+        return min(finer, key=lambda k: k[2]) if finer else None
+
+    def _arrays(self, key) -> dict:
+        source = self._source(key)
+        with self._lock:
+            if source not in self._cache:
+                path = self.series[source]
+                if self.file_type == "csv":
+                    df = read_ohlcv_csv(path)
+                else:
+                    df = open_store(self.file_type, path).read()
+                self._cache[source] = frame_to_arrays(df)
+            arrays = self._cache[source]
+            if key != source:
+                if key not in self._cache:
+                    self._cache[key] = resample_arrays(arrays, "M" if key[2] is None else str(key[2]), drop_incomplete=False)
+                arrays = self._cache[key]
+            return arrays
+
+    # ------------------------
+    # Ограничения: задержка и лимит запросов
+    # ------------------------
+    def throttle(self, random_errors: bool = False) -> bool:
+        """False — запрос отклоняется с 10006."""
+        if self.latency or self.latency_jitter:
+            time.sleep(self.latency + self.rng.uniform(0, self.latency_jitter))
+        with self._lock:
+            self.stats["requests"] += 1
+            second = int(time.monotonic())
+            count = self._window[1] + 1 if self._window[0] == second else 1
+            self._window = (second, count)
+            limited = self.rate_limit is not None and count > self.rate_limit
+            limited = limited or (random_errors and self.rng.random() < self.error_rate)
+            if limited:
+                self.stats["rate_limited"] += 1
+            return not limited
+
+    # ------------------------
+    # Ответы
+    # ------------------------
+    def now_ms(self) -> int:
+        return int(self.clock() * 1000)
+
+    def reply(self, result=None, code: int = OK, message: str = "OK") -> dict:
+        return {"retCode": code, "retMsg": message, "result": result if result is not None else {},
+                "retExtInfo": {}, "time": self.now_ms()}
+
+    def server_time(self, params: dict) -> dict:
+        now = self.clock()
+        return self.reply({"timeSecond": str(int(now)), "timeNano": str(int(now * 1e9))})
+
+    def kline(self, params: dict) -> dict:
+        category = params.get("category", "linear")
+        symbol = params.get("symbol", "")
+        interval = params.get("interval", "")
+        try:
+            key = (category, symbol, timeframe_minutes(interval))
+        except ValueError:
+            return self.reply(code=PARAMS_ERROR, message=f"params error: interval {interval} invalid")
+        if self._source(key) is None:
+            return self.reply(code=PARAMS_ERROR, message=f"params error: symbol {symbol} invalid")
+
+        arrays = self._arrays(key)
+        ts = arrays[TIMESTAMP]
+        limit = min(int(params.get("limit", 200)), self.page_size)
+        end = min(int(params.get("end", self.now_ms())), self.now_ms())
+        lo = int(np.searchsorted(ts, int(params.get("start", 0)), side="left"))
+        hi = int(np.searchsorted(ts, end, side="right"))
+        lo = max(lo, hi - limit)
+        # Bybit отдает свечи от новых к старым, числа — строками
+        rows = [
+            [str(t), repr(o), repr(h), repr(low), repr(c), repr(v), repr(v * c)]
+            for t, o, h, low, c, v in zip(
+                ts[lo:hi].tolist(), arrays["open"][lo:hi].tolist(), arrays["high"][lo:hi].tolist(),
+                arrays["low"][lo:hi].tolist(), arrays["close"][lo:hi].tolist(), arrays["volume"][lo:hi].tolist(),
+            )
+        ][::-1]
+        self.stats["candles"] += len(rows)
+        return self.reply({"category": category, "symbol": symbol, "list": rows})
+
+    def instruments_info(self, params: dict) -> dict:
+        category = params.get("category", "linear")
+        symbol = params.get("symbol")
+        instruments = {}
+        for (cat, name, _), path in self.series.items():
+            if cat != category or (symbol and name != symbol) or name in instruments:
+                continue
+            base = SERIES_NAME.match(os.path.basename(path))["base"]
+            quote = name[len(base):]
+            tick = str(self.tick_sizes.get(base) or "0.0001")
+            instruments[name] = {
+                "symbol": name,
+                "baseCoin": base,
+                "quoteCoin": quote,
+                "settleCoin": quote if category != "spot" else "",
+                "status": "Trading",
+                "contractType": {"linear": "LinearPerpetual", "inverse": "InversePerpetual"}.get(category, ""),
+                "launchTime": "0",
+                "deliveryTime": "0",
+                "priceScale": str(max(0, -int(np.floor(np.log10(float(tick)))))),
+                "priceFilter": {"tickSize": tick, "minPrice": tick, "maxPrice": "1000000"},
+                "lotSizeFilter": {
+                    "qtyStep": "0.001", "basePrecision": "0.001", "quotePrecision": "0.01",
+                    "minOrderQty": "0.001", "maxOrderQty": "1000000", "minNotionalValue": "5",
+                },
+                "leverageFilter": {"minLeverage": "1", "maxLeverage": "100", "leverageStep": "0.01"},
+                "fundingInterval": 480,
+            }
+        return self.reply({"category": category, "list": list(instruments.values()), "nextPageCursor": ""})
+
+    # ------------------------
+    # Ордера (в памяти)
+    # ------------------------
+    def last_price(self, category: str, symbol: str) -> Optional[float]:
+        keys = sorted(
+            (key for key in self.series if key[:2] == (category, symbol) and key[2] is not None),
+            key=lambda key: key[2],
+        )
+        if not keys:
+            return None
+        arrays = self._arrays(keys[0])
+        i = int(np.searchsorted(arrays[TIMESTAMP], self.now_ms(), side="right")) - 1
+        return float(arrays["close"][max(i, 0)])
+
+    def create_order(self, params: dict) -> dict:
+        category = params.get("category", "linear")
+        symbol = params.get("symbol", "")
+        price = self.last_price(category, symbol)
+        if price is None:
+            return self.reply(code=PARAMS_ERROR, message=f"params error: symbol {symbol} invalid")
+        now = str(self.now_ms())
+        market = params.get("orderType") == "Market"
+        order = {
+            "orderId": str(uuid.uuid4()),
+            "orderLinkId": params.get("orderLinkId", ""),
+            "category": category,
+            "symbol": symbol,
+            "side": params.get("side", "Buy"),
+            "orderType": params.get("orderType", "Market"),
+            "price": str(params.get("price", "0")),
+            "qty": str(params.get("qty", "0")),
+            "cumExecQty": str(params.get("qty", "0")) if market else "0",
+            "avgPrice": repr(price) if market else "",
+            "orderStatus": "Filled" if market else "New",
+            "timeInForce": params.get("timeInForce", "IOC" if market else "GTC"),
+            "createdTime": now,
+            "updatedTime": now,
+        }
+        with self._lock:
+            self.orders[order["orderId"]] = order
+        return self.reply({"orderId": order["orderId"], "orderLinkId": order["orderLinkId"]})
+
+    def _find_orders(self, params: dict, open_only: bool) -> list:
+        with self._lock:
+            orders = list(self.orders.values())
+        for field in ("category", "symbol", "orderId", "orderLinkId"):
+            if params.get(field):
+                orders = [order for order in orders if order[field] == params[field]]
+        if open_only:
+            orders = [order for order in orders if order["orderStatus"] in OPEN_STATUSES]
+        return orders
+
+    def cancel_order(self, params: dict) -> dict:
+        orders = self._find_orders(params, open_only=True)
+        if not orders or not (params.get("orderId") or params.get("orderLinkId")):
+            return self.reply(code=ORDER_NOT_FOUND, message="Order does not exist.")
+        order = orders[0]
+        order.update(orderStatus="Cancelled", updatedTime=str(self.now_ms()))
+        return self.reply({"orderId": order["orderId"], "orderLinkId": order["orderLinkId"]})
+
+    def order_list(self, params: dict, open_only: bool) -> dict:
+        orders = sorted(self._find_orders(params, open_only), key=lambda order: order["createdTime"], reverse=True)
+        limit = int(params.get("limit", 20))
+        return self.reply({"category": params.get("category", "linear"), "list": orders[:limit], "nextPageCursor": ""})
+
+    # ------------------------
+    # Маршрутизация
+    # ------------------------
+    def handle(self, method: str, path: str, params: dict) -> dict:
+        routes = {
+            ("GET", "/v5/market/time"): self.server_time,
+            ("GET", "/v5/market/kline"): self.kline,
+            ("GET", "/v5/market/instruments-info"): self.instruments_info,
+            ("POST", "/v5/order/create"): self.create_order,
+            ("POST", "/v5/order/cancel"): self.cancel_order,
+            ("GET", "/v5/order/realtime"): lambda p: self.order_list(p, open_only=True),
+            ("GET", "/v5/order/history"): lambda p: self.order_list(p, open_only=False),
+        }
+        route = routes.get((method, path))
+        if route is None:
+            return self.reply(code=PARAMS_ERROR, message=f"unknown endpoint {method} {path}")
+        if not self.throttle(random_errors=route == self.kline):
+            return self.reply(code=TOO_MANY_VISITS, message="Too many visits!")
+        return route(params)
+
+
+# -------------------------------------------------
+# HTTP-сервер в фоновом потоке
+# -------------------------------------------------
+class _Handler(BaseHTTPRequestHandler):
+    exchange: FakeBybit = None
+
+    def _respond(self, method: str):
+        url = urlsplit(self.path)
+        params = dict(parse_qsl(url.query))
+        if method == "POST":
+            length = int(self.headers.get("Content-Length") or 0)
+            body = self.rfile.read(length) if length else b""
+            params.update(json.loads(body) if body else {})
+        payload = json.dumps(self.exchange.handle(method, url.path, params)).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        self._respond("GET")
+
+    def do_POST(self):
+        self._respond("POST")
+
+    def log_message(self, format, *args):
+        logger.debug("fake bybit: " + format, *args)
+
+
+class FakeBybitServer:
+    """
+    with FakeBybitServer(FakeBybit(data_dir)) as server:
+        exchange = {"EXCHANGE_ID": "bybit", "API_URL": server.url, ...}
+    port=0 — свободный порт.
+    """
+
+    def __init__(self, exchange: FakeBybit, host: str = "127.0.0.1", port: int = 0):
+        handler = type("Handler", (_Handler,), {"exchange": exchange})
+        self.exchange = exchange
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeBybitServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Локальная подделка REST API Bybit v5 поверх DATA_DIR")
+    parser.add_argument("--data-dir", default="DATA_OHLCV/", help="Каталог данных (DATA_DIR)")
+    parser.add_argument("--format", default="csv", help="Формат хранилища: csv | npy | mmap | chunked")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="Задержка ответа, с")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Случайная добавка к задержке, до, с")
+    parser.add_argument("--rate-limit", type=float, default=None, help="Запросов в секунду до ответа 10006")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Доля случайных ответов 10006")
+    parser.add_argument("--page-size", type=int, default=1000, help="Максимум свечей в ответе")
+    args = parser.parse_args()
+
+    exchange = FakeBybit(
+        args.data_dir, file_type=args.format, latency=args.latency, latency_jitter=args.jitter,
+        rate_limit=args.rate_limit, error_rate=args.error_rate, page_size=args.page_size,
+    )
+    server = FakeBybitServer(exchange, args.host, args.port)
+    logger.info(f"Поддельная биржа: {server.url}, серий: {len(exchange.series)}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+        logger.info(f"Статистика: {exchange.stats}")
+
+
+if __name__ == "__main__":
+    main()
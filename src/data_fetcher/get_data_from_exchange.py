@@ -1,9 +1,8 @@
 """
 Основной конвейер для получения и сохранения исторических данных по монетам из конфигурации.
-Загрузка данных осуществляется через DataFetcher.
+Загрузка данных осуществляется через AsyncDownloader (все серии параллельно), запись — через DataFetcher.
 
 """
-import time
 
 # Логирование
 # ====================================================
@@ -16,14 +15,16 @@ from src.config.config import config
 # ====================================================
 # Основной конвейер для получения и сохранения исторических данных
 # ====================================================
-def run_data_update_pipeline(loading_min=True):
-    """Основной конвейер для получения и сохранения исторических данных по монетам из конфигурации."""
+def run_data_update_pipeline(loading_min=True, incremental=False):
+    """
+    Основной конвейер для получения и сохранения исторических данных по монетам из конфигурации.
+    incremental=True — догрузка только новых свечей к уже сохраненным (см. run_incremental_update).
+    """
     
     
     # Получение настроек Биржи
     exchange = config.get_section("EXCHANGE_SETTINGS")
     data_dir = config.get_setting("BACKTEST_SETTINGS", "DATA_DIR")
-    loading_update_min = False
     
     # 1. Получение массива монет
     try:
@@ -36,51 +37,150 @@ def run_data_update_pipeline(loading_min=True):
         coins_list = [] # Устанавливаем пустой список для безопасной работы
         timeframe_list = [] # Устанавливаем пустой список для безопасной работы
         
-    # Подключение к Бирже
+    if incremental:
+        run_incremental_update(coins_list, timeframe_list, exchange, data_dir)
+        return
+    run_full_download(coins_list, timeframe_list, exchange, data_dir, loading_min)
+
+
+# ------------------------
+# Общие настройки загрузки: форматы записи и загрузчик
+# ------------------------
+def _download_formats() -> tuple:
+    data_format = config.get_section("BACKTEST_SETTINGS").get("DATA_FORMAT", "csv")
+    return ("csv",) if data_format == "csv" else ("csv", data_format)
+
+
+def _downloader(exchange, data_dir):
+    from src.data_fetcher.async_downloader import AsyncDownloader
+
+    return AsyncDownloader(
+        exchange,
+        directory=data_dir,
+        concurrency=exchange.get("DOWNLOAD_CONCURRENCY", 8),
+        shards=exchange.get("DOWNLOAD_SHARDS", 4),
+    )
+
+
+# ====================================================
+# Полная загрузка: серии, которых еще нет
+# ====================================================
+def run_full_download(coins_list, timeframe_list, exchange, data_dir, loading_min=True):
+    """
+    Загружает серии TIMEFRAME_LIST, которых еще нет (или загрузка которых прервана), и минутные серии.
+    loading_min=False — серии загружаются заново (сохраненные CSV удаляются).
+    Все серии всех монет загружаются параллельно (AsyncDownloader) под общим лимитом запросов биржи:
+    история новой серии — шардами по времени, существующая догружается новыми свечами.
+    Пауз между монетами нет — частоту запросов ограничивает TokenBucket загрузчика.
+    """
     from src.data_fetcher.data_fetcher import DataFetcher
-    # 2. Обработка каждой монеты   
+
+    tasks = []
     for coin in coins_list:
-        logger.info("============================================================================")
-        symbol = coin.get("SYMBOL")+"/USDT"
-        timeframe = coin.get("TIMEFRAME")
+        symbol = coin.get("SYMBOL") + "/USDT"
         min_timeframe = coin.get("MIN_TIMEFRAME", "")
-        market_type = coin.get("MARKET_TYPE", "spot")  # Добавлено получение категории рынка
-        logger.info(f"[bold yellow]{symbol}[/bold yellow], Маркет: [bold green]{market_type}[/bold green], Таймфрейм: [bold yellow]{timeframe}[/bold yellow], Минимальный таймфрейм: [bold yellow]{min_timeframe}[/bold yellow]")
+        market_type = coin.get("MARKET_TYPE", "spot")
+        logger.info(f"[bold yellow]{symbol}[/bold yellow], Маркет: [bold green]{market_type}[/bold green], Минимальный таймфрейм: [bold yellow]{min_timeframe}[/bold yellow]")
 
-        fetcher = DataFetcher( coin,
-            exchange=exchange, 
-            directory=data_dir,
-            )
+        fetcher = DataFetcher(coin, exchange=exchange, directory=data_dir)
+        timeframes = []
         for timeframe in timeframe_list:
-            # coin["TIMEFRAME"] = tf
-            logger.info(f"[{symbol}] 🪙, 🕒 Таймфрейм: [bold yellow]{timeframe}[/bold yellow]")
-            # проверка на существование данных 
-            if fetcher.check_file_exists(timeframe) and loading_min:
+            # проверка на существование данных (прерванная загрузка продолжается)
+            in_progress = fetcher.download_in_progress(timeframe)
+            if fetcher.check_file_exists(timeframe) and loading_min and not in_progress:
                 logger.info(f"[{symbol}] 🪙, 🕒 Таймфрейм: [bold yellow]{timeframe}[/bold yellow] уже существует пропускаем")
                 continue
-            
-            # Загрузка данных
-            with LoggingTimer(f"[bold yellow]{symbol}[/bold yellow] load timeframe.....: {timeframe}"):
-                data_df = fetcher.fetch_entire_history(timeframe)
-                # Сохранение данных
-                if data_df is not None:
-                    # Сохранить в под папку 'csv_files'
-                    fetcher.export_to_csv(data_df, timeframe) 
-                        
-                        # Сохранить в под папку 'excel_files'
-                    fetcher.export_to_excel(data_df, timeframe)
-                    
-                    loading_update_min = True
-            
-        logger.info(f"[{symbol}] 🪙, 🕒 Таймфрейм: [bold yellow]{min_timeframe}[/bold yellow] pause..........")
-        time.sleep(100) # Пауза в 100 секунд
-        if loading_min or loading_update_min:
-            if min_timeframe != "":
-                with LoggingTimer(f"[bold yellow]{symbol}[/bold yellow] load timeframe.....: {timeframe}"):
-                    data_df_min = fetcher.fetch_entire_history(min_timeframe)
-                
-                    # Сохранение данных
-                    if data_df_min is not None:
-                        # Сохранить в под папку 'csv_files'
-                        fetcher.export_to_csv(data_df_min, timeframe=min_timeframe) 
-                    
\ No newline at end of file
+            timeframes.append(timeframe)
+        if min_timeframe and min_timeframe not in timeframes and (loading_min or timeframes):
+            timeframes.append(min_timeframe)
+
+        for timeframe in timeframes:
+            if not loading_min and not fetcher.download_in_progress(timeframe):
+                fetcher.discard_history(timeframe)
+            tasks.append((coin, timeframe))
+
+    downloader = _downloader(exchange, data_dir)
+    with LoggingTimer(f"load {len(tasks)} series"):
+        results = downloader.run(tasks, formats=_download_formats())
+
+    for coin, timeframe in tasks:
+        added = results[(coin.get("SYMBOL"), timeframe)]
+        if added is None:
+            logger.error(f"[{coin.get('SYMBOL')}] ❌ Таймфрейм {timeframe}: загрузка не удалась")
+        elif timeframe in timeframe_list:
+            # Сохранить в под папку 'excel_files'
+            fetcher = DataFetcher(coin, exchange=exchange, directory=data_dir)
+            fetcher.export_to_excel(fetcher.load_from_csv("csv", timeframe), timeframe)
+    logger.info(f"Загрузка завершена. Запросов: {downloader.stats['requests']}, повторов: {downloader.stats['retries']}")
+
+
+# ====================================================
+# Инкрементальное обновление: только новые свечи
+# ====================================================
+def run_incremental_update(coins_list, timeframe_list, exchange, data_dir):
+    """
+    Для каждой монеты и таймфрейма (TIMEFRAME_LIST + MIN_TIMEFRAME) догружает свечи
+    с последней сохраненной до текущего момента и дописывает их в CSV
+    и в формат BACKTEST_SETTINGS.DATA_FORMAT (npy / mmap).
+    Все серии загружаются параллельно (AsyncDownloader) под общим лимитом запросов биржи.
+    Excel не обновляется (перезапись файла целиком), паузы между монетами нет.
+    """
+    formats = _download_formats()
+
+    # HTF строятся из минутных при бэктесте (HTF_SOURCE: resample) — загружать их не нужно
+    if config.get_section("BACKTEST_SETTINGS").get("HTF_SOURCE", "download") == "resample":
+        timeframe_list = []
+
+    tasks = []
+    for coin in coins_list:
+        timeframes = list(timeframe_list)
+        # минутные нужны всегда (исполнение ордеров), по умолчанию "1" — как в DataFetcher
+        min_timeframe = coin.get("MIN_TIMEFRAME") or "1"
+        if min_timeframe not in timeframes:
+            timeframes.append(min_timeframe)
+        tasks.extend((coin, timeframe) for timeframe in timeframes)
+
+    downloader = _downloader(exchange, data_dir)
+    with LoggingTimer(f"update {len(tasks)} series"):
+        results = downloader.run(tasks, formats=formats)
+
+    for (symbol, timeframe), added in results.items():
+        if added is None:
+            logger.error(f"[{symbol}] ❌ Таймфрейм {timeframe}: обновление не удалось")
+    total = sum(added for added in results.values() if added)
+    logger.info(f"Инкрементальное обновление завершено. Новых свечей: {total}, запросов: {downloader.stats['requests']}, повторов: {downloader.stats['retries']}")
+
+
+# ====================================================
+# Проверка данных: пропуски и дубликаты (манифест DATA_DIR/manifest.json)
+# ====================================================
+def run_data_validation(repair=False):
+    """
+    Проверяет все ряды монет из конфигурации (TIMEFRAME_LIST + минутные) в формате DATA_FORMAT.
+    repair=True — догружает с биржи только пропущенные участки.
+    """
+    from src.data_fetcher.data_fetcher import DataFetcher
+
+    exchange = config.get_section("EXCHANGE_SETTINGS")
+    settings = config.get_section("BACKTEST_SETTINGS")
+    data_dir = settings.get("DATA_DIR")
+    data_format = settings.get("DATA_FORMAT", "csv")
+
+    problems = 0
+    for coin in config.get_section("COINS"):
+        fetcher = DataFetcher(coin, exchange=exchange, directory=data_dir)
+        timeframes = list(settings.get("TIMEFRAME_LIST", []))
+        min_timeframe = coin.get("MIN_TIMEFRAME") or "1"
+        if min_timeframe not in timeframes:
+            timeframes.append(min_timeframe)
+        for timeframe in timeframes:
+            entry = fetcher.repair(timeframe, data_format) if repair else fetcher.validate(timeframe, data_format)
+            if entry is None:
+                logger.warning(f"[{fetcher.symbol}] {timeframe}: данных нет")
+                continue
+            if entry.get("failed_gaps"):
+                logger.error(f"[{fetcher.symbol}] {timeframe}: не догружено пропусков {len(entry['failed_gaps'])} — ошибка биржи")
+            if entry["gaps"] or entry["duplicates"]:
+                problems += 1
+    logger.info(f"Проверка данных завершена. Рядов с пропусками или дубликатами: {problems}")
+
@@ -0,0 +1,393 @@
+# поток закрытых свечей в реальном времени: websocket Bybit -> кольцевые буферы NumPy по (монета, таймфрейм)
+
+# src/data_fetcher/live_stream.py
+"""
+Свечи приходят по websocket (темы kline.<interval>.<symbol> Bybit v5), без опроса REST.
+На каждую монету из COINS и ее таймфреймы (TIMEFRAME, MIN_TIMEFRAME) — кольцевой буфер
+фиксированной емкости MINIMUM_BARS_FOR_STRATEGY_CALCULATION + headroom. При закрытии бара
+(confirm: true) подписчики получают окно последних баров — срез буфера без копирования
+в формате стратегии (как arr в BacktestEngine): колонки open, high, low, close, dt.
+
+Перед подключением буферы заполняются последними барами из локального хранилища (DATA_DIR),
+поэтому стратегия может считаться с первого закрытого бара.
+
+Запуск (из корня проекта):
+    python -m src.data_fetcher.live_stream                                  # Bybit по config.yaml
+    python -m src.data_fetcher.live_stream --replay --start "2025-06-01"    # воспроизведение DATA_DIR
+"""
+import argparse
+import asyncio
+import json
+import time
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from src.data_fetcher.async_downloader import backoff_delay
+from src.data_fetcher.catalog import read_arrays
+from src.data_fetcher.data_fetcher import DataFetcher
+from src.data_fetcher.resample import timeframe_minutes, timeframe_ms
+from src.data_fetcher.storage.base import TIMESTAMP
+
+# Логирование
+# ====================================================
+from src.utils.logger import get_logger
+logger = get_logger(__name__)
+
+# колонки окна — как arr в BacktestEngine (dt — datetime64[ns] числом float64)
+WINDOW_COLUMNS = ("open", "high", "low", "close", "dt")
+# запас сверх MINIMUM_BARS_FOR_STRATEGY_CALCULATION
+DEFAULT_HEADROOM = 50
+# Bybit закрывает соединение без ping дольше 20 секунд простоя
+PING_INTERVAL = 20.0
+# тем в одном запросе subscribe
+SUBSCRIBE_BATCH = 10
+MS_TO_NS = 1_000_000
+
+
+def ws_url(category: str = "linear", testnet: bool = False) -> str:
+    return f"wss://stream{'-testnet' if testnet else ''}.bybit.com/v5/public/{category}"
+
+
+def bybit_interval(timeframe: str) -> str:
+    """Таймфрейм конфига ("1", "4h", "D") -> interval темы kline Bybit ("1", "240", "D")."""
+    minutes = timeframe_minutes(timeframe)
+    if minutes is None:
+        return "M"
+    return {1440: "D", 7 * 1440: "W"}.get(minutes, str(minutes))
+
+
+def bybit_symbol(coin: dict) -> str:
+    return f"{coin['SYMBOL']}{'USD' if coin.get('MARKET_TYPE') == 'inverse' else 'USDT'}"
+
+
+def coin_timeframes(coin: dict) -> list:
+    return list(dict.fromkeys(tf for tf in (coin.get("TIMEFRAME"), coin.get("MIN_TIMEFRAME")) if tf))
+
+
+# -------------------------------------------------
+# Класс CandleRing - кольцевой буфер закрытых баров одной серии
+# -------------------------------------------------
+class CandleRing:
+    """
+    Буфер удвоенной длины: бар пишется в ячейку i и i + capacity, поэтому последние n баров
+    всегда лежат подряд — window(n) возвращает срез (view) без копирования и без сборки DataFrame.
+    Окно только для чтения и действительно до следующего push: обработчик закрытия бара
+    должен использовать его сразу (или скопировать).
+    """
+
+    def __init__(self, capacity: int):
+        if capacity <= 0:
+            raise ValueError("capacity должен быть положительным")
+        self.capacity = capacity
+        self.bars = np.zeros((2 * capacity, len(WINDOW_COLUMNS)), dtype=np.float64)
+        self.volume = np.zeros(2 * capacity, dtype=np.float64)
+        self.count = 0  # баров записано за все время
+        self.last_ts = None  # время открытия последнего бара, мс
+
+    def __len__(self) -> int:
+        return min(self.count, self.capacity)
+
+    def push(self, ts_ms: int, open_: float, high: float, low: float, close: float, volume: float):
+        slot = self.count % self.capacity
+        row = (open_, high, low, close, float(ts_ms * MS_TO_NS))
+        self.bars[slot] = row
+        self.bars[slot + self.capacity] = row
+        self.volume[slot] = self.volume[slot + self.capacity] = volume
+        self.count += 1
+        self.last_ts = int(ts_ms)
+
+    def extend(self, arrays: dict):
+        """Последние capacity баров из массивов хранилища (storage.base.frame_to_arrays)."""
+        ts = np.asarray(arrays[TIMESTAMP], dtype=np.int64)[-self.capacity:]
+        if not len(ts):
+            return
+        n = len(ts)
+        block = np.column_stack([np.asarray(arrays[col], dtype=np.float64)[-n:] for col in WINDOW_COLUMNS[:4]]
+                                + [ts.astype(np.float64) * MS_TO_NS])
+        slots = (self.count + np.arange(n)) % self.capacity
+        self.bars[slots] = self.bars[slots + self.capacity] = block
+        self.volume[slots] = self.volume[slots + self.capacity] = np.asarray(arrays["volume"], dtype=np.float64)[-n:]
+        self.count += n
+        self.last_ts = int(ts[-1])
+
+    def _bounds(self, n: Optional[int]) -> tuple:
+        size = len(self)
+        n = size if n is None else min(n, size)
+        end = self.count % self.capacity + self.capacity
+        return end - n, end
+
+    def window(self, n: Optional[int] = None) -> np.ndarray:
+        """Последние n закрытых баров (n x 5: open, high, low, close, dt), от старых к новым."""
+        lo, hi = self._bounds(n)
+        view = self.bars[lo:hi]
+        view.flags.writeable = False
+        return view
+
+    def volumes(self, n: Optional[int] = None) -> np.ndarray:
+        lo, hi = self._bounds(n)
+        view = self.volume[lo:hi]
+        view.flags.writeable = False
+        return view
+
+
+# -------------------------------------------------
+# Класс CandleStream - буферы всех серий и разбор сообщений kline
+# -------------------------------------------------
+class CandleStream:
+    """
+    Серии задаются парами (SYMBOL монеты, таймфрейм конфига). on_close(callback) регистрирует
+    обработчик callback(symbol, timeframe, window), вызываемый на каждом закрытом баре.
+    Незакрытые обновления бара, повторы и бары старше последнего пропускаются;
+    разрыв (бар позже ожидаемого, например после переподключения) считается в stats["gaps"].
+    """
+
+    def __init__(self, coins: list, min_bars: int, headroom: int = DEFAULT_HEADROOM):
+        self.window_size = min_bars
+        self.rings = {}
+        self.topics = {}  # тема kline -> (symbol, timeframe)
+        for coin in coins:
+            for timeframe in coin_timeframes(coin):
+                key = (coin["SYMBOL"], timeframe)
+                self.rings[key] = CandleRing(min_bars + headroom)
+                self.topics[f"kline.{bybit_interval(timeframe)}.{bybit_symbol(coin)}"] = key
+        self.coins = {coin["SYMBOL"]: coin for coin in coins}
+        self.callbacks = []
+        self.stats = {"messages": 0, "closed": 0, "skipped": 0, "gaps": 0}
+
+    @classmethod
+    def from_config(cls, config, headroom: int = DEFAULT_HEADROOM) -> "CandleStream":
+        return cls(
+            config.get_section("COINS"),
+            config.get_setting("STRATEGY_SETTINGS", "MINIMUM_BARS_FOR_STRATEGY_CALCULATION"),
+            headroom,
+        )
+
+    def on_close(self, callback):
+        self.callbacks.append(callback)
+        return callback
+
+    def window(self, symbol: str, timeframe: str, n: Optional[int] = None) -> np.ndarray:
+        return self.rings[(symbol, timeframe)].window(n or self.window_size)
+
+    # ------------------------
+    # Начальное заполнение из локального хранилища
+    # ------------------------
+    def preload(self, data_dir: str, file_type: str = "csv", until_ms: Optional[int] = None) -> dict:
+        """Заполняет буферы последними сохраненными барами (открытыми раньше until_ms). {серия: баров}."""
+        loaded = {}
+        for (symbol, timeframe), ring in self.rings.items():
+            arrays = stored_arrays(data_dir, self.coins[symbol], timeframe, file_type)
+            if arrays is None:
+                logger.warning(f"⚠️ {symbol} {timeframe}: нет сохраненных свечей для заполнения буфера")
+                continue
+            if until_ms is not None:
+                hi = int(np.searchsorted(arrays[TIMESTAMP], until_ms, side="left"))
+                arrays = {col: values[:hi] for col, values in arrays.items()}
+            ring.extend(arrays)
+            loaded[(symbol, timeframe)] = len(ring)
+        return loaded
+
+    # ------------------------
+    # Сообщения websocket
+    # ------------------------
+    def handle(self, message: dict) -> int:
+        """Разбирает сообщение темы kline. Возвращает число закрытых баров."""
+        key = self.topics.get(message.get("topic"))
+        if key is None:
+            return 0
+        self.stats["messages"] += 1
+        ring = self.rings[key]
+        closed = 0
+        for bar in message.get("data", ()):
+            if not bar.get("confirm"):
+                continue
+            start = int(bar["start"])
+            if ring.last_ts is not None and start <= ring.last_ts:
+                self.stats["skipped"] += 1
+                continue
+            step = timeframe_ms(key[1])
+            if ring.last_ts is not None and step and start > ring.last_ts + step:
+                self.stats["gaps"] += 1
+                logger.warning(f"⚠️ {key[0]} {key[1]}: разрыв потока свечей "
+                               f"{pd.Timestamp(ring.last_ts, unit='ms')} -> {pd.Timestamp(start, unit='ms')}")
+            ring.push(start, float(bar["open"]), float(bar["high"]), float(bar["low"]), float(bar["close"]),
+                      float(bar["volume"]))
+            closed += 1
+            self.stats["closed"] += 1
+            if len(ring) >= self.window_size:
+                window = ring.window(self.window_size)
+                for callback in self.callbacks:
+                    callback(key[0], key[1], window)
+        return closed
+
+    async def consume(self, feed, max_bars: Optional[int] = None) -> int:
+        """Читает сообщения из feed (BybitKlineFeed / ReplayFeed) до конца или до max_bars закрытых баров."""
+        closed = 0
+        async for message in feed:
+            closed += self.handle(message)
+            if max_bars is not None and closed >= max_bars:
+                break
+        return closed
+
+
+def stored_arrays(data_dir: str, coin: dict, timeframe: str, file_type: str = "csv") -> Optional[dict]:
+    fetcher = DataFetcher(coin, {"EXCHANGE_ID": "bybit"}, data_dir)
+    if not fetcher.check_file_exists(timeframe, file_type):
+        return None
+    return read_arrays(fetcher._get_export_path(timeframe, file_type))
+
+
+# -------------------------------------------------
+# Класс BybitKlineFeed - сообщения kline с websocket Bybit
+# -------------------------------------------------
+class BybitKlineFeed:
+    """
+    Асинхронный итератор сообщений публичного websocket Bybit v5 (aiohttp).
+    После подключения подписывается на topics пачками по SUBSCRIBE_BATCH, каждые ping_interval
+    секунд тишины шлет {"op": "ping"}; при обрыве переподключается с экспоненциальной паузой.
+    """
+
+    def __init__(self, topics, url: Optional[str] = None, ping_interval: float = PING_INTERVAL,
+                 backoff_base: float = 0.5, max_reconnects: Optional[int] = None):
+        self.topics = list(topics)
+        self.url = url or ws_url()
+        self.ping_interval = ping_interval
+        self.backoff_base = backoff_base
+        self.max_reconnects = max_reconnects
+        self.stats = {"connects": 0, "reconnects": 0}
+
+    def __aiter__(self):
+        return self._messages()
+
+    async def _messages(self):
+        import aiohttp
+
+        attempt = 0
+        async with aiohttp.ClientSession() as session:
+            while True:
+                try:
+                    async with session.ws_connect(self.url) as ws:
+                        self.stats["connects"] += 1
+                        for i in range(0, len(self.topics), SUBSCRIBE_BATCH):
+                            await ws.send_json({"op": "subscribe", "args": self.topics[i:i + SUBSCRIBE_BATCH]})
+                        logger.info(f"Подключен поток свечей {self.url}: тем {len(self.topics)}")
+                        async for message in self._receive(ws):
+                            attempt = 0
+                            yield message
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    logger.warning(f"⚠️ Поток свечей: {e}")
+                if self.max_reconnects is not None and self.stats["reconnects"] >= self.max_reconnects:
+                    return
+                self.stats["reconnects"] += 1
+                await asyncio.sleep(backoff_delay(attempt, self.backoff_base))
+                attempt += 1
+
+    async def _receive(self, ws):
+        import aiohttp
+
+        while True:
+            try:
+                msg = await ws.receive(timeout=self.ping_interval)
+            except asyncio.TimeoutError:
+                await ws.send_json({"op": "ping"})
+                continue
+            if msg.type != aiohttp.WSMsgType.TEXT:
+                # CLOSE / ERROR: соединение закрыто
+                return
+            message = json.loads(msg.data)
+            if "topic" in message:
+                yield message
+            elif message.get("op") == "subscribe" and not message.get("success"):
+                logger.error(f"❌ Подписка отклонена: {message.get('ret_msg')}")
+
+
+# -------------------------------------------------
+# Класс ReplayFeed - воспроизведение сохраненных свечей как сообщений kline
+# -------------------------------------------------
+class ReplayFeed:
+    """
+    Замена websocket для тестов и отладки: бары серий из DATA_DIR, открытые не раньше start_ms,
+    отдаются сообщениями kline Bybit (confirm: true) в порядке закрытия. delay — пауза между барами.
+    """
+
+    def __init__(self, data_dir: str, coins: list, file_type: str = "csv",
+                 start_ms: Optional[int] = None, delay: float = 0.0):
+        self.delay = delay
+        self.series = []
+        for coin in coins:
+            for timeframe in coin_timeframes(coin):
+                arrays = stored_arrays(data_dir, coin, timeframe, file_type)
+                if arrays is None:
+                    continue
+                lo = int(np.searchsorted(arrays[TIMESTAMP], start_ms, side="left")) if start_ms is not None else 0
+                topic = f"kline.{bybit_interval(timeframe)}.{bybit_symbol(coin)}"
+                self.series.append((topic, bybit_interval(timeframe), {col: values[lo:] for col, values in arrays.items()},
+                                    timeframe_ms(timeframe)))
+
+    def _order(self) -> tuple:
+        """(серия, строка) всех баров по времени закрытия; при равенстве — младший таймфрейм первым."""
+        ends = [arrays[TIMESTAMP] + (step or 0) for _, _, arrays, step in self.series]
+        which = np.concatenate([np.full(len(end), i) for i, end in enumerate(ends)]) if ends else np.empty(0, int)
+        rows = np.concatenate([np.arange(len(end)) for end in ends]) if ends else np.empty(0, int)
+        order = np.lexsort((which, np.concatenate(ends))) if ends else np.empty(0, int)
+        return which[order], rows[order]
+
+    def __aiter__(self):
+        return self._messages()
+
+    async def _messages(self):
+        for i, row in zip(*self._order()):
+            topic, interval, arrays, step = self.series[i]
+            start = int(arrays[TIMESTAMP][row])
+            bar = {
+                "start": start,
+                "end": start + (step or 0) - 1,
+                "interval": interval,
+                **{col: repr(float(arrays[col][row])) for col in ("open", "close", "high", "low", "volume")},
+                "confirm": True,
+                "timestamp": start + (step or 0),
+            }
+            yield {"topic": topic, "type": "snapshot", "ts": bar["timestamp"], "data": [bar]}
+            await asyncio.sleep(self.delay)
+
+
+def main(argv=None) -> int:
+    from src.config.config import config
+
+    parser = argparse.ArgumentParser(description="Поток закрытых свечей в кольцевые буферы")
+    parser.add_argument("--replay", action="store_true", help="Воспроизвести свечи из DATA_DIR вместо websocket")
+    parser.add_argument("--start", default=None, help="Начало воспроизведения (дата)")
+    parser.add_argument("--delay", type=float, default=0.0, help="Пауза между барами при воспроизведении, сек")
+    args = parser.parse_args(argv)
+
+    settings = config.get_section("BACKTEST_SETTINGS")
+    exchange = config.get_section("EXCHANGE_SETTINGS")
+    data_dir = settings.get("DATA_DIR", "DATA_OHLCV/")
+    file_type = settings.get("DATA_FORMAT", "csv")
+    start_ms = pd.Timestamp(args.start).value // MS_TO_NS if args.start else None
+
+    stream = CandleStream.from_config(config)
+    logger.info(f"Буферы заполнены из {data_dir}: {stream.preload(data_dir, file_type, until_ms=start_ms)}")
+
+    @stream.on_close
+    def log_close(symbol, timeframe, window):
+        logger.info(f"{symbol} {timeframe}: закрыт бар {pd.Timestamp(int(window[-1, 4]))} close={window[-1, 3]}")
+
+    if args.replay:
+        feed = ReplayFeed(data_dir, config.get_section("COINS"), file_type, start_ms=start_ms, delay=args.delay)
+    else:
+        url = exchange.get("WS_URL") or ws_url(exchange.get("CATEGORY", "linear"), bool(exchange.get("TESTNET")))
+        feed = BybitKlineFeed(stream.topics, url)
+    started = time.perf_counter()
+    try:
+        asyncio.run(stream.consume(feed))
+    except KeyboardInterrupt:
+        pass
+    logger.info(f"Поток свечей остановлен за {time.perf_counter() - started:.1f} с: {stream.stats}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,92 @@
+# построение свечей старших таймфреймов из минутных
+
+# src/data_fetcher/resample.py
+from typing import Optional
+
+import numpy as np
+
+from src.data_fetcher.storage.base import TIMESTAMP
+
+MINUTE_MS = 60_000
+DAY_MS = 1440 * MINUTE_MS
+# 1970-01-01 — четверг; недельные свечи Bybit начинаются в понедельник 00:00 UTC
+WEEK_OFFSET_MS = 4 * DAY_MS
+
+
+# ------------------------
+# Длительность таймфрейма в минутах (имена таймфреймов Bybit и ccxt: "1", "60", "4h", "D", "1d", "W")
+# ------------------------
+def timeframe_minutes(timeframe: str) -> Optional[int]:
+    """None — месячный таймфрейм (переменная длина)."""
+    tf = str(timeframe).strip()
+    if tf in ("M", "1M"):
+        return None
+    unit = tf[-1]
+    if tf.isdigit():
+        return int(tf)
+    count = int(tf[:-1]) if len(tf) > 1 else 1
+    if unit == "m":
+        return count
+    if unit in ("h", "H"):
+        return count * 60
+    if unit in ("D", "d"):
+        return count * 1440
+    if unit in ("W", "w"):
+        return count * 7 * 1440
+    raise ValueError(f"Неизвестный таймфрейм: {timeframe}")
+
+
+def timeframe_ms(timeframe: str) -> Optional[int]:
+    minutes = timeframe_minutes(timeframe)
+    return minutes * MINUTE_MS if minutes is not None else None
+
+
+# ------------------------
+# Номер бара старшего таймфрейма для каждой минутной свечи
+# ------------------------
+def bucket_starts(ts_ms: np.ndarray, timeframe: str) -> np.ndarray:
+    """
+    Время открытия бара (мс), в который попадает свеча, с выравниванием как у Bybit:
+    минуты / часы / дни — от полуночи UTC, недели — с понедельника, месяцы — с 1-го числа.
+    """
+    ts_ms = np.asarray(ts_ms, dtype=np.int64)
+    minutes = timeframe_minutes(timeframe)
+    if minutes is None:
+        months = ts_ms.astype("datetime64[ms]").astype("datetime64[M]")
+        return months.astype("datetime64[ms]").astype(np.int64)
+    step = minutes * MINUTE_MS
+    offset = WEEK_OFFSET_MS if minutes % (7 * 1440) == 0 else 0
+    return (ts_ms - offset) // step * step + offset
+
+
+# ------------------------
+# Свертка массивов OHLCV (storage.base.frame_to_arrays) в старший таймфрейм
+# ------------------------
+def resample_arrays(arrays: dict, timeframe: str, drop_incomplete: bool = True) -> dict:
+    """
+    Один проход без pandas.resample: границы баров — по смене номера бара,
+    high / low / volume — np.maximum / np.minimum / np.add.reduceat, open / close — первая / последняя свеча.
+    drop_incomplete — отбросить последний бар, если минутные данные заканчиваются раньше его закрытия
+    (как незакрытая свеча биржи).
+    """
+    ts = np.asarray(arrays[TIMESTAMP], dtype=np.int64)
+    if len(ts) == 0:
+        return {key: np.asarray(value)[:0] for key, value in arrays.items()}
+    starts = bucket_starts(ts, timeframe)
+    first = np.flatnonzero(np.r_[True, starts[1:] != starts[:-1]])
+    last = np.r_[first[1:], len(ts)] - 1
+
+    result = {
+        TIMESTAMP: starts[first],
+        "open": np.asarray(arrays["open"])[first],
+        "high": np.maximum.reduceat(np.asarray(arrays["high"]), first),
+        "low": np.minimum.reduceat(np.asarray(arrays["low"]), first),
+        "close": np.asarray(arrays["close"])[last],
+        "volume": np.add.reduceat(np.asarray(arrays["volume"]), first),
+    }
+
+    if drop_incomplete:
+        next_start = bucket_starts(np.array([ts[-1] + MINUTE_MS]), timeframe)[0]
+        if next_start == starts[-1]:
+            result = {key: value[:-1] for key, value in result.items()}
+    return result
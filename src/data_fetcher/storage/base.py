@@ -0,0 +1,105 @@
+# общие части хранилищ OHLCV
+
+# src/data_fetcher/storage/base.py
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# колонки хранилища: время int64 (мс от эпохи), цены и объем float64
+TIMESTAMP = "timestamp"
+PRICE_COLUMNS = ("open", "high", "low", "close", "volume")
+OHLCV_COLUMNS = (TIMESTAMP,) + PRICE_COLUMNS
+
+
+# ------------------------
+# DataFrame <-> массивы
+# ------------------------
+def frame_to_arrays(df: pd.DataFrame) -> dict:
+    """
+    DataFrame с DatetimeIndex (как после load_from_csv / fetch_*) в словарь массивов:
+    timestamp — int64 мс от эпохи, остальные — float64.
+    """
+    index = pd.DatetimeIndex(df.index)
+    if index.tz is not None:
+        index = index.tz_convert(None)
+    arrays = {TIMESTAMP: index.as_unit("ms").asi8.astype(np.int64)}
+    for col in PRICE_COLUMNS:
+        arrays[col] = df[col].to_numpy(dtype=np.float64)
+    return arrays
+
+
+def arrays_to_frame(arrays: dict) -> pd.DataFrame:
+    """Обратное преобразование: тот же вид, что у load_from_csv (индекс timestamp, datetime64[ns])."""
+    # мс -> нс и просмотр как datetime64: без разбора, в отличие от pd.to_datetime(unit="ms")
+    ns = np.asarray(arrays[TIMESTAMP], dtype=np.int64) * 1_000_000
+    index = pd.DatetimeIndex(ns.view("datetime64[ns]"), name=TIMESTAMP)
+    # одна float64-матрица — один блок DataFrame без консолидации колонок
+    values = np.column_stack([np.asarray(arrays[col], dtype=np.float64) for col in PRICE_COLUMNS])
+    return pd.DataFrame(values, index=index, columns=list(PRICE_COLUMNS))
+
+
+# ------------------------
+# Разбор CSV (формат export_to_csv): используется load_from_csv и конвертером
+# ------------------------
+def read_ohlcv_csv(path) -> pd.DataFrame:
+    # index_col=0: первый столбец (таймштамп) является индексом
+    df = pd.read_csv(path, index_col=0)
+    df.index.name = TIMESTAMP
+    df.index = pd.to_datetime(df.index)
+    # числовые столбцы могли быть сохранены как строки
+    for col in PRICE_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+    # строки с пропущенными значениями после конвертации
+    df.dropna(inplace=True)
+    return df
+
+
+# ------------------------
+# Атомарная запись небольших JSON-файлов (заголовки, манифесты)
+# ------------------------
+def write_json_atomic(path, data: dict):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def read_json(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+# -------------------------------------------------
+# Реестр форматов хранения (BACKTEST_SETTINGS.DATA_FORMAT)
+# -------------------------------------------------
+# формат -> (класс хранилища, подкаталог DATA_DIR); csv обрабатывается DataFetcher напрямую
+STORAGE_FORMATS = {}
+
+
+def register_storage(name: str, subdir: str):
+    """
+    Регистрирует формат хранения. Класс хранилища создается от пути к каталогу серии
+    и реализует: exists(), header(), write(df), append(df) -> int,
+    read(start_ms=None, end_ms=None) -> DataFrame, fingerprint_path().
+    """
+    def decorator(cls):
+        STORAGE_FORMATS[name] = (cls, subdir)
+        return cls
+    return decorator
+
+
+def open_store(fmt: str, path):
+    if fmt not in STORAGE_FORMATS:
+        raise ValueError(f"Неизвестный формат хранения: {fmt}. Доступны: csv, {', '.join(STORAGE_FORMATS)}")
+    return STORAGE_FORMATS[fmt][0](path)
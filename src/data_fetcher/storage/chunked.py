@@ -0,0 +1,331 @@
+# блочное сжатое хранилище свечей с произвольным доступом по времени
+
+# src/data_fetcher/storage/chunked.py
+import lzma
+import os
+import zlib
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from src.data_fetcher.storage.base import (
+    OHLCV_COLUMNS, TIMESTAMP, arrays_to_frame, frame_to_arrays, read_json, register_storage,
+    write_json_atomic,
+)
+
+try:  # необязательный быстрый кодек
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# версия формата заголовка
+CHUNKED_VERSION = 1
+HEADER = "header.json"
+DATA = "blocks.bin"
+# служебные поля заголовка (остальное — meta, переданная в write)
+HEADER_KEYS = ("version", "codec", "block_rows", "rows", "first_ts", "last_ts", "garbage", "generation", "blocks")
+
+# строк в блоке: блок — единица сжатия и чтения
+BLOCK_ROWS = 65536
+# максимум знаков после запятой для десятичного кодирования цен
+MAX_DECIMALS = 8
+
+# кодек -> (сжать, распаковать)
+CODECS = {
+    "zlib": (lambda data: zlib.compress(data, 6), zlib.decompress),
+    "lzma": (lambda data: lzma.compress(data, preset=6), lzma.decompress),
+}
+if zstandard is not None:
+    CODECS["zstd"] = (
+        lambda data: zstandard.ZstdCompressor(level=9).compress(data),
+        lambda data: zstandard.ZstdDecompressor().decompress(data),
+    )
+
+
+# ------------------------
+# Кодирование колонок блока (без потерь)
+# ------------------------
+def _shuffle(values: np.ndarray) -> bytes:
+    # байты одного разряда подряд: старшие байты соседних значений почти одинаковы и хорошо сжимаются
+    return values.view(np.uint8).reshape(-1, 8).T.tobytes()
+
+
+def _unshuffle(data: bytes, rows: int) -> np.ndarray:
+    return np.frombuffer(data, dtype=np.uint8).reshape(8, rows).T.copy().view(np.int64).ravel()
+
+
+def _delta(values: np.ndarray) -> np.ndarray:
+    return np.diff(values, prepend=np.int64(0))
+
+
+def _decimal_scale(values: np.ndarray) -> Optional[int]:
+    """
+    Наименьшее k, при котором значения — целые числа / 10**k и восстанавливаются бит в бит
+    (цены биржи с шагом тика). None — не подходит ни одно k <= MAX_DECIMALS.
+    """
+    for k in range(MAX_DECIMALS + 1):
+        scaled = np.rint(values * 10.0 ** k)
+        if np.abs(scaled).max(initial=0) >= 2 ** 53:
+            return None
+        if np.array_equal(scaled / 10.0 ** k, values):
+            return k
+    return None
+
+
+def encode_column(name: str, values: np.ndarray) -> tuple:
+    """
+    timestamp — разности соседних значений (шаг бара -> одинаковые числа);
+    цены с конечным числом знаков — целые (value * 10**k), затем разности;
+    остальное — XOR с предыдущим значением (совпадающие знак / порядок / старшие биты мантиссы обнуляются).
+    Возвращает (способ, байты до сжатия).
+    """
+    if name == TIMESTAMP:
+        return "delta", _shuffle(_delta(values.astype(np.int64)))
+    k = _decimal_scale(values)
+    if k is not None:
+        return f"dec{k}", _shuffle(_delta(np.rint(values * 10.0 ** k).astype(np.int64)))
+    bits = values.astype(np.float64).view(np.int64)
+    return "xor", _shuffle(bits ^ np.concatenate(([0], bits[:-1])).astype(np.int64))
+
+
+def decode_column(method: str, data: bytes, rows: int) -> np.ndarray:
+    raw = _unshuffle(data, rows)
+    if method == "delta":
+        return np.cumsum(raw)
+    if method.startswith("dec"):
+        return np.cumsum(raw) / 10.0 ** int(method[3:])
+    # xor: префиксный XOR восстанавливает исходные биты
+    bits = np.bitwise_xor.accumulate(raw.view(np.uint64))
+    return bits.view(np.float64)
+
+
+# -------------------------------------------------
+# Класс ChunkedStore - одна серия (символ, таймфрейм)
+# -------------------------------------------------
+@register_storage("chunked", subdir="chunked_files")
+class ChunkedStore:
+    """
+    Каталог серии:
+        blocks.bin   блоки по BLOCK_ROWS строк; каждая колонка блока сжата отдельно
+        header.json  кодек и список блоков: смещение, размеры колонок, число строк,
+                     первый / последний timestamp, способ кодирования колонок
+
+    Чтение диапазона распаковывает только блоки, пересекающие его (индекс по времени — в заголовке).
+    Дозапись, как у mmap: новые блоки пишутся за зафиксированными, потом атомарно заменяется заголовок.
+    Неполный последний блок при дозаписи перекодируется вместе с новыми строками в новый блок,
+    старая копия становится мусором; когда мусора больше половины данных — серия переписывается.
+    """
+
+    def __init__(self, directory, codec: str = "zlib", block_rows: int = BLOCK_ROWS):
+        self.directory = Path(directory)
+        self.codec = codec
+        self.block_rows = block_rows
+
+    @property
+    def header_path(self) -> Path:
+        return self.directory / HEADER
+
+    @property
+    def data_path(self) -> Path:
+        return self.directory / DATA
+
+    def fingerprint_path(self) -> Path:
+        return self.header_path
+
+    def exists(self) -> bool:
+        return self.header() is not None
+
+    def header(self) -> Optional[dict]:
+        header = read_json(self.header_path)
+        if not header or header.get("version") != CHUNKED_VERSION:
+            return None
+        return header
+
+    # ------------------------
+    # Запись
+    # ------------------------
+    def _encode_blocks(self, arrays: dict, codec: str, offset: int, start_row: int = 0):
+        compress = CODECS[codec][0]
+        rows = len(arrays[TIMESTAMP])
+        blocks, payloads = [], []
+        for lo in range(start_row, rows, self.block_rows):
+            hi = min(rows, lo + self.block_rows)
+            methods, sizes, parts = {}, [], []
+            for col in OHLCV_COLUMNS:
+                method, raw = encode_column(col, np.ascontiguousarray(arrays[col][lo:hi]))
+                packed = compress(raw)
+                methods[col] = method
+                sizes.append(len(packed))
+                parts.append(packed)
+            payload = b"".join(parts)
+            blocks.append({
+                "offset": offset,
+                "sizes": sizes,
+                "rows": hi - lo,
+                "first_ts": int(arrays[TIMESTAMP][lo]),
+                "last_ts": int(arrays[TIMESTAMP][hi - 1]),
+                "methods": methods,
+            })
+            payloads.append(payload)
+            offset += len(payload)
+        return blocks, payloads
+
+    def _commit(self, blocks: list, codec: str, garbage: int, generation: int, meta: Optional[dict] = None,
+                previous: Optional[dict] = None) -> dict:
+        header = {
+            **{k: v for k, v in (previous or {}).items() if k not in HEADER_KEYS},
+            **(meta or {}),
+            "version": CHUNKED_VERSION,
+            "codec": codec,
+            "block_rows": self.block_rows,
+            "rows": sum(block["rows"] for block in blocks),
+            "first_ts": blocks[0]["first_ts"] if blocks else None,
+            "last_ts": blocks[-1]["last_ts"] if blocks else None,
+            "garbage": garbage,
+            "generation": generation,
+            "blocks": blocks,
+        }
+        write_json_atomic(self.header_path, header)
+        return header
+
+    def write(self, df: pd.DataFrame, meta: Optional[dict] = None, codec: Optional[str] = None) -> dict:
+        previous = self.header()
+        codec = codec or (previous or {}).get("codec") or self.codec
+        arrays = frame_to_arrays(df)
+        blocks, payloads = self._encode_blocks(arrays, codec, offset=0)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp = self.directory / f"{DATA}.tmp"
+        with open(tmp, "wb") as f:
+            for payload in payloads:
+                f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        # старый заголовок не должен указывать на новый файл данных
+        if previous is not None:
+            self.header_path.unlink()
+        os.replace(tmp, self.data_path)
+        generation = previous["generation"] + 1 if previous else 0
+        return self._commit(blocks, codec, garbage=0, generation=generation, meta=meta)
+
+    def append(self, df: pd.DataFrame) -> int:
+        """Дозаписывает свечи новее последней сохраненной. Возвращает количество добавленных."""
+        if df is None or df.empty:
+            return 0
+        header = self.header()
+        if header is None:
+            return self.write(df)["rows"]
+
+        arrays = frame_to_arrays(df)
+        if header["last_ts"] is not None:
+            keep = arrays[TIMESTAMP] > header["last_ts"]
+            arrays = {col: values[keep] for col, values in arrays.items()}
+        added = len(arrays[TIMESTAMP])
+        if added == 0:
+            return 0
+
+        blocks = list(header["blocks"])
+        garbage = header["garbage"]
+        # неполный последний блок перекодируется вместе с новыми строками
+        if blocks and blocks[-1]["rows"] < self.block_rows:
+            tail = blocks.pop()
+            garbage += sum(tail["sizes"])
+            tail_arrays = self._decode_block(tail, header["codec"])
+            arrays = {col: np.concatenate([tail_arrays[col], arrays[col]]) for col in OHLCV_COLUMNS}
+
+        last = header["blocks"][-1] if header["blocks"] else None
+        committed = last["offset"] + sum(last["sizes"]) if last else 0
+        new_blocks, payloads = self._encode_blocks(arrays, header["codec"], offset=committed)
+        live = sum(sum(block["sizes"]) for block in blocks) + sum(map(len, payloads))
+        if garbage > live // 2:
+            # мусора больше половины данных — серия переписывается целиком
+            new = arrays_to_frame({col: values[-added:] for col, values in arrays.items()})
+            meta = {k: v for k, v in header.items() if k not in HEADER_KEYS}
+            self.write(pd.concat([self.read(), new]), meta=meta)
+            return added
+
+        with open(self.data_path, "r+b") as f:
+            f.truncate(committed)
+            f.seek(committed)
+            for payload in payloads:
+                f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        self._commit(blocks + new_blocks, header["codec"], garbage, header["generation"] + 1, previous=header)
+        return added
+
+    # ------------------------
+    # Чтение
+    # ------------------------
+    def _decode_block(self, block: dict, codec: str, columns=OHLCV_COLUMNS, f=None) -> dict:
+        decompress = CODECS[codec][1]
+        own = f is None
+        if own:
+            f = open(self.data_path, "rb")
+        try:
+            f.seek(block["offset"])
+            payload = f.read(sum(block["sizes"]))
+        finally:
+            if own:
+                f.close()
+        result, pos = {}, 0
+        for col, size in zip(OHLCV_COLUMNS, block["sizes"]):
+            if col in columns:
+                result[col] = decode_column(block["methods"][col], decompress(payload[pos:pos + size]), block["rows"])
+            pos += size
+        return result
+
+    def bounds(self, start_ms: Optional[int] = None, end_ms: Optional[int] = None, offset_bars: int = 0):
+        """
+        Номера строк [lo, hi) диапазона, как MmapStore.bounds (offset_bars строк до start_ms).
+        Распаковываются только timestamp граничных блоков.
+        """
+        header = self.header()
+        if header is None:
+            return None, None, None
+        blocks = header["blocks"]
+        starts = np.cumsum([0] + [block["rows"] for block in blocks])
+        rows = int(starts[-1])
+
+        def position(ts_ms: int, side: str) -> int:
+            last_ts = [block["last_ts"] for block in blocks]
+            i = bisect_left(last_ts, ts_ms) if side == "left" else bisect_right(last_ts, ts_ms)
+            if i >= len(blocks):
+                return rows
+            ts = self._decode_block(blocks[i], header["codec"], columns=(TIMESTAMP,))[TIMESTAMP]
+            return int(starts[i]) + int(np.searchsorted(ts, ts_ms, side=side))
+
+        lo, hi = 0, rows
+        if start_ms is not None:
+            lo = position(start_ms, "left")
+            if lo == rows:
+                lo = -1  # как get_indexer(..., method="bfill") для даты после конца данных
+            lo = max(0, lo - offset_bars)
+        if end_ms is not None:
+            hi = position(end_ms, "right")
+        return header, lo, max(lo, hi)
+
+    def read_rows(self, header: dict, lo: int, hi: int) -> pd.DataFrame:
+        blocks = header["blocks"]
+        starts = np.cumsum([0] + [block["rows"] for block in blocks])
+        first = max(0, int(np.searchsorted(starts, lo, side="right")) - 1)
+        parts = []
+        with open(self.data_path, "rb") as f:
+            for i in range(first, len(blocks)):
+                if starts[i] >= hi:
+                    break
+                decoded = self._decode_block(blocks[i], header["codec"], f=f)
+                a, b = max(lo - starts[i], 0), min(hi - starts[i], blocks[i]["rows"])
+                parts.append({col: values[a:b] for col, values in decoded.items()})
+        if not parts:
+            return arrays_to_frame({col: np.empty(0, dtype=np.int64 if col == TIMESTAMP else np.float64)
+                                    for col in OHLCV_COLUMNS})
+        return arrays_to_frame({col: np.concatenate([part[col] for part in parts]) for col in OHLCV_COLUMNS})
+
+    def read(self, start_ms: Optional[int] = None, end_ms: Optional[int] = None, offset_bars: int = 0) -> Optional[pd.DataFrame]:
+        header, lo, hi = self.bounds(start_ms, end_ms, offset_bars)
+        if header is None:
+            return None
+        return self.read_rows(header, lo, hi)
@@ -0,0 +1,204 @@
+# колоночное бинарное хранилище OHLCV (.npy на колонку + JSON-заголовок)
+
+# src/data_fetcher/storage/columnar.py
+import hashlib
+import os
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from src.data_fetcher.storage.base import (
+    OHLCV_COLUMNS, TIMESTAMP, arrays_to_frame, frame_to_arrays, read_json, register_storage, write_json_atomic,
+)
+
+# версия формата заголовка
+COLUMNAR_VERSION = 1
+HEADER = "header.json"
+
+
+# -------------------------------------------------
+# Класс ColumnarStore - одна серия (символ, таймфрейм)
+# -------------------------------------------------
+@register_storage("npy", subdir="npy_files")
+class ColumnarStore:
+    """
+    Каталог серии:
+        timestamp.<g>.npy  int64, мс от эпохи
+        open.<g>.npy ... volume.<g>.npy  float64
+        header.json    версия, поколение g, имена файлов колонок, число строк,
+                       первый / последний timestamp, sha1 содержимого
+    Каждая запись создает колонки нового поколения под новыми именами, затем атомарно
+    заменяет заголовок и только после этого удаляет файлы прежнего поколения.
+    Дозапись (append) продлевает колонки текущего поколения на месте: строки, зафиксированные
+    в заголовке, не меняются, новые становятся видны с атомарной заменой заголовка.
+    Заголовок всегда ссылается на колонки одной записи: прерванная запись оставляет
+    прежнюю серию целой, серия без заголовка считается отсутствующей.
+    Загрузка — np.load без разбора текста: float64 сохраняются бит в бит.
+    """
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+
+    @property
+    def header_path(self) -> Path:
+        return self.directory / HEADER
+
+    def fingerprint_path(self) -> Path:
+        # заголовок содержит sha1 колонок — по нему считается отпечаток данных (кеш результатов)
+        return self.header_path
+
+    def exists(self) -> bool:
+        return self.header() is not None
+
+    def header(self) -> Optional[dict]:
+        header = read_json(self.header_path)
+        if not header or header.get("version") != COLUMNAR_VERSION:
+            return None
+        return header
+
+    # ------------------------
+    # Запись серии целиком
+    # ------------------------
+    def write(self, df: pd.DataFrame, meta: Optional[dict] = None) -> dict:
+        arrays = frame_to_arrays(df)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        previous = self.header()
+        generation = previous.get("generation", 0) + 1 if previous else 1
+        files = {col: f"{col}.{generation}.npy" for col in OHLCV_COLUMNS}
+        digest = hashlib.sha1()
+        for col in OHLCV_COLUMNS:
+            data = np.ascontiguousarray(arrays[col])
+            digest.update(data.tobytes())
+            tmp = self.directory / f"{files[col]}.tmp"
+            with open(tmp, "wb") as f:
+                np.save(f, data, allow_pickle=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.directory / files[col])
+
+        ts = arrays[TIMESTAMP]
+        header = {
+            "version": COLUMNAR_VERSION,
+            "generation": generation,
+            "files": files,
+            "rows": int(len(ts)),
+            "first_ts": int(ts[0]) if len(ts) else None,
+            "last_ts": int(ts[-1]) if len(ts) else None,
+            "columns": {col: str(arrays[col].dtype) for col in OHLCV_COLUMNS},
+            "sha1": digest.hexdigest(),
+            **(meta or {}),
+        }
+        write_json_atomic(self.header_path, header)
+
+        self._remove_stale(files)
+        return header
+
+    def _remove_stale(self, files: dict):
+        # колонки прежних поколений и недописанные файлы прерванных записей
+        keep = set(files.values())
+        for path in self.directory.glob("*.npy*"):
+            if path.name not in keep:
+                path.unlink()
+
+    @staticmethod
+    def column_files(header: dict) -> dict:
+        # заголовки до появления поколений ссылаются на <колонка>.npy
+        return header.get("files") or {col: f"{col}.npy" for col in OHLCV_COLUMNS}
+
+    # ------------------------
+    # Дозапись: новые строки дописываются в конец колонок текущего поколения
+    # ------------------------
+    def _columns(self, header: dict) -> dict:
+        files = self.column_files(header)
+        return {col: np.load(self.directory / files[col], mmap_mode="r")[:header["rows"]] for col in OHLCV_COLUMNS}
+
+    def _extend_column(self, path: Path, rows: int, data: np.ndarray):
+        """
+        Дописывает data после первых rows строк .npy и меняет shape в заголовке файла на месте
+        (np.save оставляет в заголовке место под рост shape). Зафиксированные строки не переписываются,
+        хвост прерванной дозаписи обрезается; до фиксации header.json новые строки не видны (read берет rows).
+        """
+        with open(path, "r+b") as f:
+            version = np.lib.format.read_magic(f)
+            read_header = np.lib.format.read_array_header_1_0 if version == (1, 0) else np.lib.format.read_array_header_2_0
+            shape, fortran_order, dtype = read_header(f)
+            offset = f.tell()
+            f.truncate(offset + rows * dtype.itemsize)
+            f.seek(0, os.SEEK_END)
+            f.write(np.ascontiguousarray(data, dtype=dtype).tobytes())
+            header = repr({"descr": np.lib.format.dtype_to_descr(dtype), "fortran_order": fortran_order,
+                           "shape": (rows + len(data),)})
+            prefix = len(np.lib.format.magic(*version)) + (2 if version == (1, 0) else 4)
+            padded = header.ljust(offset - prefix - 1) + "\n"
+            if len(padded) != offset - prefix:
+                raise ValueError(f"{path.name}: нет места в заголовке .npy под новый размер")
+            f.seek(prefix)
+            f.write(padded.encode("latin1"))
+            f.flush()
+            os.fsync(f.fileno())
+
+    def append(self, df: pd.DataFrame) -> int:
+        """
+        Дозапись новых свечей: в колонки дописываются только строки новее последней сохраненной
+        (дисковые операции и память — по размеру df, а не ряда), заголовок фиксируется атомарно,
+        sha1 — хеш прежнего sha1 и добавленных строк.
+        Перекрывающиеся свечи с другими значениями или df внутри ряда — запись нового поколения
+        (свечи ряда до и после df сохраняются). Возвращает количество свечей новее последней сохраненной.
+        """
+        if df is None or df.empty:
+            return 0
+        header = self.header()
+        if header is None or not header["rows"]:
+            self.write(df)
+            return len(df)
+
+        arrays = frame_to_arrays(df)
+        ts = arrays[TIMESTAMP]
+        columns = self._columns(header)
+        stored_ts = columns[TIMESTAMP]
+        first = int(np.searchsorted(stored_ts, ts[0], side="left"))
+        new_from = int(np.searchsorted(ts, header["last_ts"], side="right"))
+        added = len(ts) - new_from
+        # перекрытие — конец ряда и совпадает с сохраненным бит в бит: дописывается только хвост
+        tail_only = first + new_from == header["rows"] and all(
+            np.array_equal(columns[col][first:], arrays[col][:new_from]) for col in OHLCV_COLUMNS
+        )
+        if not tail_only:
+            stored = self.read()
+            self.write(pd.concat([stored[stored.index < df.index[0]], df, stored[stored.index > df.index[-1]]]))
+            return added
+        if not added:
+            return 0
+
+        files = self.column_files(header)
+        digest = hashlib.sha1(header.get("sha1", "").encode())
+        for col in OHLCV_COLUMNS:
+            data = np.ascontiguousarray(arrays[col][new_from:])
+            digest.update(data.tobytes())
+            self._extend_column(self.directory / files[col], header["rows"], data)
+        write_json_atomic(self.header_path, {
+            **header,
+            "rows": header["rows"] + added,
+            "last_ts": int(ts[-1]),
+            "sha1": digest.hexdigest(),
+        })
+        self._remove_stale(files)
+        return added
+
+    # ------------------------
+    # Чтение (целиком или диапазон [start_ms, end_ms])
+    # ------------------------
+    def read(self, start_ms: Optional[int] = None, end_ms: Optional[int] = None) -> Optional[pd.DataFrame]:
+        header = self.header()
+        if header is None:
+            return None
+        # mmap: для диапазона с диска читаются только нужные строки
+        columns = self._columns(header)
+        lo, hi = 0, header["rows"]
+        if start_ms is not None:
+            lo = int(np.searchsorted(columns[TIMESTAMP], start_ms, side="left"))
+        if end_ms is not None:
+            hi = int(np.searchsorted(columns[TIMESTAMP], end_ms, side="right"))
+        return arrays_to_frame({col: np.array(data[lo:hi]) for col, data in columns.items()})
@@ -0,0 +1,76 @@
+# конвертация CSV-файлов данных в бинарное хранилище
+
+# src/data_fetcher/storage/convert.py
+"""
+Запуск (из корня проекта):
+    python -m src.data_fetcher.storage.convert --data-dir DATA_OHLCV/            # все csv_files/*.csv -> npy_files/
+    python -m src.data_fetcher.storage.convert --data-dir DATA_OHLCV/ --force    # перезаписать уже сконвертированные
+    python -m src.data_fetcher.storage.convert --data-dir DATA_OHLCV/ --format mmap
+
+Серия пишется под тем же именем, что и CSV (без расширения) — именно этот путь
+формирует DataFetcher._get_export_path для file_extension="npy" / "mmap".
+CSV разбирается тем же кодом, что и load_from_csv, поэтому загрузка из хранилища
+возвращает DataFrame, идентичный загрузке из CSV.
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+from src.data_fetcher.catalog import DataCatalog
+from src.data_fetcher.storage.base import STORAGE_FORMATS, frame_to_arrays, open_store, read_ohlcv_csv
+import src.data_fetcher.storage.columnar  # noqa: F401  регистрирует формат npy
+import src.data_fetcher.storage.mmap_store  # noqa: F401  регистрирует формат mmap
+import src.data_fetcher.storage.chunked  # noqa: F401  регистрирует формат chunked
+import src.data_fetcher.storage.partitioned  # noqa: F401  регистрирует формат partitioned
+
+# Логирование
+# ====================================================
+from src.utils.logger import get_logger
+logger = get_logger(__name__)
+
+
+def convert_file(csv_path, data_dir, fmt: str = "npy", force: bool = False) -> bool:
+    """Конвертирует один CSV. False — серия уже есть и force не задан."""
+    csv_path = Path(csv_path)
+    store = open_store(fmt, Path(data_dir) / STORAGE_FORMATS[fmt][1] / csv_path.stem)
+    if store.exists() and not force:
+        return False
+    df = read_ohlcv_csv(csv_path)
+    store.write(df, meta={"source": csv_path.name})
+    DataCatalog(data_dir).record_write(store.fingerprint_path(), frame_to_arrays(df))
+    return True
+
+
+def convert_directory(data_dir, fmt: str = "npy", force: bool = False) -> dict:
+    files = sorted((Path(data_dir) / "csv_files").glob("*.csv"))
+    stats = {"converted": 0, "skipped": 0, "failed": 0}
+    for csv_path in files:
+        started = time.perf_counter()
+        try:
+            if convert_file(csv_path, data_dir, fmt, force):
+                stats["converted"] += 1
+                logger.info(f"✅ {csv_path.name} -> {fmt} за {time.perf_counter() - started:.2f} с")
+            else:
+                stats["skipped"] += 1
+                logger.debug(f"{csv_path.name}: уже сконвертирован")
+        except Exception as e:
+            stats["failed"] += 1
+            logger.error(f"❌ Ошибка конвертации {csv_path}: {e}")
+    return stats
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Конвертация CSV-файлов OHLCV в бинарное хранилище")
+    parser.add_argument("--data-dir", default="DATA_OHLCV/", help="Каталог данных (BACKTEST_SETTINGS.DATA_DIR)")
+    parser.add_argument("--format", default="npy", choices=sorted(STORAGE_FORMATS), help="Формат хранилища")
+    parser.add_argument("--force", action="store_true", help="Перезаписать уже сконвертированные серии")
+    args = parser.parse_args(argv)
+
+    stats = convert_directory(args.data_dir, args.format, args.force)
+    logger.info(f"Конвертация завершена: {stats}")
+    return 1 if stats["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,218 @@
+# append-only хранилище свечей: записи фиксированной ширины + np.memmap
+
+# src/data_fetcher/storage/mmap_store.py
+import os
+from bisect import bisect_right
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from src.data_fetcher.storage.base import (
+    OHLCV_COLUMNS, PRICE_COLUMNS, TIMESTAMP, frame_to_arrays, read_json, register_storage, write_json_atomic,
+)
+
+# версия формата заголовка
+MMAP_VERSION = 1
+HEADER = "header.json"
+DATA = "data.bin"
+
+# запись: ts int64 (мс) + o, h, l, c, v float64 — 48 байт; все поля одной ширины,
+# поэтому файл читается и как матрица (rows, 6): цены — срез [:, 1:] без копирования
+RECORD = np.dtype([(TIMESTAMP, "<i8")] + [(col, "<f8") for col in PRICE_COLUMNS])
+FIELDS = len(OHLCV_COLUMNS)
+
+# шаг разреженного индекса: timestamp каждой INDEX_STEP-й записи
+INDEX_STEP = 1024
+
+
+# -------------------------------------------------
+# Класс MmapStore - одна серия (символ, таймфрейм)
+# -------------------------------------------------
+@register_storage("mmap", subdir="mmap_files")
+class MmapStore:
+    """
+    Каталог серии:
+        data.bin     записи RECORD подряд, по возрастанию timestamp
+        header.json  число зафиксированных записей, первый / последний timestamp,
+                     разреженный индекс (timestamp каждой INDEX_STEP-й записи), номер поколения
+
+    Чтение диапазона: бисекция по разреженному индексу + searchsorted внутри одного блока,
+    результат — срез memmap (с диска читаются только страницы диапазона).
+
+    Дозапись безопасна при падении: записи пишутся за последней зафиксированной,
+    файл синхронизируется, и только потом атомарно заменяется заголовок.
+    Хвост после зафиксированных записей (прерванная дозапись) игнорируется при чтении
+    и отрезается при следующей дозаписи — существующие записи не перезаписываются никогда.
+    Писатель у серии один (загрузчик данных).
+    """
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+
+    @property
+    def header_path(self) -> Path:
+        return self.directory / HEADER
+
+    @property
+    def data_path(self) -> Path:
+        return self.directory / DATA
+
+    def fingerprint_path(self) -> Path:
+        # заголовок меняется при каждой записи (rows, last_ts, generation)
+        return self.header_path
+
+    def exists(self) -> bool:
+        return self.header() is not None
+
+    def header(self) -> Optional[dict]:
+        header = read_json(self.header_path)
+        if not header or header.get("version") != MMAP_VERSION:
+            return None
+        return header
+
+    def __len__(self):
+        header = self.header()
+        return header["rows"] if header else 0
+
+    # ------------------------
+    # Запись
+    # ------------------------
+    @staticmethod
+    def _records(df: pd.DataFrame) -> np.ndarray:
+        arrays = frame_to_arrays(df)
+        records = np.empty(len(arrays[TIMESTAMP]), dtype=RECORD)
+        for col in OHLCV_COLUMNS:
+            records[col] = arrays[col]
+        if len(records) > 1 and not (np.diff(records[TIMESTAMP]) > 0).all():
+            raise ValueError("Свечи должны идти по строго возрастающему timestamp")
+        return records
+
+    def _commit_header(self, header: Optional[dict], records: np.ndarray, generation: Optional[int] = None,
+                       meta: Optional[dict] = None) -> dict:
+        # header — заголовок, к записям которого дописаны records (None — серия пишется заново)
+        rows = header["rows"] if header else 0
+        index = list(header["index"]) if header else []
+        ts = records[TIMESTAMP]
+        # новые точки индекса: записи с глобальным номером, кратным INDEX_STEP
+        index.extend(int(t) for t in ts[-rows % INDEX_STEP::INDEX_STEP])
+        if generation is None:
+            generation = header["generation"] + 1 if header else 0
+        new_header = {
+            **(header or {}),
+            **(meta or {}),
+            "version": MMAP_VERSION,
+            "rows": rows + len(records),
+            "record": RECORD.descr,
+            "first_ts": header["first_ts"] if rows else (int(ts[0]) if len(ts) else None),
+            "last_ts": int(ts[-1]) if len(ts) else (header["last_ts"] if header else None),
+            "index_step": INDEX_STEP,
+            "index": index,
+            "generation": generation,
+        }
+        write_json_atomic(self.header_path, new_header)
+        return new_header
+
+    def write(self, df: pd.DataFrame, meta: Optional[dict] = None) -> dict:
+        """Переписывает серию целиком (конвертер, полная загрузка истории)."""
+        records = self._records(df)
+        previous = self.header()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp = self.directory / f"{DATA}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(records.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        # старый заголовок не должен указывать на новый файл данных
+        if previous is not None:
+            self.header_path.unlink()
+        os.replace(tmp, self.data_path)
+        generation = previous["generation"] + 1 if previous else 0
+        return self._commit_header(None, records, generation=generation, meta=meta)
+
+    def append(self, df: pd.DataFrame) -> int:
+        """
+        Дозаписывает свечи новее последней зафиксированной; более старые и совпадающие
+        по timestamp отбрасываются. Возвращает количество добавленных свечей.
+        """
+        header = self.header()
+        if header is None:
+            if df is None or df.empty:
+                return 0
+            return self.write(df)["rows"]
+
+        records = self._records(df)
+        if header["last_ts"] is not None:
+            records = records[records[TIMESTAMP] > header["last_ts"]]
+        if len(records) == 0:
+            return 0
+
+        committed = header["rows"] * RECORD.itemsize
+        with open(self.data_path, "r+b") as f:
+            f.truncate(committed)
+            f.seek(committed)
+            f.write(records.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        self._commit_header(header, records)
+        return len(records)
+
+    # ------------------------
+    # Чтение
+    # ------------------------
+    def records(self, header: Optional[dict] = None) -> Optional[np.memmap]:
+        """Все зафиксированные записи (memmap только для чтения)."""
+        header = header or self.header()
+        if header is None:
+            return None
+        if header["rows"] == 0:
+            return np.empty(0, dtype=RECORD)
+        return np.memmap(self.data_path, dtype=RECORD, mode="r", shape=(header["rows"],))
+
+    @staticmethod
+    def _search(records: np.ndarray, header: dict, ts_ms: int, side: str) -> int:
+        # блок по разреженному индексу, затем searchsorted только внутри блока
+        step = header["index_step"]
+        block = max(0, bisect_right(header["index"], ts_ms) - 1)
+        lo = block * step
+        hi = min(len(records), lo + step + 1)
+        return lo + int(np.searchsorted(records[TIMESTAMP][lo:hi], ts_ms, side=side))
+
+    def bounds(self, start_ms: Optional[int] = None, end_ms: Optional[int] = None, offset_bars: int = 0):
+        """
+        Номера записей [lo, hi) для диапазона [start_ms, end_ms] с offset_bars записями до start_ms
+        (как select_range_backtest). None — серии нет.
+        """
+        header = self.header()
+        records = self.records(header)
+        if records is None:
+            return None, None, None
+        lo, hi = 0, len(records)
+        if start_ms is not None:
+            lo = self._search(records, header, start_ms, "left")
+            if lo == len(records):
+                lo = -1  # как get_indexer(..., method="bfill") для даты после конца данных
+            lo = max(0, lo - offset_bars)
+        if end_ms is not None:
+            hi = self._search(records, header, end_ms, "right")
+        return records, lo, max(lo, hi)
+
+    def view(self, start_ms: Optional[int] = None, end_ms: Optional[int] = None, offset_bars: int = 0) -> Optional[np.ndarray]:
+        records, lo, hi = self.bounds(start_ms, end_ms, offset_bars)
+        return None if records is None else records[lo:hi]
+
+    @staticmethod
+    def to_frame(records: np.ndarray) -> pd.DataFrame:
+        """
+        DataFrame поверх записей: цены — срез матрицы (rows, 6) без копирования
+        (для memmap — только для чтения), копируется лишь индекс времени.
+        """
+        matrix = records.view(np.float64).reshape(len(records), FIELDS)
+        ns = records[TIMESTAMP].astype(np.int64) * 1_000_000
+        index = pd.DatetimeIndex(ns.view("datetime64[ns]"), name=TIMESTAMP)
+        return pd.DataFrame(matrix[:, 1:], index=index, columns=list(PRICE_COLUMNS), copy=False)
+
+    def read(self, start_ms: Optional[int] = None, end_ms: Optional[int] = None, offset_bars: int = 0) -> Optional[pd.DataFrame]:
+        records = self.view(start_ms, end_ms, offset_bars)
+        return None if records is None else self.to_frame(records)
@@ -0,0 +1,193 @@
+# хранилище свечей, разбитое на месячные партиции: период бэктеста читает только свои месяцы
+
+# src/data_fetcher/storage/partitioned.py
+import os
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from src.data_fetcher.storage.base import TIMESTAMP, read_json, register_storage, write_json_atomic
+from src.data_fetcher.storage.mmap_store import RECORD, MmapStore
+
+# версия формата заголовка
+PARTITIONED_VERSION = 1
+HEADER = "header.json"
+
+
+def month_of(ts_ms: np.ndarray) -> np.ndarray:
+    """Месяц (datetime64[M]) каждой свечи."""
+    return np.asarray(ts_ms, dtype=np.int64).astype("datetime64[ms]").astype("datetime64[M]")
+
+
+# -------------------------------------------------
+# Класс PartitionedStore - одна серия (символ, таймфрейм)
+# -------------------------------------------------
+@register_storage("partitioned", subdir="partitioned_files")
+class PartitionedStore:
+    """
+    Каталог серии:
+        2025-01.npy ...  записи RECORD (как у mmap) за календарный месяц UTC
+        header.json      список партиций: имя, число строк, первый / последний timestamp
+
+    Чтение диапазона [start, end] с offset_bars строками прогрева до start:
+    по заголовку выбираются партиции, пересекающие диапазон, а прогрев отсчитывается
+    по числу строк партиций — более ранние месяцы не открываются вовсе.
+    Партиции читаются через mmap, диапазон из одной партиции — без копирования.
+
+    Дозапись переписывает только последний месяц и создает новые; заголовок заменяется
+    атомарно последним, а строки партиции сверх записанных в заголовке при чтении не видны.
+    """
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+
+    @property
+    def header_path(self) -> Path:
+        return self.directory / HEADER
+
+    def fingerprint_path(self) -> Path:
+        return self.header_path
+
+    def exists(self) -> bool:
+        return self.header() is not None
+
+    def header(self) -> Optional[dict]:
+        header = read_json(self.header_path)
+        if not header or header.get("version") != PARTITIONED_VERSION:
+            return None
+        return header
+
+    # ------------------------
+    # Запись
+    # ------------------------
+    def _write_partition(self, name: str, records: np.ndarray) -> dict:
+        tmp = self.directory / f"{name}.tmp.npy"
+        with open(tmp, "wb") as f:
+            np.save(f, records)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.directory / f"{name}.npy")
+        return {"name": name, "rows": len(records),
+                "first_ts": int(records[TIMESTAMP][0]), "last_ts": int(records[TIMESTAMP][-1])}
+
+    def _write_months(self, records: np.ndarray) -> list:
+        months = month_of(records[TIMESTAMP])
+        cuts = np.flatnonzero(months[1:] != months[:-1]) + 1
+        return [
+            self._write_partition(str(months[lo]), records[lo:hi])
+            for lo, hi in zip(np.r_[0, cuts], np.r_[cuts, len(records)])
+        ]
+
+    def _commit(self, partitions: list, generation: int, meta: Optional[dict] = None) -> dict:
+        header = {
+            **(meta or {}),
+            "version": PARTITIONED_VERSION,
+            "record": RECORD.descr,
+            "rows": sum(part["rows"] for part in partitions),
+            "first_ts": partitions[0]["first_ts"] if partitions else None,
+            "last_ts": partitions[-1]["last_ts"] if partitions else None,
+            "generation": generation,
+            "partitions": partitions,
+        }
+        write_json_atomic(self.header_path, header)
+        return header
+
+    def write(self, df: pd.DataFrame, meta: Optional[dict] = None) -> dict:
+        """Переписывает серию целиком."""
+        records = MmapStore._records(df)
+        previous = self.header()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        if previous is not None:
+            self.header_path.unlink()
+        partitions = self._write_months(records) if len(records) else []
+        header = self._commit(partitions, previous["generation"] + 1 if previous else 0, meta)
+        # месяцы, которых больше нет в серии
+        keep = {f"{part['name']}.npy" for part in partitions}
+        for path in self.directory.glob("*.npy"):
+            if path.name not in keep:
+                path.unlink()
+        return header
+
+    def append(self, df: pd.DataFrame) -> int:
+        """Дозаписывает свечи новее последней сохраненной. Возвращает количество добавленных."""
+        if df is None or df.empty:
+            return 0
+        header = self.header()
+        if header is None:
+            return self.write(df)["rows"]
+
+        records = MmapStore._records(df)
+        if header["last_ts"] is not None:
+            records = records[records[TIMESTAMP] > header["last_ts"]]
+        added = len(records)
+        if added == 0:
+            return 0
+
+        partitions = list(header["partitions"])
+        meta = {k: v for k, v in header.items() if k not in ("version", "record", "rows", "first_ts", "last_ts",
+                                                             "generation", "partitions")}
+        if partitions and str(month_of(records[TIMESTAMP][:1])[0]) == partitions[-1]["name"]:
+            # тот же месяц, что и последняя партиция: она переписывается вместе с новыми строками
+            last = partitions.pop()
+            records = np.concatenate([self._load(last), records])
+        partitions += self._write_months(records)
+        self._commit(partitions, header["generation"] + 1, meta)
+        return added
+
+    # ------------------------
+    # Чтение
+    # ------------------------
+    def _load(self, part: dict) -> np.ndarray:
+        # строки сверх заголовка — прерванная дозапись
+        return np.load(self.directory / f"{part['name']}.npy", mmap_mode="r")[:part["rows"]]
+
+    def bounds(self, start_ms: Optional[int] = None, end_ms: Optional[int] = None, offset_bars: int = 0):
+        """
+        Номера строк [lo, hi), как MmapStore.bounds (offset_bars строк до start_ms).
+        Открываются только партиции, в которые попадают start_ms и end_ms.
+        """
+        header = self.header()
+        if header is None:
+            return None, None, None
+        partitions = header["partitions"]
+        starts = np.cumsum([0] + [part["rows"] for part in partitions])
+        rows = int(starts[-1])
+        last_ts = [part["last_ts"] for part in partitions]
+
+        def position(ts_ms: int, side: str) -> int:
+            i = bisect_left(last_ts, ts_ms) if side == "left" else bisect_right(last_ts, ts_ms)
+            if i >= len(partitions):
+                return rows
+            return int(starts[i]) + int(np.searchsorted(self._load(partitions[i])[TIMESTAMP], ts_ms, side=side))
+
+        lo, hi = 0, rows
+        if start_ms is not None:
+            lo = position(start_ms, "left")
+            if lo == rows:
+                lo = -1  # как get_indexer(..., method="bfill") для даты после конца данных
+            lo = max(0, lo - offset_bars)
+        if end_ms is not None:
+            hi = position(end_ms, "right")
+        return header, lo, max(lo, hi)
+
+    def read_rows(self, header: dict, lo: int, hi: int) -> pd.DataFrame:
+        partitions = header["partitions"]
+        starts = np.cumsum([0] + [part["rows"] for part in partitions])
+        parts = []
+        for i, part in enumerate(partitions):
+            if starts[i + 1] <= lo or starts[i] >= hi:
+                continue
+            parts.append(self._load(part)[max(lo - starts[i], 0):hi - starts[i]])
+        if not parts:
+            return MmapStore.to_frame(np.empty(0, dtype=RECORD))
+        # один месяц — DataFrame поверх mmap без копирования
+        return MmapStore.to_frame(parts[0] if len(parts) == 1 else np.concatenate(parts))
+
+    def read(self, start_ms: Optional[int] = None, end_ms: Optional[int] = None, offset_bars: int = 0) -> Optional[pd.DataFrame]:
+        header, lo, hi = self.bounds(start_ms, end_ms, offset_bars)
+        if header is None:
+            return None
+        return self.read_rows(header, lo, hi)
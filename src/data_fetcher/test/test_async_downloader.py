@@ -0,0 +1,205 @@
+# tests/test_async_downloader.py
+import asyncio
+import os
+import time
+
+import ccxt
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data_fetcher.async_downloader import AsyncDownloader, TokenBucket, backoff_delay, timeframe_ms
+from src.data_fetcher.data_fetcher import DataFetcher
+from src.data_fetcher.storage.base import read_json
+
+EXCHANGE = {"EXCHANGE_ID": "bybit", "LIMIT": 200}
+COINS = [{"SYMBOL": symbol, "MARKET_TYPE": "linear"} for symbol in ("BTC", "ETH", "SOL")]
+
+
+def make_candles(periods, freq, seed):
+    rng = np.random.default_rng(seed)
+    close = np.round(100 + np.cumsum(rng.normal(0, 1, periods)), 2)
+    index = pd.date_range("2025-01-01", periods=periods, freq=freq, name="timestamp")
+    return pd.DataFrame({"open": close, "high": close + 1, "low": close - 1, "close": close, "volume": 1.0}, index=index)
+
+
+class FakeAsyncExchange:
+    """Асинхронный fetch_ohlcv по готовым историям; каждый fail_every-й запрос — сетевая ошибка."""
+
+    def __init__(self, histories, fail_every=0):
+        self.histories = histories
+        self.fail_every = fail_every
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def fetch_ohlcv(self, symbol, timeframe, since=None, limit=None, params=None):
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.002)
+            if self.fail_every and self.calls % self.fail_every == 0:
+                raise ccxt.RequestTimeout("timeout")
+            df = self.histories[(symbol, timeframe)]
+            ts = df.index.asi8 // 1_000_000
+            lo, hi = ts.searchsorted(since), ts.searchsorted(params["until"], side="right")
+            lo = max(lo, hi - limit)
+            return [[int(t), *row] for t, row in zip(ts[lo:hi], df.to_numpy()[lo:hi].tolist())]
+        finally:
+            self.in_flight -= 1
+
+    async def close(self):
+        pass
+
+
+def test_downloads_all_series_concurrently_with_retries(tmp_path, monkeypatch):
+    histories = {}
+    for seed, coin in enumerate(COINS):
+        symbol = DataFetcher(coin, EXCHANGE, "").symbol
+        histories[(symbol, "1")] = make_candles(1500, "min", seed)
+        histories[(symbol, "4h")] = make_candles(300, "4h", seed + 10)
+        histories[(symbol, "M")] = make_candles(2, "MS", seed)
+        histories[(symbol, "D")] = make_candles(50, "D", seed)
+    # все свечи закрыты
+    monkeypatch.setattr(time, "time", lambda: (histories[("BTC/USDT:USDT", "4h")].index[-1].value // 1_000_000 + 4 * 3600_000) / 1000)
+
+    exchange = FakeAsyncExchange(histories, fail_every=7)
+    downloader = AsyncDownloader(EXCHANGE, directory=f"{tmp_path}/", exchange=exchange, rate=10_000, burst=100,
+                                 backoff_base=0.001)
+    tasks = [(coin, timeframe) for coin in COINS for timeframe in ("1", "4h")]
+    results = downloader.run(tasks)
+
+    assert results == {(coin["SYMBOL"], tf): len(histories[(DataFetcher(coin, EXCHANGE, "").symbol, tf)])
+                       for coin, tf in tasks}
+    assert downloader.stats["retries"] > 0
+    assert exchange.max_in_flight > 1
+    for coin, timeframe in tasks:
+        fetcher = DataFetcher(coin, EXCHANGE, f"{tmp_path}/")
+        pd.testing.assert_frame_equal(
+            histories[(fetcher.symbol, timeframe)], fetcher.load_from_csv("csv", timeframe), check_freq=False
+        )
+
+    # повторный запуск: по одной странице на серию (перекрытие с последней свечой)
+    exchange.calls = 0
+    exchange.fail_every = 0
+    assert set(downloader.run(tasks).values()) == {0}
+    assert exchange.calls == len(tasks)
+
+
+def test_sharded_range_fetch_is_complete():
+    candles = make_candles(10_000, "min", 3)
+    exchange = FakeAsyncExchange({("BTC/USDT:USDT", "1"): candles})
+    downloader = AsyncDownloader(EXCHANGE, directory="", exchange=exchange, rate=10_000, burst=100)
+    start = candles.index[0].value // 1_000_000
+    end = candles.index[-1].value // 1_000_000 + timeframe_ms("1")
+
+    async def fetch(shards):
+        bucket = TokenBucket(downloader.rate, downloader.burst)
+        return await downloader.fetch_range_sharded(bucket, "BTC/USDT:USDT", "1", start, end, shards=shards)
+
+    df, gaps = asyncio.run(fetch(4))
+    pd.testing.assert_frame_equal(candles, df, check_freq=False)
+    assert gaps == []
+    # окна по limit=200 свечей: 50 запросов, 4 шарда одновременно
+    assert exchange.calls == 50
+    assert exchange.max_in_flight == 4
+
+    # биржа потеряла свечи на стыке шардов — разрыв попадает в отчет
+    exchange.histories[("BTC/USDT:USDT", "1")] = candles.drop(candles.index[2390:2410])
+    df, gaps = asyncio.run(fetch(4))
+    assert len(df) == len(candles) - 20
+    assert [(gap["prev"], gap["next"]) for gap in gaps] == [
+        (candles.index[2389].value // 1_000_000, candles.index[2410].value // 1_000_000)
+    ]
+
+
+def test_sharded_download_streams_to_disk_and_resumes(tmp_path, monkeypatch):
+    coin = {"SYMBOL": "BTC", "MARKET_TYPE": "linear"}
+    candles = make_candles(10_000, "min", 4)
+    exchange = FakeAsyncExchange({
+        ("BTC/USDT:USDT", "1"): candles,
+        ("BTC/USDT:USDT", "M"): make_candles(1, "MS", 5),
+        ("BTC/USDT:USDT", "D"): make_candles(7, "D", 6),
+    }, fail_every=30)
+    monkeypatch.setattr(time, "time", lambda: (candles.index[-1].value // 1_000_000 + 60_000) / 1000)
+    stored = []
+    store_update = DataFetcher.store_update
+    monkeypatch.setattr(DataFetcher, "store_update", lambda self, df, *args: stored.append(len(df)) or store_update(self, df, *args))
+
+    # без повторов: 30-й запрос обрывает загрузку шарда, порции и позиции шардов остаются на диске
+    downloader = AsyncDownloader(EXCHANGE, directory=f"{tmp_path}/", exchange=exchange, rate=10_000, burst=100,
+                                 shards=4, max_retries=0, flush_rows=1000)
+    assert downloader.run([(coin, "1")], formats=("csv", "mmap")) == {("BTC", "1"): None}
+    fetcher = DataFetcher(coin, EXCHANGE, f"{tmp_path}/")
+    assert fetcher.download_in_progress("1") and fetcher.load_from_csv("csv", "1") is None
+    spooled = [np.load(os.path.join(fetcher.spool_dir("1"), name)) for name in os.listdir(fetcher.spool_dir("1"))]
+    assert spooled and max(len(chunk) for chunk in spooled) <= 1000
+
+    # продолжение: запрашиваются только незагруженные окна шардов, запись — порциями по flush_rows
+    state = read_json(fetcher.cursor_path("1"))
+    window = EXCHANGE["LIMIT"] * timeframe_ms("1")
+    remaining = sum(-(-(shard["hi"] - shard["next_ms"]) // window) for shard in state["shards"])
+    exchange.calls = 0
+    exchange.fail_every = 0
+    assert downloader.run([(coin, "1")], formats=("csv", "mmap")) == {("BTC", "1"): len(candles)}
+    assert exchange.calls == remaining < 50
+    assert stored and max(stored) <= 1000
+    assert not fetcher.download_in_progress("1") and not os.path.exists(fetcher.spool_dir("1"))
+    pd.testing.assert_frame_equal(candles, fetcher.load_from_csv("csv", "1"), check_freq=False)
+    pd.testing.assert_frame_equal(candles, fetcher.load_from_csv("mmap", "1"), check_freq=False)
+
+
+def test_full_download_runs_missing_series_through_downloader(tmp_path, monkeypatch):
+    import src.data_fetcher.get_data_from_exchange as pipeline
+
+    coins = [{**coin, "MIN_TIMEFRAME": "1"} for coin in COINS[:2]]
+    histories = {}
+    for seed, coin in enumerate(coins):
+        symbol = DataFetcher(coin, EXCHANGE, "").symbol
+        histories[(symbol, "1")] = make_candles(3000, "min", seed)
+        histories[(symbol, "4h")] = make_candles(300, "4h", seed + 10)
+        histories[(symbol, "M")] = make_candles(2, "MS", seed)
+        histories[(symbol, "D")] = make_candles(60, "D", seed)
+    monkeypatch.setattr(time, "time", lambda: (histories[("BTC/USDT:USDT", "4h")].index[-1].value // 1_000_000 + 4 * 3600_000) / 1000)
+    monkeypatch.setattr(time, "sleep", lambda seconds: pytest.fail("пауза между монетами"))
+    # 4h BTC уже загружен — пропускается
+    btc = DataFetcher(coins[0], EXCHANGE, f"{tmp_path}/")
+    btc.export_to_csv(histories[("BTC/USDT:USDT", "4h")], "4h")
+
+    exchange = FakeAsyncExchange(histories)
+    requested = set()
+    fetch = exchange.fetch_ohlcv
+    exchange.fetch_ohlcv = lambda symbol, timeframe, **kwargs: requested.add((symbol, timeframe)) or fetch(symbol, timeframe, **kwargs)
+    monkeypatch.setattr(pipeline, "_download_formats", lambda: ("csv",))
+    monkeypatch.setattr(pipeline, "_downloader", lambda settings, data_dir: AsyncDownloader(
+        EXCHANGE, directory=data_dir, exchange=exchange, rate=10_000, burst=100, shards=4, flush_rows=1000,
+    ))
+    pipeline.run_full_download(coins, ["4h"], EXCHANGE, f"{tmp_path}/", loading_min=True)
+
+    assert ("BTC/USDT:USDT", "4h") not in requested and ("ETH/USDT:USDT", "4h") in requested
+    for coin in coins:
+        fetcher = DataFetcher(coin, EXCHANGE, f"{tmp_path}/")
+        for timeframe in ("1", "4h"):
+            pd.testing.assert_frame_equal(
+                histories[(fetcher.symbol, timeframe)], fetcher.load_from_csv("csv", timeframe), check_freq=False
+            )
+            assert not fetcher.download_in_progress(timeframe)
+    assert DataFetcher(coins[1], EXCHANGE, f"{tmp_path}/").check_file_exists("4h", file_extension="xlsx")
+
+
+def test_token_bucket_limits_rate():
+    async def take(count):
+        bucket = TokenBucket(rate=200, capacity=5)
+        started = time.monotonic()
+        await asyncio.gather(*(bucket.acquire() for _ in range(count)))
+        return time.monotonic() - started
+
+    # 5 токенов в запасе, остальные 40 — не быстрее 200 в секунду
+    assert asyncio.run(take(45)) >= 40 / 200 * 0.9
+
+
+def test_backoff_delay_is_bounded():
+    delays = [backoff_delay(attempt, base=0.5, cap=4.0) for attempt in range(10) for _ in range(20)]
+    assert all(0 <= delay <= 4.0 for delay in delays)
+    assert max(backoff_delay(1, base=0.5) for _ in range(50)) <= 1.0
@@ -0,0 +1,79 @@
+# tests/test_catalog.py
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.backtester.result_cache import series_fingerprint
+from src.data_fetcher.catalog import DataCatalog
+from src.data_fetcher.data_fetcher import DataFetcher
+from src.data_fetcher.storage.convert import convert_directory
+
+
+@pytest.fixture
+def fetcher(tmp_path):
+    return DataFetcher(
+        coin={"SYMBOL": "BTC", "MARKET_TYPE": "linear"},
+        exchange={"EXCHANGE_ID": "bybit", "LIMIT": 1000},
+        directory=f"{tmp_path}/",
+    )
+
+
+@pytest.fixture
+def ohlcv():
+    rng = np.random.default_rng(5)
+    close = np.round(100 + np.cumsum(rng.normal(0, 0.1, 3000)), 2)
+    index = pd.date_range("2025-01-01", periods=close.size, freq="min", name="timestamp")
+    return pd.DataFrame({"open": close, "high": close + 0.5, "low": close - 0.5, "close": close, "volume": 2.0}, index=index)
+
+
+def ms(ts):
+    return ts.value // 1_000_000
+
+
+def test_catalog_tracks_writes_and_appends(fetcher, ohlcv, tmp_path):
+    # пропуск из 10 свечей в середине
+    history = ohlcv.drop(ohlcv.index[1000:1010])
+    fetcher.export_to_csv(history.iloc[:2000], "1")
+    path = fetcher._get_export_path("1", "csv")
+
+    entry = fetcher.catalog.series()["BTC_USDT_USDT_1_bybit_OHLCV"]
+    assert (entry["symbol"], entry["market_type"], entry["timeframe"], entry["exchange"]) == ("BTC", "linear", "1", "bybit")
+    record = fetcher.catalog.entry(path)
+    assert (record["rows"], record["first_ts"], record["last_ts"], record["gap_count"]) == (
+        2000, ms(history.index[0]), ms(history.index[1999]), 1,
+    )
+
+    # дозапись с перекрытием и вторым пропуском на стыке: каталог обновляется без чтения файла
+    fetcher.store_update(history.iloc[1999:].drop(history.index[2000:2005]), "1", formats=("csv", "mmap"), last_ms=record["last_ts"])
+    appended = fetcher.catalog.entry(path)
+    assert (appended["rows"], appended["last_ts"], appended["gap_count"]) == (len(history) - 5, ms(history.index[-1]), 2)
+    assert appended["hash"] != record["hash"]
+    assert fetcher.last_stored_timestamp("1", "csv") == ms(history.index[-1])
+    mmap = fetcher.catalog.entry(fetcher._get_export_path("1", "mmap"))
+    assert (mmap["rows"], mmap["gap_count"]) == (len(history) - 5, 2)
+
+    # файл изменен в обход DataFetcher — запись каталога не используется
+    with open(path, "a") as f:
+        f.write("2025-01-03 03:00:00,1,1,1,1,1\n")
+    assert fetcher.catalog.entry(path) is None
+    assert fetcher.last_stored_timestamp("1", "csv") == ms(pd.Timestamp("2025-01-03 03:00"))
+    assert series_fingerprint(path) != f"catalog:{appended['hash']}"
+
+
+def test_convert_and_rebuild_fill_catalog(fetcher, ohlcv, tmp_path):
+    fetcher.export_to_csv(ohlcv, "1")
+    convert_directory(tmp_path, "npy")
+    npy_path = fetcher._get_export_path("1", "npy")
+    csv_hash = fetcher.catalog.entry(fetcher._get_export_path("1", "csv"))["hash"]
+    # одинаковое содержимое — одинаковый хеш в любом формате
+    assert fetcher.catalog.entry(npy_path)["hash"] == csv_hash
+    assert series_fingerprint(npy_path) == f"catalog:{csv_hash}"
+
+    os.remove(os.path.join(tmp_path, "manifest.json"))
+    catalog = DataCatalog(f"{tmp_path}/")
+    assert catalog.series() == {}
+    assert catalog.rebuild() == 2
+    assert catalog.entry(npy_path)["rows"] == len(ohlcv)
+    assert DataCatalog.for_path(npy_path).entry(npy_path)["hash"] == csv_hash
@@ -0,0 +1,93 @@
+# tests/test_fake_exchange.py
+import json
+from urllib.request import Request, urlopen
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data_fetcher.async_downloader import AsyncDownloader
+from src.data_fetcher.data_fetcher import DataFetcher
+from src.data_fetcher.fake_exchange import TOO_MANY_VISITS, FakeBybit, FakeBybitServer
+
+COINS = [{"SYMBOL": symbol, "MARKET_TYPE": "linear", "MINIMAL_TICK_SIZE": 0.01} for symbol in ("BTC", "ETH")]
+
+
+def make_candles(periods, freq, seed):
+    rng = np.random.default_rng(seed)
+    close = np.round(100 + np.cumsum(rng.normal(0, 1, periods)), 2)
+    index = pd.date_range("2025-01-01", periods=periods, freq=freq, name="timestamp")
+    return pd.DataFrame({"open": close, "high": close + 1, "low": close - 1, "close": close, "volume": 1.5}, index=index)
+
+
+@pytest.fixture
+def source(tmp_path):
+    """Каталог данных, из которого отвечает поддельная биржа."""
+    histories = {}
+    for seed, coin in enumerate(COINS):
+        fetcher = DataFetcher(coin, {"EXCHANGE_ID": "bybit"}, f"{tmp_path}/source/")
+        for timeframe, freq, periods in (("1", "min", 1200), ("4h", "4h", 300)):
+            histories[(coin["SYMBOL"], timeframe)] = make_candles(periods, freq, seed)
+            fetcher.export_to_csv(histories[(coin["SYMBOL"], timeframe)], timeframe)
+    return f"{tmp_path}/source/", histories
+
+
+def call(url, path, body=None):
+    request = Request(url + path, data=json.dumps(body).encode() if body is not None else None, method="POST" if body else "GET")
+    with urlopen(request) as response:
+        return json.loads(response.read())
+
+
+def test_downloader_over_fake_exchange_with_rate_limit_errors(source, tmp_path):
+    data_dir, histories = source
+    exchange = FakeBybit(data_dir, coins=COINS, page_size=150, error_rate=0.2, seed=1)
+    settings = {"EXCHANGE_ID": "bybit", "LIMIT": 1000}
+    with FakeBybitServer(exchange) as server:
+        settings["API_URL"] = server.url
+        downloader = AsyncDownloader(settings, directory=f"{tmp_path}/loaded/", rate=1000, burst=50, backoff_base=0.001)
+        tasks = [(coin, timeframe) for coin in COINS for timeframe in ("1", "4h")]
+        results = downloader.run(tasks)
+
+    assert results == {(coin["SYMBOL"], tf): len(histories[(coin["SYMBOL"], tf)]) for coin, tf in tasks}
+    # страницы по page_size свечей, ответы 10006 повторены загрузчиком
+    assert exchange.stats["rate_limited"] > 0
+    assert downloader.stats["retries"] == exchange.stats["rate_limited"]
+    for coin, timeframe in tasks:
+        loaded = DataFetcher(coin, settings, f"{tmp_path}/loaded/").load_from_csv("csv", timeframe)
+        pd.testing.assert_frame_equal(histories[(coin["SYMBOL"], timeframe)], loaded, check_freq=False)
+
+
+def test_kline_time_instruments_and_orders(source):
+    data_dir, histories = source
+    candles = histories[("BTC", "1")]
+    exchange = FakeBybit(data_dir, coins=COINS, rate_limit=1000, clock=lambda: candles.index[99].value / 1e9)
+    with FakeBybitServer(exchange) as server:
+        assert call(server.url, "/v5/market/time")["result"]["timeSecond"] == str(candles.index[99].value // 10**9)
+
+        # от новых к старым, не позже времени сервера
+        rows = call(server.url, "/v5/market/kline?category=linear&symbol=BTCUSDT&interval=1&limit=1000")["result"]["list"]
+        assert len(rows) == 100
+        assert [int(row[0]) for row in rows[:2]] == [t.value // 10**6 for t in candles.index[[99, 98]]]
+        assert float(rows[0][4]) == candles["close"].iloc[99]
+        assert call(server.url, "/v5/market/kline?category=linear&symbol=XRPUSDT&interval=1")["retCode"] == 10001
+
+        info = call(server.url, "/v5/market/instruments-info?category=linear")["result"]["list"]
+        assert [(item["symbol"], item["priceFilter"]["tickSize"]) for item in info] == [("BTCUSDT", "0.01"), ("ETHUSDT", "0.01")]
+
+        market = call(server.url, "/v5/order/create", {
+            "category": "linear", "symbol": "BTCUSDT", "side": "Buy", "orderType": "Market", "qty": "10", "orderLinkId": "m1",
+        })["result"]
+        call(server.url, "/v5/order/create", {
+            "category": "linear", "symbol": "BTCUSDT", "side": "Sell", "orderType": "Limit", "qty": "10", "price": "150",
+            "orderLinkId": "l1",
+        })
+        history = call(server.url, "/v5/order/history?category=linear&symbol=BTCUSDT&orderLinkId=m1")["result"]["list"]
+        assert history[0]["orderId"] == market["orderId"]
+        assert (history[0]["orderStatus"], float(history[0]["avgPrice"])) == ("Filled", candles["close"].iloc[99])
+        assert [order["orderLinkId"] for order in call(server.url, "/v5/order/realtime?category=linear")["result"]["list"]] == ["l1"]
+        assert call(server.url, "/v5/order/cancel", {"category": "linear", "symbol": "BTCUSDT", "orderLinkId": "l1"})["retCode"] == 0
+        assert call(server.url, "/v5/order/realtime?category=linear")["result"]["list"] == []
+
+        # лимит запросов в секунду
+        exchange.rate_limit = 0
+        assert call(server.url, "/v5/market/time")["retCode"] == TOO_MANY_VISITS
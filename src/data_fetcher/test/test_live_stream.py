@@ -0,0 +1,114 @@
+# tests/test_live_stream.py
+import asyncio
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data_fetcher.data_fetcher import DataFetcher
+from src.data_fetcher.live_stream import BybitKlineFeed, CandleStream, ReplayFeed
+
+COINS = [{"SYMBOL": "BTC", "MARKET_TYPE": "linear", "TIMEFRAME": "4h", "MIN_TIMEFRAME": "1"}]
+
+
+def make_candles(periods, freq, seed):
+    rng = np.random.default_rng(seed)
+    close = np.round(100 + np.cumsum(rng.normal(0, 1, periods)), 2)
+    index = pd.date_range("2025-01-01", periods=periods, freq=freq, name="timestamp")
+    return pd.DataFrame({"open": close, "high": close + 1, "low": close - 1, "close": close, "volume": 1.5}, index=index)
+
+
+def strategy_arr(ohlcv):
+    # как arr в BacktestEngine.run
+    arr = ohlcv[["open", "high", "low", "close"]].copy()
+    arr["dt"] = ohlcv.index.to_numpy()
+    return arr.to_numpy()
+
+
+@pytest.fixture
+def history(tmp_path):
+    fetcher = DataFetcher(COINS[0], {"EXCHANGE_ID": "bybit"}, f"{tmp_path}/")
+    candles = {"4h": make_candles(60, "4h", 0), "1": make_candles(600, "min", 1)}
+    for timeframe, df in candles.items():
+        fetcher.export_to_csv(df, timeframe)
+    return f"{tmp_path}/", candles
+
+
+def test_replay_fills_ring_buffers_with_zero_copy_windows(history):
+    data_dir, candles = history
+    stream = CandleStream(COINS, min_bars=20, headroom=5)
+    start = candles["4h"].index[30]
+    assert stream.preload(data_dir, until_ms=start.value // 10**6) == {("BTC", "4h"): 25, ("BTC", "1"): 25}
+
+    seen = []
+
+    @stream.on_close
+    def check(symbol, timeframe, window):
+        ring = stream.rings[(symbol, timeframe)]
+        assert np.shares_memory(window, ring.bars) and window.flags.c_contiguous and not window.flags.writeable
+        seen.append((symbol, timeframe, pd.Timestamp(int(window[-1, 4]))))
+        if timeframe == "4h":
+            i = candles["4h"].index.get_loc(pd.Timestamp(int(window[-1, 4])))
+            expected = strategy_arr(candles["4h"].iloc[i - 19:i + 1])
+            np.testing.assert_array_equal(window[:, :4], expected[:, :4].astype(float))
+            assert (pd.to_datetime(window[:, 4]) == pd.DatetimeIndex(expected[:, 4])).all()
+
+    closed = asyncio.run(stream.consume(ReplayFeed(data_dir, COINS, start_ms=start.value // 10**6)))
+    # минутные свечи истории закончились раньше start: воспроизводятся только 4h
+    assert closed == 30 and stream.stats["closed"] == 30
+    assert seen[-1] == ("BTC", "4h", candles["4h"].index[-1])
+    assert stream.rings[("BTC", "4h")].count == 55
+
+    stream.callbacks.clear()
+
+    # повтор и незакрытое обновление не попадают в буфер, разрыв считается
+    last = candles["4h"].index[-1].value // 10**6
+    bar = {"open": "1", "high": "2", "low": "0.5", "close": "1.5", "volume": "3"}
+    stream.handle({"topic": "kline.240.BTCUSDT", "data": [{**bar, "start": last, "confirm": True}]})
+    stream.handle({"topic": "kline.240.BTCUSDT", "data": [{**bar, "start": last + 4 * 3600_000, "confirm": False}]})
+    assert stream.rings[("BTC", "4h")].count == 55 and stream.stats["skipped"] == 1
+    stream.handle({"topic": "kline.240.BTCUSDT", "data": [{**bar, "start": last + 8 * 3600_000, "confirm": True}]})
+    assert stream.stats["gaps"] == 1
+    assert stream.window("BTC", "4h")[-1, 3] == 1.5
+
+
+def test_websocket_feed_subscribes_and_reconnects():
+    from aiohttp import web
+
+    connections = []
+
+    async def kline_ws(request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        subscribe = await ws.receive_json()
+        connections.append(subscribe["args"])
+        await ws.send_json({"op": "subscribe", "success": True})
+        start = 1_735_689_600_000 + len(connections) * 60_000
+        await ws.send_json({"topic": "kline.1.BTCUSDT", "data": [{
+            "start": start, "open": "1", "high": "2", "low": "0.5", "close": str(len(connections)), "volume": "1",
+            "confirm": True,
+        }]})
+        # обрыв соединения после одного бара
+        await ws.close()
+        return ws
+
+    async def scenario():
+        app = web.Application()
+        app.router.add_get("/v5/public/linear", kline_ws)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = runner.addresses[0][1]
+        stream = CandleStream([{"SYMBOL": "BTC", "MARKET_TYPE": "linear", "TIMEFRAME": "1"}], min_bars=1, headroom=2)
+        feed = BybitKlineFeed(stream.topics, f"http://127.0.0.1:{port}/v5/public/linear", backoff_base=0.001)
+        try:
+            return stream, feed, await asyncio.wait_for(stream.consume(feed, max_bars=3), timeout=10)
+        finally:
+            await runner.cleanup()
+
+    stream, feed, closed = asyncio.run(scenario())
+    assert closed == 3
+    assert connections == [["kline.1.BTCUSDT"]] * 3
+    assert feed.stats["reconnects"] == 2
+    np.testing.assert_array_equal(stream.window("BTC", "1", 3)[:, 3], [1.0, 2.0, 3.0])
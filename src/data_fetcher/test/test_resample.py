@@ -0,0 +1,61 @@
+# tests/test_resample.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data_fetcher.data_fetcher import DataFetcher
+from src.data_fetcher.resample import resample_arrays
+from src.data_fetcher.storage.base import arrays_to_frame, frame_to_arrays
+from src.data_fetcher.storage.mmap_store import MmapStore
+
+RULES = {"15": "15min", "4h": "4h", "D": "1D", "W": "W-MON", "M": "MS"}
+
+
+@pytest.fixture
+def minutes():
+    rng = np.random.default_rng(5)
+    index = pd.date_range("2024-12-30 13:07", periods=60 * 24 * 75, freq="min", name="timestamp")
+    # пропуски в данных: бары строятся по имеющимся свечам
+    index = index.delete(np.s_[5000:5300])
+    close = 100 + np.cumsum(rng.normal(0, 0.1, len(index)))
+    return pd.DataFrame({
+        "open": close + rng.normal(0, 0.05, len(index)),
+        "high": close + 0.2,
+        "low": close - 0.2,
+        "close": close,
+        "volume": rng.random(len(index)),
+    }, index=index)
+
+
+@pytest.mark.parametrize("timeframe", list(RULES))
+def test_resample_matches_pandas(minutes, timeframe):
+    expected = minutes.resample(RULES[timeframe], label="left", closed="left").agg(
+        {"open": "first", "high": "max", "low": "min", "close": "last", "volume": "sum"}
+    ).dropna()
+    result = arrays_to_frame(resample_arrays(frame_to_arrays(minutes), timeframe, drop_incomplete=False))
+    pd.testing.assert_frame_equal(expected, result, check_freq=False, check_names=False)
+
+    # последний бар не закрыт (данные заканчиваются раньше) — отбрасывается
+    complete = arrays_to_frame(resample_arrays(frame_to_arrays(minutes), timeframe))
+    assert len(complete) == len(result) - 1
+
+
+def test_load_resampled_cache_invalidated_on_append(tmp_path, minutes):
+    fetcher = DataFetcher(
+        coin={"SYMBOL": "BTC", "MARKET_TYPE": "linear"},
+        exchange={"EXCHANGE_ID": "bybit", "LIMIT": 1000},
+        directory=f"{tmp_path}/",
+    )
+    first, rest = minutes.iloc[:50_000], minutes.iloc[50_000:]
+    fetcher.export_to_store(first, "1", file_type="mmap")
+
+    htf = fetcher.load_resampled("4h", file_type="mmap")
+    assert htf.index[-1] < first.index[-1]
+    assert fetcher.load_resampled("4h", file_type="mmap").equals(htf)
+
+    # дозапись минутных меняет заголовок серии — кеш HTF пересчитывается
+    MmapStore(tmp_path / "mmap_files" / "BTC_USDT_USDT_1_bybit_OHLCV").append(rest)
+
+    updated = fetcher.load_resampled("4h", file_type="mmap")
+    expected = arrays_to_frame(resample_arrays(frame_to_arrays(minutes), "4h"))
+    pd.testing.assert_frame_equal(expected, updated, check_freq=False)
@@ -0,0 +1,369 @@
+# tests/test_storage.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data_fetcher.data_fetcher import DataFetcher
+from src.data_fetcher.storage.columnar import ColumnarStore
+from src.data_fetcher.storage.convert import convert_directory
+
+
+@pytest.fixture
+def fetcher(tmp_path):
+    return DataFetcher(
+        coin={"SYMBOL": "BTC", "MARKET_TYPE": "linear"},
+        exchange={"EXCHANGE_ID": "bybit", "LIMIT": 1000},
+        directory=f"{tmp_path}/",
+    )
+
+
+@pytest.fixture
+def ohlcv():
+    rng = np.random.default_rng(1)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.001, 5000)))
+    df = pd.DataFrame({
+        "open": close * (1 + rng.normal(0, 1e-4, close.size)),
+        "high": close * 1.001,
+        "low": close * 0.999,
+        "close": close,
+        "volume": rng.random(close.size) * 1e3,
+    }, index=pd.date_range("2025-01-01", periods=close.size, freq="min", name="timestamp"))
+    return df
+
+
+def test_npy_load_matches_csv_load(fetcher, ohlcv, tmp_path):
+    fetcher.export_to_csv(ohlcv, "1")
+    stats = convert_directory(tmp_path)
+    assert stats == {"converted": 1, "skipped": 0, "failed": 0}
+
+    from_csv = fetcher.load_from_csv("csv")
+    from_npy = fetcher.load_from_csv("npy")
+    pd.testing.assert_frame_equal(from_csv, from_npy, check_exact=True)
+
+    # повторный запуск не трогает уже сконвертированные серии
+    assert convert_directory(tmp_path)["skipped"] == 1
+
+
+def test_store_roundtrip_is_bit_exact(fetcher, ohlcv):
+    path = fetcher.export_to_store(ohlcv, "1")
+    loaded = fetcher.load_from_csv("npy")
+    pd.testing.assert_frame_equal(ohlcv, loaded, check_exact=True, check_freq=False)
+
+    header = ColumnarStore(path.rsplit("/", 1)[0]).header()
+    assert header["rows"] == len(ohlcv)
+    assert header["first_ts"] == ohlcv.index[0].value // 1_000_000
+
+
+def test_store_range_read_and_missing_header(tmp_path, ohlcv):
+    store = ColumnarStore(tmp_path / "series")
+    store.write(ohlcv)
+    part = store.read(
+        start_ms=ohlcv.index[100].value // 1_000_000,
+        end_ms=ohlcv.index[199].value // 1_000_000,
+    )
+    pd.testing.assert_frame_equal(ohlcv.iloc[100:200], part, check_freq=False)
+
+    # без заголовка (запись прервана до фиксации) серия считается отсутствующей
+    store.header_path.unlink()
+    assert not store.exists()
+    assert store.read() is None
+
+
+def test_store_interrupted_write_keeps_previous_generation(tmp_path, ohlcv, monkeypatch):
+    import src.data_fetcher.storage.columnar as columnar
+
+    store = ColumnarStore(tmp_path / "series")
+    store.write(ohlcv.iloc[:1000])
+    replace = columnar.os.replace
+    replaced = []
+
+    def crash_after_three(src, dst):
+        if len(replaced) == 3:
+            raise OSError("сбой посреди записи")
+        replaced.append(dst)
+        replace(src, dst)
+
+    # дозапись с перекрытием прерывается после трех колонок нового поколения
+    monkeypatch.setattr(columnar.os, "replace", crash_after_three)
+    with pytest.raises(OSError):
+        store.append(ohlcv.iloc[900:2000] * 2)
+    monkeypatch.undo()
+    pd.testing.assert_frame_equal(ohlcv.iloc[:1000], store.read(), check_freq=False)
+
+    # следующая запись убирает остатки прерванной
+    assert store.append(ohlcv.iloc[900:2000]) == 1000
+    pd.testing.assert_frame_equal(ohlcv.iloc[:2000], store.read(), check_freq=False)
+    assert sorted(p.name for p in store.directory.iterdir()) == sorted(
+        [f"{col}.{store.header()['generation']}.npy" for col in columnar.OHLCV_COLUMNS] + ["header.json"]
+    )
+
+
+def test_store_append_extends_columns_in_place(tmp_path, ohlcv, monkeypatch):
+    import src.data_fetcher.storage.columnar as columnar
+
+    store = ColumnarStore(tmp_path / "series")
+    store.write(ohlcv.iloc[:1000])
+    generation = store.header()["generation"]
+    # дозапись с перекрытием в одну свечу не переписывает ряд
+    monkeypatch.setattr(ColumnarStore, "write", lambda self, df, meta=None: pytest.fail("ряд переписан целиком"))
+    assert store.append(ohlcv.iloc[999:3000]) == 2000
+    assert store.append(ohlcv.iloc[3000:3500]) == 500
+    assert store.header()["generation"] == generation
+    pd.testing.assert_frame_equal(ohlcv.iloc[:3500], store.read(), check_freq=False)
+
+    # сбой до фиксации заголовка: дописанные строки не видны, следующая дозапись их обрезает
+    extend = ColumnarStore._extend_column
+    calls = []
+
+    def crash_after_three(self, *args):
+        if len(calls) == 3:
+            raise OSError("сбой посреди дозаписи")
+        calls.append(args)
+        extend(self, *args)
+
+    monkeypatch.setattr(ColumnarStore, "_extend_column", crash_after_three)
+    with pytest.raises(OSError):
+        store.append(ohlcv.iloc[3500:4000] * 2)
+    monkeypatch.undo()
+    pd.testing.assert_frame_equal(ohlcv.iloc[:3500], store.read(), check_freq=False)
+    assert store.append(ohlcv.iloc[3500:]) == len(ohlcv) - 3500
+    pd.testing.assert_frame_equal(ohlcv, store.read(), check_freq=False)
+
+    # замена свечей внутри ряда — новое поколение, свечи после df сохраняются
+    changed = ohlcv.iloc[100:200] * 2
+    assert store.append(changed) == 0
+    expected = pd.concat([ohlcv.iloc[:100], changed, ohlcv.iloc[200:]])
+    pd.testing.assert_frame_equal(expected, store.read(), check_freq=False)
+    assert store.header()["generation"] == generation + 1
+    assert len(list(store.directory.glob("*.npy*"))) == len(columnar.OHLCV_COLUMNS)
+
+
+# ===== MMAP: append-only хранилище =====
+
+def test_mmap_append_and_range_matches_select_range(fetcher, ohlcv):
+    from src.data_fetcher.storage.mmap_store import MmapStore
+    from src.data_fetcher.utils import select_range_backtest
+
+    path = fetcher._get_export_path("1", "mmap")
+    store = MmapStore(path.rsplit("/", 1)[0])
+    # история приходит частями, с перекрытием
+    assert store.append(ohlcv.iloc[:3000]) == 3000
+    assert store.append(ohlcv.iloc[2990:]) == len(ohlcv) - 3000
+    assert store.append(ohlcv.iloc[-10:]) == 0
+
+    period = {"full_datafile": False, "start_date": "2025-01-02 10:00", "end_date": "2025-01-03 05:30"}
+    expected = select_range_backtest(ohlcv, offset_bars=100, **period)
+    loaded = fetcher.load_range("mmap", offset_bars=100, **period)
+    pd.testing.assert_frame_equal(expected, loaded, check_exact=True, check_freq=False)
+    # цены — представление файла, а не копия
+    assert isinstance(loaded["close"].to_numpy().base, np.ndarray)
+    assert not loaded["close"].to_numpy().flags.writeable
+
+
+def test_mmap_interrupted_append_keeps_committed_data(tmp_path, ohlcv):
+    from src.data_fetcher.storage.mmap_store import MmapStore
+
+    store = MmapStore(tmp_path / "series")
+    store.append(ohlcv.iloc[:1000])
+    # дозапись прервана после записи данных, но до фиксации заголовка
+    with open(store.data_path, "ab") as f:
+        f.write(b"\xff" * 100)
+
+    assert len(store) == 1000
+    pd.testing.assert_frame_equal(ohlcv.iloc[:1000], store.read(), check_freq=False)
+    # следующая дозапись отрезает мусорный хвост
+    assert store.append(ohlcv.iloc[1000:]) == len(ohlcv) - 1000
+    pd.testing.assert_frame_equal(ohlcv, store.read(), check_exact=True, check_freq=False)
+
+
+
+def test_chunked_blocks_append_and_range(fetcher, ohlcv):
+    from src.data_fetcher.storage.chunked import ChunkedStore
+    from src.data_fetcher.utils import select_range_backtest
+
+    # цены с шагом тика (десятичное кодирование) и произвольные float (XOR) в одной серии
+    ohlcv[["open", "high", "low", "close"]] = ohlcv[["open", "high", "low", "close"]].round(2)
+    path = fetcher._get_export_path("1", "chunked")
+    store = ChunkedStore(path.rsplit("/", 1)[0], block_rows=1000)
+    for lo, hi in ((0, 1500), (1490, 3200), (3200, 3201), (3100, len(ohlcv))):
+        store.append(ohlcv.iloc[lo:hi])
+    assert store.append(ohlcv.iloc[-10:]) == 0
+    header = store.header()
+    assert header["rows"] == len(ohlcv) and len(header["blocks"]) == 5
+    assert header["blocks"][0]["methods"]["close"] == "dec2"
+    assert header["blocks"][0]["methods"]["volume"] == "xor"
+
+    pd.testing.assert_frame_equal(ohlcv, store.read(), check_exact=True, check_freq=False)
+    period = {"full_datafile": False, "start_date": "2025-01-02 10:00", "end_date": "2025-01-03 05:30"}
+    expected = select_range_backtest(ohlcv, offset_bars=100, **period)
+    loaded = fetcher.load_range("chunked", offset_bars=100, **period)
+    pd.testing.assert_frame_equal(expected, loaded, check_exact=True, check_freq=False)
+
+    # без volume (случайные float) серия из цен с шагом тика сжимается в разы относительно CSV
+    prices = ohlcv.assign(volume=ohlcv["volume"].round(1))
+    compact = ChunkedStore(path.rsplit("/", 1)[0] + "_prices")
+    compact.write(prices)
+    csv_size = len(prices.to_csv().encode())
+    assert compact.data_path.stat().st_size * 4 < csv_size
+
+
+
+def test_partitioned_reads_only_overlapping_months(fetcher, monkeypatch):
+    from src.data_fetcher.storage.partitioned import PartitionedStore
+    from src.data_fetcher.utils import select_range_backtest
+
+    index = pd.date_range("2024-11-01", "2025-06-30 23:00", freq="h", name="timestamp")
+    rng = np.random.default_rng(3)
+    close = np.round(100 + np.cumsum(rng.normal(0, 1, len(index))), 2)
+    hourly = pd.DataFrame({"open": close, "high": close + 1, "low": close - 1, "close": close, "volume": 1.0}, index=index)
+
+    path = fetcher._get_export_path("60", "partitioned")
+    store = PartitionedStore(path.rsplit("/", 1)[0])
+    store.append(hourly.loc[:"2025-03-10"])
+    assert store.append(hourly.loc["2025-03-05":]) == len(hourly.loc["2025-03-11":])
+    header = store.header()
+    assert [part["name"] for part in header["partitions"]][:3] == ["2024-11", "2024-12", "2025-01"]
+    assert header["rows"] == len(hourly) and len(header["partitions"]) == 8
+
+    opened = []
+    load = PartitionedStore._load
+    monkeypatch.setattr(PartitionedStore, "_load", lambda self, part: opened.append(part["name"]) or load(self, part))
+    # прогрев 100 часов уходит в апрель, более ранние месяцы не открываются
+    period = {"full_datafile": False, "start_date": "2025-05-02", "end_date": "2025-06-10"}
+    loaded = fetcher.load_range("partitioned", timeframe="60", offset_bars=100, **period)
+    expected = select_range_backtest(hourly, offset_bars=100, **period)
+    pd.testing.assert_frame_equal(expected, loaded, check_exact=True, check_freq=False)
+    assert sorted(set(opened)) == ["2025-04", "2025-05", "2025-06"]
+
+
+# ===== ИНКРЕМЕНТАЛЬНОЕ ОБНОВЛЕНИЕ =====
+
+class FakeExchange:
+    """fetch_ohlcv по готовой истории: limit свечей, заканчивающихся на params['until']."""
+    rateLimit = 0
+
+    def __init__(self, candles: pd.DataFrame, limit: int):
+        self.rows = [[ts.value // 1_000_000, *row] for ts, row in zip(candles.index, candles.to_numpy().tolist())]
+        self.limit = limit
+        self.calls = 0
+
+    def fetch_ohlcv(self, symbol, timeframe, since=None, limit=None, params=None):
+        self.calls += 1
+        until = params["until"]
+        return [row for row in self.rows if row[0] <= until][-self.limit:]
+
+
+def test_update_history_fetches_only_new_candles(fetcher, ohlcv, monkeypatch):
+    import src.data_fetcher.data_fetcher as module
+
+    candles = ohlcv.round(2)
+    exchange = FakeExchange(candles, limit=fetcher.limit)
+    monkeypatch.setattr(fetcher, "_set_exchange", lambda: setattr(fetcher, "exchange", exchange))
+
+    def at(i):
+        # момент времени внутри i-й минуты: i-я свеча еще не закрыта
+        monkeypatch.setattr(module.time, "time", lambda: (candles.index[i].value // 1_000_000 + 30_000) / 1000)
+
+    # полная загрузка прошлой версии конвейера сохранила незакрытую свечу 2999
+    stale = candles.iloc[:3000].copy()
+    stale.iloc[-1, stale.columns.get_loc("close")] = 0.5
+    fetcher.export_to_csv(stale, "1")
+
+    at(4000)
+    assert fetcher.update_history("1", formats=("csv", "mmap")) == 1000
+    # 1000 новых свечей + перекрытие — две страницы, а не вся история
+    assert exchange.calls == 2
+    pd.testing.assert_frame_equal(candles.iloc[:4000], fetcher.load_from_csv("csv"), check_freq=False)
+    pd.testing.assert_frame_equal(candles.iloc[:4000], fetcher.load_from_csv("mmap"), check_freq=False)
+
+    at(4500)
+    assert fetcher.update_history("1", formats=("csv", "mmap", "npy")) == 500
+    pd.testing.assert_frame_equal(candles.iloc[:4500], fetcher.load_from_csv("csv"), check_freq=False)
+    pd.testing.assert_frame_equal(candles.iloc[:4500], fetcher.load_from_csv("mmap"), check_freq=False)
+    pd.testing.assert_frame_equal(candles.iloc[:4500], fetcher.load_from_csv("npy"), check_freq=False)
+
+
+def test_download_history_streams_and_resumes(fetcher, ohlcv, monkeypatch):
+    import ccxt
+
+    import src.data_fetcher.data_fetcher as module
+
+    candles = ohlcv.round(2)
+    exchange = FakeExchange(candles, limit=fetcher.limit)
+    monkeypatch.setattr(fetcher, "_set_exchange", lambda: setattr(fetcher, "exchange", exchange))
+    monkeypatch.setattr(module.time, "time", lambda: (candles.index[-1].value // 1_000_000 + 60_000) / 1000)
+    flushed = []
+    store_update = fetcher.store_update
+    monkeypatch.setattr(fetcher, "store_update", lambda df, *args: flushed.append(len(df)) or store_update(df, *args))
+
+    # обрыв связи на 4-й странице: две записанные порции остаются на диске вместе с позицией
+    fetch = exchange.fetch_ohlcv
+
+    def broken(*args, **kwargs):
+        if exchange.calls >= 3:
+            raise ccxt.RequestTimeout("timeout")
+        return fetch(*args, **kwargs)
+
+    exchange.fetch_ohlcv = broken
+    start = candles.index[0].value // 1_000_000
+    assert fetcher.download_history("1", formats=("csv", "mmap"), start_ms=start, flush_rows=1500, retry_delay=0) is None
+    assert fetcher.download_in_progress("1")
+    # в памяти не больше порции flush_rows (+ одна страница)
+    assert flushed == [2000]
+    pd.testing.assert_frame_equal(candles.iloc[:2000], fetcher.load_from_csv("csv"), check_freq=False)
+
+    # продолжение: запрашиваются только оставшиеся окна
+    exchange.fetch_ohlcv = fetch
+    exchange.calls = 0
+    assert fetcher.update_history("1", formats=("csv", "mmap")) == len(candles) - 2000
+    assert exchange.calls == 3
+    assert not fetcher.download_in_progress("1")
+    pd.testing.assert_frame_equal(candles, fetcher.load_from_csv("csv"), check_freq=False)
+    pd.testing.assert_frame_equal(candles, fetcher.load_from_csv("mmap"), check_freq=False)
+
+
+def test_download_history_fills_pages_shorter_than_window(fetcher, ohlcv, monkeypatch):
+    import src.data_fetcher.data_fetcher as module
+
+    candles = ohlcv.round(2)
+    # биржа отдает не больше 300 свечей при limit=1000: окно догружается назад по until
+    exchange = FakeExchange(candles, limit=300)
+    monkeypatch.setattr(fetcher, "_set_exchange", lambda: setattr(fetcher, "exchange", exchange))
+    monkeypatch.setattr(module.time, "time", lambda: (candles.index[-1].value // 1_000_000 + 60_000) / 1000)
+
+    assert fetcher.download_history("1", start_ms=candles.index[0].value // 1_000_000) == len(candles)
+    # 5 окон по 1000 свечей, по 4 страницы на окно
+    assert exchange.calls == 20
+    pd.testing.assert_frame_equal(candles, fetcher.load_from_csv("csv"), check_freq=False)
+
+
+def test_update_history_keeps_pages_fetched_before_network_error(fetcher, ohlcv, monkeypatch):
+    import ccxt
+
+    import src.data_fetcher.data_fetcher as module
+
+    candles = ohlcv.round(2)
+    exchange = FakeExchange(candles, limit=fetcher.limit)
+    monkeypatch.setattr(fetcher, "_set_exchange", lambda: setattr(fetcher, "exchange", exchange))
+    monkeypatch.setattr(module.time, "time", lambda: (candles.index[4500].value // 1_000_000 + 30_000) / 1000)
+    monkeypatch.setattr(module.time, "sleep", lambda seconds: None)
+    fetcher.export_to_csv(candles.iloc[:3000], "1")
+
+    fetch = exchange.fetch_ohlcv
+
+    def broken(*args, **kwargs):
+        if exchange.calls >= 1:
+            exchange.calls += 1
+            raise ccxt.RequestTimeout("timeout")
+        return fetch(*args, **kwargs)
+
+    # первая страница записана сразу, обрыв на второй не теряет ее
+    exchange.fetch_ohlcv = broken
+    assert fetcher.update_history("1") is None
+    assert fetcher.download_in_progress("1")
+    pd.testing.assert_frame_equal(candles.iloc[:3999], fetcher.load_from_csv("csv"), check_freq=False)
+
+    exchange.fetch_ohlcv = fetch
+    assert fetcher.update_history("1") == 501
+    assert not fetcher.download_in_progress("1")
+    pd.testing.assert_frame_equal(candles.iloc[:4500], fetcher.load_from_csv("csv"), check_freq=False)
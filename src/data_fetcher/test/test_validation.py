@@ -0,0 +1,102 @@
+# tests/test_validation.py
+import numpy as np
+import pandas as pd
+
+from src.data_fetcher.data_fetcher import DataFetcher
+from src.data_fetcher.validation import gaps_overlapping, load_manifest, scan_series
+
+MINUTE = 60_000
+
+
+def test_scan_series_finds_gaps_and_duplicates():
+    ts = np.array([0, 1, 2, 2, 5, 6, 10, 9], dtype=np.int64) * MINUTE
+    result = scan_series(ts, MINUTE)
+    assert result["gaps"] == [[3 * MINUTE, 4 * MINUTE, 2], [7 * MINUTE, 9 * MINUTE, 3]]
+    assert result["duplicates"] == [2 * MINUTE]
+    assert result["unordered"] == 1
+
+    assert gaps_overlapping(result["gaps"], 4 * MINUTE, 6 * MINUTE) == [[3 * MINUTE, 4 * MINUTE, 2]]
+    assert gaps_overlapping(result["gaps"], 5 * MINUTE, 6 * MINUTE) == []
+
+
+class FakeExchange:
+    rateLimit = 0
+
+    def __init__(self, candles: pd.DataFrame):
+        self.candles = candles
+        self.requests = []
+
+    def fetch_ohlcv(self, symbol, timeframe, since=None, limit=None, params=None):
+        self.requests.append(params["until"])
+        ts = self.candles.index.asi8 // 1_000_000
+        hi = ts.searchsorted(params["until"], side="right")
+        lo = max(0, hi - limit)
+        return [[int(t), *row] for t, row in zip(ts[lo:hi], self.candles.to_numpy()[lo:hi].tolist())]
+
+
+def test_repair_refetches_only_missing_spans(tmp_path, monkeypatch):
+    index = pd.date_range("2025-01-01", periods=20_000, freq="min", name="timestamp")
+    candles = pd.DataFrame({c: np.round(np.linspace(1, 2, len(index)), 4) for c in
+                            ("open", "high", "low", "close", "volume")}, index=index)
+    fetcher = DataFetcher(
+        coin={"SYMBOL": "BTC", "MARKET_TYPE": "linear"},
+        exchange={"EXCHANGE_ID": "bybit", "LIMIT": 1000},
+        directory=f"{tmp_path}/",
+    )
+    # в сохраненных данных: два пропуска и дубликат
+    stored = pd.concat([candles.drop(candles.index[3000:3010]).drop(candles.index[15000:15500]), candles.iloc[[100]]])
+    fetcher.export_to_csv(stored.sort_index(), "1")
+
+    entry = fetcher.validate("1")
+    assert [gap[2] for gap in entry["gaps"]] == [10, 500]
+    assert len(entry["duplicates"]) == 1
+    assert load_manifest(f"{tmp_path}/")["series"][fetcher.series_name("1")]["rows"] == len(stored)
+
+    # у биржи нет свечей второго пропуска (техобслуживание)
+    exchange = FakeExchange(candles.drop(candles.index[15000:15500]))
+    monkeypatch.setattr(fetcher, "_set_exchange", lambda: setattr(fetcher, "exchange", exchange))
+    entry = fetcher.repair("1")
+
+    assert len(exchange.requests) <= 4  # по одной-две страницы на пропуск, а не вся история
+    assert entry["duplicates"] == []
+    assert [gap[2] for gap in entry["gaps"]] == [500]
+    assert entry["confirmed_gaps"] == entry["gaps"]
+    pd.testing.assert_frame_equal(candles.drop(candles.index[15000:15500]), fetcher.load_from_csv("csv"), check_freq=False)
+
+    # подтвержденный пропуск больше не запрашивается
+    exchange.requests.clear()
+    fetcher.repair("1")
+    assert exchange.requests == []
+    assert fetcher.known_gaps("1") == entry["gaps"]
+
+
+def test_repair_does_not_confirm_gap_after_fetch_error(tmp_path, monkeypatch):
+    import ccxt
+
+    import src.data_fetcher.data_fetcher as module
+
+    index = pd.date_range("2025-01-01", periods=5000, freq="min", name="timestamp")
+    candles = pd.DataFrame({c: np.round(np.linspace(1, 2, len(index)), 4) for c in
+                            ("open", "high", "low", "close", "volume")}, index=index)
+    fetcher = DataFetcher(
+        coin={"SYMBOL": "BTC", "MARKET_TYPE": "linear"},
+        exchange={"EXCHANGE_ID": "bybit", "LIMIT": 1000},
+        directory=f"{tmp_path}/",
+    )
+    fetcher.export_to_csv(candles.drop(candles.index[2000:2100]), "1")
+    exchange = FakeExchange(candles)
+    monkeypatch.setattr(fetcher, "_set_exchange", lambda: setattr(fetcher, "exchange", exchange))
+    monkeypatch.setattr(module.time, "sleep", lambda seconds: None)
+
+    # биржа недоступна: пропуск остается неподтвержденным и попадает в отчет
+    fetch = exchange.fetch_ohlcv
+    exchange.fetch_ohlcv = lambda *args, **kwargs: (_ for _ in ()).throw(ccxt.NetworkError("down"))
+    entry = fetcher.repair("1")
+    assert [gap[2] for gap in entry["failed_gaps"]] == [100]
+    assert entry.get("confirmed_gaps", []) == []
+
+    # следующий repair запрашивает пропуск снова
+    exchange.fetch_ohlcv = fetch
+    entry = fetcher.repair("1")
+    assert entry["gaps"] == [] and entry["failed_gaps"] == []
+    pd.testing.assert_frame_equal(candles, fetcher.load_from_csv("csv"), check_freq=False)
@@ -0,0 +1,86 @@
+# проверка целостности рядов свечей: пропуски и дубликаты
+
+# src/data_fetcher/validation.py
+import os
+import threading
+import time
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from src.data_fetcher.storage.base import read_json, write_json_atomic
+
+MANIFEST = "manifest.json"
+MANIFEST_VERSION = 1
+# манифест обновляют потоки асинхронного загрузчика (store_update) — чтение-изменение-запись под замком
+manifest_lock = threading.RLock()
+
+
+# ------------------------
+# Индекс пропусков и дубликатов: одна разность по timestamp
+# ------------------------
+def scan_series(ts_ms: np.ndarray, step_ms: Optional[int]) -> dict:
+    """
+    :param ts_ms: timestamp свечей (мс) в порядке хранения
+    :param step_ms: длительность бара; None (месяцы) — пропуски не проверяются
+    :return: {"gaps": [[первая пропущенная, последняя пропущенная, сколько баров]],
+              "duplicates": [timestamp], "unordered": количество нарушений порядка}
+    """
+    ts = np.asarray(ts_ms, dtype=np.int64)
+    diff = np.diff(ts)
+    gaps = []
+    if step_ms is not None:
+        at = np.flatnonzero(diff > step_ms)
+        gaps = [
+            [int(ts[i] + step_ms), int(ts[i + 1] - step_ms), int(diff[i] // step_ms - 1)]
+            for i in at
+        ]
+    return {
+        "gaps": gaps,
+        "duplicates": [int(t) for t in ts[1:][diff == 0]],
+        "unordered": int((diff < 0).sum()),
+    }
+
+
+def gaps_overlapping(gaps: list, start_ms: int, end_ms: int) -> list:
+    """Пропуски, пересекающие окно [start_ms, end_ms]."""
+    return [gap for gap in gaps if gap[0] <= end_ms and gap[1] >= start_ms]
+
+
+# ------------------------
+# Манифест данных: DATA_DIR/manifest.json, запись на ряд (имя файла без расширения)
+# ------------------------
+def manifest_path(data_dir: str) -> str:
+    return os.path.join(data_dir, MANIFEST)
+
+
+def load_manifest(data_dir: str) -> dict:
+    manifest = read_json(manifest_path(data_dir))
+    if not manifest or manifest.get("version") != MANIFEST_VERSION:
+        return {"version": MANIFEST_VERSION, "series": {}}
+    return manifest
+
+
+def save_manifest(data_dir: str, manifest: dict):
+    write_json_atomic(manifest_path(data_dir), manifest)
+
+
+def update_manifest(data_dir: str, key: str, entry: dict) -> dict:
+    with manifest_lock:
+        manifest = load_manifest(data_dir)
+        manifest["series"][key] = {**manifest["series"].get(key, {}), **entry}
+        save_manifest(data_dir, manifest)
+    return manifest["series"][key]
+
+
+def validation_entry(df: pd.DataFrame, step_ms: Optional[int], file_type: str) -> dict:
+    ts = pd.DatetimeIndex(df.index).as_unit("ms").asi8
+    return {
+        "format": file_type,
+        "rows": int(len(ts)),
+        "first_ts": int(ts[0]) if len(ts) else None,
+        "last_ts": int(ts[-1]) if len(ts) else None,
+        **scan_series(ts, step_ms),
+        "checked_at": int(time.time() * 1000),
+    }
@@ -1,4 +1,5 @@
 
+import logging
 import pandas as pd
 from pandas import Timedelta, DateOffset
 from typing import List
@@ -69,7 +70,10 @@ class ZigZagAndFibo:
             logger.error(f"Стратегия не вернула корректные результаты.")
             return Signal.no_signal()
 
-        logger.debug(f"ZigZag / z1 =: {zigzag["z1"]}, z2 =: {zigzag["z2"]}, z2_index: {zigzag['z2_index'].strftime("%d.%m.%Y %H:%M")} direction: {zigzag['direction']}")        
+        # strftime на каждом баре — только при включенном DEBUG
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("ZigZag / z1 =: %s, z2 =: %s, z2_index: %s direction: %s",
+                         zigzag["z1"], zigzag["z2"], zigzag['z2_index'].strftime("%d.%m.%Y %H:%M"), zigzag['direction'])
         
         direction_zigzag = zigzag["direction"] # направление позиции -1 long, 1 short
         z2_index = zigzag["z2_index"] # индекс ближайшей точки z2 
@@ -83,7 +87,7 @@ class ZigZagAndFibo:
         # 2) z2_index должен быть текущим баром или не более чем на ALLOWED_Z2_OFFSET баров раньше
         allowed_shifted = shift_timestamp(current_index, self.ALLOWED_Z2_OFFSET, self.timeframe, direction=-1)
         if not (z2_index == current_index or z2_index == allowed_shifted):
-            logger.debug(f"Пропускаем сигнал: z2_index={z2_index} не в допустимом окне (текущий={current_index})")
+            logger.debug("Пропускаем сигнал: z2_index=%s не в допустимом окне (текущий=%s)", z2_index, current_index)
             return Signal.no_signal()
                             
         # # Проверяем индекс бара zigzag он должен совпадать с свечей расчета
@@ -96,27 +100,27 @@ class ZigZagAndFibo:
         if direction_zigzag == -1: #индикатор zigzag показывает что нужно входить в long
             # проверяем цену входа в позицию с первым тейком 1 уровня фибоначчи цена входа должна быть меньше уровня 1
             if entry_price < fiboLev[78.6]['level_price']:
-                logger.debug(f"Цена входа {entry_price} [bold green] < [/bold green] {fiboLev[78.6]['level_price']} [bold green]long[/bold green]")
+                logger.debug("Цена входа %s [bold green] < [/bold green] %s [bold green]long[/bold green]", entry_price, fiboLev[78.6]['level_price'])
                 direction = Direction.LONG # направление позиции -1 long, 1 short
             else :
-                logger.debug(f"Цена входа {entry_price} [bold red] > [/bold red] {fiboLev[78.6]['level_price']}")
-                logger.debug(f"Пропускаем сигнал на LONG")
+                logger.debug("Цена входа %s [bold red] > [/bold red] %s", entry_price, fiboLev[78.6]['level_price'])
+                logger.debug("Пропускаем сигнал на LONG")
                 return Signal.no_signal()
 
         if direction_zigzag == 1: #индикатор zigzag показывает что нужно входить в long
-            logger.debug(f"Индикатор zigzag показывает что нужно входить в long {direction_zigzag}")
+            logger.debug("Индикатор zigzag показывает что нужно входить в long %s", direction_zigzag)
             # проверяем цену входа в позицию с первым тейком 1 уровня фибоначчи цена входа должна быть меньше уровня 1
             if entry_price > fiboLev[78.6]['level_price']:
-                logger.debug(f"Цена входа {entry_price} [bold green] > [/bold green] {fiboLev[78.6]['level_price']}")
+                logger.debug("Цена входа %s [bold green] > [/bold green] %s", entry_price, fiboLev[78.6]['level_price'])
                 direction = Direction.SHORT # направление позиции -1 long, 1 short
             else :
-                logger.debug(f"Цена входа {entry_price} [bold red] < [/bold red] {fiboLev[78.6]['level_price']}")
-                logger.debug(f"Пропускаем сигнал на SHORT")
+                logger.debug("Цена входа %s [bold red] < [/bold red] %s", entry_price, fiboLev[78.6]['level_price'])
+                logger.debug("Пропускаем сигнал на SHORT")
                 return Signal.no_signal()
             
                     
         if direction is None:
-            logger.debug(f"Нет сигнала на вход в позицию")
+            logger.debug("Нет сигнала на вход в позицию")
             return Signal.no_signal()
         # Создание сделки
         tps= []
@@ -0,0 +1,137 @@
+import logging
+from types import SimpleNamespace
+from decimal import Decimal
+
+import pandas as pd
+import pytest
+
+from src.backtester.engine.checkpoint import CheckpointManager
+from src.backtester.engine.execution_engine import ExecutionEngine
+from src.backtester.runner import run_backtest
+from src.benchmarks.suite import BENCH_COIN
+from src.benchmarks.synthetic import generate_ohlcv, resample_ohlcv
+from src.logical.strategy.zigzag_fibo.zigzag_and_fibo import ZigZagAndFibo
+from src.backtester.portfolio.portfolio import Portfolio
+from src.trading_engine.managers.position_manager import PositionManager
+from src.trading_engine.core.enums import Direction, SignalSource
+
+
+def make_engine():
+    manager = PositionManager()
+    return SimpleNamespace(
+        manager=manager,
+        portfolio=Portfolio(Decimal("1000")),
+        strategy=SimpleNamespace(allowed_min_bars=100),
+    )
+
+
+def test_checkpoint_roundtrip_keeps_shared_positions(tmp_path):
+    engine = make_engine()
+    pos = engine.manager.open_position("BTC/USDT", SignalSource.STRATEGY, Direction.LONG, Decimal("0.01"), None)
+    engine.portfolio.on_bar("t1", Decimal("5"), Decimal("0"))
+
+    CheckpointManager(tmp_path, run_key="a").save(7, "t1", engine, {pos.id: pos})
+
+    restored = make_engine()
+    checkpoint = CheckpointManager(tmp_path, run_key="a")
+    state = checkpoint.load()
+    positions = checkpoint.restore(state, restored)
+
+    assert state["cursor"] == 7
+    assert restored.portfolio.balance == Decimal("1005")
+    # позиция рабочего набора и позиция менеджера — один объект
+    assert positions[pos.id] is restored.manager.positions[pos.id]
+
+
+def test_checkpoint_of_other_run_is_ignored(tmp_path):
+    CheckpointManager(tmp_path, run_key="a").save(1, "t", make_engine(), {})
+    assert CheckpointManager(tmp_path, run_key="b").load() is None
+
+
+def test_checkpoint_interval_grows_when_overhead_exceeded(tmp_path):
+    checkpoint = CheckpointManager(tmp_path, every_bars=10, max_overhead=0.0)
+    checkpoint.save(1, "t", make_engine(), {})
+    assert checkpoint.every_bars == 20
+
+
+def test_final_state_requires_same_settings(tmp_path):
+    CheckpointManager(tmp_path, base_key="a").save_final(3, "t", make_engine(), {}, data_fp="fp")
+
+    assert CheckpointManager(tmp_path, base_key="a").load_final()["data_fp"] == "fp"
+    assert CheckpointManager(tmp_path, base_key="b").load_final() is None
+
+
+# ===== Прерывание и продолжение BacktestEngine.run =====
+
+logger = logging.getLogger(__name__)
+
+
+class Interrupted(Exception):
+    pass
+
+
+def interrupt_after(monkeypatch, calls: int):
+    """Бэктест "падает" на calls-м вызове стратегии (счетчик вне стратегии: она сама попадает в чекпоинт)."""
+    original = ZigZagAndFibo.find_entry_point
+    seen = []
+
+    def find_entry_point(self, data):
+        seen.append(1)
+        if len(seen) == calls:
+            raise Interrupted()
+        return original(self, data)
+
+    monkeypatch.setattr(ZigZagAndFibo, "find_entry_point", find_entry_point)
+
+
+@pytest.fixture(scope="module")
+def synthetic():
+    coin = dict(BENCH_COIN, TIMEFRAME="4h")
+    data_1m = generate_ohlcv(years=0.1, seed=42)
+    return coin, resample_ohlcv(data_1m, "4h"), data_1m
+
+
+def backtest(coin, data, data_1m, checkpoint=None):
+    manager = PositionManager()
+    strategy = ZigZagAndFibo(coin)
+    return run_backtest(data, data_1m, coin, strategy, manager, ExecutionEngine(manager), logger, checkpoint=checkpoint)
+
+
+def trades(result):
+    return [(p.direction, p.status, p.bar_opened, p.bar_closed, p.avg_entry_price, p.realized_pnl)
+            for p in result["positions"].values()]
+
+
+def test_interrupted_run_resumes_to_same_result(synthetic, tmp_path, monkeypatch):
+    coin, data, data_1m = synthetic
+    full = backtest(coin, data, data_1m)
+    assert len(full["positions"]) == 2
+
+    # сбой между первой и второй сделкой: вторая совершается уже после продолжения
+    interrupt_after(monkeypatch, 20)
+    with pytest.raises(Interrupted):
+        backtest(coin, data, data_1m, CheckpointManager(tmp_path, run_key="r", every_bars=10, max_overhead=1.0))
+    monkeypatch.undo()
+    checkpoint = CheckpointManager(tmp_path, run_key="r", every_bars=10, max_overhead=1.0)
+    resumed = backtest(coin, data, data_1m, checkpoint)
+
+    # продолжение с чекпоинта до второй сделки
+    assert full["positions"][max(full["positions"])].bar_opened > pd.Timestamp(checkpoint.stats["resumed_from"])
+    assert trades(resumed) == trades(full)
+    assert resumed["portfolio"].equity_curve == full["portfolio"].equity_curve
+
+
+def test_incremental_run_on_new_bars_matches_full_run(synthetic, tmp_path):
+    coin, data, data_1m = synthetic
+    full = backtest(coin, data, data_1m)
+
+    # первый запуск — на истории до второй сделки, продолжение — на всей истории
+    cut = data.index[120]
+    backtest(coin, data[data.index < cut], data_1m[data_1m.index < cut],
+             CheckpointManager(tmp_path, run_key="old", base_key="b"))
+    checkpoint = CheckpointManager(tmp_path, run_key="new", base_key="b", incremental=True)
+    extended = backtest(coin, data, data_1m, checkpoint)
+
+    assert pd.Timestamp(checkpoint.stats["incremental_from"]) < cut
+    assert trades(extended) == trades(full)
+    assert extended["portfolio"].equity_curve == full["portfolio"].equity_curve
@@ -0,0 +1,168 @@
+import multiprocessing
+import os
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from src.backtester.distributed import coordinator
+from src.backtester.distributed.job_queue import SQLiteJobQueue, DONE, FAILED, PENDING, RUNNING
+from src.backtester.distributed.worker import Worker
+from src.backtester.engine.checkpoint import load_task_result
+
+
+def square_job(payload):
+    time.sleep(0.05)
+    return {"value": payload["x"] ** 2}
+
+
+def run_local_worker(queue_path, results_dir):
+    Worker(SQLiteJobQueue(queue_path), results_dir, runner=square_job,
+           heartbeat_seconds=0.02, exit_when_idle=True).run()
+
+
+def test_local_worker_processes_share_queue(tmp_path):
+    queue = SQLiteJobQueue(tmp_path / "jobs.sqlite")
+    for x in range(8):
+        queue.put(f"job-{x}", {"x": x, "run_key": "k"})
+
+    processes = [
+        multiprocessing.Process(target=run_local_worker, args=(tmp_path / "jobs.sqlite", tmp_path / "results"))
+        for _ in range(3)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(timeout=60)
+
+    jobs = queue.jobs()
+    assert [job["status"] for job in jobs] == [DONE] * 8
+    # каждая задача выполнена ровно один раз
+    assert all(job["attempts"] == 1 for job in jobs)
+    assert load_task_result(jobs[3]["result_path"], "k") == {"value": 9}
+
+
+def test_expired_lease_is_taken_by_other_worker(tmp_path):
+    queue = SQLiteJobQueue(tmp_path / "jobs.sqlite", max_attempts=2)
+    queue.put("job", {"x": 1})
+
+    # воркер "упал" сразу после захвата
+    assert queue.claim("crashed", lease_seconds=0)["attempts"] == 1
+    assert queue.claim("other", lease_seconds=60)["attempts"] == 2
+    assert not queue.heartbeat("job", "crashed", 60)
+    assert queue.jobs()[0]["status"] == RUNNING
+
+
+def test_job_fails_after_max_attempts(tmp_path):
+    queue = SQLiteJobQueue(tmp_path / "jobs.sqlite", max_attempts=1)
+    queue.put("job", {"x": 1})
+    queue.claim("crashed", lease_seconds=0)
+
+    assert queue.claim("other", lease_seconds=60) is None
+    assert queue.jobs()[0]["status"] == FAILED
+
+
+def test_job_error_is_retried_until_max_attempts(tmp_path):
+    queue = SQLiteJobQueue(tmp_path / "jobs.sqlite", max_attempts=2)
+    queue.put("job", {"x": 1})
+
+    queue.claim("w", lease_seconds=60)
+    assert queue.fail("job", "w", "boom") == PENDING
+    assert queue.claim("other", lease_seconds=60)["attempts"] == 2
+    # чужой воркер не может закрыть задачу
+    assert queue.fail("job", "w", "boom") is None
+    assert queue.fail("job", "other", "boom again") == FAILED
+    job = queue.jobs()[0]
+    assert (job["status"], job["attempts"], job["error"]) == (FAILED, 2, "boom again")
+    assert queue.claim("w", lease_seconds=60) is None
+
+
+def test_worker_retries_failing_job(tmp_path):
+    calls = []
+
+    def flaky_job(payload):
+        calls.append(payload)
+        if len(calls) == 1:
+            raise ValueError("boom")
+        return {"value": payload["x"]}
+
+    queue = SQLiteJobQueue(tmp_path / "jobs.sqlite", max_attempts=2)
+    queue.put("job", {"x": 1, "run_key": "k"})
+    Worker(queue, tmp_path / "results", runner=flaky_job, heartbeat_seconds=0.02, exit_when_idle=True).run()
+
+    job = queue.jobs()[0]
+    assert (job["status"], job["attempts"]) == (DONE, 2)
+    assert load_task_result(job["result_path"], "k") == {"value": 1}
+
+
+def test_failed_job_is_requeued_on_put(tmp_path):
+    queue = SQLiteJobQueue(tmp_path / "jobs.sqlite", max_attempts=1)
+    queue.put("job", {"x": 1})
+    queue.put("done", {"x": 2})
+    queue.claim("w", lease_seconds=60)
+    queue.fail("job", "w", "boom")
+    queue.claim("w", lease_seconds=60)
+    queue.complete("done", "w", "path")
+
+    queue.put("job", {"x": 3})
+    queue.put("done", {"x": 4})
+    jobs = {job["id"]: job for job in queue.jobs()}
+    assert (jobs["job"]["status"], jobs["job"]["attempts"], jobs["job"]["error"]) == ("pending", 0, None)
+    assert jobs["job"]["payload"] == {"x": 3}
+    # выполненная задача не пересчитывается
+    assert (jobs["done"]["status"], jobs["done"]["payload"]) == (DONE, {"x": 2})
+
+
+def test_coordinator_timeout_stops_local_workers(tmp_path, monkeypatch):
+    queue_path = tmp_path / "jobs.sqlite"
+
+    def slow_worker(exit_when_idle=False):
+        Worker(SQLiteJobQueue(queue_path), tmp_path / "results", runner=lambda payload: time.sleep(1),
+               heartbeat_seconds=0.05, exit_when_idle=exit_when_idle).run()
+
+    monkeypatch.setattr(coordinator, "run_worker", slow_worker)
+    manager = SimpleNamespace(
+        coins_list=[{"SYMBOL": f"C{i}"} for i in range(20)],
+        settings_test={"TIMEFRAME_LIST": ["4h"]},
+        _build_run_key=lambda coin: "k",
+    )
+    coord = coordinator.Coordinator(manager, queue=SQLiteJobQueue(queue_path), results_dir=tmp_path, poll_seconds=0.05)
+
+    started = time.monotonic()
+    with pytest.raises(TimeoutError):
+        coord.run(local_workers=2, timeout=0.3)
+    # 20 задач по секунде на двух воркерах заняли бы ~10 с
+    assert time.monotonic() - started < 5
+    assert multiprocessing.active_children() == []
+
+
+def test_coordinator_restarts_local_workers_after_crash(tmp_path, monkeypatch):
+    queue_path = tmp_path / "jobs.sqlite"
+
+    def crash_once(payload):
+        # первая задача убивает процесс воркера посреди расчета (как OOM / SIGKILL)
+        marker = tmp_path / "crashed"
+        if payload["coin"]["SYMBOL"] == "C0" and not marker.exists():
+            marker.touch()
+            os._exit(1)
+        time.sleep(0.05)
+        return {"value": payload["coin"]["SYMBOL"]}
+
+    def worker(exit_when_idle=False):
+        Worker(SQLiteJobQueue(queue_path), tmp_path / "results", runner=crash_once, lease_seconds=0.5,
+               heartbeat_seconds=0.05, poll_seconds=0.05, exit_when_idle=exit_when_idle).run()
+
+    monkeypatch.setattr(coordinator, "run_worker", worker)
+    manager = SimpleNamespace(
+        coins_list=[{"SYMBOL": f"C{i}"} for i in range(4)],
+        settings_test={"TIMEFRAME_LIST": ["4h"]},
+        _build_run_key=lambda coin: "k",
+    )
+    coord = coordinator.Coordinator(manager, queue=SQLiteJobQueue(queue_path), results_dir=tmp_path, poll_seconds=0.05)
+    monkeypatch.setattr(coord, "collect", lambda jobs: None)
+
+    jobs = coord.run(local_workers=2, timeout=30)
+    assert [job["status"] for job in jobs] == [DONE] * 4
+    # задачу упавшего воркера взял перезапущенный воркер после истечения аренды
+    assert {job["id"]: job["attempts"] for job in jobs}["C0_TF-4h_k"] == 2
+    assert multiprocessing.active_children() == []
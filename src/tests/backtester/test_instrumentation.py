@@ -0,0 +1,42 @@
+import json
+
+from src.utils.logger_time import Instrumentation, NULL_INSTRUMENTATION, LoggingTimer
+
+
+def test_stages_and_counters_are_accumulated(tmp_path):
+    inst = Instrumentation("BNB_TF-4h")
+    for _ in range(3):
+        with inst.stage("find_entry_point"):
+            pass
+    with inst.stage("process_bar", calls=60):
+        pass
+    with LoggingTimer("Отчет", instrumentation=inst, stage="report"):
+        pass
+    inst.count("bars_htf", 3)
+
+    report = inst.report()
+    assert report["stages"]["find_entry_point"]["calls"] == 3
+    assert report["stages"]["process_bar"]["calls"] == 60
+    assert report["stages"]["report"]["calls"] == 1
+    assert report["counters"] == {"bars_htf": 3}
+
+    inst.save(tmp_path / "stats.json")
+    assert json.loads((tmp_path / "stats.json").read_text(encoding="utf-8"))["name"] == "BNB_TF-4h"
+
+
+def test_merge_sums_tasks():
+    a, b = Instrumentation("a"), Instrumentation("b")
+    a.add("backtest", 1.0)
+    b.add("backtest", 3.0)
+    a.count("bars_htf", 10)
+    b.count("bars_htf", 30)
+
+    total = Instrumentation.merge([a.report(), b.report()])
+    assert total["stages"]["backtest"]["calls"] == 2
+    assert total["bars_per_sec"] == 10.0
+
+
+def test_disabled_instrumentation_records_nothing():
+    with NULL_INSTRUMENTATION.stage("find_entry_point"):
+        NULL_INSTRUMENTATION.count("bars_htf")
+    assert NULL_INSTRUMENTATION.report() is None
@@ -0,0 +1,66 @@
+from decimal import Decimal
+
+import pandas as pd
+
+from src.utils import memory
+from src.utils.memory import MemoryBudget, MemoryTracker, MB
+from src.trading_engine.managers.position_manager import PositionManager
+from src.trading_engine.core.enums import Direction, SignalSource
+
+
+def test_budget_defers_when_memory_is_short(monkeypatch):
+    monkeypatch.setattr(memory, "current_rss", lambda: 100 * MB)
+    monkeypatch.setattr(memory, "available_memory", lambda: 250 * MB)
+    budget = MemoryBudget(100 * MB)
+
+    assert budget.can_start(running=0)
+    assert budget.can_start(running=1)
+    # две запущенные задачи еще не заняли свои 200 MB
+    assert not budget.can_start(running=2)
+    assert budget.deferred == 1
+
+
+def test_tracker_reports_frames_and_objects():
+    manager = PositionManager()
+    manager.open_position("BTC/USDT", SignalSource.STRATEGY, Direction.LONG, Decimal("0.01"), None)
+    frame = pd.DataFrame({"close": range(1000)})
+
+    with MemoryTracker("BTC_TF-4h", top=3) as tracker:
+        tracker.measure_frames(frame)
+        tracker.measure_positions(manager.positions)
+
+    report = tracker.report()
+    assert report["dataframes_mb"] > 0
+    assert report["objects"]["positions"] == 1
+    assert len(report["top_allocations"]) <= 3
+    assert "traced_peak_mb" in report
+
+
+def test_tracemalloc_is_owned_by_one_tracker():
+    with MemoryTracker("BTC_TF-4h", top=1) as first:
+        # соседняя задача не сбрасывает пик первой и не смешивает с ней свои аллокации
+        with MemoryTracker("ETH_TF-4h", top=1) as second:
+            pass
+
+    assert "traced_peak_mb" in first.report()
+    assert "traced_peak_mb" not in second.report()
+    assert second.report()["rss_peak_mb"] is not None
+
+
+def test_budget_counts_deferred_tasks_and_learns_peak(monkeypatch):
+    monkeypatch.setattr(memory, "current_rss", lambda: 100 * MB)
+    monkeypatch.setattr(memory, "available_memory", lambda: 150 * MB)
+    budget = MemoryBudget(100 * MB)
+
+    # задача ждет несколько опросов планировщика — отложена один раз
+    for _ in range(5):
+        assert not budget.can_start(running=1, task="BTC_TF-4h")
+    assert not budget.can_start(running=1, task="ETH_TF-4h")
+    assert budget.deferred == 2
+
+    assert budget.can_start(running=0, task="SOL_TF-4h")
+    assert not budget.observe(80 * MB)
+    assert budget.observe(160 * MB)
+    assert (budget.task_bytes, budget.overruns) == (160 * MB, 1)
+    # по фактическому пику задача больше не помещается даже одна
+    assert not budget.can_start(running=0, task="SOL_TF-4h")
@@ -0,0 +1,141 @@
+import copy
+import random
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import numpy as np
+
+from src.backtester.engine.execution_engine import ExecutionEngine
+from src.backtester.trading.position_builder import PositionBuilder
+from src.trading_engine.core.enums import Direction, OrderType, Position_Status, SignalSource
+from src.trading_engine.managers.position_manager import PositionManager
+from src.trading_engine.signals.signal import Signal
+
+COIN = {"SYMBOL": "TEST", "START_DEPOSIT_USDT": 1000, "MINIMAL_TICK_SIZE": 0.01, "VOLUME_SIZE": 1000, "LEVERAGE": 5}
+
+
+def full_scan_process_bar(engine, bar, bar_index):
+    # прежний алгоритм: перебор всех активных ордеров каждой позиции
+    for pos in list(engine.position_manager.positions.values()):
+        active_orders = pos.get_active_orders()
+        if not active_orders:
+            continue
+        for order in active_orders:
+            if engine.should_execute(order, bar):
+                exec_price = engine.get_execution_price(order, bar)
+                exec_volume = order.remaining()
+                if order.order_type in {OrderType.TAKE_PROFIT, OrderType.CLOSE, OrderType.STOP_LOSS}:
+                    exec_volume = min(exec_volume, pos.remaining_volume)
+                if exec_volume <= Decimal("0"):
+                    continue
+                pos.record_execution(order, exec_price, pos.round_to_tick(exec_volume), bar_index)
+        if pos.status == Position_Status.ACTIVE and pos.check_stop_break():
+            pos.move_stop_to_break_even()
+
+
+def make_bars(rng, count, price=100.0):
+    start = datetime(2025, 1, 1)
+    bars = []
+    for i in range(count):
+        close = round(price * (1 + rng.gauss(0, 0.004)), 2)
+        high = round(max(price, close) * (1 + abs(rng.gauss(0, 0.002))), 2)
+        low = round(min(price, close) * (1 - abs(rng.gauss(0, 0.002))), 2)
+        bars.append([price, high, low, close, start + timedelta(minutes=i)])
+        price = close
+    return bars
+
+
+def make_signal(rng, price):
+    direction = rng.choice([Direction.LONG, Direction.SHORT])
+    sign = 1 if direction == Direction.LONG else -1
+    entry = round(price * (1 - sign * rng.uniform(0, 0.003)), 2)
+    return Signal.entry(
+        source=SignalSource.STRATEGY,
+        direction=direction,
+        entry_price=entry,
+        take_profits=[
+            {"price": round(entry * (1 + sign * k * 0.002), 2), "volume": 0.25, "tp_to_break": k == 1}
+            for k in range(1, 5)
+        ],
+        stop_losses=[{"price": round(entry * (1 - sign * 0.006), 2), "volume": 1}],
+    )
+
+
+def snapshot(manager):
+    return [
+        (pos.status, pos.realized_pnl, [(o.order_type, o.price, o.status, o.filled, o.close_bar) for o in pos.orders])
+        for pos in manager.positions.values()
+    ]
+
+
+def test_order_book_matches_full_scan():
+    rng = random.Random(7)
+    bars = make_bars(rng, 3000)
+    signals = {i: make_signal(rng, bars[i][3]) for i in range(0, len(bars), 40)}
+
+    results = []
+    for process in (ExecutionEngine.process_bar, full_scan_process_bar):
+        manager = PositionManager()
+        builder = PositionBuilder(manager, COIN)
+        engine = ExecutionEngine(manager)
+        for i, bar in enumerate(bars):
+            if i in signals:
+                builder.build(copy.deepcopy(signals[i]), bar)
+            if i % 97 == 0:
+                # выход по рынку у одной из открытых позиций
+                for pos in manager.positions.values():
+                    if pos.status == Position_Status.ACTIVE:
+                        manager.cancel_active_orders(pos.id, bar)
+                        manager.close_position_at_market(pos.id, Decimal(str(bar[3])), bar)
+                        break
+            process(engine, bar, bar[4])
+        results.append(snapshot(manager))
+
+    assert results[0] == results[1]
+    assert any(status != Position_Status.CREATED for status, _, _ in results[0])
+
+
+def test_batch_mode_matches_bar_mode():
+    rng = random.Random(11)
+    bars = make_bars(rng, 3000)
+    signals = {i: make_signal(rng, bars[i][3]) for i in range(0, len(bars), 60)}
+
+    results = []
+    for mode in ("bar", "batch"):
+        manager = PositionManager()
+        builder = PositionBuilder(manager, COIN)
+        engine = ExecutionEngine(manager, mode=mode)
+        # блоки по 60 минутных баров, сигналы — на первом баре блока (как бар HTF)
+        for start in range(0, len(bars), 60):
+            if start in signals:
+                builder.build(copy.deepcopy(signals[start]), bars[start])
+            block = np.array(bars[start:start + 60], dtype=object)
+            if mode == "batch":
+                engine.process_block(block)
+            else:
+                for bar in block:
+                    engine.process_bar(bar, bar[4])
+        results.append(snapshot(manager))
+
+    assert results[0] == results[1]
+
+
+def test_triggered_uses_price_range():
+    manager = PositionManager()
+    signal = Signal.entry(
+        source=SignalSource.STRATEGY,
+        direction=Direction.LONG,
+        entry_price=100,
+        take_profits=[{"price": 110, "volume": 1}],
+        stop_losses=[{"price": 90, "volume": 1}],
+    )
+    PositionBuilder(manager, COIN).build(signal, [100, 101, 99, 100, datetime(2025, 1, 1)])
+    book = ExecutionEngine(manager).order_book
+    book.sync()
+
+    def types(low, high):
+        return [order.order_type for _, _, order, _ in book.triggered(Decimal(low), Decimal(high))]
+
+    assert types("101", "105") == []
+    assert types("99", "105") == [OrderType.ENTRY]
+    assert types("85", "115") == [OrderType.ENTRY, OrderType.TAKE_PROFIT, OrderType.STOP_LOSS]
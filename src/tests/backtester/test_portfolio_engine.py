@@ -0,0 +1,89 @@
+import logging
+from types import SimpleNamespace
+from decimal import Decimal
+
+import numpy as np
+import pytest
+
+from src.backtester.engine.execution_engine import ExecutionEngine
+from src.backtester.engine.portfolio_engine import PortfolioBacktestEngine
+from src.backtester.portfolio.portfolio import Portfolio
+from src.backtester.runner import run_backtest, run_portfolio_backtest
+from src.benchmarks.suite import BENCH_COIN
+from src.benchmarks.synthetic import generate_ohlcv, resample_ohlcv
+from src.logical.strategy.zigzag_fibo.zigzag_and_fibo import ZigZagAndFibo
+from src.trading_engine.managers.position_manager import PositionManager
+
+logger = logging.getLogger(__name__)
+
+
+def make_ctx(ts, margin="1000"):
+    return SimpleNamespace(
+        ts=np.array(ts, dtype=np.int64),
+        strategy=SimpleNamespace(allowed_min_bars=1),
+        margin=Decimal(margin),
+    )
+
+
+def make_engine(contexts, deposit="2000", max_positions=2):
+    return PortfolioBacktestEngine(contexts, Portfolio(Decimal(deposit)), max_positions, logger=None)
+
+
+def test_events_are_merged_by_time():
+    engine = make_engine([make_ctx([0, 10, 30]), make_ctx([0, 20, 30])])
+    # первые allowed_min_bars баров каждой монеты пропускаются
+    assert list(engine._events()) == [(10, 0, 1), (20, 1, 1), (30, 0, 2), (30, 1, 2)]
+
+
+def with_open(engine, count, margin="1000"):
+    # накопленные суммы, как после открытия count позиций
+    engine.open_count = count
+    engine.used_margin = Decimal(margin) * count
+    return engine
+
+
+def test_position_limit_blocks_entry():
+    a, b = make_ctx([0]), make_ctx([0])
+    assert not with_open(make_engine([a, b], deposit="10000", max_positions=2), 2)._can_open(a)
+    assert with_open(make_engine([a, b], deposit="10000", max_positions=3), 2)._can_open(a)
+
+
+def test_free_capital_blocks_entry():
+    a, b = make_ctx([0]), make_ctx([0])
+    assert not with_open(make_engine([a, b], deposit="1500", max_positions=5), 1)._can_open(b)
+    assert with_open(make_engine([a, b], deposit="2000", max_positions=5), 1)._can_open(b)
+
+
+# ===== Полный прогон на синтетических данных =====
+
+@pytest.fixture(scope="module")
+def synthetic():
+    coin = dict(BENCH_COIN, TIMEFRAME="4h")
+    data_1m = generate_ohlcv(years=0.1, seed=42)
+    return coin, resample_ohlcv(data_1m, "4h"), data_1m
+
+
+def trades(positions):
+    return [(p.direction, p.status, p.bar_opened, p.bar_closed, p.avg_entry_price, p.realized_pnl)
+            for p in positions.values()]
+
+
+def test_single_coin_portfolio_matches_run_backtest(synthetic):
+    coin, data, data_1m = synthetic
+    manager = PositionManager()
+    single = run_backtest(data, data_1m, coin, ZigZagAndFibo(coin), manager, ExecutionEngine(manager), logger)
+    portfolio = run_portfolio_backtest([(coin, data, data_1m)], "4h", Decimal("100000"), 10, logger)
+
+    assert len(single["positions"]) >= 2
+    assert trades(portfolio["positions"]) == trades(single["positions"])
+    assert portfolio["skipped_entries"] == 0
+
+
+def test_small_shared_deposit_skips_entries(synthetic):
+    coin, data, data_1m = synthetic
+    tasks = [(coin, data, data_1m), (dict(coin, SYMBOL="BENCH2"), data, data_1m)]
+    # общего депозита не хватает на VOLUME_SIZE одной позиции: все входы отклоняются
+    shared = run_portfolio_backtest(tasks, "4h", Decimal(coin["VOLUME_SIZE"]) / 2, 10, logger)
+
+    assert shared["skipped_entries"] >= 4
+    assert shared["positions"] == {}
@@ -0,0 +1,34 @@
+from src.backtester.result_cache import ResultCache, build_cache_key
+
+
+def make_key(tmp_path, strategy=None):
+    return build_cache_key(
+        {"1": tmp_path / "1m.csv", "4h": tmp_path / "4h.csv"},
+        coin={"SYMBOL": "BNB", "TIMEFRAME": "4h"},
+        settings_test={"START_DATE": "2025-01-01", "END_DATE": "2025-02-01"},
+        settings_strategy=strategy or {"ZIGZAG_DEPTH": 12},
+    )
+
+
+def test_cache_key_follows_data_and_settings(tmp_path):
+    (tmp_path / "1m.csv").write_text("a")
+    (tmp_path / "4h.csv").write_text("b")
+    key = make_key(tmp_path)
+
+    assert make_key(tmp_path) == key
+    assert make_key(tmp_path, strategy={"ZIGZAG_DEPTH": 10}) != key
+
+    (tmp_path / "1m.csv").write_text("changed")
+    assert make_key(tmp_path) != key
+
+
+def test_cache_key_requires_data_files(tmp_path):
+    assert make_key(tmp_path) is None
+
+
+def test_cache_roundtrip_drops_run_statistics(tmp_path):
+    cache = ResultCache(tmp_path)
+    cache.put("abcdef", {"metrics": {"count": 2}, "checkpoint": {"count": 5}})
+
+    assert cache.get("abcdef") == {"metrics": {"count": 2}}
+    assert cache.get("other") is None
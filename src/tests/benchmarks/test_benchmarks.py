@@ -0,0 +1,26 @@
+from src.benchmarks.suite import compare
+from src.benchmarks.synthetic import generate_ohlcv, resample_ohlcv
+
+
+def test_generator_is_deterministic():
+    a = generate_ohlcv(years=0.001, seed=7)
+    b = generate_ohlcv(years=0.001, seed=7)
+    assert a.equals(b)
+    assert not a.equals(generate_ohlcv(years=0.001, seed=8))
+    assert (a["high"] >= a[["open", "close"]].max(axis=1)).all()
+    assert (a["low"] <= a[["open", "close"]].min(axis=1)).all()
+
+
+def test_resample_keeps_extremes():
+    m = generate_ohlcv(years=0.01)
+    h = resample_ohlcv(m, "4h")
+    assert h["high"].iloc[0] == m["high"].iloc[:240].max()
+    assert h["open"].iloc[1] == m["open"].iloc[240]
+
+
+def test_compare_flags_regression_past_threshold():
+    baseline = {"params": {}, "benchmarks": {"a": {"median_s": 1.0}, "b": {"median_s": 1.0}}}
+    results = {"params": {}, "benchmarks": {"a": {"median_s": 1.1}, "b": {"median_s": 1.5}, "c": {"median_s": 9.0}}}
+
+    regressions = compare(results, baseline, threshold=0.25)
+    assert [r["name"] for r in regressions] == ["b"]
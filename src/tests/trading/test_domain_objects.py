@@ -0,0 +1,79 @@
+import pickle
+import sys
+import threading
+from decimal import Decimal
+
+import pytest
+
+from src.backtester.reports.serializers import serialize_position
+from src.trading_engine.core import ids
+from src.trading_engine.core.enums import Direction, OrderType, SignalSource
+from src.trading_engine.core.position import Position
+from src.trading_engine.orders.order_factory import make_order
+from src.trading_engine.signals.signal import NO_SIGNAL, Signal
+
+
+def test_ids_are_monotonic_and_advance_past_restored():
+    first, second = ids.next_id(), ids.next_id()
+    assert second > first
+
+    ids.advance_past(second + 1000)
+    assert ids.next_id() > second + 1000
+
+
+def test_ids_unique_while_advance_past_runs_concurrently():
+    drawn = []
+
+    def draw():
+        drawn.extend(ids.next_id() for _ in range(20_000))
+
+    def advance():
+        for _ in range(2_000):
+            ids.advance_past(ids.next_id())
+
+    # частое переключение потоков, чтобы advance_past попадал между чтениями счетчика
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        threads = [threading.Thread(target=draw) for _ in range(4)] + [threading.Thread(target=advance)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+    assert len(drawn) == len(set(drawn))
+
+
+def test_domain_objects_have_no_dict():
+    pos = Position("BNB", Direction.LONG, Decimal("0.01"), SignalSource.STRATEGY)
+    order = make_order(OrderType.TAKE_PROFIT, Decimal("1.5"), Decimal("2"), Direction.LONG)
+    pos.add_order(order)
+
+    assert not hasattr(pos, "__dict__") and not hasattr(order, "__dict__")
+    with pytest.raises(AttributeError):
+        pos.unknown = 1
+
+    restored = pickle.loads(pickle.dumps(pos))
+    assert restored.id == pos.id and restored.orders[0].id == order.id
+    assert ids.max_id({pos.id: pos}) == max(pos.id, order.id)
+
+
+def test_serializer_keeps_string_ids():
+    pos = Position("BNB", Direction.SHORT, Decimal("0.01"), SignalSource.STRATEGY)
+    pos.add_order(make_order(OrderType.STOP_LOSS, Decimal("10"), Decimal("1"), Direction.SHORT))
+    data = serialize_position(pos)
+
+    assert data["id"] == str(pos.id)
+    assert data["orders"][0]["id"] == str(pos.orders[0].id)
+    assert data["orders"][0]["order_type"] == "STOP_LOSS"
+
+
+def test_no_signal_is_shared_and_immutable():
+    assert Signal.no_signal() is NO_SIGNAL
+    assert NO_SIGNAL.is_no_signal()
+    assert pickle.loads(pickle.dumps(NO_SIGNAL)) is NO_SIGNAL
+    with pytest.raises(AttributeError):
+        NO_SIGNAL.price = 1
+    # с bar_index — отдельный объект
+    assert Signal.no_signal(bar_index=5).bar_index == 5
@@ -0,0 +1,35 @@
+import logging
+
+from src.utils.logger import QuietEvents, log_event
+
+
+def test_quiet_mode_counts_events_instead_of_logging(caplog):
+    logger = logging.getLogger("test.events")
+    with caplog.at_level(logging.INFO, logger="test.events"):
+        with QuietEvents() as events:
+            log_event(logger, "order_filled", "Ордер %s исполнен", "a")
+            log_event(logger, "order_filled", "Ордер %s исполнен", "b")
+            log_event(logger, "position_closed", "Позиция закрыта")
+        log_event(logger, "order_filled", "Ордер %s исполнен", "c")
+
+    assert events.counters == {"order_filled": 2, "position_closed": 1}
+    assert events.summary() == "order_filled=2, position_closed=1"
+    assert [r.getMessage() for r in caplog.records] == ["Ордер c исполнен"]
+
+
+def test_disabled_quiet_mode_and_level_gating(caplog):
+    logger = logging.getLogger("test.events")
+
+    class Lazy:
+        formatted = False
+
+        def __str__(self):
+            Lazy.formatted = True
+            return "lazy"
+
+    with caplog.at_level(logging.WARNING, logger="test.events"):
+        with QuietEvents(enabled=False) as events:
+            log_event(logger, "order_filled", "Ордер %s", Lazy())
+
+    assert not events.counters
+    assert not Lazy.formatted
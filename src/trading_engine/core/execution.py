@@ -4,10 +4,10 @@ from datetime import datetime
 from dataclasses import dataclass   
 
 # ? класс исполнения ордера
-@dataclass
+@dataclass(slots=True)
 class Execution:
     price: Decimal
     volume: Decimal
     bar_index: Optional[datetime]  # индекс бара исполнения
-    order_id: str
+    order_id: int
     realized_pnl: Decimal = Decimal("0")
\ No newline at end of file
@@ -0,0 +1,37 @@
+# идентификаторы доменных объектов
+
+# src/trading_engine/core/ids.py
+import threading
+
+# Монотонные int64-идентификаторы ордеров и позиций в пределах процесса.
+# Счетчик один на процесс и сдвигается только под _lock: advance_past из потока,
+# восстанавливающего чекпоинт, не может разойтись с next_id в соседних потоках.
+_next = 1
+_lock = threading.Lock()
+
+
+def next_id() -> int:
+    global _next
+    with _lock:
+        value = _next
+        _next += 1
+    return value
+
+
+def advance_past(value: int):
+    """
+    Следующие id будут больше value: объекты, восстановленные из чекпоинта
+    другого процесса, не совпадут по id с новыми.
+    """
+    global _next
+    with _lock:
+        _next = max(_next, int(value) + 1)
+
+
+def max_id(positions: dict) -> int:
+    # наибольший id среди позиций и их ордеров (0 — если id не целые, например старые данные)
+    ids = [0]
+    for pos in positions.values():
+        ids.append(pos.id)
+        ids.extend(order.id for order in pos.orders)
+    return max((i for i in ids if isinstance(i, int)), default=0)
@@ -10,16 +10,16 @@ logger = get_logger(__name__)
 
 from src.trading_engine.core.enums import Direction, OrderType, OrderStatus
 
-@dataclass
+@dataclass(slots=True)
 class Order:
-    id: str
+    id: int                   # монотонный id (src.trading_engine.core.ids.next_id)
     order_type: OrderType
     price: Optional[Decimal]  # Нет для рыночных ордеров
     volume: Decimal           # абсолютный объем в нативных единицах (не дробях)
     direction: Direction      #направление: ДЛИННОЕ или КОРОТКОЕ (влияет на интерпретацию стопов)
     profit: Optional[Decimal] = Decimal("0")  # результат исполнения ордера
     status: OrderStatus = OrderStatus.ACTIVE
-    filled: Decimal = field(default_factory=lambda: Decimal("0"))
+    filled: Decimal = Decimal("0")  # Decimal неизменяем — общий ноль вместо нового объекта на ордер
     created_bar: Optional[datetime] = None  # optional bar index when created
     close_bar: Optional[datetime] = None  # optional bar index when closed
     meta: Dict[str, Any] = field(default_factory=dict)
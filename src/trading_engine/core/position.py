@@ -2,17 +2,17 @@ from __future__ import annotations
 
 from decimal import Decimal, ROUND_HALF_UP
 from typing import List, Optional, Dict, Any
-from uuid import uuid4
 from datetime import datetime
 
 # Логирование
 # ====================================================
-from src.utils.logger import get_logger
+from src.utils.logger import get_logger, log_event
 logger = get_logger(__name__)
 
 # Core enums
 from src.trading_engine.core.execution import Execution
 from src.trading_engine.core.enums import Direction, OrderType, Position_Status, OrderStatus, SignalSource, PositionType
+from src.trading_engine.core.ids import next_id
 from src.trading_engine.orders.order_factory import Order
 from src.trading_engine.utils.decimal_utils import to_decimal
 
@@ -23,8 +23,16 @@ class Position:
     Позиция объединяет ордера и исполнения.
     Он НЕ сам принимает решения о выполнении — это делает ExecutionEngine.
     """
+    # без __dict__: в прогоне с перебором параметров позиций сотни тысяч
+    __slots__ = (
+        "id", "source", "type", "symbol", "direction", "status", "orders", "executions",
+        "opened_volume", "closed_volume", "bar_opened", "bar_closed", "avg_entry_price", "realized_pnl",
+        "tick_size", "filled_tp_volume", "filled_sl_volume", "filled_close_volume", "meta",
+        "is_hedge",  # задается SignalHandler для хеджирующих позиций
+    )
+
     def __init__(self, symbol: str, direction: Direction, tick_size: Optional[Decimal], source: SignalSource):
-        self.id = uuid4().hex # уникальный идентификатор позиции
+        self.id = next_id() # уникальный идентификатор позиции
         self.source = source # источник позиции
         self.type = PositionType.MAIN # тип позиции (основная/хеджирующая)
         self.symbol = symbol # торговый символ / инструмент
@@ -50,11 +58,12 @@ class Position:
     # Order management
     # ------------------------
     def add_order(self, order: Order):
-        logger.debug(f"[{self.symbol}] Позиция {self.id[:6]}: ордер {order.id[:6]} {order.order_type} /price = {order.price} /volume = {order.volume} /status = {order.status}")
+        logger.debug("[%s] Позиция %s: ордер %s %s /price = %s /volume = %s /status = %s",
+                     self.symbol, self.id, order.id, order.order_type, order.price, order.volume, order.status)
         self.orders.append(order)
 
     # Отмена ордера по ID
-    def __cancel_order(self, order_id: str):
+    def __cancel_order(self, order_id: int):
         for o in self.orders:
             if o.id == order_id and o.status == OrderStatus.ACTIVE:
                 o.status = OrderStatus.CANCELLED
@@ -63,7 +72,7 @@ class Position:
     # Установка типа позиции
     def setPositionType(self, ptype: PositionType):
         self.type = ptype
-        logger.debug(f"[{self.symbol}] Позиция {self.id[:6]} установлена как тип {ptype.value}")
+        logger.debug(f"[{self.symbol}] Позиция {self.id} установлена как тип {ptype.value}")
 
     # Отмена ордера по типу
     def cancel_orders_by_type(self, otype: OrderType):
@@ -113,7 +122,8 @@ class Position:
 
             # mark active if at least some opened
             self.status = Position_Status.ACTIVE
-            logger.info(f"[{self.symbol}] ☑️ Ордер {order.id[:6]} Тип: {order.order_type.value} Исполнен.  Объем: {order.volume}, Средняя цена входа: {self.avg_entry_price}")  
+            log_event(logger, "order_filled", "[%s] ☑️ Ордер %s Тип: %s Исполнен.  Объем: %s, Средняя цена входа: %s",
+                      self.symbol, order.id, order.order_type.value, order.volume, self.avg_entry_price)
 
         # если это закрывающий ордер (TP/SL/CLOSE)
         elif order.order_type in {OrderType.TAKE_PROFIT, OrderType.CLOSE, OrderType.STOP_LOSS}:
@@ -136,7 +146,8 @@ class Position:
                     elif order.order_type == OrderType.CLOSE:
                         self.filled_close_volume += volume
                         
-                logger.info(f"☑️ Ордер {order.id[:6]} [bool cyan] Тип:{order.order_type.value}[/bool cyan] Исполнен. Объем: {order.volume} profit: {order.profit}")
+                log_event(logger, "order_filled", "☑️ Ордер %s [bool cyan] Тип:%s[/bool cyan] Исполнен. Объем: %s profit: %s",
+                          order.id, order.order_type.value, order.volume, order.profit)
 
         # обновить статус позиции
         if  self.opened_volume > Decimal("0") and self.closed_volume >=  self.opened_volume:
@@ -148,7 +159,7 @@ class Position:
 
         elif self.closed_volume > Decimal("0") and self.closed_volume  < self.opened_volume:
             # закрыта частично
-            logger.info(f"[symbol]🟢 Позиция {self.id[:6]} частично закрыта. Статус: {self.status.value}")
+            log_event(logger, "position_partial", "[symbol]🟢 Позиция %s частично закрыта. Статус: %s", self.id, self.status.value)
             
         # записываем исполнение
         ex = Execution(price=price, volume=volume, bar_index=bar_index, realized_pnl=(order.profit or Decimal("0")), order_id=order.id) 
@@ -199,7 +210,7 @@ class Position:
         else:
             self.status = Position_Status.TAKEN_PART
 
-        logger.info(f"✅ Позиция {self.id[:6]} закрыта. Статус: {self.status.value}")
+        log_event(logger, "position_closed", "✅ Позиция %s закрыта. Статус: %s", self.id, self.status.value)
                 
                 
     @property            
@@ -236,7 +247,7 @@ class Position:
         # отменить существующие активные стопы и добавить новый стоп по цене входа
         self.cancel_orders_by_type(OrderType.STOP_LOSS)
         new_stop = Order(
-            id=uuid4().hex,
+            id=next_id(),
             order_type=OrderType.STOP_LOSS,
             price=self.round_to_tick(be_price),
             volume=self.remaining_volume,
@@ -244,10 +255,11 @@ class Position:
             meta={"moved_to_break": True}
         )
         self.add_order(new_stop)
-        logger.info(f"Позиция {self.id[:6]}: стоп перенесен в точку безубыточности цена: {new_stop.price}, volume={new_stop.volume}")
+        log_event(logger, "stop_to_break_even", "Позиция %s: стоп перенесен в точку безубыточности цена: %s, volume=%s",
+                  self.id, new_stop.price, new_stop.volume)
         return new_stop
 
 
 
     def __repr__(self):
-        return f"<Position id={self.id[:6]} sym={self.symbol} dir={self.direction.value} status={self.status.value} opened={self.opened_volume} closed={self.closed_volume} avg_entry={self.avg_entry_price} pnl={self.realized_pnl}>"
+        return f"<Position id={self.id} sym={self.symbol} dir={self.direction.value} status={self.status.value} opened={self.opened_volume} closed={self.closed_volume} avg_entry={self.avg_entry_price} pnl={self.realized_pnl}>"
@@ -2,14 +2,14 @@ from uuid import uuid4
 from decimal import Decimal
 from typing import List, Optional, Dict
 from datetime import datetime
-from uuid import uuid4
 
 # Логирование
 # ====================================================
-from src.utils.logger import get_logger
+from src.utils.logger import get_logger, log_event
 logger = get_logger(__name__)
 
 from src.trading_engine.core.enums import Direction, OrderType, OrderStatus, SignalSource
+from src.trading_engine.core.ids import next_id
 from src.trading_engine.core.position import Position
 from src.trading_engine.orders.order_factory import Order
 
@@ -22,7 +22,7 @@ class PositionManager:
     Поддерживает множественные позиции на один и тот же символ (хеджирование).
     """
     def __init__(self):
-        self.positions: Dict[str, Position] = {}
+        self.positions: Dict[int, Position] = {}
         self.id = uuid4().hex
     # ------------------------
     # открытие 
@@ -38,13 +38,13 @@ class PositionManager:
         pos = Position(symbol=symbol, direction=direction, tick_size=tick_size, source=source)
         self.positions[pos.id] = pos
         self.positions[pos.id].bar_opened = open_bar
-        logger.debug(f"[{symbol}] 📚 Создана новая позиция  {direction.value} id: {pos.id} ")
+        logger.debug("[%s] 📚 Создана новая позиция  %s id: %s ", symbol, direction.value, pos.id)
         return pos
 
     # ------------------------
     # закрытие по ID
     # ------------------------
-    def cancel_active_orders(self, position_id: str, close_bar: Optional[datetime] = None):
+    def cancel_active_orders(self, position_id: int, close_bar: Optional[datetime] = None):
         pos = self.positions.get(position_id)
         if not pos:
             return
@@ -52,12 +52,12 @@ class PositionManager:
         for o in pos.get_active_orders():
             o.status = OrderStatus.CANCELLED
         
-        logger.debug(f"📚По позиции {position_id[:6]} Все активные ордера отменены на баре {pos.bar_closed}")
+        logger.debug("📚По позиции %s Все активные ордера отменены на баре %s", position_id, pos.bar_closed)
 
     # ------------------------
     # Закрытие позиции по текущей цене
     # ------------------------
-    def close_position_at_market(self, position_id: str, current_price: Decimal, close_bar: Optional[datetime] = None):
+    def close_position_at_market(self, position_id: int, current_price: Decimal, close_bar: Optional[datetime] = None):
         """
         Закрыть позицию полностью по текущей рыночной цене.
         Устанавливает статус CANCELLED для всех активных ордеров.
@@ -71,7 +71,7 @@ class PositionManager:
         if remaining_vol > 0:
             # Создаем закрывающий маркет ордер для закрытия всей позиции
             market_order = Order(
-                id=uuid4().hex,
+                id=next_id(),
                 order_type=OrderType.CLOSE,
                 price=current_price,
                 volume=remaining_vol,
@@ -79,7 +79,7 @@ class PositionManager:
                 status=OrderStatus.ACTIVE
             )
             pos.add_order(market_order)
-            logger.info(f"Создан ордер на закрытие по текущей рыночной цене: {current_price}")
+            log_event(logger, "close_at_market", "Создан ордер на закрытие по текущей рыночной цене: %s", current_price)
         
 
     # ------------------------
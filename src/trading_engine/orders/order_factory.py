@@ -1,9 +1,8 @@
 from decimal import Decimal
 from typing import Optional, Dict, Any
 from datetime import datetime
-from uuid import uuid4
-
 from src.trading_engine.core.enums import Direction, OrderType
+from src.trading_engine.core.ids import next_id
 from src.trading_engine.core.order import Order
 
 # -------------------------
@@ -22,7 +21,7 @@ def make_order(order_type: OrderType, price: Optional[Decimal], volume: Decimal,
     :return: созданный ордер
     """
     return Order(
-        id=uuid4().hex,
+        id=next_id(),
         order_type=order_type,
         price=price if price is not None else None,
         volume=volume,
@@ -1,6 +1,7 @@
 from datetime import datetime, UTC
 from typing import List, Optional, Dict, Any
 from decimal import Decimal
+from types import MappingProxyType
 from src.trading_engine.core.enums import SignalType, SignalSource, Direction
 
 
@@ -10,6 +11,10 @@ class Signal:
     Универсальный торговый сигнал.
     Используется стратегиями, ALS и другими модулями.
     """
+    __slots__ = (
+        "signal_type", "direction", "price", "volume", "take_profits", "stop_losses",
+        "bar_index", "source", "metadata", "timestamp",
+    )
 
     def __init__(
         self,
@@ -45,8 +50,11 @@ class Signal:
     @classmethod
     def no_signal(cls, bar_index=None):
         """
-        Пустой сигнал — стратегия ничего не делает
+        Пустой сигнал — стратегия ничего не делает.
+        Без bar_index возвращается общий неизменяемый NO_SIGNAL (вызывается на каждом баре).
         """
+        if bar_index is None:
+            return NO_SIGNAL
         return cls(
             signal_type=SignalType.NO_SIGNAL,
             bar_index=bar_index,
@@ -135,3 +143,28 @@ class Signal:
 
     def __repr__(self):
         return f"<Signal {self.signal_type.value} {self.direction} src={self.source.value}>"
+
+
+# -------------------------------------------------
+# Общий пустой сигнал
+# -------------------------------------------------
+class _NoSignal(Signal):
+    __slots__ = ()
+
+    def __init__(self):
+        for name, value in (
+            ("signal_type", SignalType.NO_SIGNAL), ("direction", None), ("price", None), ("volume", None),
+            ("take_profits", ()), ("stop_losses", ()), ("bar_index", None), ("source", SignalSource.STRATEGY),
+            ("metadata", MappingProxyType({})), ("timestamp", datetime.now(UTC)),
+        ):
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("NO_SIGNAL неизменяем")
+
+    def __reduce__(self):
+        # после pickle (чекпоинт, очередь задач) остается тем же объектом
+        return "NO_SIGNAL"
+
+
+NO_SIGNAL = _NoSignal()
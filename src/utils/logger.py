@@ -1,7 +1,11 @@
 # logger.py
+import atexit
 import logging
 import logging.handlers
 import os
+import queue
+import threading
+from collections import Counter
 
 
 from rich.logging import RichHandler
@@ -11,6 +15,10 @@ class LoggerManager:
     """
     Класс для настройки и получения централизованного Logger.
     Использует RotatingFileHandler для управления размером и количеством файлов.
+
+    При LOGGING_SETTINGS.QUEUE (по умолчанию включено) потоки только кладут запись в очередь
+    (QueueHandler), а файл и консоль пишет фоновый QueueListener — потоки бэктеста
+    не ждут друг друга на блокировке обработчиков.
     """
     
     def __init__(self):
@@ -22,6 +30,11 @@ class LoggerManager:
         self.log_file = os.path.join(self.log_dir, log_settings["FILENAME"])
         self.max_bytes = log_settings["MAX_BYTES"]
         self.backup_count = log_settings["BACKUP_COUNT"]
+        self.use_queue = log_settings.get("QUEUE", True)
+        self.backtest_quiet = log_settings.get("BACKTEST_QUIET", False)
+        self.handlers = []
+        self.queue_handler = None
+        self.listener = None
         
         # Убедимся, что директория для логов существует
         if not os.path.exists(self.log_dir):
@@ -45,6 +58,9 @@ class LoggerManager:
         
         # Настройка консольного обработчика
         self._setup_console_handler()
+
+        # Подключение обработчиков: через очередь или напрямую
+        self._attach_handlers()
         
         # Выводим информацию об успешной настройке
         self.get_logger(__name__).info("Система логирования инициализирована.")
@@ -60,11 +76,7 @@ class LoggerManager:
             encoding='utf-8'
         )
         file_handler.setFormatter(self.formatter_files)
-        logging.getLogger().addHandler(file_handler)
-        
-        self.get_logger(__name__).info(
-            f"Логирование в файл: {self.log_file} (Max size: {self.max_bytes / 1024**2:.2f} MB, Backups: {self.backup_count})"
-        )
+        self.handlers.append(file_handler)
 
     def _setup_console_handler(self):
         """Настраивает обработчик для вывода в консоль."""
@@ -78,7 +90,67 @@ class LoggerManager:
             enable_link_path = True
         )
         console_handler.setFormatter(self.formatter)
-        logging.getLogger().addHandler(console_handler)
+        self.handlers.append(console_handler)
+
+    def _attach_handlers(self):
+        """Подключает обработчики к корневому Logger: через QueueHandler / QueueListener или напрямую."""
+        root = logging.getLogger()
+        if not self.use_queue:
+            for handler in self.handlers:
+                root.addHandler(handler)
+        else:
+            log_queue = queue.SimpleQueue()
+            self.queue_handler = logging.handlers.QueueHandler(log_queue)
+            root.addHandler(self.queue_handler)
+            # respect_handler_level: уровень обработчиков проверяется в фоновом потоке
+            self.listener = logging.handlers.QueueListener(log_queue, *self.handlers, respect_handler_level=True)
+            self.listener.start()
+            # записи из очереди дописываются при выходе
+            atexit.register(self.stop)
+            # поток записи не наследуется дочерним процессом (fork) — там обработчики подключаются напрямую;
+            # на время fork блокировки обработчиков захвачены, чтобы поток записи не был посреди emit
+            # (иначе ребенок унаследует занятую блокировку консоли Rich и зависнет на первой записи)
+            if hasattr(os, "register_at_fork"):
+                os.register_at_fork(
+                    before=self._lock_handlers,
+                    after_in_parent=self._unlock_handlers,
+                    after_in_child=self._direct_in_child,
+                )
+
+        self.get_logger(__name__).info(
+            "Логирование в файл: %s (Max size: %.2f MB, Backups: %s, очередь: %s)",
+            self.log_file, self.max_bytes / 1024**2, self.backup_count, self.use_queue,
+        )
+
+    def _lock_handlers(self):
+        if self.listener is None:
+            return
+        for handler in self.handlers:
+            handler.acquire()
+
+    def _unlock_handlers(self):
+        if self.listener is None:
+            return
+        for handler in reversed(self.handlers):
+            handler.release()
+
+    def _direct_in_child(self):
+        if self.listener is None:
+            return
+        self.listener = None
+        # блокировки, захваченные перед fork, в ребенке создаются заново
+        for handler in self.handlers:
+            handler.createLock()
+        root = logging.getLogger()
+        root.removeHandler(self.queue_handler)
+        for handler in self.handlers:
+            root.addHandler(handler)
+
+    def stop(self):
+        """Останавливает фоновую запись, дописав накопленные записи."""
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
 
     @staticmethod
     def get_logger(name: str) -> logging.Logger:
@@ -88,6 +160,56 @@ class LoggerManager:
         """
         return logging.getLogger(name)
 
+# -------------------------------------------------
+# События горячих участков: строка лога или счетчик (тихий режим бэктеста)
+# -------------------------------------------------
+_quiet = threading.local()
+
+
+class QuietEvents:
+    """
+    Тихий режим бэктеста (LOGGING_SETTINGS.BACKTEST_QUIET) для текущего потока:
+    события log_event не пишутся построчно, а считаются — итог одной строкой в конце задачи.
+        with QuietEvents() as events:
+            ...
+        events.counters  # Counter({"order_filled": 120, ...})
+    enabled=False — контекст ничего не меняет (события пишутся как обычно).
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.counters = Counter()
+        self._previous = None
+
+    def __enter__(self):
+        if self.enabled:
+            self._previous = getattr(_quiet, "counters", None)
+            _quiet.counters = self.counters
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self.enabled:
+            _quiet.counters = self._previous
+        return False
+
+    def summary(self) -> str:
+        return ", ".join(f"{name}={count}" for name, count in sorted(self.counters.items()))
+
+
+def log_event(logger: logging.Logger, event: str, msg: str, *args, level: int = logging.INFO):
+    """
+    Событие горячего участка (исполнение ордера, закрытие позиции, ...).
+    Форматирование ленивое (%-аргументы) и только если уровень включен;
+    в тихом режиме вместо строки увеличивается счетчик event.
+    """
+    counters = getattr(_quiet, "counters", None)
+    if counters is not None:
+        counters[event] += 1
+        return
+    if logger.isEnabledFor(level):
+        logger.log(level, msg, *args, stacklevel=2)
+
+
 # Инициализируем систему логирования один раз при запуске приложения
 log_manager = LoggerManager()
 
@@ -1,5 +1,7 @@
+import json
 import time
 from datetime import datetime
+from pathlib import Path
 import math
 
 # Логирование
@@ -13,12 +15,16 @@ class LoggingTimer:
     Менеджер контекста для логирования времени выполнения задачи.
     Записывает время начала, конца и общее затраченное время.
     """
-    def __init__(self, task_name="Задача"):
+    def __init__(self, task_name="Задача", instrumentation=None, stage=None):
         self.task_name = task_name
+        # если передан instrumentation — время задачи добавляется к этапу stage
+        self.instrumentation = instrumentation
+        self.stage = stage or task_name
 
     def __enter__(self):
         # 1. Фиксация и запись времени НАЧАЛА
         self.start_time_raw = time.time()
+        self.start_cpu = time.thread_time()
         self.start_datetime = datetime.now()
 
         logger.info(f"[🟢🟢🟢] {self.task_name} / {self.start_datetime.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]}")
@@ -31,6 +37,8 @@ class LoggingTimer:
 
         # 3. Расчет и запись ЗАТРАЧЕННОГО ВРЕМЕНИ
         execution_time = self.end_time_raw - self.start_time_raw
+        if self.instrumentation is not None:
+            self.instrumentation.add(self.stage, execution_time, time.thread_time() - self.start_cpu)
 
         logger.info(f"[🔴🔴🔴] {self.task_name} / Затрачено времени: {format_time(execution_time)} / {self.end_datetime.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]}")
         
@@ -70,4 +78,132 @@ def format_time(seconds):
         f"{final_seconds:.4f} секунд"
     )
     
-    return formatted_time
\ No newline at end of file
+    return formatted_time
+
+# -------------------------------------------------
+# Инструментирование этапов бэктеста
+# -------------------------------------------------
+class _StageTimer:
+    # замер одного вызова этапа: стена (perf_counter) и CPU текущего потока
+    __slots__ = ("totals", "calls", "wall", "cpu")
+
+    def __init__(self, totals, calls):
+        self.totals = totals
+        self.calls = calls
+
+    def __enter__(self):
+        self.wall = time.perf_counter()
+        self.cpu = time.thread_time()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        totals = self.totals
+        totals[0] += self.calls
+        totals[1] += time.perf_counter() - self.wall
+        totals[2] += time.thread_time() - self.cpu
+        return False
+
+
+class Instrumentation:
+    """
+    Накопительные счетчики по этапам: число вызовов, время (стена и CPU потока)
+    и произвольные счетчики (бары HTF, минутные бары обработанные / пропущенные).
+    CPU считается через thread_time, потому что задачи бэктеста идут в потоках.
+
+        with instrumentation.stage("find_entry_point"):
+            ...
+        instrumentation.count("bars_htf")
+    """
+    enabled = True
+
+    def __init__(self, name: str = ""):
+        self.name = name
+        self.stages = {}    # этап -> [вызовы, стена, CPU]
+        self.counters = {}
+
+    def stage(self, name: str, calls: int = 1):
+        totals = self.stages.get(name)
+        if totals is None:
+            totals = self.stages[name] = [0, 0.0, 0.0]
+        return _StageTimer(totals, calls)
+
+    def count(self, name: str, value: int = 1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def add(self, name: str, wall: float, cpu: float = 0.0, calls: int = 1):
+        totals = self.stages.setdefault(name, [0, 0.0, 0.0])
+        totals[0] += calls
+        totals[1] += wall
+        totals[2] += cpu
+
+    # ------------------------
+    # Итог в виде словаря (для JSON и сводного отчета)
+    # ------------------------
+    def report(self) -> dict:
+        stages = {
+            name: {
+                "calls": calls,
+                "wall_seconds": round(wall, 6),
+                "cpu_seconds": round(cpu, 6),
+                "avg_us": round(wall / calls * 1e6, 2) if calls else 0.0,
+            }
+            for name, (calls, wall, cpu) in self.stages.items()
+        }
+        backtest = self.stages.get("backtest")
+        bars = self.counters.get("bars_htf", 0)
+        return {
+            "name": self.name,
+            "stages": stages,
+            "counters": dict(self.counters),
+            "bars_per_sec": round(bars / backtest[1], 2) if backtest and backtest[1] > 0 else None,
+        }
+
+    def save(self, path):
+        Path(path).write_text(json.dumps(self.report(), ensure_ascii=False, indent=2), encoding="utf-8")
+
+    # ------------------------
+    # Сумма отчетов нескольких задач (для сводного отчета)
+    # ------------------------
+    @staticmethod
+    def merge(reports: list) -> dict:
+        total = Instrumentation("total")
+        for report in reports:
+            for name, stage in report["stages"].items():
+                total.add(name, stage["wall_seconds"], stage["cpu_seconds"], stage["calls"])
+            for name, value in report["counters"].items():
+                total.count(name, value)
+        return total.report()
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class NullInstrumentation:
+    """Выключенное инструментирование: те же методы без замеров и аллокаций."""
+    enabled = False
+    name = ""
+
+    def stage(self, name: str, calls: int = 1):
+        return _NULL_STAGE
+
+    def count(self, name: str, value: int = 1):
+        pass
+
+    def add(self, name: str, wall: float, cpu: float = 0.0, calls: int = 1):
+        pass
+
+    def report(self):
+        return None
+
+
+NULL_INSTRUMENTATION = NullInstrumentation()
@@ -0,0 +1,248 @@
+# учет памяти задач бэктеста
+
+# src/utils/memory.py
+import os
+import sys
+import threading
+import tracemalloc
+from pathlib import Path
+from typing import Optional
+
+# Логирование
+# ====================================================
+from src.utils.logger import get_logger
+logger = get_logger(__name__)
+
+MB = 1024 * 1024
+
+
+# ------------------------
+# RSS процесса (Linux: /proc/self/statm)
+# ------------------------
+def current_rss() -> Optional[int]:
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+# ------------------------
+# Доступная память: лимит cgroup контейнера или MemAvailable системы
+# ------------------------
+def available_memory() -> Optional[int]:
+    cgroup_v2 = Path("/sys/fs/cgroup/memory.max")
+    cgroup_v1 = Path("/sys/fs/cgroup/memory/memory.limit_in_bytes")
+    try:
+        if cgroup_v2.exists():
+            limit = cgroup_v2.read_text().strip()
+            if limit != "max":
+                used = int(Path("/sys/fs/cgroup/memory.current").read_text())
+                return int(limit) - used
+        elif cgroup_v1.exists():
+            limit = int(cgroup_v1.read_text())
+            if limit < 1 << 60:  # "без лимита" в v1 — огромное число
+                used = int(Path("/sys/fs/cgroup/memory/memory.usage_in_bytes").read_text())
+                return limit - used
+    except (OSError, ValueError):
+        pass
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+# ------------------------
+# Размер доменных объектов (позиции, ордера, исполнения)
+# ------------------------
+def _attrs(obj) -> dict:
+    if hasattr(obj, "__dict__"):
+        return vars(obj)
+    # объекты со __slots__
+    return {
+        name: getattr(obj, name, None)
+        for cls in type(obj).__mro__
+        for name in getattr(cls, "__slots__", ())
+    }
+
+
+def _shallow_size(obj) -> int:
+    # объект + его атрибуты (без вложенных доменных объектов — они считаются отдельно)
+    size = sys.getsizeof(obj)
+    if hasattr(obj, "__dict__"):
+        size += sys.getsizeof(obj.__dict__)
+    for value in _attrs(obj).values():
+        size += sys.getsizeof(value)
+        if isinstance(value, dict):
+            size += sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in value.items())
+    return size
+
+
+def positions_memory(positions: dict) -> dict:
+    orders = executions = 0
+    size_positions = size_orders = size_executions = 0
+    for pos in positions.values():
+        size_positions += _shallow_size(pos)
+        for order in pos.orders:
+            orders += 1
+            size_orders += _shallow_size(order)
+        for execution in pos.executions:
+            executions += 1
+            size_executions += _shallow_size(execution)
+    return {
+        "positions": len(positions),
+        "orders": orders,
+        "executions": executions,
+        "positions_mb": round(size_positions / MB, 3),
+        "orders_mb": round(size_orders / MB, 3),
+        "executions_mb": round(size_executions / MB, 3),
+    }
+
+
+def dataframes_memory(*frames) -> float:
+    return round(sum(int(df.memory_usage(deep=True).sum()) for df in frames if df is not None) / MB, 3)
+
+
+# -------------------------------------------------
+# Класс MemoryTracker - память одной задачи
+# -------------------------------------------------
+class MemoryTracker:
+    """
+    Замер памяти задачи бэктеста:
+        - RSS процесса в начале / конце и пик (фоновая выборка каждые sample_seconds)
+        - пик tracemalloc и топ мест аллокаций (если trace=True)
+        - объем DataFrame'ов и доменных объектов (Position / Order / Execution)
+
+    tracemalloc общий для процесса, поэтому трассирует только один трекер:
+    пока он открыт, остальные (задачи в соседних потоках) пишут только RSS.
+    Бэктест с MEMORY_TRACEMALLOC выполняет задачи последовательно.
+    RSS тоже общий: при задачах в потоках его пик включает соседние задачи.
+    """
+    _lock = threading.Lock()
+    _tracing = False
+
+    def __init__(self, name: str = "", trace: bool = True, top: int = 10, sample_seconds: float = 0.2):
+        self.name = name
+        self.trace = trace
+        self.top = top
+        self.sample_seconds = sample_seconds
+        self.data = {"name": name}
+        self._stop = threading.Event()
+        self._sampler = None
+        self._rss_peak = 0
+
+    def __enter__(self):
+        if self.trace:
+            with MemoryTracker._lock:
+                if MemoryTracker._tracing or tracemalloc.is_tracing():
+                    # пик и аллокации смешались бы с чужой задачей
+                    logger.debug(f"[{self.name}] tracemalloc занят другой задачей, только RSS")
+                    self.trace = False
+                else:
+                    tracemalloc.start()
+                    MemoryTracker._tracing = True
+        rss = current_rss()
+        self.data["rss_start_mb"] = round(rss / MB, 1) if rss else None
+        self._rss_peak = rss or 0
+        self._sampler = threading.Thread(target=self._sample, daemon=True)
+        self._sampler.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._stop.set()
+        self._sampler.join()
+        rss = current_rss()
+        self._rss_peak = max(self._rss_peak, rss or 0)
+        self.data["rss_end_mb"] = round(rss / MB, 1) if rss else None
+        self.data["rss_peak_mb"] = round(self._rss_peak / MB, 1) if self._rss_peak else None
+
+        if self.trace:
+            _, peak = tracemalloc.get_traced_memory()
+            self.data["traced_peak_mb"] = round(peak / MB, 1)
+            self.data["top_allocations"] = self._top_allocations()
+            with MemoryTracker._lock:
+                tracemalloc.stop()
+                MemoryTracker._tracing = False
+        return False
+
+    def _sample(self):
+        while not self._stop.wait(self.sample_seconds):
+            rss = current_rss()
+            if rss and rss > self._rss_peak:
+                self._rss_peak = rss
+
+    def _top_allocations(self) -> list:
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+        return [
+            {
+                "site": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                "size_mb": round(stat.size / MB, 3),
+                "count": stat.count,
+            }
+            for stat in snapshot.statistics("lineno")[:self.top]
+        ]
+
+    # ------------------------
+    # Объем данных и объектов задачи
+    # ------------------------
+    def measure_frames(self, *frames):
+        self.data["dataframes_mb"] = dataframes_memory(*frames)
+
+    def measure_positions(self, positions: dict):
+        self.data["objects"] = positions_memory(positions)
+
+    def report(self) -> dict:
+        return dict(self.data)
+
+
+# -------------------------------------------------
+# Класс MemoryBudget - допуск задач по памяти
+# -------------------------------------------------
+class MemoryBudget:
+    """
+    Планировщик откладывает запуск задачи, пока свободной памяти меньше бюджета задачи.
+    Память уже запущенных задач, которую они еще не успели занять,
+    считается зарезервированной: budget * running - (рост RSS с начала пула).
+    Если измеренный пик задачи больше бюджета, бюджет поднимается до него —
+    следующие задачи допускаются по фактическому расходу.
+    """
+
+    def __init__(self, task_bytes: int):
+        self.task_bytes = task_bytes
+        self.rss_base = current_rss() or 0
+        self.deferred_tasks = set()  # задачи, запуск которых откладывался
+        self.overruns = 0  # задач с пиком больше бюджета
+        self._lock = threading.Lock()
+
+    @property
+    def deferred(self) -> int:
+        return len(self.deferred_tasks)
+
+    def can_start(self, running: int, task=None) -> bool:
+        available = available_memory()
+        if available is None:
+            return True
+        growth = max(0, (current_rss() or 0) - self.rss_base)
+        reserved = max(0, self.task_bytes * running - growth)
+        if available - reserved >= self.task_bytes:
+            return True
+        # планировщик опрашивает бюджет, пока задача ждет: считается задача, а не опрос
+        self.deferred_tasks.add(task)
+        return False
+
+    def observe(self, peak_bytes: int) -> bool:
+        """Пик памяти завершенной задачи; True — пик больше бюджета, бюджет поднят."""
+        with self._lock:
+            if peak_bytes <= self.task_bytes:
+                return False
+            self.task_bytes = peak_bytes
+            self.overruns += 1
+            return True